@@ -0,0 +1,115 @@
+"""
+Arranque del dashboard: qué se importa y cuánto tarda la primera página.
+
+Cada medición corre en un proceso nuevo con `python -X importtime` y ejecuta
+dashboard.py con el AppTest de Streamlit sobre documentos sintéticos en
+memoria (ver `reruns.py`). Se reporta:
+
+- primera página (sección 1) en ms y tiempo de importación acumulado de los
+  paquetes pesados (tensorflow, sklearn, plotly, requests) que cargó;
+- primera visita a la sección 3, donde ahora se importa TensorFlow y se carga
+  el modelo.
+
+El precalentamiento en segundo plano se desactiva (DASHBOARD_PRECALENTAR=0)
+para medir solo lo que bloquea cada página. `--script` permite medir otra
+versión del dashboard, p. ej. la del commit anterior:
+
+    git show HEAD~1:dashboard.py > /tmp/dashboard_antes.py
+    python benchmarks/arranque.py --script /tmp/dashboard_antes.py
+
+Uso:
+    python benchmarks/arranque.py --n 5000
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+PAQUETES = ['tensorflow', 'keras', 'sklearn', 'plotly', 'requests', 'streamlit', 'pandas']
+SECCION_MODELO = "3. Modelo Predictivo"
+
+
+def _hijo(args):
+    """Proceso medido: primera página y, opcionalmente, primera visita a la sección 3"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from reruns import preparar_app
+
+    at = preparar_app(args.n, args.semilla, args.script)
+    inicio = time.perf_counter()
+    at.run()
+    resultado = {
+        'primera_pagina_ms': round((time.perf_counter() - inicio) * 1000, 1),
+        'cargados_primera_pagina': [p for p in PAQUETES if p in sys.modules],
+    }
+    if args.seccion_modelo:
+        at.sidebar.radio[0].set_value(SECCION_MODELO)
+        inicio = time.perf_counter()
+        at.run()
+        resultado['seccion_modelo_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    print("RESULTADO " + json.dumps(resultado))
+
+
+def _importtime(stderr):
+    """Microsegundos acumulados por paquete de primer nivel según -X importtime"""
+    acumulado = {}
+    for linea in stderr.splitlines():
+        coincidencia = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)", linea)
+        if coincidencia and coincidencia.group(3) in PAQUETES:
+            paquete = coincidencia.group(3)
+            acumulado[paquete] = max(acumulado.get(paquete, 0), int(coincidencia.group(1)))
+    return acumulado
+
+
+def medir(args, seccion_modelo):
+    comando = [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--hijo",
+               "--n", str(args.n), "--semilla", str(args.semilla), "--script", args.script]
+    if seccion_modelo:
+        comando.append("--seccion-modelo")
+    entorno = {**os.environ, 'DASHBOARD_PRECALENTAR': "0", 'TF_CPP_MIN_LOG_LEVEL': "2"}
+    proceso = subprocess.run(comando, capture_output=True, text=True, cwd=RAIZ, env=entorno)
+    lineas = [l for l in proceso.stdout.splitlines() if l.startswith("RESULTADO ")]
+    if not lineas:
+        raise RuntimeError(proceso.stderr[-2000:])
+    resultado = json.loads(lineas[-1][len("RESULTADO "):])
+    resultado['importtime_ms'] = {p: round(us / 1000, 1) for p, us in _importtime(proceso.stderr).items()}
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importaciones y tiempo de la primera página del dashboard")
+    parser.add_argument('--n', type=int, default=5_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--script', default=os.path.join(RAIZ, "dashboard.py"))
+    parser.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--seccion-modelo', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        _hijo(args)
+        return
+
+    inicio = medir(args, seccion_modelo=False)
+    con_modelo = medir(args, seccion_modelo=True)
+    resultado = {
+        'script': args.script,
+        'n': args.n,
+        'primera_pagina_ms': inicio['primera_pagina_ms'],
+        'cargados_primera_pagina': inicio['cargados_primera_pagina'],
+        'importtime_primera_pagina_ms': inicio['importtime_ms'],
+        'seccion_modelo_ms': con_modelo['seccion_modelo_ms'],
+        'importtime_con_seccion_modelo_ms': con_modelo['importtime_ms'],
+    }
+    print(json.dumps(resultado, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "arranque.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark de la lectura de los Excel fuente (ingesta_excel.py).
+
+Escribe libros sintéticos con las columnas que usa DB MONGO.ipynb
+(ESTUDIANTES: una fila por estudiante; MATERIAS: una fila por materia
+cursada) y mide:
+- openpyxl: pd.read_excel de cada libro, uno tras otro, como el notebook;
+- frio: `leer_excels` con la caché vacía (conversión en paralelo a Parquet);
+- caliente: `leer_excels` otra vez, desde la caché.
+
+Sale con código 1 si la lectura en caliente no devuelve los mismos
+DataFrames que la conversión; también reporta si coinciden con openpyxl
+(calamine puede leer algunos tipos distinto).
+
+Uso:
+    python benchmarks/carga_excel.py --estudiantes 10226 --materias 300000
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingesta_excel import leer_excels, motor_excel  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+
+def libros_sinteticos(n_estudiantes, n_materias, semilla=42):
+    """(df_estudiantes, df_materias) con las columnas de ESTUDIANTES.xlsx y MATERIAS.xlsx"""
+    rng = np.random.default_rng(semilla)
+    ids = rng.choice(np.arange(300_000, 500_000), n_estudiantes, replace=False)
+    icfes = {col: np.where(rng.random(n_estudiantes) < 0.2, np.nan, rng.integers(30, 100, n_estudiantes))
+             for col in ['ICFES MT', 'ICFES LC', 'ICFES SC', 'ICFES CN', 'ICFES ING']}
+    df_estudiantes = pd.DataFrame({
+        'ID': ids,
+        'PERIODO': 202510,
+        'EDAD': rng.integers(16, 35, n_estudiantes),
+        'SEXO': rng.choice(['F', 'M'], n_estudiantes),
+        'SEMESTRE': rng.integers(1, 11, n_estudiantes).astype(float),
+        'TIPO_ESTUDIANTE': 'Estudiante regular',
+        'TIPO_ADMISION': rng.choice(['Ordinaria Pregrado', 'Transferencia Externa'], n_estudiantes, p=[0.9, 0.1]),
+        'PROGRAMA': rng.choice(['Derecho', 'Medicina', 'Psicología', 'Ingeniería Industrial', 'Economía'], n_estudiantes),
+        'PROGRAMA2': np.where(rng.random(n_estudiantes) < 0.05, 'Economía', None),
+        'ESTRATO': rng.integers(1, 7, n_estudiantes),
+        'CIUDAD': rng.choice(['BARRANQUILLA', 'SOLEDAD', 'CARTAGENA', 'SANTA MARTA'], n_estudiantes),
+        'DEPARTAMENTO': rng.choice(['ATLANTICO', 'BOLIVAR', 'MAGDALENA'], n_estudiantes),
+        'COLEGIO': rng.choice(['OFICIAL', 'PRIVADO'], n_estudiantes),
+        'ICFES': sum(icfes.values()),
+        **icfes,
+        'DISCAPACIDAD': '00- Ninguno',
+        'GRADUADO': (rng.random(n_estudiantes) < 0.1).astype(int),
+        'DESERTOR': (rng.random(n_estudiantes) < 0.08).astype(int),
+        'BECADO': rng.choice(['No becado', 'Institucional', 'oficial'], n_estudiantes),
+    })
+
+    cursos = [(f"MAT{i:04d}", f"MATERIA {i}", f"CATEGORIA {i % 28}") for i in range(800)]
+    eleccion = rng.integers(0, len(cursos), n_materias)
+    df_materias = pd.DataFrame({
+        'ID': rng.choice(ids, n_materias),
+        'PERIODO': rng.choice([202210, 202230, 202310, 202330, 202410, 202430, 202510], n_materias),
+        'CODIGO MAERIA': [cursos[i][0] for i in eleccion],
+        'MATERIA': [cursos[i][1] for i in eleccion],
+        'CATEGORIA MATERIA': [cursos[i][2] for i in eleccion],
+        'NOTA': rng.uniform(0, 5, n_materias).round(1),
+        'Retirada': rng.choice(['NO', 'SI'], n_materias, p=[0.95, 0.05]),
+    })
+    return df_estudiantes, df_materias
+
+
+def iguales(a, b):
+    try:
+        pd.testing.assert_frame_equal(a, b)
+        return True
+    except AssertionError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lectura de los Excel fuente")
+    parser.add_argument('--estudiantes', type=int, default=10_226)
+    parser.add_argument('--materias', type=int, default=300_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    temporal = tempfile.mkdtemp(prefix="carga_excel_")
+    try:
+        rutas = [os.path.join(temporal, "ESTUDIANTES.xlsx"), os.path.join(temporal, "MATERIAS.xlsx")]
+        for ruta, df in zip(rutas, libros_sinteticos(args.estudiantes, args.materias)):
+            df.to_excel(ruta, index=False)
+        cache = os.path.join(temporal, "cache")
+
+        inicio = time.perf_counter()
+        originales = [pd.read_excel(ruta) for ruta in rutas]
+        segundos_openpyxl = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        frios = leer_excels(rutas, directorio=cache, workers=args.workers)
+        segundos_frio = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        calientes = leer_excels(rutas, directorio=cache, workers=args.workers)
+        segundos_caliente = time.perf_counter() - inicio
+
+        coinciden = all(iguales(f, c) for f, c in zip(frios, calientes))
+        resultado = {
+            'estudiantes': args.estudiantes,
+            'materias': args.materias,
+            'motor': motor_excel() or 'openpyxl',
+            'cpus': os.cpu_count(),
+            'openpyxl_segundos': round(segundos_openpyxl, 3),
+            'frio_segundos': round(segundos_frio, 3),
+            'caliente_segundos': round(segundos_caliente, 3),
+            'aceleracion_caliente': round(segundos_openpyxl / segundos_caliente, 1),
+            'cache_igual_a_conversion': coinciden,
+            'igual_a_openpyxl': all(iguales(o, c) for o, c in zip(originales, calientes)),
+        }
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+    print(json.dumps(resultado, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "carga_excel.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+    if not coinciden:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
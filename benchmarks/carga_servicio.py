@@ -0,0 +1,144 @@
+"""
+Prueba de carga local del servicio de predicción.
+
+Lanza N clientes concurrentes contra /predecir, cada uno con su propia
+conexión persistente, y reporta throughput y latencias p50/p99 para cada
+nivel de concurrencia.
+
+Uso:
+    # contra un servicio ya levantado
+    python benchmarks/carga_servicio.py --url http://127.0.0.1:8502
+    # levantando el servicio en este proceso con el registro local
+    python benchmarks/carga_servicio.py --iniciar --espera-ms 5 --concurrencia 1 4 16 64
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+
+def estudiante_aleatorio(rng):
+    """Estudiante con los mismos rangos que el formulario del dashboard"""
+    return {
+        'edad': rng.randint(16, 35), 'genero': rng.choice(["Masculino", "Femenino"]),
+        'estrato': rng.randint(1, 6), 'discapacidad': rng.choice(["No", "Sí"]),
+        'programa': "INGENIERIA DE SISTEMAS", 'semestre': rng.randint(1, 10),
+        'promedio': round(rng.uniform(2.0, 5.0), 2), 'materias_cursadas': rng.randint(5, 60),
+        'materias_perdidas': rng.randint(0, 10), 'materias_repetidas': rng.randint(0, 5),
+        'icfes_mat': rng.randint(20, 100), 'icfes_lec': rng.randint(20, 100), 'icfes_soc': rng.randint(20, 100),
+        'icfes_cie': rng.randint(20, 100), 'icfes_ing': rng.randint(20, 100),
+        'becado': rng.choice(["No becado", "Institucional", "oficial"]),
+        'tipo_colegio': rng.choice(["OFICIAL", "PRIVADO"]), 'es_barranquilla': rng.choice(["Sí", "No"])
+    }
+
+
+def _cliente(host, puerto, solicitudes, por_solicitud, semilla, latencias, errores):
+    rng = random.Random(semilla)
+    conexion = http.client.HTTPConnection(host, puerto, timeout=60)
+    for _ in range(solicitudes):
+        if por_solicitud == 1:
+            cuerpo = estudiante_aleatorio(rng)
+        else:
+            cuerpo = {'estudiantes': [estudiante_aleatorio(rng) for _ in range(por_solicitud)]}
+        datos = json.dumps(cuerpo).encode('utf-8')
+        inicio = time.perf_counter()
+        try:
+            conexion.request("POST", "/predecir", body=datos, headers={'Content-Type': "application/json"})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(respuesta.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errores.append(str(e))
+            conexion.close()
+            conexion = http.client.HTTPConnection(host, puerto, timeout=60)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    conexion.close()
+
+
+def medir(host, puerto, concurrencia, solicitudes, por_solicitud=1):
+    """Corre un nivel de concurrencia y devuelve sus métricas"""
+    latencias, errores = [], []
+    hilos = [threading.Thread(target=_cliente,
+                              args=(host, puerto, solicitudes, por_solicitud, i, latencias, errores))
+             for i in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+
+    latencias_ms = np.array(latencias) * 1000
+    return {
+        'concurrencia': concurrencia,
+        'solicitudes': len(latencias),
+        'errores': len(errores),
+        'segundos': round(segundos, 3),
+        'solicitudes_por_segundo': round(len(latencias) / segundos, 1),
+        'estudiantes_por_segundo': round(len(latencias) * por_solicitud / segundos, 1),
+        'p50_ms': round(float(np.percentile(latencias_ms, 50)), 2) if len(latencias_ms) else None,
+        'p99_ms': round(float(np.percentile(latencias_ms, 99)), 2) if len(latencias_ms) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de predicción")
+    parser.add_argument('--url', default="http://127.0.0.1:8502")
+    parser.add_argument('--iniciar', action='store_true', help="Levanta el servicio en este proceso")
+    parser.add_argument('--espera-ms', type=float, default=5)
+    parser.add_argument('--max-lote', type=int, default=256)
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--solicitudes', type=int, default=200, help="Solicitudes por cliente")
+    parser.add_argument('--por-solicitud', type=int, default=1, help="Estudiantes por solicitud")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    host, puerto = url.hostname, url.port or 80
+    servidor = None
+    if args.iniciar:
+        from servicio_prediccion import crear_servidor
+
+        servidor = crear_servidor(host, puerto, args.espera_ms, args.max_lote)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    # Calentamiento: la primera llamada a predict compila el grafo
+    medir(host, puerto, 1, 5, args.por_solicitud)
+
+    resultados = []
+    print(f"{'clientes':>8} {'sol/s':>9} {'est/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    for concurrencia in args.concurrencia:
+        fila = medir(host, puerto, concurrencia, args.solicitudes, args.por_solicitud)
+        resultados.append(fila)
+        print(f"{fila['concurrencia']:>8} {fila['solicitudes_por_segundo']:>9} {fila['estudiantes_por_segundo']:>9} "
+              f"{fila['p50_ms']:>8} {fila['p99_ms']:>8} {fila['errores']:>8}")
+
+    if servidor is not None:
+        agrupador = servidor.agrupador
+        print(f"Lotes: {agrupador.lotes}, filas promedio por lote: {agrupador.filas / max(agrupador.lotes, 1):.1f}")
+        servidor.shutdown()
+        servidor.server_close()
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    ruta = os.path.join(DIRECTORIO_RESULTADOS, "carga_servicio.json")
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'espera_ms': args.espera_ms, 'max_lote': args.max_lote,
+                   'por_solicitud': args.por_solicitud, 'resultados': resultados}, f, indent=4)
+    print(f"Resultados guardados en {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de la codificación de las pérdidas por departamento.
+
+Compara, para --n registros del modelo (por defecto 1M, armados repitiendo
+--n-base documentos sintéticos):
+- denso: lo que hacía `Preprocesador.transformar` antes, expandir
+  perdidas_por_depto con json_normalize y codificar toda la matriz en float64;
+- disperso: `transformar` actual, con las pérdidas como bloque CSR que solo se
+  vuelve denso lote a lote.
+
+Mide el tiempo (mejor de --repeticiones) y el pico de memoria asignada
+(tracemalloc, en una pasada aparte), reporta el tamaño del bloque de pérdidas
+en cada forma y sale con código 1 si las dos matrices no son idénticas.
+
+Uso:
+    python benchmarks/codificacion_perdidas.py --n 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generador_documentos import generar_documentos  # noqa: E402
+from preprocesamiento import (Preprocesador, expandir_perdidas, primeros_registros, registro_modelo,  # noqa: E402
+                              tabla_registros)
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+
+def transformar_denso(preprocesador, df_registros):
+    """La codificación anterior: pérdidas expandidas en columnas y matriz float64 completa"""
+    df = expandir_perdidas(df_registros)
+    matriz = (preprocesador._codificar(df) - preprocesador.media) / preprocesador.escala
+    return np.nan_to_num(matriz, nan=0.0).astype(np.float32)
+
+
+def medir(funcion, repeticiones):
+    """(mejor tiempo en s, pico de memoria en MB, resultado)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        del resultado
+    tracemalloc.start()
+    resultado = funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(tiempos), pico / 2**20, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la codificación de pérdidas por departamento")
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--n-base', type=int, default=100_000, help="Documentos sintéticos distintos")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    base = [registro_modelo(doc) for doc in generar_documentos(min(args.n_base, args.n), args.semilla)]
+    preprocesador = Preprocesador.ajustar(primeros_registros(tabla_registros(base), 5000))
+    df_registros = pd.DataFrame([base[i % len(base)] for i in range(args.n)])
+    del base
+
+    segundos_denso, pico_denso, X_denso = medir(lambda: transformar_denso(preprocesador, df_registros), args.repeticiones)
+    segundos_disperso, pico_disperso, X_disperso = medir(lambda: preprocesador.transformar(df_registros),
+                                                          args.repeticiones)
+    identicas = bool(np.array_equal(X_denso, X_disperso))
+    del X_denso, X_disperso
+
+    perdidas = preprocesador.codificar_perdidas(df_registros)
+    bytes_csr = perdidas.data.nbytes + perdidas.indices.nbytes + perdidas.indptr.nbytes
+    resultado = {
+        'n': args.n,
+        'columnas': len(preprocesador.columnas),
+        'columnas_perdidas': int(perdidas.shape[1]),
+        'densidad_perdidas': round(perdidas.nnz / max(1, perdidas.shape[0] * perdidas.shape[1]), 4),
+        'bloque_perdidas_mb': {'denso_float64': round(perdidas.shape[0] * perdidas.shape[1] * 8 / 2**20, 1),
+                               'csr': round(bytes_csr / 2**20, 1)},
+        'denso': {'segundos': round(segundos_denso, 3), 'pico_mb': round(pico_denso, 1)},
+        'disperso': {'segundos': round(segundos_disperso, 3), 'pico_mb': round(pico_disperso, 1)},
+        'matriz_salida_mb': round(args.n * len(preprocesador.columnas) * 4 / 2**20, 1),
+        'identicas': identicas,
+    }
+    print(json.dumps(resultado, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "codificacion_perdidas.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+    if not identicas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de escalado de la puntuación por lotes (puntuacion_lotes.py).
+
+Codifica una población sintética con el preprocesador legacy (ajustado con
+los primeros 5000 registros, como el dashboard), la repite hasta --n filas
+(por defecto 1M) y mide:
+- en_proceso: `predecir` del modelo en el proceso actual, como
+  riesgo.puntuar_poblacion;
+- pool con 1, 2, 4 y 8 workers de un hilo cada uno, con los workers ya
+  calentados (modelo cargado), así que el tiempo es solo el de puntuar.
+
+Reporta filas/s, aceleración y eficiencia respecto a 1 worker, y verifica que
+los puntajes del pool sean los mismos que en proceso (sale con código 1 si
+no). Con menos CPUs que workers la aceleración se satura en el número de
+CPUs: se guarda `cpus` junto a los resultados.
+
+Uso:
+    python benchmarks/escalado_puntuacion.py --n 1000000 --modelo keras:mejor_modelo_desercion.keras
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generador_documentos import generar_documentos  # noqa: E402
+from preprocesamiento import Preprocesador, primeros_registros, registro_modelo, tabla_registros  # noqa: E402
+from puntuacion_lotes import PuntuadorLotes, _especificacion, cargar_modelo, predecir  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+TOLERANCIA = 1e-5
+
+
+def matriz_poblacion(n, n_base, semilla):
+    """Matriz codificada de n filas: n_base documentos sintéticos repetidos"""
+    registros = tabla_registros([registro_modelo(doc) for doc in generar_documentos(n_base, semilla)])
+    preprocesador = Preprocesador.ajustar(primeros_registros(registros, 5000))
+    X = preprocesador.transformar(registros)
+    return np.ascontiguousarray(np.resize(X, (n, X.shape[1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalado de la puntuación por lotes")
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--n-base', type=int, default=100_000, help="Documentos sintéticos distintos")
+    parser.add_argument('--modelo', default="keras:mejor_modelo_desercion.keras")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--tamano-tramo', type=int, default=50_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    especificacion = _especificacion(args.modelo)
+    X = matriz_poblacion(args.n, min(args.n_base, args.n), args.semilla)
+
+    modelo = cargar_modelo(especificacion)
+    inicio = time.perf_counter()
+    referencia = predecir(modelo, X)
+    segundos_en_proceso = time.perf_counter() - inicio
+    del modelo
+
+    pools = []
+    coinciden = True
+    for n_workers in args.workers:
+        with PuntuadorLotes(especificacion, n_workers, hilos_por_worker=1) as puntuador:
+            puntuador.calentar()
+            inicio = time.perf_counter()
+            puntajes = puntuador.puntuar(X, args.tamano_tramo)
+            segundos = time.perf_counter() - inicio
+        diferencia = float(np.abs(puntajes - referencia).max())
+        coinciden &= diferencia <= TOLERANCIA
+        pools.append({'workers': n_workers, 'segundos': round(segundos, 3),
+                      'filas_por_segundo': round(args.n / segundos), 'diferencia_max': diferencia})
+
+    base = pools[0]['segundos'] * pools[0]['workers']
+    for fila in pools:
+        fila['aceleracion'] = round(base / fila['segundos'], 2)
+        fila['eficiencia'] = round(fila['aceleracion'] / fila['workers'], 2)
+
+    resultado = {
+        'n': args.n,
+        'columnas': X.shape[1],
+        'modelo': args.modelo,
+        'cpus': os.cpu_count(),
+        'tamano_tramo': args.tamano_tramo,
+        'en_proceso': {'segundos': round(segundos_en_proceso, 3),
+                       'filas_por_segundo': round(args.n / segundos_en_proceso)},
+        'pool': pools,
+        'coinciden': bool(coinciden),
+    }
+    print(json.dumps(resultado, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "escalado_puntuacion.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+    if not coinciden:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Filtros globales de las secciones 1 y 2: índice de mapas de bits vs máscara `isin`.
+
+Replica una base de documentos sintéticos hasta n estudiantes (por defecto
+1M), construye `indice_filtros.IndiceFiltros` y resuelve combinaciones
+aleatorias de filtros (semilla fija) de dos formas:
+
+- indice: AND/OR de mapas de bits y posiciones de fila;
+- mascara: `isin` por columna combinado con `&` y `np.flatnonzero`.
+
+Se reporta p50/p95 en ms de cada una y del cambio de filtro completo
+(índice + `df.iloc` de las filas seleccionadas, lo que hace el dashboard;
+la copia de filas cuesta lo mismo con cualquiera de las dos formas). Falla
+(código de salida 1) si el p95 del índice supera el presupuesto o si alguna
+combinación no coincide con la máscara.
+
+Uso:
+    python benchmarks/filtros_globales.py --n 1000000 --presupuesto-ms 50
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generador_documentos import generar_documentos  # noqa: E402
+from indice_filtros import DIMENSIONES, IndiceFiltros  # noqa: E402
+from tabla_estudiantes import construir_df  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+PRESUPUESTO_MS = 50
+
+
+def combinacion_aleatoria(indice, rng):
+    """Entre 1 y 4 columnas, cada una con 1 a 3 valores"""
+    columnas = rng.choice(DIMENSIONES, size=rng.integers(1, 5), replace=False)
+    filtros = {}
+    for columna in columnas:
+        opciones = indice.opciones(columna)
+        elegidos = rng.choice(len(opciones), size=min(len(opciones), rng.integers(1, 4)), replace=False)
+        filtros[str(columna)] = [opciones[i] for i in elegidos]
+    return filtros
+
+
+def por_mascara(df, filtros):
+    mascara = np.ones(len(df), dtype=bool)
+    for columna, valores in filtros.items():
+        mascara &= df[columna].isin(valores).to_numpy()
+    return np.flatnonzero(mascara)
+
+
+def percentiles(tiempos):
+    return {'p50_ms': round(float(np.percentile(tiempos, 50)), 2),
+            'p95_ms': round(float(np.percentile(tiempos, 95)), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtros globales: mapas de bits vs máscara isin")
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--base', type=int, default=100_000, help="Documentos sintéticos distintos que se replican")
+    parser.add_argument('--combinaciones', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS)
+    args = parser.parse_args()
+
+    df_base = construir_df(generar_documentos(min(args.base, args.n), args.semilla))
+    df = pd.concat([df_base] * math.ceil(args.n / len(df_base)), ignore_index=True)
+    del df_base
+
+    inicio = time.perf_counter()
+    indice = IndiceFiltros(df)
+    construccion_ms = (time.perf_counter() - inicio) * 1000
+    print(f"n={len(df):,}: índice construido en {construccion_ms:.0f} ms, "
+          f"{indice.memoria_bytes() / 1e6:.1f} MB en mapas de bits")
+
+    rng = np.random.default_rng(args.semilla)
+    tiempos = {'indice': [], 'mascara': [], 'cambio': []}
+    diferentes = 0
+    filas_seleccionadas = []
+    for _ in range(args.combinaciones):
+        filtros = combinacion_aleatoria(indice, rng)
+
+        inicio = time.perf_counter()
+        filas = indice.filtrar(filtros)
+        tiempos['indice'].append((time.perf_counter() - inicio) * 1000)
+        df_filtrado = df if filas is None else df.iloc[filas]
+        tiempos['cambio'].append((time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        filas_mascara = por_mascara(df, filtros)
+        tiempos['mascara'].append((time.perf_counter() - inicio) * 1000)
+
+        if filas is None:
+            filas = np.arange(len(df))
+        diferentes += not np.array_equal(filas, filas_mascara)
+        filas_seleccionadas.append(len(df_filtrado))
+
+    resultado = {
+        'n': len(df),
+        'combinaciones': args.combinaciones,
+        'construccion_ms': round(construccion_ms, 1),
+        'mb_mapas': round(indice.memoria_bytes() / 1e6, 2),
+        'filas_seleccionadas_mediana': int(np.median(filas_seleccionadas)),
+        **{nombre: percentiles(t) for nombre, t in tiempos.items()},
+        'diferentes': diferentes,
+        'presupuesto_ms': args.presupuesto_ms,
+    }
+    resultado['cumple'] = bool(resultado['indice']['p95_ms'] <= args.presupuesto_ms and diferentes == 0)
+    print(json.dumps(resultado, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "filtros_globales.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+
+    if diferentes:
+        print(f"{diferentes} combinaciones no coinciden con la máscara isin")
+    if not resultado['cumple']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Generador de documentos sintéticos con el esquema de Estudiantes_Materias.
+
+Produce documentos con la misma forma que DB MONGO.ipynb escribe en la
+colección (datos_personales, academico, location, colegio, ICFES,
+metricas_rendimiento con pérdidas por departamento, estado, periodo_info y el
+arreglo materias_cursadas). Con la misma semilla el resultado es idéntico.
+
+Uso:
+    python benchmarks/generador_documentos.py --n 10000 --salida documentos.json
+"""
+import argparse
+import json
+import random
+
+PROGRAMAS = [
+    'INGENIERIA DE SISTEMAS', 'INGENIERIA INDUSTRIAL', 'INGENIERIA CIVIL', 'INGENIERIA MECANICA',
+    'INGENIERIA ELECTRONICA', 'DERECHO', 'MEDICINA', 'PSICOLOGIA', 'ADMINISTRACION DE EMPRESAS',
+    'CONTADURIA PUBLICA', 'ARQUITECTURA', 'DISEÑO GRAFICO', 'COMUNICACION SOCIAL', 'ENFERMERIA',
+    'ODONTOLOGIA', 'ECONOMIA', 'NEGOCIOS INTERNACIONALES', 'CIENCIA POLITICA', 'MUSICA', 'FILOSOFIA'
+]
+# (departamento, ciudades, peso)
+UBICACIONES = [
+    ('ATLANTICO', ['BARRANQUILLA', 'SOLEDAD', 'MALAMBO', 'PUERTO COLOMBIA', 'GALAPA', 'SABANALARGA'], 70),
+    ('BOLIVAR', ['CARTAGENA', 'MAGANGUE'], 6),
+    ('MAGDALENA', ['SANTA MARTA', 'CIENAGA'], 5),
+    ('CESAR', ['VALLEDUPAR'], 4),
+    ('LA GUAJIRA', ['RIOHACHA', 'MAICAO'], 4),
+    ('CORDOBA', ['MONTERIA'], 3),
+    ('SUCRE', ['SINCELEJO'], 3),
+    ('BOGOTA D.C.', ['BOGOTA'], 3),
+    ('ANTIOQUIA', ['MEDELLIN'], 1),
+    ('SANTANDER', ['BUCARAMANGA'], 1),
+]
+CATEGORIAS = [
+    'MATEMATICAS', 'FISICA', 'QUIMICA', 'BIOLOGIA', 'HUMANIDADES', 'IDIOMAS', 'INGENIERIA DE SISTEMAS',
+    'INGENIERIA INDUSTRIAL', 'INGENIERIA CIVIL', 'INGENIERIA MECANICA', 'INGENIERIA ELECTRICA Y ELECTRONICA',
+    'DERECHO', 'MEDICINA', 'PSICOLOGIA', 'ADMINISTRACION', 'CONTABILIDAD', 'ARQUITECTURA Y DISEÑO',
+    'COMUNICACION', 'ENFERMERIA', 'ODONTOLOGIA', 'ECONOMIA', 'NEGOCIOS', 'CIENCIA POLITICA', 'MUSICA',
+    'FILOSOFIA', 'EDUCACION', 'SALUD PUBLICA', 'DEPORTES'
+]
+MATERIAS = [(f"MAT{i:04d}", f"MATERIA {i}", CATEGORIAS[i % len(CATEGORIAS)]) for i in range(400)]
+PERIODOS = [anio * 100 + semestre for anio in range(2018, 2026) for semestre in (10, 30)][:-1]
+BECAS = ['No becado'] * 8 + ['Institucional', 'oficial']
+
+
+def documento(indice, rng):
+    """Un documento de estudiante; la deserción depende del rendimiento para que los modelos tengan señal"""
+    cohorte = rng.randrange(len(PERIODOS))
+    n_periodos = rng.randint(1, len(PERIODOS) - cohorte)
+    dificultad = rng.random()
+
+    materias = []
+    for periodo in PERIODOS[cohorte:cohorte + n_periodos]:
+        for _ in range(rng.randint(3, 7)):
+            codigo, nombre, categoria = rng.choice(MATERIAS)
+            retirada = 1 if rng.random() < 0.03 + 0.05 * dificultad else 0
+            nota = None if retirada else round(min(5.0, max(0.0, rng.gauss(3.8 - 1.2 * dificultad, 0.7))), 1)
+            materias.append({'materia': nombre, 'codigo_materia': codigo, 'categoria': categoria,
+                             'periodo': periodo, 'nota': nota, 'retirada': retirada})
+
+    perdidas_por_departamento = {}
+    for materia in materias:
+        if materia['retirada'] == 1 or (materia['nota'] is not None and 0 < materia['nota'] < 3.0):
+            perdidas_por_departamento[materia['categoria']] = perdidas_por_departamento.get(materia['categoria'], 0) + 1
+    notas = [m['nota'] for m in materias if m['nota'] is not None]
+    codigos = [m['codigo_materia'] for m in materias]
+
+    departamento, ciudades, _ = rng.choices(UBICACIONES, weights=[u[2] for u in UBICACIONES])[0]
+    ciudad = rng.choice(ciudades)
+    icfes = [None if rng.random() < 0.02 else float(rng.randint(25, 95)) for _ in range(5)]
+    graduado = int(n_periodos >= 10 and rng.random() < 0.6)
+    desertor = int(not graduado and rng.random() < 0.04 + 0.25 * dificultad)
+
+    return {
+        '_id': str(200000000 + indice),
+        'datos_personales': {
+            'edad': None if rng.random() < 0.01 else rng.randint(16, 45),
+            'genero': rng.choice(['Masculino', 'Femenino']),
+            'estrato': rng.choices([1, 2, 3, 4, 5, 6], weights=[25, 30, 25, 10, 6, 4])[0],
+            'discapacidad': 'Sí' if rng.random() < 0.02 else 'No',
+        },
+        'academico': {
+            'programa': rng.choice(PROGRAMAS),
+            'programa_secundario': rng.choice(PROGRAMAS) if rng.random() < 0.03 else None,
+            'semestre_actual': min(n_periodos, 10),
+            'tipo_estudiante': 'PREGRADO',
+            'tipo_admision': rng.choice(['REGULAR', 'TRANSFERENCIA', 'REINTEGRO']),
+            'estado_academico': 'RETIRADO' if desertor else ('GRADUADO' if graduado else 'ACTIVO'),
+        },
+        'location': {
+            'ciudad': ciudad,
+            'departamento': departamento,
+            'pais': 'COLOMBIA',
+            'es_barranquilla': int(ciudad == 'BARRANQUILLA'),
+            'es_colombia': 1,
+            'codigo_dane': None,
+        },
+        'colegio': {
+            'tipo_colegio': rng.choice(['OFICIAL', 'PRIVADO', 'PRIVADO', 'NO APLICA']),
+            'calendario_colegio': rng.choice(['A', 'A', 'B']),
+            'descripcion_bachillerato': rng.choice(['ACADEMICO', 'TECNICO', 'NORMALISTA']),
+        },
+        'ICFES': {
+            'puntaje_total': sum(v for v in icfes if v is not None) * 5 / len(icfes),
+            'matematicas': icfes[0],
+            'lectura_critica': icfes[1],
+            'sociales': icfes[2],
+            'ciencias': icfes[3],
+            'ingles': icfes[4],
+        },
+        'metricas_rendimiento': {
+            'promedio_acumulado': round(sum(notas) / len(notas), 2) if notas else None,
+            'materias_cursadas_total': len(materias),
+            'materias_perdidas_total': sum(perdidas_por_departamento.values()),
+            'materias_perdidas_por_departamento': perdidas_por_departamento,
+            'materias_repetidas': len(codigos) - len(set(codigos)),
+        },
+        'estado': {
+            'becado': rng.choice(BECAS),
+            'graduado': graduado,
+            'desertor': desertor,
+        },
+        'periodo_info': {
+            'ultimo_periodo': PERIODOS[cohorte + n_periodos - 1],
+        },
+        'materias_cursadas': materias,
+    }
+
+
+def generar_documentos(n, semilla=42):
+    """Lista de n documentos sintéticos reproducibles"""
+    rng = random.Random(semilla)
+    return [documento(i, rng) for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera documentos sintéticos de Estudiantes_Materias")
+    parser.add_argument('--n', type=int, default=10_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', required=True, help="Archivo JSON de salida")
+    args = parser.parse_args()
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(generar_documentos(args.n, args.semilla), f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Memoria de la tabla de estudiantes (`df` del dashboard) con y sin tipos compactos.
+
+Construye la tabla a partir de documentos sintéticos (por defecto 100k
+estudiantes), imprime el reporte de bytes por columna y falla (código de
+salida 1) si la tabla compacta supera el presupuesto; sirve como chequeo de
+regresión al agregar columnas. El presupuesto escala con el número de
+estudiantes (10 MB por cada 100k) y `suite.py` aplica el mismo chequeo a la
+tabla que construye en cada corrida.
+
+Uso:
+    python benchmarks/memoria_df.py --n 100000
+    python benchmarks/memoria_df.py --n 100000 --presupuesto-mb 10
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generador_documentos import generar_documentos  # noqa: E402
+from tabla_estudiantes import compactar, construir_df, reporte_memoria  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+# Presupuesto de la tabla compacta: PRESUPUESTO_MB por cada N_PRESUPUESTO estudiantes
+PRESUPUESTO_MB = 10
+N_PRESUPUESTO = 100_000
+
+
+def presupuesto_mb(n):
+    return PRESUPUESTO_MB * n / N_PRESUPUESTO
+
+
+def mb_tabla(df):
+    return reporte_memoria(df)['bytes'].sum() / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de la tabla de estudiantes")
+    parser.add_argument('--n', type=int, default=100_000)
+    parser.add_argument('--presupuesto-mb', type=float, default=None,
+                        help=f"Por defecto {PRESUPUESTO_MB} MB por cada {N_PRESUPUESTO} estudiantes")
+    args = parser.parse_args()
+    if args.presupuesto_mb is None:
+        args.presupuesto_mb = presupuesto_mb(args.n)
+
+    original = construir_df(generar_documentos(args.n), compacto=False)
+    compacta = compactar(original.copy())
+
+    reporte = reporte_memoria(compacta)
+    reporte_original = reporte_memoria(original).set_index('columna')
+    reporte['tipo_original'] = reporte['columna'].map(reporte_original['tipo'])
+    reporte['bytes_original'] = reporte['columna'].map(reporte_original['bytes'])
+    print(reporte.to_string(index=False))
+
+    mb_original = reporte['bytes_original'].sum() / 1e6
+    mb_compacta = reporte['bytes'].sum() / 1e6
+    resultado = {
+        'n': args.n,
+        'mb_original': round(mb_original, 2),
+        'mb_compacta': round(mb_compacta, 2),
+        'reduccion': round(1 - mb_compacta / mb_original, 3),
+        'presupuesto_mb': args.presupuesto_mb,
+        'cumple': bool(mb_compacta <= args.presupuesto_mb),
+        'columnas': reporte.to_dict(orient='records'),
+    }
+    print(json.dumps({k: v for k, v in resultado.items() if k != 'columnas'}, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "memoria_df.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4, default=str)
+
+    if not resultado['cumple']:
+        print(f"La tabla compacta ocupa {mb_compacta:.2f} MB, por encima del presupuesto de {args.presupuesto_mb} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
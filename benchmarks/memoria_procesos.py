@@ -0,0 +1,136 @@
+"""
+Memoria total de K procesos del servidor: cada uno con su copia vs plano compartido.
+
+Publica una sola vez las tablas de n estudiantes sintéticos con
+`plano_compartido.publicar` y arranca K procesos nuevos (spawn) por modo:
+
+- base: solo las importaciones (lo que cuesta un proceso vacío);
+- mongo: cada proceso tiene su lista de documentos (lo que devuelve
+  `load_data`) y arma df, registros del modelo y almacén de materias;
+- plano: cada proceso abre la versión publicada y recorre todas las columnas.
+
+Con los K procesos vivos cada uno lee su PSS (/proc/self/smaps_rollup: las
+páginas compartidas se reparten entre los procesos que las mapean), así que
+la suma es la memoria total real. También se reporta la memoria privada
+(Anonymous) por proceso y los documentos leídos de MongoDB (K x n contra n
+del único cargador). Falla (código de salida 1) si las tablas abiertas no son
+iguales a las publicadas.
+
+Uso:
+    python benchmarks/memoria_procesos.py --n 100000 --procesos 1 2 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import plano_compartido  # noqa: E402
+from generador_documentos import generar_documentos  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+
+def memoria_mb():
+    """Pss, Rss y memoria privada (Anonymous) del proceso actual, en MB"""
+    valores = {}
+    with open('/proc/self/smaps_rollup', 'r') as f:
+        for linea in f:
+            clave, _, resto = linea.partition(':')
+            if clave in ('Rss', 'Pss', 'Anonymous'):
+                valores[clave.lower()] = int(resto.split()[0]) / 1024
+    return valores
+
+
+def _recorrer(df):
+    """Toca todas las columnas, como lo harían los gráficos"""
+    for columna in df.columns:
+        if df[columna].dtype.kind in 'fiu':
+            df[columna].sum()
+        else:
+            df[columna].nunique()
+
+
+def trabajador(modo, n, semilla, directorio, barrera, cola):
+    if modo == 'mongo':
+        documentos = generar_documentos(n, semilla)
+        df, registros, almacen = plano_compartido.tablas_desde_documentos(documentos)
+    elif modo == 'plano':
+        df, registros, almacen = plano_compartido.abrir(plano_compartido.version_publicada(directorio), directorio)
+    if modo != 'base':
+        _recorrer(df)
+        _recorrer(registros)
+        almacen.tasa_por_curso()
+    # Todos los procesos vivos antes de medir, para que el PSS reparta las páginas compartidas
+    barrera.wait()
+    cola.put(memoria_mb())
+    barrera.wait()
+
+
+def medir(modo, procesos, args):
+    contexto = multiprocessing.get_context('spawn')
+    barrera = contexto.Barrier(procesos)
+    cola = contexto.Queue()
+    hijos = [contexto.Process(target=trabajador, args=(modo, args.n, args.semilla, args.directorio, barrera, cola))
+             for _ in range(procesos)]
+    for hijo in hijos:
+        hijo.start()
+    memorias = [cola.get() for _ in hijos]
+    for hijo in hijos:
+        hijo.join()
+    return {
+        'modo': modo,
+        'procesos': procesos,
+        'pss_total_mb': round(sum(m['pss'] for m in memorias), 1),
+        'privada_por_proceso_mb': round(float(np.mean([m['anonymous'] for m in memorias])), 1),
+        'rss_por_proceso_mb': round(float(np.mean([m['rss'] for m in memorias])), 1),
+        'documentos_leidos': args.n * procesos if modo == 'mongo' else (args.n if modo == 'plano' else 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de K procesos: copias propias vs plano compartido")
+    parser.add_argument('--n', type=int, default=100_000)
+    parser.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--directorio', default=plano_compartido.DIRECTORIO_PLANO + "-benchmark")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.directorio, ignore_errors=True)
+    df, registros, almacen = plano_compartido.tablas_desde_documentos(generar_documentos(args.n, args.semilla))
+    publicacion = plano_compartido.publicar(df, registros, almacen, args.directorio)
+    mb_publicados = sum(os.path.getsize(os.path.join(raiz, f))
+                        for raiz, _, archivos in os.walk(os.path.join(args.directorio, publicacion['directorio']))
+                        for f in archivos) / 1e6
+    df_plano, registros_plano, almacen_plano = plano_compartido.abrir(publicacion, args.directorio)
+    iguales = (df_plano.equals(df) and registros_plano.equals(registros)
+               and almacen_plano.tasa_por_curso().equals(almacen.tasa_por_curso()))
+    del df, registros, almacen, df_plano, registros_plano, almacen_plano
+    print(f"n={args.n:,}: {mb_publicados:.0f} MB publicados en {args.directorio}, tablas iguales: {iguales}")
+
+    resultados = []
+    for procesos in args.procesos:
+        for modo in ('base', 'mongo', 'plano'):
+            r = medir(modo, procesos, args)
+            resultados.append(r)
+            print(f"{modo:<6} K={procesos}: PSS total {r['pss_total_mb']:>8.0f} MB   "
+                  f"privada/proceso {r['privada_por_proceso_mb']:>7.0f} MB   documentos leídos {r['documentos_leidos']:,}")
+    shutil.rmtree(args.directorio, ignore_errors=True)
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "memoria_procesos.json"), 'w', encoding='utf-8') as f:
+        json.dump({'n': args.n, 'mb_publicados': round(mb_publicados, 1), 'iguales': iguales,
+                   'resultados': resultados}, f, indent=4)
+
+    if not iguales:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
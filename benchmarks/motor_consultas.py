@@ -0,0 +1,211 @@
+"""
+Agregaciones de las secciones 1, 2 y 5: pandas sobre df en memoria vs DuckDB sobre Parquet.
+
+Genera una base de documentos sintéticos (`--base`, por defecto 100k) y la
+replica hasta n estudiantes escribiendo la copia Parquet por partes, así que
+10 millones de estudiantes no pasan nunca por memoria. Por cada n:
+
+- duckdb: mediana en ms de cada consulta de `motor_duckdb.MotorDuckDB`;
+- pandas: la agregación equivalente de graficos.py sobre df en memoria, solo
+  si n <= --max-pandas (df de 10 millones no cabe en una máquina pequeña);
+- iguales: si las dos tablas coinciden (cuando corre pandas).
+
+Las materias cursadas (sección 5, unas 40 filas por estudiante) se incluyen
+con --con-materias.
+
+Uso:
+    python benchmarks/motor_consultas.py --n 1000000 10000000
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import graficos  # noqa: E402
+import motor_duckdb  # noqa: E402
+from generador_documentos import generar_documentos  # noqa: E402
+from materias import AlmacenMaterias  # noqa: E402
+from tabla_estudiantes import construir_df  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+# (agregación, tabla de entrada de pandas, parámetros)
+CONSULTAS = [
+    ('conteo_genero', 'df', {}),
+    ('conteo_edad', 'df', {}),
+    ('conteo_edad_genero', 'df', {}),
+    ('estudiantes_por_departamento', 'df', {}),
+    ('estudiantes_atlantico_por_ciudad', 'df', {}),
+    ('desercion_genero', 'sin_graduados', {}),
+    ('desercion_edad', 'sin_graduados', {}),
+    ('desercion_edad_genero', 'sin_graduados', {}),
+    ('desercion_programa', 'sin_graduados', {}),
+    ('desertores_por_estrato', 'desertores', {}),
+    ('desercion_departamento', 'sin_graduados', {}),
+    ('promedios_icfes', 'sin_graduados', {}),
+    ('promedios_icfes', 'sin_graduados', {'programa': 'MEDICINA'}),
+    ('desercion_colegio', 'sin_graduados', {}),
+    ('desercion_calendario', 'sin_graduados', {}),
+]
+CONSULTAS_MATERIAS = [
+    ('tasa_por_curso', {'min_inscritos': 30}),
+    ('tasa_por_categoria', {}),
+    ('tasa_por_periodo', {}),
+]
+
+
+def mediana_ms(funcion, repeticiones):
+    tiempos, resultado = [], None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos)), resultado
+
+
+def _comparable(tabla):
+    """Textos y categorías como str, números como float, filas ordenadas"""
+    tabla = tabla.copy()
+    for columna in tabla.columns:
+        if pd.api.types.is_numeric_dtype(tabla[columna]) and not isinstance(tabla[columna].dtype, pd.CategoricalDtype):
+            tabla[columna] = tabla[columna].astype(float)
+        else:
+            tabla[columna] = tabla[columna].astype(str)
+    return tabla.sort_values(list(tabla.columns)).reset_index(drop=True)
+
+
+def iguales(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    if list(a.columns) != list(b.columns):
+        return False
+    try:
+        pd.testing.assert_frame_equal(_comparable(a), _comparable(b), check_dtype=False, rtol=1e-5)
+    except AssertionError:
+        return False
+    return True
+
+
+def replicar_almacen(almacen, copias):
+    """Almacén de `copias` repeticiones de los mismos estudiantes (estudiante desplazado en cada copia)"""
+    n = almacen.n_estudiantes
+    desplazamiento = np.repeat(np.arange(copias, dtype=np.int64) * n, len(almacen))
+    return AlmacenMaterias(
+        (np.tile(almacen.estudiante.astype(np.int64), copias) + desplazamiento).astype(np.int32),
+        np.tile(almacen.curso, copias), np.tile(almacen.categoria, copias), np.tile(almacen.periodo, copias),
+        np.tile(almacen.nota, copias), np.tile(almacen.retirada, copias), almacen.codigos, almacen.nombres,
+        almacen.categorias, almacen.categoria_curso, n * copias)
+
+
+def escribir_replicas(directorio, df_base, almacen_base, copias, con_materias):
+    """Copia Parquet de `copias` repeticiones de la base, una parte por repetición"""
+    shutil.rmtree(directorio, ignore_errors=True)
+    n_base = len(df_base)
+    for parte in range(copias):
+        desplazamiento = parte * n_base
+        estudiantes = df_base.assign(_id=[str(desplazamiento + i) for i in range(n_base)])
+        motor_duckdb.escribir_parte(directorio, 'estudiantes',
+                                    motor_duckdb.tabla_estudiantes(estudiantes, desplazamiento), parte)
+        if con_materias:
+            motor_duckdb.escribir_parte(directorio, 'materias',
+                                        motor_duckdb.tabla_materias(almacen_base, desplazamiento), parte)
+    if not con_materias:
+        motor_duckdb.escribir_parte(directorio, 'materias', motor_duckdb.tabla_materias(almacen_base.filtrar([])))
+    motor_duckdb.escribir_dimensiones(directorio, almacen_base)
+
+
+def medir_n(args, df_base, almacen_base, n):
+    copias = max(1, math.ceil(n / len(df_base)))
+    n_real = copias * len(df_base)
+    directorio = os.path.join(args.directorio, f"n{n_real}")
+
+    inicio = time.perf_counter()
+    escribir_replicas(directorio, df_base, almacen_base, copias, args.con_materias)
+    escritura_s = time.perf_counter() - inicio
+    mb_parquet = sum(os.path.getsize(os.path.join(raiz, f)) for raiz, _, archivos in os.walk(directorio)
+                     for f in archivos) / 1e6
+    print(f"\nn={n_real:,}: Parquet {mb_parquet:.0f} MB escrito en {escritura_s:.1f} s")
+
+    motor = motor_duckdb.MotorDuckDB(directorio, hilos=args.hilos, limite_memoria=args.limite_memoria)
+    con_pandas = n_real <= args.max_pandas
+    if con_pandas:
+        df = pd.concat([df_base] * copias, ignore_index=True)
+        bases = {'df': df, 'sin_graduados': df[df['graduado'] == 0].copy()}
+        bases['desertores'] = bases['sin_graduados'][bases['sin_graduados']['desertor'] == 1]
+        almacen = replicar_almacen(almacen_base, copias) if args.con_materias else None
+
+    filas = []
+    consultas = [(nombre, base, parametros) for nombre, base, parametros in CONSULTAS]
+    if args.con_materias:
+        consultas += [(nombre, 'materias', parametros) for nombre, parametros in CONSULTAS_MATERIAS]
+    for nombre, base, parametros in consultas:
+        etiqueta = nombre + ''.join(f"[{v}]" for v in parametros.values())
+        duckdb_ms, tabla_duckdb = mediana_ms(lambda: motor.consultar(nombre, None, **parametros), args.repeticiones)
+        fila = {'consulta': etiqueta, 'duckdb_ms': round(duckdb_ms, 1)}
+        if con_pandas:
+            if base == 'materias':
+                pandas_ms, tabla_pandas = mediana_ms(lambda: getattr(almacen, nombre)(**parametros), args.repeticiones)
+            else:
+                pandas_ms, tabla_pandas = mediana_ms(lambda: getattr(graficos, nombre)(bases[base], **parametros),
+                                                     args.repeticiones)
+            fila.update(pandas_ms=round(pandas_ms, 1), iguales=iguales(tabla_pandas, tabla_duckdb))
+        filas.append(fila)
+        pandas_texto = f"pandas {fila['pandas_ms']:>9.1f} ms   iguales {fila['iguales']}" if con_pandas else ""
+        print(f"{etiqueta:<42} duckdb {duckdb_ms:>9.1f} ms   {pandas_texto}")
+
+    if not args.conservar:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return {
+        'n': n_real,
+        'mb_parquet': round(mb_parquet, 1),
+        'escritura_s': round(escritura_s, 1),
+        'duckdb_total_ms': round(sum(f['duckdb_ms'] for f in filas), 1),
+        'pandas_total_ms': round(sum(f['pandas_ms'] for f in filas), 1) if con_pandas else None,
+        'todas_iguales': all(f['iguales'] for f in filas) if con_pandas else None,
+        'consultas': filas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregaciones: pandas en memoria vs DuckDB sobre Parquet")
+    parser.add_argument('--n', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--base', type=int, default=100_000, help="Documentos sintéticos distintos que se replican")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--hilos', type=int, default=None, help="Hilos de DuckDB (por defecto todos los núcleos)")
+    parser.add_argument('--limite-memoria', default=None, help="memory_limit de DuckDB, p. ej. 1GB")
+    parser.add_argument('--max-pandas', type=int, default=1_000_000)
+    parser.add_argument('--con-materias', action='store_true')
+    parser.add_argument('--directorio', default=os.path.join(DIRECTORIO_RESULTADOS, "motor_consultas"))
+    parser.add_argument('--conservar', action='store_true', help="No borra la copia Parquet al terminar")
+    args = parser.parse_args()
+
+    documentos = generar_documentos(min(args.base, min(args.n)), args.semilla)
+    df_base = construir_df(documentos)
+    almacen_base = AlmacenMaterias.desde_documentos(documentos)
+    del documentos
+
+    resultados = [medir_n(args, df_base, almacen_base, n) for n in args.n]
+    for r in resultados:
+        pandas_texto = f"pandas {r['pandas_total_ms']:.0f} ms, iguales {r['todas_iguales']}" if r['pandas_total_ms'] else "pandas omitido"
+        print(f"n={r['n']:,}: duckdb {r['duckdb_total_ms']:.0f} ms en total, {pandas_texto}")
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "motor_consultas.json"), 'w', encoding='utf-8') as f:
+        json.dump({'base': len(df_base), 'hilos': args.hilos, 'resultados': resultados}, f, indent=4)
+
+    if any(r['todas_iguales'] is False for r in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
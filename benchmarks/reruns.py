@@ -0,0 +1,173 @@
+"""
+Latencia de cada interacción del dashboard: rerun completo vs rerun del fragmento.
+
+Ejecuta dashboard.py con el AppTest de Streamlit sobre documentos sintéticos
+(`generador_documentos.py`, servidos por una colección en memoria en lugar
+de MongoDB) y, para cada widget que vive en un `@st.fragment`, mide:
+
+- completo: el script entero, como se ejecutaba cada interacción antes;
+- fragmento: solo el fragmento dueño del widget, como lo ejecuta el
+  servidor ahora (mismo mecanismo que usa el navegador).
+
+Uso:
+    python benchmarks/reruns.py --n 10000 --repeticiones 5
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pymongo  # noqa: E402
+import requests  # noqa: E402
+from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1 import app_test  # noqa: E402
+
+from generador_documentos import generar_documentos  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+# (sección, fragmento, tipo de widget, etiqueta)
+INTERACCIONES = [
+    ("2. Desertores vs No Desertores", "icfes", "selectbox", "Seleccionar Programa:"),
+    ("2. Desertores vs No Desertores", "multivariable", "selectbox", "Seleccione el tipo de análisis:"),
+    ("3. Modelo Predictivo", "prediccion", "button", "Predecir Riesgo de Deserción"),
+    ("3. Modelo Predictivo", "prediccion", "button", "Limpiar Formulario"),
+    ("4. Estudiantes en Riesgo", "riesgo", "selectbox", "Programa"),
+    ("4. Estudiantes en Riesgo", "riesgo", "selectbox", "Filas por página"),
+]
+
+
+class ClienteMemoria:
+    """Sustituye a MongoClient: cualquier base o colección son los documentos sintéticos"""
+    documentos = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getitem__(self, nombre):
+        return self
+
+    def find(self, *args, **kwargs):
+        return list(self.documentos)
+
+
+class _RespuestaGeojson:
+    def json(self):
+        return {'type': 'FeatureCollection', 'features': []}
+
+
+# Fragmento al que se dirige el próximo rerun (None = script completo)
+_fragmento_objetivo = [None]
+
+
+class _Ejecutor(app_test.LocalScriptRunner):
+    """LocalScriptRunner que, si hay un fragmento objetivo, pide un rerun solo de ese fragmento"""
+
+    def request_rerun(self, rerun_data):
+        if _fragmento_objetivo[0] is not None:
+            # El constructor ya encoló un rerun completo que absorbería el del fragmento
+            self._requests = ScriptRequests()
+            rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=[_fragmento_objetivo[0]])
+        return super().request_rerun(rerun_data)
+
+
+def _id_fragmento(at, clave):
+    # Registro interno de Streamlit: clave de @st.fragment(key=...) -> id del fragmento
+    return next(iter(at._fragment_storage._ids_by_target_key[clave]))
+
+
+def _widget(at, tipo, etiqueta):
+    return next(w for w in getattr(at, tipo) if w.label == etiqueta)
+
+
+def _interactuar(at, tipo, etiqueta, paso):
+    widget = _widget(at, tipo, etiqueta)
+    if tipo == "button":
+        widget.click()
+    else:
+        widget.set_value(widget.options[paso % len(widget.options)])
+
+
+def _medir(at, ejecutar, errores):
+    inicio = time.perf_counter()
+    ejecutar()
+    duracion = (time.perf_counter() - inicio) * 1000
+    errores.update(e.value for e in at.exception)
+    return duracion
+
+
+def _preparar(at, seccion):
+    _fragmento_objetivo[0] = None
+    at.sidebar.radio[0].set_value(seccion)
+    at.run()
+
+
+def medir_interaccion(at, seccion, fragmento, tipo, etiqueta, repeticiones):
+    """Mediana en ms del rerun completo y del rerun del fragmento, y los errores que mostró la app"""
+    completo, parcial, errores = [], [], set()
+    for paso in range(repeticiones):
+        _preparar(at, seccion)
+        _interactuar(at, tipo, etiqueta, paso + 1)
+        completo.append(_medir(at, at.run, errores))
+
+        _preparar(at, seccion)
+        _interactuar(at, tipo, etiqueta, paso + 1)
+        _fragmento_objetivo[0] = _id_fragmento(at, fragmento)
+        try:
+            parcial.append(_medir(at, at.run, errores))
+        finally:
+            _fragmento_objetivo[0] = None
+        # El árbol de un rerun parcial solo tiene el fragmento; un rerun completo lo restaura
+        at.run()
+    return float(np.median(completo)), float(np.median(parcial)), sorted(errores)
+
+
+def preparar_app(n, semilla=42, script=os.path.join(RAIZ, "dashboard.py")):
+    """AppTest del dashboard con n documentos sintéticos en memoria (sin MongoDB ni red), sin ejecutar"""
+    ClienteMemoria.documentos = generar_documentos(n, semilla)
+    pymongo.MongoClient = ClienteMemoria
+    requests.get = lambda *a, **k: _RespuestaGeojson()
+    app_test.LocalScriptRunner = _Ejecutor
+
+    os.chdir(RAIZ)
+    at = AppTest.from_file(script, default_timeout=600)
+    at.secrets['CONNECTION_STRING'] = "memoria"
+    return at
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia por interacción: rerun completo vs fragmento")
+    parser.add_argument('--n', type=int, default=10_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    at = preparar_app(args.n, args.semilla)
+    at.run()
+
+    resultados = []
+    for seccion, fragmento, tipo, etiqueta in INTERACCIONES:
+        completo, parcial, errores = medir_interaccion(at, seccion, fragmento, tipo, etiqueta, args.repeticiones)
+        resultados.append({'seccion': seccion, 'fragmento': fragmento, 'widget': etiqueta,
+                           'completo_ms': round(completo, 1), 'fragmento_ms': round(parcial, 1),
+                           'aceleracion': round(completo / parcial, 1), 'errores': errores})
+        print(f"{etiqueta:<35} completo {completo:>8.1f} ms   fragmento {parcial:>8.1f} ms   x{completo / parcial:.1f}")
+        for error in errores:
+            print(f"    la app mostró un error: {error}")
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "reruns.json"), 'w', encoding='utf-8') as f:
+        json.dump({'n': args.n, 'repeticiones': args.repeticiones, 'interacciones': resultados}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
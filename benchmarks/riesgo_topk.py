@@ -0,0 +1,94 @@
+"""
+Benchmark del ranking de estudiantes en riesgo (sección 4 del dashboard).
+
+Genera una población sintética (por defecto 1M estudiantes) con puntaje de
+riesgo, programa y departamento, y mide el tiempo de un cambio de filtro:
+selección top-k + armado de la tabla de una página. El objetivo es < 100 ms.
+
+Uso:
+    python benchmarks/riesgo_topk.py --n 1000000 --k 200 --repeticiones 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from riesgo import TODOS, IndiceRiesgo, pagina  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+OBJETIVO_MS = 100
+
+
+def poblacion_sintetica(n, n_programas=60, n_departamentos=33, semilla=42):
+    rng = np.random.default_rng(semilla)
+    programas = np.array([f"PROGRAMA {i:02d}" for i in range(n_programas)], dtype=object)
+    departamentos = np.array([f"DEPARTAMENTO {i:02d}" for i in range(n_departamentos)], dtype=object)
+    return pd.DataFrame({
+        '_id': np.arange(n).astype(str),
+        # Distribución sesgada: pocos programas concentran la mayoría de estudiantes
+        'programa': programas[np.minimum(rng.zipf(1.5, n) - 1, n_programas - 1)],
+        'departamento': departamentos[np.minimum(rng.zipf(2.0, n) - 1, n_departamentos - 1)],
+        'semestre_actual': rng.integers(1, 11, n),
+        'promedio': rng.uniform(2.0, 5.0, n).round(2),
+        'materias_perdidas': rng.poisson(2, n),
+        'becado': rng.choice(['No becado', 'Institucional', 'oficial'], n),
+        'graduado': (rng.random(n) < 0.1).astype(int),
+        'desertor': (rng.random(n) < 0.08).astype(int),
+        'riesgo': rng.beta(2, 8, n).astype(np.float32),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-k de estudiantes en riesgo")
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--k', type=int, default=200)
+    parser.add_argument('--tamano-pagina', type=int, default=50)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df = poblacion_sintetica(args.n)
+    elegibles = (df['graduado'] != 1) & (df['desertor'] != 1)
+    indice = IndiceRiesgo(df['riesgo'].values, {'programa': df['programa'], 'departamento': df['departamento']}, elegibles)
+    segundos_indice = time.perf_counter() - inicio
+
+    rng = np.random.default_rng(0)
+    opciones_programa = indice.opciones('programa')
+    opciones_depto = indice.opciones('departamento')
+    columnas = ['_id', 'programa', 'departamento', 'semestre_actual', 'promedio', 'materias_perdidas', 'becado', 'riesgo']
+
+    tiempos = []
+    for _ in range(args.repeticiones):
+        programa = opciones_programa[rng.integers(len(opciones_programa))]
+        departamento = TODOS if rng.random() < 0.5 else opciones_depto[rng.integers(len(opciones_depto))]
+        t = time.perf_counter()
+        seleccion = indice.seleccionar(args.k, programa=programa, departamento=departamento)
+        df.iloc[pagina(seleccion, 1, args.tamano_pagina)][columnas]
+        tiempos.append((time.perf_counter() - t) * 1000)
+
+    tiempos = np.array(tiempos)
+    resultado = {
+        'n': args.n,
+        'k': args.k,
+        'segundos_construir_indice': round(segundos_indice, 3),
+        'p50_ms': round(float(np.percentile(tiempos, 50)), 2),
+        'p95_ms': round(float(np.percentile(tiempos, 95)), 2),
+        'max_ms': round(float(tiempos.max()), 2),
+        'objetivo_ms': OBJETIVO_MS,
+        'cumple': bool(np.percentile(tiempos, 95) < OBJETIVO_MS),
+    }
+    print(json.dumps(resultado, indent=4))
+
+    os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRECTORIO_RESULTADOS, "riesgo_topk.json"), 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Suite de benchmarks del dashboard, sin Streamlit.
+
+Genera documentos sintéticos con el esquema de Estudiantes_Materias
+(`generador_documentos.py`) y mide, paso por paso, lo que hace un rerun:
+decodificar los documentos (BSON, como llegan de MongoDB), construir `df`,
+los índices derivados, las agregaciones y figuras de cada sección
+(construcción + serialización a JSON, que es lo que se envía al navegador) y
+la predicción individual y en lote.
+
+El resultado (mediana y mínimo por paso, con metadatos de versión y commit)
+queda en un JSON con claves estables para comparar entre commits. También
+revisa que `df` quede dentro del presupuesto de memoria de `memoria_df.py`
+y sale con código 1 si lo supera.
+
+Uso:
+    python benchmarks/suite.py --n 20000 --repeticiones 5
+    python benchmarks/suite.py --n 20000 --comparar benchmarks/resultados/suite_base.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import graficos  # noqa: E402
+from cache_predicciones import CachePredicciones  # noqa: E402
+from generador_documentos import generar_documentos  # noqa: E402
+from memoria_df import mb_tabla, presupuesto_mb  # noqa: E402
+from materias import AlmacenMaterias  # noqa: E402
+from periodos import ParticionesPeriodo  # noqa: E402
+from preprocesamiento import Preprocesador, registro_modelo, registro_prediccion  # noqa: E402
+from riesgo import IndiceRiesgo, puntuar_poblacion  # noqa: E402
+from tabla_estudiantes import construir_df, version_tabla  # noqa: E402
+
+DIRECTORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+ESTUDIANTE_EJEMPLO = {
+    'edad': 19, 'genero': 'Femenino', 'estrato': 2, 'discapacidad': 'No', 'programa': 'INGENIERIA DE SISTEMAS',
+    'semestre': 3, 'promedio': 3.1, 'materias_cursadas': 18, 'materias_perdidas': 4, 'materias_repetidas': 1,
+    'icfes_mat': 55, 'icfes_lec': 60, 'icfes_soc': 52, 'icfes_cie': 50, 'icfes_ing': 48,
+    'becado': 'No becado', 'tipo_colegio': 'OFICIAL', 'es_barranquilla': 'Sí'
+}
+
+
+def medir(resultados, nombre, funcion, repeticiones):
+    """Ejecuta `funcion` varias veces y guarda mediana y mínimo en ms; devuelve el último resultado"""
+    tiempos = []
+    valor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        valor = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    resultados[nombre] = {
+        'mediana_ms': round(float(np.median(tiempos)), 3),
+        'min_ms': round(float(np.min(tiempos)), 3),
+        'repeticiones': repeticiones,
+    }
+    print(f"{nombre:<45} {resultados[nombre]['mediana_ms']:>10.2f} ms")
+    return valor
+
+
+def figura(construir):
+    """Construye la figura y la serializa como lo hace st.plotly_chart"""
+    return lambda: construir().to_json()
+
+
+def cargar_modelo(documentos):
+    """Versión activa del registro o, si está vacío, los archivos sueltos con preprocesamiento ajustado"""
+    import registro_modelos
+
+    entrada = registro_modelos.entrada_activa()
+    if entrada is not None:
+        modelo, preprocesador, _ = registro_modelos.cargar_version(entrada['version'])
+        return modelo, preprocesador, entrada['version']
+
+    from tensorflow import keras
+    ruta = os.path.join(RAIZ, "mejor_modelo_desercion.keras")
+    modelo = keras.models.load_model(ruta)
+    preprocesador = Preprocesador.ajustar(pd.DataFrame([registro_modelo(doc) for doc in documentos[:5000]]))
+    return modelo, preprocesador, "archivos locales"
+
+
+def metadatos(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import plotly
+    return {
+        'commit': commit,
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'n': args.n,
+        'semilla': args.semilla,
+        'repeticiones': args.repeticiones,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'cpus': os.cpu_count(),
+    }
+
+
+def correr(args):
+    """(pasos, memoria de df frente a su presupuesto)"""
+    r = {}
+    rep = args.repeticiones
+    documentos = generar_documentos(args.n, args.semilla)
+
+    # Carga: decodificar los documentos como llegan de MongoDB
+    try:
+        import bson
+        binario = [bson.encode(doc) for doc in documentos]
+        documentos = medir(r, 'carga.decodificar_bson', lambda: [bson.decode(b) for b in binario], rep)
+    except ImportError:
+        texto = json.dumps(documentos)
+        documentos = medir(r, 'carga.decodificar_json', lambda: json.loads(texto), rep)
+
+    # Datos derivados
+    df = medir(r, 'datos.construir_df', lambda: construir_df(documentos), rep)
+    medir(r, 'datos.version', lambda: version_tabla(df), rep)
+    memoria = {'mb': round(mb_tabla(df), 3), 'presupuesto_mb': round(presupuesto_mb(len(df)), 3)}
+    memoria['cumple'] = bool(memoria['mb'] <= memoria['presupuesto_mb'])
+    almacen = medir(r, 'datos.almacen_materias', lambda: AlmacenMaterias.desde_documentos(documentos), rep)
+    df['cohorte'] = almacen.primer_periodo()
+    matriculas = almacen.matriculas()
+
+    def particiones_nuevas():
+        particiones = ParticionesPeriodo()
+        particiones.actualizar('v', df['periodo'].fillna(0).astype(int), df['cohorte'], df['desertor'].fillna(0),
+                               df['graduado'].fillna(0), *matriculas)
+        return particiones
+    particiones = medir(r, 'datos.particiones_periodo', particiones_nuevas, rep)
+
+    # Sección 1
+    medir(r, 'seccion1.genero', figura(lambda: graficos.grafico_genero(graficos.conteo_genero(df))), rep)
+    medir(r, 'seccion1.edad', figura(lambda: graficos.grafico_edad(graficos.conteo_edad(df))), rep)
+    medir(r, 'seccion1.edad_genero', figura(lambda: graficos.grafico_edad_genero(graficos.conteo_edad_genero(df))), rep)
+    estudiantes_mapa = medir(r, 'seccion1.departamentos', lambda: graficos.estudiantes_por_departamento(df), rep)
+    if hasattr(graficos.px, 'choropleth_mapbox'):
+        geojson_vacio = {'type': 'FeatureCollection', 'features': []}
+        medir(r, 'seccion1.mapa', figura(lambda: graficos.grafico_mapa(estudiantes_mapa, geojson_vacio)), rep)
+    ciudades = medir(r, 'seccion1.ciudades_atlantico', lambda: graficos.estudiantes_atlantico_por_ciudad(df), rep)
+    if ciudades is not None:
+        otras = ciudades[ciudades['ciudad'] != 'Barranquilla']
+        medir(r, 'seccion1.grafico_ciudades', figura(lambda: graficos.grafico_ciudades(otras)), rep)
+
+    # Sección 2
+    df_sin_graduados = df[df['graduado'] == 0].copy()
+    df_desertores = df_sin_graduados[df_sin_graduados['desertor'] == 1]
+    medir(r, 'seccion2.genero', figura(lambda: graficos.grafico_genero_desercion(graficos.desercion_genero(df_sin_graduados))), rep)
+    medir(r, 'seccion2.edad', figura(lambda: graficos.grafico_edad_desercion(graficos.desercion_edad(df_sin_graduados))), rep)
+    medir(r, 'seccion2.edad_genero', figura(lambda: graficos.grafico_edad_genero_desercion(graficos.desercion_edad_genero(df_sin_graduados))), rep)
+    medir(r, 'seccion2.programas', figura(lambda: graficos.grafico_programas(graficos.desercion_programa(df_sin_graduados))), rep)
+    medir(r, 'seccion2.estratos', figura(lambda: graficos.grafico_estratos(graficos.desertores_por_estrato(df_desertores))), rep)
+    medir(r, 'seccion2.departamentos', figura(lambda: graficos.grafico_departamentos_desercion(graficos.desercion_departamento(df_sin_graduados))), rep)
+    medir(r, 'seccion2.promedio_box', figura(lambda: graficos.grafico_promedio_box(df_sin_graduados)), rep)
+    medir(r, 'seccion2.icfes', figura(lambda: graficos.grafico_icfes(graficos.promedios_icfes(df_sin_graduados))), rep)
+    medir(r, 'seccion2.colegio', figura(lambda: graficos.grafico_colegio(graficos.desercion_colegio(df_sin_graduados))), rep)
+    medir(r, 'seccion2.calendario', figura(lambda: graficos.grafico_calendario(graficos.desercion_calendario(df_sin_graduados))), rep)
+    df_multi = graficos.datos_multivariable(df_sin_graduados)
+    for i, tipo in enumerate(graficos.TIPOS_MULTIVARIABLE, start=1):
+        medir(r, f'seccion2.multivariable_{i}', figura(lambda: graficos.grafico_multivariable(df_multi, tipo)), rep)
+
+    # Sección 5
+    por_curso = medir(r, 'seccion5.tasa_por_curso', lambda: almacen.tasa_por_curso(), rep)
+    por_categoria = medir(r, 'seccion5.tasa_por_categoria', lambda: almacen.tasa_por_categoria(), rep)
+    por_periodo = medir(r, 'seccion5.tasa_por_periodo', lambda: almacen.tasa_por_periodo(), rep)
+    desertor = df['desertor'].fillna(0).to_numpy()
+    medir(r, 'seccion5.cursos_puerta', lambda: almacen.cursos_puerta(desertor), rep)
+    medir(r, 'seccion5.grafico_cursos', figura(lambda: graficos.grafico_cursos(por_curso)), rep)
+    medir(r, 'seccion5.grafico_categorias', figura(lambda: graficos.grafico_categorias(por_categoria)), rep)
+    medir(r, 'seccion5.grafico_periodos', figura(lambda: graficos.grafico_perdida_periodos(por_periodo)), rep)
+
+    # Sección 6
+    serie = medir(r, 'seccion6.serie', particiones.tabla, rep)
+    medir(r, 'seccion6.grafico_matricula', figura(lambda: graficos.grafico_matricula_periodos(serie)), rep)
+    medir(r, 'seccion6.grafico_cohortes', figura(lambda: graficos.grafico_cohortes(serie)), rep)
+
+    if args.sin_modelo:
+        return r, memoria
+
+    # Secciones 3 y 4: predicción individual, en lote y ranking de riesgo
+    modelo, preprocesador, version = cargar_modelo(documentos)
+    print(f"modelo: {version}")
+    from sensibilidad import evaluar_grilla
+
+    def prediccion_individual():
+        X = preprocesador.transformar(pd.DataFrame([registro_prediccion(ESTUDIANTE_EJEMPLO)]))
+        return modelo.predict(X, verbose=0)
+    prediccion_individual()
+    medir(r, 'seccion3.prediccion_individual', prediccion_individual, rep)
+    cache = CachePredicciones()
+    cache.obtener(version, ESTUDIANTE_EJEMPLO, prediccion_individual)
+    medir(r, 'seccion3.prediccion_cache', lambda: cache.obtener(version, ESTUDIANTE_EJEMPLO, prediccion_individual), rep)
+    registro = registro_prediccion(ESTUDIANTE_EJEMPLO)
+    medir(r, 'seccion3.what_if', lambda: evaluar_grilla(modelo, preprocesador, registro, 'promedio', 'materias_perdidas'), rep)
+
+    registros = [registro_modelo(doc) for doc in documentos]
+    puntajes = medir(r, 'seccion4.prediccion_lote', lambda: puntuar_poblacion(modelo, preprocesador, registros), rep)
+    elegibles = ((df['graduado'] != 1) & (df['desertor'] != 1)).fillna(True)
+    filtros = {'programa': df['programa'], 'departamento': df['departamento'], 'periodo': df['periodo'].fillna(0).astype(int)}
+    indice = medir(r, 'seccion4.indice_riesgo', lambda: IndiceRiesgo(puntajes, filtros, elegibles), rep)
+    medir(r, 'seccion4.top_k', lambda: indice.seleccionar(200, programa=indice.opciones('programa')[1]), rep)
+    return r, memoria
+
+
+def comparar(actual, ruta_anterior):
+    with open(ruta_anterior, 'r', encoding='utf-8') as f:
+        anterior = json.load(f)
+    print(f"\nComparación con {ruta_anterior} (commit {anterior['metadatos'].get('commit')})")
+    print(f"{'paso':<45} {'antes':>10} {'ahora':>10} {'ahora/antes':>12}")
+    for nombre, paso in actual['pasos'].items():
+        previo = anterior['pasos'].get(nombre)
+        if previo is None:
+            print(f"{nombre:<45} {'-':>10} {paso['mediana_ms']:>10.2f}")
+            continue
+        razon = paso['mediana_ms'] / previo['mediana_ms'] if previo['mediana_ms'] else float('nan')
+        print(f"{nombre:<45} {previo['mediana_ms']:>10.2f} {paso['mediana_ms']:>10.2f} {razon:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del dashboard sin Streamlit")
+    parser.add_argument('--n', type=int, default=20_000, help="Estudiantes sintéticos")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--sin-modelo', action='store_true', help="Omite las secciones que cargan TensorFlow")
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO_RESULTADOS, "suite.json"))
+    parser.add_argument('--comparar', help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    pasos, memoria = correr(args)
+    resultado = {'metadatos': metadatos(args), 'pasos': pasos, 'memoria_df': memoria}
+
+    os.makedirs(os.path.dirname(args.salida) or ".", exist_ok=True)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=4)
+    print(f"\nResultados en {args.salida}")
+
+    if args.comparar:
+        comparar(resultado, args.comparar)
+
+    if not memoria['cumple']:
+        print(f"df ocupa {memoria['mb']:.2f} MB, por encima del presupuesto de {memoria['presupuesto_mb']:.2f} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
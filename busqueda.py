@@ -0,0 +1,683 @@
+"""
+Búsqueda paralela de hiperparámetros para la red neuronal de deserción.
+
+Reproduce la grilla de `modelocode.ipynb` (muestreo, pesos, arquitectura,
+dropout, learning rate, batch size, optimizador y regularización) pero reparte
+las configuraciones entre un pool de procesos, fija los hilos de CPU de cada
+worker y guarda un checkpoint en disco para poder reanudar una búsqueda
+interrumpida. La primera línea del checkpoint es un encabezado con las
+épocas, el hash del .npz y la huella de la grilla: si alguno cambió, la
+búsqueda no se reanuda (--reiniciar empieza de cero). Las variantes SMOTE se calculan una vez por estrategia y se
+comparten con los workers por memoria compartida (ver `cache_muestreo.py`).
+
+Los datos de entrada se leen de un `.npz` con `X_train`, `y_train`, `X_val` y
+`y_val` ya escalados, generado desde el notebook:
+
+    np.savez_compressed('datos_entrenamiento.npz', X_train=X_train_scaled,
+                        y_train=y_train.values, X_val=X_val_scaled, y_val=y_val.values)
+
+Uso:
+    python busqueda.py --datos datos_entrenamiento.npz --workers 4
+    python busqueda.py --datos datos_entrenamiento.npz --workers 4 --reiniciar
+    python busqueda.py --datos datos_entrenamiento.npz --escalado 1 2 4 8 --max-configs 16
+    python busqueda.py --datos datos_entrenamiento.npz --modo sucesiva --eta 3
+    python busqueda.py --datos datos_entrenamiento.npz --benchmark --objetivo v1
+"""
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import cache_muestreo
+from metricas import UMBRALES_NOTEBOOK, barrido_umbrales
+
+# ============================================================================
+# GRILLA DE CONFIGURACIONES (igual que en modelocode.ipynb)
+# ============================================================================
+TECNICAS_MUESTREO = {
+    'smote_30': 0.30,
+    'smote_40': 0.40,
+    'smote_50': 0.50,
+    'smote_60': 0.60
+}
+
+CONFIGURACIONES_PESOS = {
+    'sin_pesos': None,
+    'balanced': 1.0,
+    'high_recall_1.5x': 1.5,
+    'high_recall_2x': 2.0,
+    'high_recall_3x': 3.0
+}
+
+ARQUITECTURAS = {
+    'light_3': [128, 64, 32],
+    'medium_4': [512, 256, 128, 64],
+    'deep_3': [512, 256, 256, 128, 64]
+}
+
+HIPERPARAMETROS = {
+    'dropout_rates': [0.2, 0.3, 0.4],
+    'learning_rates': [0.001, 0.002],
+    'batch_sizes': [64, 128, 256],
+    'optimizers': ['adam', 'rmsprop']
+}
+
+REGULARIZACIONES = {
+    'sin_regularizacion': None,
+    'l2_very_light': 0.0001,
+    'l2_light': 0.001
+}
+
+# Umbrales de v1 y v2 juntos: cada modelo se entrena una sola vez y se evalúa con ambas funciones objetivo
+UMBRALES = UMBRALES_NOTEBOOK
+
+DIRECTORIO_RESULTADOS = "busqueda_resultados"
+
+
+def generar_configuraciones(max_configs=100, semilla=42):
+    """Genera las configuraciones en el mismo orden y muestreo que el notebook"""
+    random.seed(semilla)
+    np.random.seed(semilla)
+
+    configuraciones = []
+    for muestreo_nombre in TECNICAS_MUESTREO:
+        for peso_nombre in CONFIGURACIONES_PESOS:
+            for arq_nombre, capas in ARQUITECTURAS.items():
+                for dropout in HIPERPARAMETROS['dropout_rates']:
+                    for lr in HIPERPARAMETROS['learning_rates']:
+                        for bs in HIPERPARAMETROS['batch_sizes']:
+                            for opt in HIPERPARAMETROS['optimizers']:
+                                for reg_nombre in REGULARIZACIONES:
+                                    configuraciones.append({
+                                        'muestreo_nombre': muestreo_nombre,
+                                        'peso_nombre': peso_nombre,
+                                        'arquitectura_nombre': arq_nombre,
+                                        'capas': capas,
+                                        'dropout': dropout,
+                                        'learning_rate': lr,
+                                        'batch_size': bs,
+                                        'optimizer': opt,
+                                        'regularizacion_nombre': reg_nombre,
+                                    })
+
+    if max_configs is not None and len(configuraciones) > max_configs:
+        random.shuffle(configuraciones)
+        configuraciones = configuraciones[:max_configs]
+
+    # Mismo índice que el notebook (enumerate desde 1): modelo_38 es config_idx 38
+    for idx, config in enumerate(configuraciones, 1):
+        config['config_idx'] = idx
+    return configuraciones
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+# Estado por proceso: datos y TensorFlow se cargan una sola vez por worker
+_ESTADO = {}
+
+
+def fijar_hilos(ranura, hilos_por_worker):
+    """Limita los hilos de TensorFlow/BLAS y fija el proceso a un bloque de CPUs"""
+    hilos = str(hilos_por_worker)
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                     'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[variable] = hilos
+
+    if hasattr(os, 'sched_setaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+        inicio = (ranura * hilos_por_worker) % len(cpus)
+        bloque = {cpus[(inicio + i) % len(cpus)] for i in range(hilos_por_worker)}
+        os.sched_setaffinity(0, bloque)
+
+
+def _inicializar_worker(ruta_datos, cola_ranuras, hilos_por_worker, descriptores_muestreo):
+    ranura = cola_ranuras.get()
+    fijar_hilos(ranura, hilos_por_worker)
+
+    # TensorFlow se importa después de fijar las variables de entorno
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(hilos_por_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    datos = np.load(ruta_datos)
+    _ESTADO['y_train'] = datos['y_train'].astype(int)
+    _ESTADO['X_val'] = datos['X_val']
+    _ESTADO['y_val'] = datos['y_val'].astype(int)
+    _ESTADO['ranura'] = ranura
+    # Variantes SMOTE calculadas una sola vez por el proceso principal
+    _ESTADO['variantes'] = cache_muestreo.adjuntar(descriptores_muestreo)
+
+
+def _pesos_clase(peso_nombre, y_train):
+    """Equivalente a compute_class_weight('balanced') con el multiplicador del notebook"""
+    factor = CONFIGURACIONES_PESOS[peso_nombre]
+    if factor is None:
+        return None
+    conteos = np.bincount(y_train, minlength=2)
+    base = len(y_train) / (2 * conteos)
+    return {0: float(base[0]), 1: float(base[1] * factor)}
+
+
+def _construir_modelo(config, n_features):
+    from tensorflow.keras.layers import Dense, Dropout, Input
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.optimizers import Adam, RMSprop
+    from tensorflow.keras.regularizers import l2
+
+    factor_reg = REGULARIZACIONES[config['regularizacion_nombre']]
+    regularizacion = l2(factor_reg) if factor_reg is not None else None
+
+    modelo = Sequential()
+    modelo.add(Input(shape=(n_features,)))
+    for units in config['capas']:
+        modelo.add(Dense(units, activation='relu', kernel_regularizer=regularizacion))
+        modelo.add(Dropout(config['dropout']))
+    modelo.add(Dense(1, activation='sigmoid'))
+
+    if config['optimizer'] == 'adam':
+        opt = Adam(learning_rate=config['learning_rate'])
+    else:
+        opt = RMSprop(learning_rate=config['learning_rate'])
+
+    modelo.compile(optimizer=opt, loss='binary_crossentropy', metrics=['accuracy'])
+    return modelo
+
+
+def _remuestrear(config):
+    return _ESTADO['variantes'][config['muestreo_nombre']]
+
+
+def _evaluar(config, y_pred_proba, epocas):
+    """Filas de resultados por umbral, con el mismo formato que resultados_busqueda del notebook"""
+    barrido = barrido_umbrales(_ESTADO['y_val'], y_pred_proba, UMBRALES)
+    filas = []
+    for i, thresh in enumerate(UMBRALES):
+        filas.append({
+            'modelo_id': f"modelo_{config['config_idx']}", 'config_idx': config['config_idx'],
+            'muestreo': config['muestreo_nombre'], 'pesos': config['peso_nombre'],
+            'arquitectura': config['arquitectura_nombre'], 'capas': str(config['capas']),
+            'dropout': config['dropout'], 'learning_rate': config['learning_rate'],
+            'batch_size': config['batch_size'], 'optimizer': config['optimizer'],
+            'regularizacion': config['regularizacion_nombre'], 'threshold': thresh,
+            'recall': float(barrido['recall'][i]), 'precision': float(barrido['precision'][i]),
+            'f1': float(barrido['f1'][i]), 'auc': float(barrido['auc'][i]),
+            'score_custom': float(barrido['score_custom'][i]),
+            'score_custom_v1': float(barrido['score_custom_v1'][i]),
+            'tp': int(barrido['tp'][i]), 'fp': int(barrido['fp'][i]),
+            'tn': int(barrido['tn'][i]), 'fn': int(barrido['fn'][i]),
+            'epochs': epocas
+        })
+    return filas
+
+
+def entrenar_configuracion(config, epocas=100, dir_modelos=None):
+    """Entrena y evalúa una configuración dentro de un worker ya inicializado"""
+    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+
+    inicio = time.time()
+    inicio_cpu = time.process_time()
+    try:
+        X_train_prep, y_train_prep = _remuestrear(config)
+        modelo = _construir_modelo(config, X_train_prep.shape[1])
+
+        early_stop = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True, verbose=0)
+        reduce_lr = ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=0.00001, verbose=0)
+        history = modelo.fit(
+            X_train_prep, y_train_prep, epochs=epocas, batch_size=config['batch_size'],
+            validation_data=(_ESTADO['X_val'], _ESTADO['y_val']),
+            class_weight=_pesos_clase(config['peso_nombre'], _ESTADO['y_train']),
+            callbacks=[early_stop, reduce_lr], verbose=0
+        )
+
+        y_pred_proba = modelo.predict(_ESTADO['X_val'], verbose=0).flatten()
+        filas = _evaluar(config, y_pred_proba, len(history.history['loss']))
+
+        if dir_modelos is not None:
+            modelo.save(os.path.join(dir_modelos, f"modelo_{config['config_idx']}.keras"))
+
+        return {'config_idx': config['config_idx'], 'filas': filas,
+                'segundos': time.time() - inicio, 'cpu_segundos': time.process_time() - inicio_cpu,
+                'ranura': _ESTADO['ranura']}
+    except Exception as e:
+        return {'config_idx': config['config_idx'], 'error': str(e),
+                'segundos': time.time() - inicio, 'cpu_segundos': time.process_time() - inicio_cpu,
+                'ranura': _ESTADO.get('ranura')}
+
+
+def entrenar_tramo(config, epoca_inicial, epoca_final, dir_estado):
+    """Continúa el entrenamiento de una configuración hasta epoca_final (una ronda de successive halving)"""
+    from tensorflow import keras
+
+    inicio = time.time()
+    inicio_cpu = time.process_time()
+    ruta_modelo = os.path.join(dir_estado, f"modelo_{config['config_idx']}.keras")
+    try:
+        X_train_prep, y_train_prep = _remuestrear(config)
+        if epoca_inicial > 0 and os.path.exists(ruta_modelo):
+            # El .keras guarda también el estado del optimizador
+            modelo = keras.models.load_model(ruta_modelo)
+        else:
+            epoca_inicial = 0
+            modelo = _construir_modelo(config, X_train_prep.shape[1])
+
+        modelo.fit(
+            X_train_prep, y_train_prep, initial_epoch=epoca_inicial, epochs=epoca_final,
+            batch_size=config['batch_size'],
+            class_weight=_pesos_clase(config['peso_nombre'], _ESTADO['y_train']),
+            verbose=0
+        )
+        modelo.save(ruta_modelo)
+
+        y_pred_proba = modelo.predict(_ESTADO['X_val'], verbose=0).flatten()
+        filas = _evaluar(config, y_pred_proba, epoca_final)
+
+        return {'config_idx': config['config_idx'], 'filas': filas,
+                'segundos': time.time() - inicio, 'cpu_segundos': time.process_time() - inicio_cpu,
+                'ranura': _ESTADO['ranura']}
+    except Exception as e:
+        return {'config_idx': config['config_idx'], 'error': str(e),
+                'segundos': time.time() - inicio, 'cpu_segundos': time.process_time() - inicio_cpu,
+                'ranura': _ESTADO.get('ranura')}
+
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+class CheckpointDistinto(ValueError):
+    """El checkpoint existente es de otra búsqueda (épocas, datos o grilla)"""
+
+
+def _huella_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def encabezado_checkpoint(ruta_datos, configuraciones, epocas):
+    """Lo que debe coincidir para reanudar: épocas, hash del .npz y huella de la grilla"""
+    grilla = json.dumps(configuraciones, sort_keys=True, default=str).encode('utf-8')
+    return {'epocas': epocas, 'datos': _huella_archivo(ruta_datos),
+            'grilla': hashlib.sha256(grilla).hexdigest()[:16]}
+
+
+def leer_checkpoint(ruta, encabezado=None):
+    """Resultados ya completados, indexados por config_idx.
+    Con `encabezado`, CheckpointDistinto si el checkpoint es de otra búsqueda (o no tiene encabezado)"""
+    completados = {}
+    if not os.path.exists(ruta):
+        return completados
+    guardado = None
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                # Última línea truncada por una interrupción: se vuelve a entrenar
+                continue
+            if 'encabezado' in registro:
+                guardado = registro['encabezado']
+                continue
+            completados[registro['config_idx']] = registro
+    if encabezado is not None and guardado != encabezado:
+        if guardado is None:
+            motivo = "no tiene encabezado"
+        else:
+            motivo = "cambió " + ", ".join(c for c in encabezado if guardado.get(c) != encabezado[c])
+        raise CheckpointDistinto(f"El checkpoint {ruta} es de otra búsqueda ({motivo}); "
+                         f"use --reiniciar o indique otro --checkpoint")
+    return completados
+
+
+def _agregar_checkpoint(ruta, registro):
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+def repartir_cpus(n_workers):
+    """Número de workers y de hilos de CPU por worker"""
+    n_cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    n_workers = n_workers or n_cpus
+    return n_workers, max(1, n_cpus // n_workers)
+
+
+@contextmanager
+def _crear_pool(ruta_datos, configuraciones, n_workers, hilos_por_worker):
+    """Pool de workers con las variantes SMOTE de las configuraciones publicadas en memoria compartida"""
+    with np.load(ruta_datos) as datos:
+        X_train = datos['X_train']
+        y_train = datos['y_train'].astype(int)
+    estrategias = {nombre: TECNICAS_MUESTREO[nombre]
+                   for nombre in sorted({config['muestreo_nombre'] for config in configuraciones})}
+    variantes = cache_muestreo.obtener_variantes(X_train, y_train, estrategias)
+    descriptores, bloques = cache_muestreo.publicar(variantes)
+
+    contexto = mp.get_context('spawn')
+    cola_ranuras = contexto.Queue()
+    for ranura in range(n_workers):
+        cola_ranuras.put(ranura)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=contexto,
+                                 initializer=_inicializar_worker,
+                                 initargs=(ruta_datos, cola_ranuras, hilos_por_worker, descriptores)) as pool:
+            yield pool
+    finally:
+        cache_muestreo.liberar(bloques)
+
+
+def ejecutar_busqueda(ruta_datos, configuraciones, n_workers=None, ruta_checkpoint=None,
+                      epocas=100, dir_modelos=None, verbose=True, reiniciar=False):
+    """Entrena las configuraciones pendientes en paralelo y devuelve (resultados, resumen).
+    Solo reanuda un checkpoint de la misma búsqueda; `reiniciar` lo descarta"""
+    if ruta_checkpoint is None:
+        ruta_checkpoint = os.path.join(DIRECTORIO_RESULTADOS, "checkpoint.jsonl")
+    os.makedirs(os.path.dirname(ruta_checkpoint) or ".", exist_ok=True)
+    if dir_modelos is not None:
+        os.makedirs(dir_modelos, exist_ok=True)
+
+    encabezado = encabezado_checkpoint(ruta_datos, configuraciones, epocas)
+    if reiniciar and os.path.exists(ruta_checkpoint):
+        os.remove(ruta_checkpoint)
+    completados = leer_checkpoint(ruta_checkpoint, encabezado)
+    if not os.path.exists(ruta_checkpoint):
+        _agregar_checkpoint(ruta_checkpoint, {'encabezado': encabezado})
+    pendientes = [c for c in configuraciones if c['config_idx'] not in completados]
+    if verbose and completados:
+        print(f"Reanudando: {len(completados)} configuraciones en checkpoint, {len(pendientes)} pendientes")
+
+    n_workers, hilos_por_worker = repartir_cpus(n_workers)
+    inicio = time.time()
+    entrenados = 0
+    cpu_segundos = 0.0
+    if pendientes:
+        with _crear_pool(ruta_datos, pendientes, n_workers, hilos_por_worker) as pool:
+            futuros = [pool.submit(entrenar_configuracion, config, epocas, dir_modelos) for config in pendientes]
+            for futuro in as_completed(futuros):
+                registro = futuro.result()
+                if 'error' in registro:
+                    print(f"Error en modelo {registro['config_idx']}: {registro['error']}")
+                    continue
+                _agregar_checkpoint(ruta_checkpoint, registro)
+                completados[registro['config_idx']] = registro
+                entrenados += 1
+                cpu_segundos += registro['cpu_segundos']
+                if verbose:
+                    print(f"[{len(completados)}/{len(configuraciones)}] modelo_{registro['config_idx']} "
+                          f"({registro['segundos']:.1f}s, worker {registro['ranura']})")
+
+    segundos = time.time() - inicio
+    resumen = {
+        'workers': n_workers,
+        'hilos_por_worker': hilos_por_worker,
+        'modelos': entrenados,
+        'segundos': segundos,
+        'cpu_segundos': cpu_segundos,
+        'modelos_por_hora': entrenados / segundos * 3600 if segundos > 0 and entrenados else 0.0
+    }
+
+    indices = {c['config_idx'] for c in configuraciones}
+    filas = [fila for idx, registro in completados.items() if idx in indices for fila in registro['filas']]
+    return pd.DataFrame(filas), resumen
+
+
+def medir_escalado(ruta_datos, configuraciones, lista_workers, epocas=100):
+    """Entrena las mismas configuraciones con distinto número de workers y compara tiempos"""
+    resumenes = []
+    for n_workers in lista_workers:
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta_checkpoint = os.path.join(directorio, "checkpoint.jsonl")
+            _, resumen = ejecutar_busqueda(ruta_datos, configuraciones, n_workers=n_workers,
+                                           ruta_checkpoint=ruta_checkpoint, epocas=epocas, verbose=False)
+        resumenes.append(resumen)
+        print(f"{n_workers} workers: {resumen['segundos']:.1f}s, {resumen['modelos_por_hora']:.1f} modelos/hora")
+
+    df_escalado = pd.DataFrame(resumenes)
+    df_escalado['aceleracion'] = df_escalado['segundos'].iloc[0] / df_escalado['segundos']
+    return df_escalado
+
+
+# ============================================================================
+# SUCCESSIVE HALVING / HYPERBAND
+# ============================================================================
+def _columna_score(objetivo):
+    return 'score_custom_v1' if objetivo == 'v1' else 'score_custom'
+
+
+def _ejecutar_rondas(pool, configuraciones, epocas_min, eta, epocas_max, dir_estado, objetivo, verbose):
+    """Successive halving sobre un pool ya creado; devuelve (filas, cpu_segundos)"""
+    columna = _columna_score(objetivo)
+    sobrevivientes = list(configuraciones)
+    epoca_actual = 0
+    presupuesto = min(epocas_min, epocas_max)
+    filas = []
+    cpu_segundos = 0.0
+    ronda = 0
+
+    while sobrevivientes:
+        futuros = [pool.submit(entrenar_tramo, config, epoca_actual, presupuesto, dir_estado)
+                   for config in sobrevivientes]
+        puntajes = {}
+        for futuro in as_completed(futuros):
+            registro = futuro.result()
+            cpu_segundos += registro['cpu_segundos']
+            if 'error' in registro:
+                print(f"Error en modelo {registro['config_idx']}: {registro['error']}")
+                continue
+            for fila in registro['filas']:
+                fila['ronda'] = ronda
+            filas.extend(registro['filas'])
+            # Cada configuración compite con su mejor umbral
+            puntajes[registro['config_idx']] = max(fila[columna] for fila in registro['filas'])
+
+        if not puntajes:
+            break
+        if verbose:
+            print(f"Ronda {ronda}: {len(puntajes)} configuraciones a {presupuesto} épocas, "
+                  f"mejor {columna} = {max(puntajes.values()):.4f}")
+        if presupuesto >= epocas_max or len(puntajes) <= 1:
+            break
+
+        n_siguiente = max(1, len(puntajes) // eta)
+        mejores = set(sorted(puntajes, key=puntajes.get, reverse=True)[:n_siguiente])
+        sobrevivientes = [config for config in sobrevivientes if config['config_idx'] in mejores]
+        epoca_actual = presupuesto
+        presupuesto = min(epocas_max, presupuesto * eta)
+        ronda += 1
+
+    return filas, cpu_segundos
+
+
+def _resumir_rondas(filas, objetivo, segundos, cpu_segundos, n_workers, hilos_por_worker):
+    df_resultados = pd.DataFrame(filas)
+    resumen = {
+        'workers': n_workers,
+        'hilos_por_worker': hilos_por_worker,
+        'modelos': int(df_resultados[['bracket', 'config_idx']].drop_duplicates().shape[0]) if len(df_resultados) else 0,
+        'segundos': segundos,
+        'cpu_segundos': cpu_segundos,
+        'mejor': None
+    }
+    if len(df_resultados) > 0:
+        # Solo la última ronda de cada configuración corresponde al modelo guardado en disco
+        ultima = df_resultados.groupby(['bracket', 'config_idx'])['ronda'].transform('max')
+        finales = df_resultados[df_resultados['ronda'] == ultima]
+        resumen['mejor'] = finales.loc[finales[_columna_score(objetivo)].idxmax()].to_dict()
+    return df_resultados, resumen
+
+
+def busqueda_sucesiva(ruta_datos, configuraciones, n_workers=None, epocas_min=1, eta=3, epocas_max=81,
+                      objetivo='v2', dir_estado=None, verbose=True):
+    """Entrena todas las configuraciones pocas épocas y multiplica por eta el presupuesto del mejor 1/eta"""
+    n_workers, hilos_por_worker = repartir_cpus(n_workers)
+    dir_estado = dir_estado or os.path.join(DIRECTORIO_RESULTADOS, "sucesiva")
+    os.makedirs(dir_estado, exist_ok=True)
+
+    inicio = time.time()
+    with _crear_pool(ruta_datos, configuraciones, n_workers, hilos_por_worker) as pool:
+        filas, cpu_segundos = _ejecutar_rondas(pool, configuraciones, epocas_min, eta, epocas_max,
+                                               dir_estado, objetivo, verbose)
+    for fila in filas:
+        fila['bracket'] = 0
+    return _resumir_rondas(filas, objetivo, time.time() - inicio, cpu_segundos, n_workers, hilos_por_worker)
+
+
+def busqueda_hyperband(ruta_datos, configuraciones, n_workers=None, eta=3, epocas_max=81,
+                       objetivo='v2', dir_estado=None, semilla=42, verbose=True):
+    """Hyperband: varias rondas de successive halving con distinto balance entre cantidad y épocas"""
+    n_workers, hilos_por_worker = repartir_cpus(n_workers)
+    dir_estado = dir_estado or os.path.join(DIRECTORIO_RESULTADOS, "hyperband")
+    s_max = int(math.log(epocas_max) / math.log(eta) + 1e-9)
+    aleatorio = random.Random(semilla)
+
+    inicio = time.time()
+    filas = []
+    cpu_segundos = 0.0
+    with _crear_pool(ruta_datos, configuraciones, n_workers, hilos_por_worker) as pool:
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            epocas_min = max(1, int(round(epocas_max * eta ** -s)))
+            muestra = aleatorio.sample(configuraciones, min(n, len(configuraciones)))
+            # Cada bracket guarda sus modelos aparte: una configuración puede repetirse entre brackets
+            dir_bracket = os.path.join(dir_estado, f"bracket_{s}")
+            os.makedirs(dir_bracket, exist_ok=True)
+            if verbose:
+                print(f"Bracket {s}: {len(muestra)} configuraciones desde {epocas_min} épocas")
+
+            filas_bracket, cpu_bracket = _ejecutar_rondas(pool, muestra, epocas_min, eta, epocas_max,
+                                                          dir_bracket, objetivo, verbose)
+            for fila in filas_bracket:
+                fila['bracket'] = s
+            filas.extend(filas_bracket)
+            cpu_segundos += cpu_bracket
+
+    return _resumir_rondas(filas, objetivo, time.time() - inicio, cpu_segundos, n_workers, hilos_por_worker)
+
+
+def comparar_estrategias(ruta_datos, configuraciones, n_workers=None, epocas=100, eta=3,
+                         objetivo='v1', ruta_salida=None, ruta_info="mejor_modelo_info.json"):
+    """Benchmark: grilla completa vs successive halving sobre las mismas configuraciones"""
+    with tempfile.TemporaryDirectory() as directorio:
+        df_completa, resumen_completa = ejecutar_busqueda(
+            ruta_datos, configuraciones, n_workers=n_workers, epocas=epocas,
+            ruta_checkpoint=os.path.join(directorio, "checkpoint.jsonl"), verbose=False)
+        _, resumen_sucesiva = busqueda_sucesiva(
+            ruta_datos, configuraciones, n_workers=n_workers, eta=eta,
+            epocas_max=epocas, objetivo=objetivo, dir_estado=os.path.join(directorio, "sucesiva"))
+
+    columna = _columna_score(objetivo)
+    mejor_completa = float(df_completa[columna].max()) if len(df_completa) else float('nan')
+    mejor_sucesiva = float(resumen_sucesiva['mejor'][columna]) if resumen_sucesiva['mejor'] else float('nan')
+
+    referencia = None
+    if os.path.exists(ruta_info):
+        with open(ruta_info, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        referencia = {'modelo_id': info['modelo_id'], 'score_custom': info['metricas']['score_custom']}
+
+    benchmark = {
+        'configuraciones': len(configuraciones),
+        'objetivo': objetivo,
+        'completa': {'segundos': resumen_completa['segundos'], 'cpu_segundos': resumen_completa['cpu_segundos'],
+                     'mejor_score': mejor_completa},
+        'sucesiva': {'segundos': resumen_sucesiva['segundos'], 'cpu_segundos': resumen_sucesiva['cpu_segundos'],
+                     'mejor_score': mejor_sucesiva, 'eta': eta, 'epocas_max': epocas},
+        'fraccion_cpu': resumen_sucesiva['cpu_segundos'] / resumen_completa['cpu_segundos']
+        if resumen_completa['cpu_segundos'] else None,
+        'calidad_relativa': mejor_sucesiva / mejor_completa if mejor_completa else None,
+        'referencia': referencia
+    }
+
+    ruta_salida = ruta_salida or os.path.join(DIRECTORIO_RESULTADOS, "benchmark_sucesiva.json")
+    os.makedirs(os.path.dirname(ruta_salida) or ".", exist_ok=True)
+    with open(ruta_salida, 'w', encoding='utf-8') as f:
+        json.dump(benchmark, f, indent=4, ensure_ascii=False)
+    return benchmark
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda paralela de hiperparámetros de la red neuronal")
+    parser.add_argument('--datos', default="datos_entrenamiento.npz")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-configs', type=int, default=100)
+    parser.add_argument('--epocas', type=int, default=100)
+    parser.add_argument('--checkpoint', default=os.path.join(DIRECTORIO_RESULTADOS, "checkpoint.jsonl"))
+    parser.add_argument('--reiniciar', action='store_true',
+                        help="Descarta el checkpoint y empieza de cero (necesario si cambió la búsqueda)")
+    parser.add_argument('--guardar-modelos', action='store_true')
+    parser.add_argument('--escalado', type=int, nargs='+', default=None,
+                        help="Lista de números de workers para medir tiempo total y modelos por hora")
+    parser.add_argument('--modo', choices=['completa', 'sucesiva', 'hyperband'], default='completa')
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--epocas-min', type=int, default=1)
+    parser.add_argument('--objetivo', choices=['v1', 'v2'], default='v2')
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Compara grilla completa vs successive halving (CPU y mejor score)")
+    args = parser.parse_args()
+
+    configuraciones = generar_configuraciones(max_configs=args.max_configs)
+
+    if args.escalado:
+        df_escalado = medir_escalado(args.datos, configuraciones, args.escalado, epocas=args.epocas)
+        print(df_escalado.to_string(index=False))
+        return
+
+    if args.benchmark:
+        benchmark = comparar_estrategias(args.datos, configuraciones, n_workers=args.workers,
+                                         epocas=args.epocas, eta=args.eta, objetivo=args.objetivo)
+        print(json.dumps(benchmark, indent=4, ensure_ascii=False))
+        return
+
+    if args.modo != 'completa':
+        if args.modo == 'sucesiva':
+            df_resultados, resumen = busqueda_sucesiva(args.datos, configuraciones, n_workers=args.workers,
+                                                       epocas_min=args.epocas_min, eta=args.eta,
+                                                       epocas_max=args.epocas, objetivo=args.objetivo)
+        else:
+            df_resultados, resumen = busqueda_hyperband(args.datos, configuraciones, n_workers=args.workers,
+                                                        eta=args.eta, epocas_max=args.epocas,
+                                                        objetivo=args.objetivo)
+        print(f"\nTiempo total: {resumen['segundos']:.1f}s, CPU: {resumen['cpu_segundos']:.1f}s")
+        if resumen['mejor'] is not None:
+            mejor = resumen['mejor']
+            print(f"Mejor: {mejor['modelo_id']} (threshold {mejor['threshold']}, {mejor['epochs']} épocas) "
+                  f"recall={mejor['recall']:.4f} precision={mejor['precision']:.4f} "
+                  f"{_columna_score(args.objetivo)}={mejor[_columna_score(args.objetivo)]:.4f}")
+        return
+
+    dir_modelos = os.path.join(DIRECTORIO_RESULTADOS, "modelos") if args.guardar_modelos else None
+    try:
+        df_resultados, resumen = ejecutar_busqueda(args.datos, configuraciones, n_workers=args.workers,
+                                                   ruta_checkpoint=args.checkpoint, epocas=args.epocas,
+                                                   dir_modelos=dir_modelos, reiniciar=args.reiniciar)
+    except CheckpointDistinto as e:
+        parser.error(str(e))
+
+    print(f"\nTiempo total: {resumen['segundos']:.1f}s con {resumen['workers']} workers "
+          f"({resumen['hilos_por_worker']} hilos c/u)")
+    print(f"Modelos por hora: {resumen['modelos_por_hora']:.1f}")
+    if len(df_resultados) > 0:
+        df_resultados.to_csv(os.path.join(DIRECTORIO_RESULTADOS, "resultados.csv"), index=False)
+        mejores = df_resultados.nlargest(10, 'score_custom')
+        print(mejores[['modelo_id', 'muestreo', 'arquitectura', 'threshold',
+                       'recall', 'precision', 'auc', 'score_custom']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
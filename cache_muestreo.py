@@ -0,0 +1,118 @@
+"""
+Caché de conjuntos de entrenamiento remuestreados con SMOTE.
+
+Solo hay cuatro estrategias de muestreo (smote_30 ... smote_60) y cientos de
+configuraciones por estrategia, así que cada variante se calcula una sola vez,
+se guarda en disco con clave (huella de los datos, estrategia) y se publica en
+memoria compartida para que todos los workers de `busqueda.py` la lean sin
+copiarla.
+"""
+import hashlib
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DIRECTORIO_CACHE = os.path.join("busqueda_resultados", "muestreo")
+
+# Bloques adjuntados por este proceso: deben seguir vivos mientras se usen las vistas
+_BLOQUES_ADJUNTOS = []
+
+
+def huella_datos(X, y):
+    """Hash estable de X_train/y_train para invalidar la caché si cambian los datos"""
+    h = hashlib.sha256()
+    for arreglo in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+        h.update(str(arreglo.shape).encode())
+        h.update(arreglo.dtype.str.encode())
+        h.update(arreglo.tobytes())
+    return h.hexdigest()[:16]
+
+
+def _remuestrear(X, y, estrategia):
+    from imblearn.over_sampling import SMOTE
+
+    smote = SMOTE(sampling_strategy=estrategia, random_state=42)
+    return smote.fit_resample(X, y)
+
+
+def obtener_variantes(X, y, estrategias, directorio=DIRECTORIO_CACHE):
+    """Devuelve {nombre: (X_res, y_res)} leyendo de disco o calculando SMOTE una vez por estrategia"""
+    X = np.asarray(X)
+    y = np.asarray(y)
+    os.makedirs(directorio, exist_ok=True)
+    huella = huella_datos(X, y)
+
+    variantes = {}
+    for nombre, estrategia in estrategias.items():
+        ruta = os.path.join(directorio, f"{huella}_{nombre}.npz")
+        if os.path.exists(ruta):
+            with np.load(ruta) as guardado:
+                variantes[nombre] = (guardado['X'], guardado['y'])
+            continue
+
+        X_res, y_res = _remuestrear(X, y, estrategia)
+        X_res = np.ascontiguousarray(X_res)
+        y_res = np.ascontiguousarray(y_res)
+        # Escritura atómica: un proceso interrumpido no deja un .npz a medias
+        ruta_tmp = ruta + ".tmp.npz"
+        np.savez(ruta_tmp, X=X_res, y=y_res)
+        os.replace(ruta_tmp, ruta)
+        variantes[nombre] = (X_res, y_res)
+    return variantes
+
+
+# ============================================================================
+# MEMORIA COMPARTIDA
+# ============================================================================
+def publicar_arreglo(arreglo, bloques):
+    bloque = shared_memory.SharedMemory(create=True, size=max(1, arreglo.nbytes))
+    destino = np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=bloque.buf)
+    destino[...] = arreglo
+    bloques.append(bloque)
+    return {'nombre': bloque.name, 'shape': arreglo.shape, 'dtype': arreglo.dtype.str}
+
+
+def publicar(variantes):
+    """Copia las variantes a memoria compartida; devuelve (descriptores, bloques)"""
+    bloques = []
+    descriptores = {}
+    for nombre, (X_res, y_res) in variantes.items():
+        descriptores[nombre] = {
+            'X': publicar_arreglo(np.ascontiguousarray(X_res), bloques),
+            'y': publicar_arreglo(np.ascontiguousarray(y_res), bloques),
+        }
+    return descriptores, bloques
+
+
+def adjuntar_bloque(nombre):
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)
+    except TypeError:
+        # Python < 3.13: los workers (spawn) comparten el resource tracker del proceso principal,
+        # así que volver a registrar el bloque no cambia nada y solo liberar() lo elimina
+        return shared_memory.SharedMemory(name=nombre)
+
+
+def _adjuntar_arreglo(descriptor):
+    bloque = adjuntar_bloque(descriptor['nombre'])
+    _BLOQUES_ADJUNTOS.append(bloque)
+    arreglo = np.ndarray(tuple(descriptor['shape']), dtype=np.dtype(descriptor['dtype']), buffer=bloque.buf)
+    arreglo.flags.writeable = False
+    return arreglo
+
+
+def adjuntar(descriptores):
+    """Vistas de solo lectura (sin copia) sobre las variantes publicadas por el proceso principal"""
+    return {nombre: (_adjuntar_arreglo(d['X']), _adjuntar_arreglo(d['y']))
+            for nombre, d in descriptores.items()}
+
+
+def liberar(bloques):
+    """Cierra y elimina los bloques creados con publicar()"""
+    for bloque in bloques:
+        bloque.close()
+        try:
+            bloque.unlink()
+        except FileNotFoundError:
+            pass
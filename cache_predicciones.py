@@ -0,0 +1,100 @@
+"""
+Caché de predicciones individuales (formulario del predictor).
+
+La clave es un hash canónico del registro del modelo: JSON con claves
+ordenadas y números normalizados (20 y 20.0 o 3.5 y np.float32(3.5) dan la
+misma clave). Cada entrada pertenece a una huella de modelo (versión +
+huella del preprocesamiento): si la huella cambia, la caché se vacía.
+
+LRU acotada a `max_entradas` con expiración por TTL; un solo objeto por
+proceso se comparte entre sesiones y es seguro entre hilos.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_ENTRADAS = 1024
+TTL_SEGUNDOS = 3600
+
+
+def _normalizar(valor):
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        numero = float(valor)
+        if np.isnan(numero):
+            return None
+        return int(numero) if numero.is_integer() else round(numero, 6)
+    return valor
+
+
+def clave_registro(registro):
+    """Hash canónico del registro: no depende del orden de las claves ni del tipo numérico"""
+    contenido = json.dumps(_normalizar(registro), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:32]
+
+
+class CachePredicciones:
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS, reloj=time.monotonic):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._reloj = reloj
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.huella_modelo = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.expiradas = 0
+        self.invalidaciones = 0
+
+    def _revisar_modelo(self, huella_modelo):
+        if huella_modelo != self.huella_modelo:
+            if self.huella_modelo is not None:
+                self.invalidaciones += 1
+            self._entradas.clear()
+            self.huella_modelo = huella_modelo
+
+    def obtener(self, huella_modelo, registro, calcular):
+        """Resultado guardado para (modelo, registro) o `calcular()` si no está o expiró"""
+        clave = clave_registro(registro)
+        with self._lock:
+            self._revisar_modelo(huella_modelo)
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                instante, valor = entrada
+                if self._reloj() - instante <= self.ttl:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+                self.expiradas += 1
+            self.fallos += 1
+
+        # El modelo corre fuera del lock para no bloquear a otras sesiones
+        valor = calcular()
+        with self._lock:
+            if huella_modelo == self.huella_modelo:
+                self._entradas[clave] = (self._reloj(), valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return valor
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+            'expiradas': self.expiradas,
+            'invalidaciones': self.invalidaciones,
+        }
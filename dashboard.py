@@ -3,12 +3,28 @@ from pymongo import MongoClient
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
 import numpy as np
-from tensorflow import keras
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+import registro_modelos
+from preprocesamiento import (Preprocesador, registro_modelo, registro_prediccion, tabla_registros,
+                               primeros_registros, registro_desde_tabla)
+from sensibilidad import VARIABLES_WHAT_IF, evaluar_grilla
+import explicaciones
+from riesgo import IndiceRiesgo, puntuar_poblacion, pagina, total_paginas
+from materias import AlmacenMaterias, formato_periodo
+from periodos import ParticionesPeriodo
+from tabla_estudiantes import construir_df, version_conjunta
+from cache_predicciones import CachePredicciones
+from indice_filtros import IndiceFiltros
+import graficos
+import instrumentacion
+from indice_estudiantes import (IndiceEstudiantes, entrada_desde_fila, OPCIONES_GENERO, OPCIONES_ESTRATO,
+                                OPCIONES_DISCAPACIDAD, OPCIONES_BECA, OPCIONES_COLEGIO, OPCIONES_BARRANQUILLA)
 import json
 import os
+import pickle
+import hashlib
+import threading
+import time
 
 st.set_page_config(
     page_title="Dashboard Deserción Estudiantil",
@@ -16,6 +32,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Tramo raíz del rerun (sin costo si DASHBOARD_INSTRUMENTACION no está activa)
+instrumentacion.iniciar_rerun()
+
 # ============================================================================
 # SIDEBAR - NAVEGACIÓN
 # ============================================================================
@@ -26,7 +45,8 @@ st.sidebar.markdown("""
 </div>
 """, unsafe_allow_html=True)
 st.sidebar.title("Dashboard Deserción")
-st.sidebar.markdown("### Periodo: 2025-10")
+# El selector de periodo se llena cuando ya están cargados los datos
+contenedor_periodo = st.sidebar.container()
 
 # Botón para refrescar datos
 if st.sidebar.button("Refrescar Datos", type="primary", use_container_width=True):
@@ -48,7 +68,10 @@ seccion = st.sidebar.radio(
     [
         "1. Características Generales",
         "2. Desertores vs No Desertores",
-        "3. Modelo Predictivo"
+        "3. Modelo Predictivo",
+        "4. Estudiantes en Riesgo",
+        "5. Análisis por Materias",
+        "6. Evolución por Periodo"
     ],
     index=0
 )
@@ -56,7 +79,9 @@ seccion = st.sidebar.radio(
 
 st.sidebar.markdown("---")
 
-CONNECTION_STRING = st.secrets["CONNECTION_STRING"]
+# Plano de datos compartido (DASHBOARD_DATOS=plano): un cargador (python plano_compartido.py) lee MongoDB y
+# publica las tablas en memoria compartida; los procesos del servidor las mapean sin leer la colección
+DATOS_PLANO = os.environ.get("DASHBOARD_DATOS", "mongo") == "plano"
 
 # Nombres
 DATABASE_NAME = "Estudiantes"
@@ -68,11 +93,14 @@ def get_connection():
     client = MongoClient(CONNECTION_STRING)
     return client
 
-client = get_connection()
-db = client[DATABASE_NAME]
-collection = db[COLLECTION_NAME]
+if not DATOS_PLANO:
+    CONNECTION_STRING = st.secrets["CONNECTION_STRING"]
+    with instrumentacion.tramo('mongo.conexion'):
+        client = get_connection()
+        db = client[DATABASE_NAME]
+        collection = db[COLLECTION_NAME]
 
-# Cargar modelo de Keras y metadatos
+# Cargar modelo de Keras y metadatos (archivos sueltos, si el registro está vacío)
 @st.cache_resource
 def load_keras_model():
     """Carga el modelo de Keras guardado y sus metadatos"""
@@ -84,7 +112,8 @@ def load_keras_model():
             st.warning(f"No se encontró el modelo en {model_path}")
             return None, None
         
-        # Cargar modelo
+        # Cargar modelo (TensorFlow se importa aquí, no al inicio del script)
+        from tensorflow import keras
         model = keras.models.load_model(model_path)
         
         # Cargar info del modelo
@@ -98,86 +127,312 @@ def load_keras_model():
         st.warning(f"Error al cargar el modelo: {str(e)}")
         return None, None
 
-modelo_keras, info_modelo = load_keras_model()
+# Cargar una versión del registro de modelos (se mantienen en memoria la activa y la anterior)
+@st.cache_resource(max_entries=2)
+def cargar_version_modelo(version):
+    """Carga modelo, preprocesamiento e info de una versión del registro"""
+    try:
+        return registro_modelos.cargar_version(version)
+    except Exception as e:
+        st.warning(f"Error al cargar la versión {version} del modelo: {str(e)}")
+        return None, None, None
 
-# Extraer todos los datos
+# Extraer todos los datos, con la marca de tiempo de la lectura (clave de las tablas que salen de los documentos)
 @st.cache_data(ttl=60)
 def load_data(_collection):
     data = list(_collection.find({}))
-    return data
-
-datos = load_data(collection)
-
-# Aplanar los datos para análisis completo
-registros = []
-for doc in datos:
-    registro = {
-        '_id': doc['_id'],
-        # Datos personales
-        'edad': doc['datos_personales'].get('edad'),
-        'genero': doc['datos_personales'].get('genero', ''),
-        'estrato': doc['datos_personales'].get('estrato'),
-        'discapacidad': doc['datos_personales'].get('discapacidad', ''),
-        # Académico
-        'programa': doc['academico'].get('programa', ''),
-        'programa_secundario': doc['academico'].get('programa_secundario'),
-        'semestre_actual': doc['academico'].get('semestre_actual'),
-        'tipo_estudiante': doc['academico'].get('tipo_estudiante', ''),
-        'tipo_admision': doc['academico'].get('tipo_admision', ''),
-        'estado_academico': doc['academico'].get('estado_academico', ''),
-        # Ubicación
-        'ciudad': doc['location'].get('ciudad', ''),
-        'departamento': doc['location'].get('departamento', ''),
-        'pais': doc['location'].get('pais', ''),
-        'es_barranquilla': doc['location'].get('es_barranquilla', 0),
-        'es_colombia': doc['location'].get('es_colombia', 0),
-        # Colegio
-        'tipo_colegio': doc['colegio'].get('tipo_colegio'),
-        'calendario_colegio': doc['colegio'].get('calendario_colegio'),
-        'descripcion_bachillerato': doc['colegio'].get('descripcion_bachillerato'),
-        # ICFES
-        'puntaje_total': doc['ICFES'].get('puntaje_total'),
-        'icfes_matematicas': doc['ICFES'].get('matematicas'),
-        'icfes_lectura': doc['ICFES'].get('lectura_critica'),
-        'icfes_sociales': doc['ICFES'].get('sociales'),
-        'icfes_ciencias': doc['ICFES'].get('ciencias'),
-        'icfes_ingles': doc['ICFES'].get('ingles'),
-        # Métricas rendimiento
-        'promedio': doc['metricas_rendimiento'].get('promedio_acumulado'),
-        'materias_cursadas': doc['metricas_rendimiento'].get('materias_cursadas_total', 0),
-        'materias_perdidas': doc['metricas_rendimiento'].get('materias_perdidas_total', 0),
-        'materias_repetidas': doc['metricas_rendimiento'].get('materias_repetidas', 0),
-        # Estado
-        'becado': doc['estado'].get('becado', ''),
-        'graduado': doc['estado'].get('graduado', 0),
-        'desertor': doc['estado'].get('desertor', 0),
-        # Periodo
-        'periodo': doc['periodo_info'].get('ultimo_periodo'),
-    }
-    registros.append(registro)
-
-df = pd.DataFrame(registros)
-
-# Mapeo de nombres de departamentos (usado en múltiples secciones)
-mapeo_departamentos = {
-    'ATLANTICO': 'ATLÁNTICO',
-    'BOLIVAR': 'BOLÍVAR',
-    'BOGOTA': 'BOGOTÁ D.C.',
-    'BOGOTA D.C.': 'BOGOTÁ D.C.',
-    'BOGOTÁ': 'BOGOTÁ D.C.',
-    'CORDOBA': 'CÓRDOBA',
-    'NARINO': 'NARIÑO',
-    'QUINDIO': 'QUINDÍO',
-    'VALLE': 'VALLE DEL CAUCA',
-    'NORTE SANTANDER': 'NORTE DE SANTANDER',
-    'ARCHIPIELAGO DE SAN ANDRES': 'ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA',
-    'SAN ANDRES': 'ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA'
+    return data, time.time_ns()
+
+# Tablas de una versión del plano compartido: se abren una vez por versión, sin copiar los datos
+@st.cache_resource(max_entries=2)
+def abrir_plano(contador, _publicacion):
+    """df, registros del modelo y almacén de materias mapeados desde la memoria compartida"""
+    import plano_compartido
+    return plano_compartido.abrir(_publicacion)
+
+if DATOS_PLANO:
+    import plano_compartido
+    publicacion = plano_compartido.version_publicada()
+    if publicacion is None:
+        st.error(f"No hay datos publicados en {plano_compartido.DIRECTORIO_PLANO}: ejecute `python plano_compartido.py`")
+        st.stop()
+    with instrumentacion.tramo('plano.abrir', contador=publicacion['contador']):
+        df_plano, registros_plano, almacen_plano = abrir_plano(publicacion['contador'], publicacion)
+    datos = carga = None
+else:
+    with instrumentacion.tramo('mongo.load_data'):
+        datos, carga = load_data(collection)
+
+# Registros del modelo (fila i = documento i), lo que las secciones 3 y 4 leen de los documentos:
+# una vez por lectura de MongoDB
+@st.cache_resource(max_entries=2)
+def registros_modelo(carga, _datos):
+    """Tabla de registros del modelo con las pérdidas expandidas"""
+    return tabla_registros([registro_modelo(doc) for doc in _datos])
+
+def registros_poblacion():
+    return registros_plano if DATOS_PLANO else registros_modelo(carga, datos)
+
+# Preprocesamiento para los archivos sueltos: se ajusta una sola vez con los primeros 5000 documentos
+@st.cache_resource
+def ajustar_preprocesador_legacy(_registros):
+    """Ajusta encoders y scaler como lo hacía el predictor antes del registro"""
+    return Preprocesador.ajustar(primeros_registros(_registros, 5000))
+
+# Modelo activo: el manifest se lee en cada rerun, así que publicar o activar
+# una versión cambia el modelo sin reiniciar el servidor
+entrada_modelo = registro_modelos.entrada_activa()
+version_modelo = entrada_modelo['version'] if entrada_modelo is not None else "archivos locales"
+st.sidebar.caption(f"Modelo activo: {version_modelo}")
+
+# Importar TensorFlow toma varios segundos: se hace en un hilo de fondo después del
+# primer rerun (DASHBOARD_PRECALENTAR=0 lo desactiva) y el modelo se carga solo en las
+# secciones que lo usan
+PRECALENTAR = os.environ.get("DASHBOARD_PRECALENTAR", "1") not in ("", "0")
+
+def _importar_tensorflow():
+    from tensorflow import keras  # noqa: F401
+
+@st.cache_resource
+def precalentar_tensorflow():
+    hilo = threading.Thread(target=_importar_tensorflow, name="precalentar-tensorflow", daemon=True)
+    hilo.start()
+    return hilo
+
+def modelo_activo():
+    """Modelo, preprocesamiento, info y métricas de la versión activa (importa TensorFlow la primera vez)"""
+    if PRECALENTAR:
+        # Evita importar TensorFlow desde dos hilos a la vez
+        precalentar_tensorflow().join()
+    with instrumentacion.tramo('modelo.cargar', version=version_modelo):
+        if entrada_modelo is not None:
+            modelo, preprocesador, info = cargar_version_modelo(version_modelo)
+            return modelo, preprocesador, info, entrada_modelo['metricas']
+        modelo, info = load_keras_model()
+        preprocesador = ajustar_preprocesador_legacy(registros_poblacion()) if modelo is not None else None
+        return modelo, preprocesador, info, registro_modelos.metricas_info(info)
+
+@st.cache_data(max_entries=2)
+def huella_archivo_modelo(ruta, modificado):
+    """Hash del contenido del .keras suelto (la fecha de modificación solo es la clave de la caché)"""
+    with open(ruta, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def huella_modelo_activo(preprocesador):
+    """Versión (o hash del .keras suelto) + huella del preprocesamiento: clave de las cachés del modelo"""
+    if entrada_modelo is not None:
+        return f"{version_modelo}/{preprocesador.huella()}"
+    ruta = "mejor_modelo_desercion.keras"
+    return f"local-{huella_archivo_modelo(ruta, os.path.getmtime(ruta))}/{preprocesador.huella()}"
+
+# Predicciones del formulario: compartidas entre sesiones, se vacían al cambiar el modelo
+@st.cache_resource
+def cache_predicciones():
+    cache = CachePredicciones()
+    instrumentacion.registrar_contadores('cache_predicciones', cache.estadisticas)
+    return cache
+
+# Modelos alternativos del notebook, usados para las explicaciones de los tabs 2 y 3
+@st.cache_resource
+def load_sklearn_models():
+    """Carga árbol de decisión y regresión logística con una huella del archivo como versión"""
+    modelos = {}
+    for tipo, ruta in [('arbol', "modelo_arbol_decision.pkl"), ('logistica', "modelo_regresion_logistica.pkl")]:
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                contenido = f.read()
+            modelos[tipo] = (pickle.loads(contenido), hashlib.sha256(contenido).hexdigest()[:12])
+    return modelos
+
+# Matriz escalada de la población (no graduados), la misma entrada que ven los modelos
+@st.cache_data(max_entries=2)
+def matriz_poblacion(huella_modelo, version_datos, _registros, _df, _preprocesador):
+    """Registros de todos los estudiantes no graduados, preprocesados con la versión activa"""
+    no_graduados = (_df['graduado'].fillna(0) == 0).to_numpy()
+    return _preprocesador.transformar(_registros[no_graduados])
+
+# Importancia global: las atribuciones se calculan una vez por versión y datos (caché en disco)
+@st.cache_data
+def importancia_poblacion(tipo, version, huella, _modelo, _X, columnas):
+    """Importancia media de cada variable en la población"""
+    atribuciones = explicaciones.explicar_poblacion(tipo, _modelo, _X, version)
+    return explicaciones.importancia_global(atribuciones, columnas)
+
+def grafico_importancia(df_importancia, titulo, top=15):
+    """Barras horizontales con las variables más importantes"""
+    top_variables = df_importancia.head(top).iloc[::-1]
+    fig = px.bar(
+        top_variables,
+        x='Importancia',
+        y='Variable',
+        orientation='h',
+        color='Efecto medio',
+        color_continuous_scale='RdYlGn_r',
+        color_continuous_midpoint=0,
+        title=titulo
+    )
+    fig.update_layout(height=500)
+    return fig
+
+# Puntaje de riesgo de toda la población: se calcula una vez por modelo y versión de los datos
+@st.cache_resource(max_entries=2)
+def indice_riesgo(huella_modelo, version_datos, _registros, _df, _modelo, _preprocesador):
+    """Índice para top-k por programa/departamento/periodo; solo entran estudiantes activos"""
+    puntajes = puntuar_poblacion(_modelo, _preprocesador, _registros)
+    elegibles = ((_df['graduado'] != 1) & (_df['desertor'] != 1)).fillna(True)
+    filtros = {'programa': _df['programa'], 'departamento': _df['departamento'], 'periodo': _df['periodo'].fillna(0).astype(int)}
+    return IndiceRiesgo(puntajes, filtros, elegibles)
+
+# Grilla what-if: la versión del modelo y el estudiante (JSON) son la clave de la caché
+@st.cache_data(max_entries=50)
+def evaluar_what_if(version, estudiante_json, variable_x, variable_y, _modelo, _preprocesador):
+    """Probabilidades de la grilla what-if, evaluada en un solo predict"""
+    return evaluar_grilla(_modelo, _preprocesador, json.loads(estudiante_json), variable_x, variable_y)
+
+# Materias cursadas aplanadas en arreglos columnares: una vez por lectura de MongoDB
+@st.cache_resource(max_entries=2)
+def almacen_materias(carga, _datos):
+    """Una fila por materia cursada con códigos enteros de materia y categoría"""
+    return AlmacenMaterias.desde_documentos(_datos)
+
+# Versión de los datos: hash de df, de los registros del modelo y de las materias, una vez por lectura de MongoDB
+@st.cache_data(max_entries=2)
+def version_carga(carga, _df, _registros, _almacen):
+    return version_conjunta(_df, _registros, _almacen)
+
+# Aplanar los datos para análisis completo (tipos compactos: category, enteros pequeños, float32)
+if DATOS_PLANO:
+    # Copia superficial: las columnas que se agregan abajo no tocan la tabla compartida
+    df = df_plano.copy(deep=False)
+    almacen = almacen_plano
+    version_datos = publicacion['version_datos']
+else:
+    with instrumentacion.tramo('df.construir', filas=len(datos)):
+        df = construir_df(datos)
+    almacen = almacen_materias(carga, datos)
+
+    # Versión de los datos: cambia cuando cambia cualquier valor de df, de los registros del modelo
+    # (pérdidas por departamento) o de las materias; es la clave de índices y cachés derivados
+    version_datos = version_carga(carga, df, registros_poblacion(), almacen)
+
+# Índice de búsqueda de estudiantes: se construye una vez por versión de los datos
+@st.cache_resource(max_entries=2)
+def indice_estudiantes(version, _df):
+    """Hash por _id + prefijos de _id, programa y ciudad"""
+    return IndiceEstudiantes(_df)
+
+# Entradas de los agregados por periodo (cohorte, matrículas, conteos): una vez por versión de los datos
+@st.cache_resource(max_entries=2)
+def entradas_periodo(version, _df, _almacen):
+    """Último periodo, cohorte, desertor y graduado por estudiante + pares (estudiante, periodo) matriculados"""
+    por_estudiante = [_df[col].fillna(0).to_numpy(dtype=np.int64) for col in ('periodo', 'desertor', 'graduado')]
+    ultimo_periodo, desertor, graduado = por_estudiante
+    return (ultimo_periodo, _almacen.primer_periodo(), desertor, graduado) + tuple(_almacen.matriculas())
+
+ultimo_periodo, cohorte, desertor, graduado, matricula_estudiante, matricula_periodo = entradas_periodo(version_datos, df, almacen)
+df['cohorte'] = cohorte
+
+# Agregados por periodo: el objeto se comparte entre reruns y solo recalcula los periodos que cambian
+@st.cache_resource
+def particiones_periodo():
+    return ParticionesPeriodo()
+
+particiones = particiones_periodo()
+particiones.actualizar(version_datos, ultimo_periodo, cohorte, desertor, graduado, matricula_estudiante, matricula_periodo)
+
+# Selector de periodo (último periodo del estudiante): filtra las secciones con las particiones precalculadas
+periodos_disponibles = particiones.periodos()
+etiquetas_periodo = {formato_periodo(p): p for p in reversed(periodos_disponibles)}
+periodo_etiqueta = contenedor_periodo.selectbox("Periodo", ["Todos"] + list(etiquetas_periodo))
+periodo_seleccionado = etiquetas_periodo.get(periodo_etiqueta)
+filas_periodo = None if periodo_seleccionado is None else particiones.filas(periodo_seleccionado)
+filtro_periodo = None if periodo_seleccionado is None else {'periodo': [periodo_seleccionado]}
+
+# Filtros globales de las secciones 1 y 2: un mapa de bits por valor, construido una vez por versión de los datos
+FILTROS_GLOBALES = {
+    'programa': "Programa",
+    'estrato': "Estrato",
+    'becado': "Beca",
+    'tipo_colegio': "Tipo de colegio",
+    'departamento': "Departamento",
+    'genero': "Género",
 }
 
+@st.cache_resource(max_entries=2)
+def indice_filtros(version, _df):
+    """Mapas de bits por valor de programa, estrato, beca, colegio, departamento, género y periodo"""
+    return IndiceFiltros(_df)
+
+filtros = dict(filtro_periodo or {})
+df_filtrado = df
+if "1. Características Generales" in seccion or "2. Desertores vs No Desertores" in seccion:
+    indice_filtro = indice_filtros(version_datos, df)
+    with contenedor_periodo.expander("Filtros"):
+        for columna, etiqueta in FILTROS_GLOBALES.items():
+            filtros[columna] = st.multiselect(etiqueta, indice_filtro.opciones(columna), key=f"filtro_{columna}")
+    with instrumentacion.tramo('filtros.resolver'):
+        filas_filtradas = indice_filtro.filtrar(filtros)
+        if filas_filtradas is not None:
+            df_filtrado = df.iloc[filas_filtradas]
+
+# Motor de consultas opcional (DASHBOARD_MOTOR=duckdb): las agregaciones de los gráficos de las secciones
+# 1, 2 y 5 corren en DuckDB sobre una copia Parquet de los datos, en varios hilos y sin cargarla en memoria
+MOTOR_DUCKDB = os.environ.get("DASHBOARD_MOTOR", "pandas") == "duckdb"
+
+@st.cache_resource(max_entries=2)
+def motor_duckdb(version, _df, _almacen):
+    """Escribe la copia Parquet de esta versión de los datos (si no existe) y registra las tablas"""
+    try:
+        from motor_duckdb import MotorDuckDB
+        return MotorDuckDB.desde_tablas(version, _df, _almacen)
+    except ImportError as e:
+        st.sidebar.warning(f"DuckDB no disponible ({e}); se usa pandas")
+        return None
+
+motor = motor_duckdb(version_datos, df, almacen) if MOTOR_DUCKDB else None
+
+def agregado(nombre, datos, **parametros):
+    """Tabla de un gráfico: consulta SQL del motor si está activo, si no la agregación de graficos sobre `datos`"""
+    if motor is not None:
+        with instrumentacion.tramo('duckdb.' + nombre):
+            return motor.consultar(nombre, filtros, **parametros)
+    return getattr(graficos, nombre)(datos, **parametros)
+
+instrumentacion.marca('datos.derivados')
+
+# Riesgo de un estudiante existente con su registro completo
+@st.cache_data(max_entries=200)
+def riesgo_estudiante(huella_modelo, version_datos, posicion, _modelo, _preprocesador, _registros):
+    """Probabilidad de deserción del registro completo del estudiante"""
+    return float(puntuar_poblacion(_modelo, _preprocesador, _registros.iloc[[posicion]])[0])
+
+# Panel de instrumentación (oculto): requiere DASHBOARD_INSTRUMENTACION=1 y ?admin=1 en la URL
+if instrumentacion.ACTIVO and st.query_params.get("admin") == "1":
+    with st.sidebar.expander("Instrumentación"):
+        st.dataframe(instrumentacion.resumen(), use_container_width=True, hide_index=True)
+        st.dataframe(instrumentacion.contadores(), use_container_width=True, hide_index=True)
+        st.download_button("Tramos (JSON lines)", instrumentacion.exportar_jsonl(),
+                           file_name="tramos.jsonl", mime="application/jsonl")
+        st.download_button("Tramos (OTLP JSON)", json.dumps(instrumentacion.exportar_otlp()),
+                           file_name="tramos_otlp.json", mime="application/json")
+        endpoint_otlp = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+        if endpoint_otlp and st.button("Enviar al colector OTLP"):
+            try:
+                st.success(f"Colector respondió {instrumentacion.enviar_otlp(endpoint_otlp)}")
+            except Exception as e:
+                st.error(f"Error al enviar los tramos: {str(e)}")
+        if st.button("Limpiar tramos"):
+            instrumentacion.limpiar()
+            st.rerun()
+
 # ============================================================================
 # SECCIÓN 1: CARACTERÍSTICAS GENERALES DE LA POBLACIÓN
 # ============================================================================
 if "1. Características Generales" in seccion:
+    df = df_filtrado
+    if len(df) == 0:
+        st.info("Ningún estudiante cumple los filtros seleccionados")
+        st.stop()
     st.title("Características Generales de la Población")
     st.markdown("### Análisis descriptivo de toda la población estudiantil")
     st.markdown("---")
@@ -318,66 +573,18 @@ if "1. Características Generales" in seccion:
 
     with col1:
         # Distribución por género
-        genero_count = df['genero'].value_counts().reset_index()
-        genero_count.columns = ['genero', 'count']
-        genero_count['porcentaje'] = (genero_count['count'] / genero_count['count'].sum() * 100).round(1)
-        
-        fig_genero = px.pie(
-            genero_count,
-            values='count',
-            names='genero',
-            title='Distribución por Género',
-            color_discrete_sequence=['#3498db', '#e74c3c'],
-            hole=0.4
-        )
-        fig_genero.update_traces(textposition='inside', textinfo='percent+label')
-        fig_genero.update_layout(height=400)
-        st.plotly_chart(fig_genero, use_container_width=True)
+        st.plotly_chart(graficos.grafico_genero(agregado('conteo_genero', df)), use_container_width=True)
+        instrumentacion.marca('seccion1.fig_genero')
 
     with col2:
         # Distribución por edad
-        df_edad = df[df['edad'].notna()].copy()
-        df_edad['rango_edad'] = pd.cut(df_edad['edad'], 
-                                        bins=[0, 16, 17, 18, 19, 20, 21, 22, 23, 24, 100], 
-                                        labels=['Menos de 16', '16', '17', '18', '19', '20', '21', '22', '23', '+24'])
-        edad_count = df_edad['rango_edad'].value_counts().reset_index()
-        edad_count.columns = ['rango_edad', 'count']
-        edad_count = edad_count.sort_values('rango_edad')
-        
-        fig_edad = px.bar(
-            edad_count,
-            x='rango_edad',
-            y='count',
-            title='Distribución por Rango de Edad',
-            labels={'rango_edad': 'Rango de Edad', 'count': 'Número de Estudiantes'},
-            color='count',
-            color_continuous_scale='Blues'
-        )
-        fig_edad.update_layout(showlegend=False, coloraxis_showscale=False, height=400)
-        st.plotly_chart(fig_edad, use_container_width=True)
+        st.plotly_chart(graficos.grafico_edad(agregado('conteo_edad', df)), use_container_width=True)
+        instrumentacion.marca('seccion1.fig_edad')
 
     # Gráfico combinado: Género y Edad
     st.markdown("##### Distribución Combinada: Género por Rango de Edad")
-    df_edad_genero = df[(df['edad'].notna()) & (df['genero'].notna())].copy()
-    df_edad_genero['rango_edad'] = pd.cut(df_edad_genero['edad'], 
-                                          bins=[0, 16, 17, 18, 19, 20, 21, 22, 23, 24, 100], 
-                                          labels=['Menos de 16', '16', '17', '18', '19', '20', '21', '22', '23', '+24'])
-    edad_genero_count = df_edad_genero.groupby(['rango_edad', 'genero']).size().reset_index(name='count')
-    
-    fig_edad_genero = px.bar(
-        edad_genero_count,
-        x='rango_edad',
-        y='count',
-        color='genero',
-        barmode='group',
-        labels={'rango_edad': 'Rango de Edad', 'count': 'Número de Estudiantes', 'genero': 'Género'},
-        color_discrete_map={'Masculino': '#3498db', 'Femenino': '#e74c3c'}
-    )
-    fig_edad_genero.update_layout(
-        height=450,
-        legend=dict(title='', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    st.plotly_chart(fig_edad_genero, use_container_width=True)
+    st.plotly_chart(graficos.grafico_edad_genero(agregado('conteo_edad_genero', df)), use_container_width=True)
+    instrumentacion.marca('seccion1.fig_edad_genero')
 
     st.markdown("---")
 
@@ -389,62 +596,21 @@ if "1. Características Generales" in seccion:
     # Mapa de Colombia por departamento (sin Atlántico)
     st.subheader("Estudiantes por Departamento")
 
-    # Filtrar solo estudiantes de Colombia
-    df_colombia = df[df['es_colombia'] == 1].copy()
-
-    # Contar por departamento
-    estudiantes_depto = df_colombia.groupby('departamento').agg({
-        '_id': 'count'
-    }).reset_index()
-    estudiantes_depto.columns = ['departamento', 'total_estudiantes']
-    estudiantes_depto['porcentaje'] = (estudiantes_depto['total_estudiantes'] / estudiantes_depto['total_estudiantes'].sum() * 100).round(2)
-
-    # Normalizar nombres de departamentos
-    estudiantes_depto['departamento'] = estudiantes_depto['departamento'].str.upper().str.strip()
-    estudiantes_depto['departamento'] = estudiantes_depto['departamento'].replace(mapeo_departamentos)
-
-    # Separar Atlántico para el mapa
-    estudiantes_mapa = estudiantes_depto[estudiantes_depto['departamento'] != 'ATLÁNTICO'].copy()
+    # Estudiantes de Colombia por departamento, sin Atlántico
+    estudiantes_mapa = agregado('estudiantes_por_departamento', df)
 
     # Cargar GeoJSON
     @st.cache_data
     def load_geojson():
-        url = "https://gist.githubusercontent.com/john-guerra/43c7656821069d00dcbc/raw/3aadedf47badbdac823b00dbe259f6bc6d9e1899/colombia.geo.json"
-        response = requests.get(url)
+        import requests
+        response = requests.get(graficos.URL_GEOJSON_COLOMBIA)
         return response.json()
 
-    geojson_colombia = load_geojson()
-
-    # Crear el mapa con degradado de color y porcentaje
-    fig_mapa = px.choropleth_mapbox(
-        estudiantes_mapa,
-        geojson=geojson_colombia,
-        locations='departamento',
-        featureidkey="properties.NOMBRE_DPT",
-        color='total_estudiantes',
-        color_continuous_scale="Viridis",
-        hover_name='departamento',
-        hover_data={
-            'departamento': False,
-            'total_estudiantes': ':,',
-            'porcentaje': ':.2f'
-        },
-        mapbox_style="carto-positron",
-        zoom=4.5,
-        center={"lat": 4.5, "lon": -74},
-        opacity=0.8,
-        labels={
-            'total_estudiantes': 'Estudiantes', 
-            'porcentaje': '% del Total'
-        }
-    )
-
-    fig_mapa.update_layout(
-        height=600,
-        margin={"r": 0, "t": 0, "l": 0, "b": 0}
-    )
+    with instrumentacion.tramo('geojson.fetch'):
+        geojson_colombia = load_geojson()
 
-    st.plotly_chart(fig_mapa, use_container_width=True)
+    st.plotly_chart(graficos.grafico_mapa(estudiantes_mapa, geojson_colombia), use_container_width=True)
+    instrumentacion.marca('seccion1.fig_mapa')
 
     st.info("Nota: Atlántico fue excluido del mapa para mejor visualización de otros departamentos.")
 
@@ -453,19 +619,9 @@ if "1. Características Generales" in seccion:
     # Distribución por ciudad del Atlántico
     st.subheader("Estudiantes del Atlántico por Ciudad")
 
-    df_atlantico = df[df['departamento'].str.upper().str.strip().str.contains('ATLANTICO|ATLÁNTICO', na=False)].copy()
+    estudiantes_ciudad = agregado('estudiantes_atlantico_por_ciudad', df)
 
-    if len(df_atlantico) > 0:
-        # Contar por ciudad
-        estudiantes_ciudad = df_atlantico.groupby('ciudad').agg({
-            '_id': 'count'
-        }).reset_index()
-        estudiantes_ciudad.columns = ['ciudad', 'total_estudiantes']
-        estudiantes_ciudad['porcentaje'] = (estudiantes_ciudad['total_estudiantes'] / estudiantes_ciudad['total_estudiantes'].sum() * 100).round(2)
-        
-        # Normalizar nombres de ciudades
-        estudiantes_ciudad['ciudad'] = estudiantes_ciudad['ciudad'].str.title().str.strip()
-        
+    if estudiantes_ciudad is not None:
         # Separar Barranquilla del resto
         barranquilla_data = estudiantes_ciudad[estudiantes_ciudad['ciudad'] == 'Barranquilla']
         otras_ciudades = estudiantes_ciudad[estudiantes_ciudad['ciudad'] != 'Barranquilla'].copy()
@@ -488,36 +644,8 @@ if "1. Características Generales" in seccion:
         # Mostrar gráfico solo para otras ciudades
         if len(otras_ciudades) > 0:
             st.subheader("Otras Ciudades del Atlántico")
-            
-            # Ordenar por frecuencia
-            otras_ciudades = otras_ciudades.sort_values('total_estudiantes', ascending=True)
-            
-            # Crear gráfico de barras horizontales
-            fig_ciudades = px.bar(
-                otras_ciudades,
-                y='ciudad',
-                x='total_estudiantes',
-                text='porcentaje',
-                orientation='h',
-                labels={'ciudad': 'Ciudad', 'total_estudiantes': 'Frecuencia'},
-                color='total_estudiantes',
-                color_continuous_scale='Blues'
-            )
-            
-            fig_ciudades.update_traces(
-                texttemplate='%{text:.1f}%',
-                textposition='outside'
-            )
-            
-            fig_ciudades.update_layout(
-                height=max(400, len(otras_ciudades) * 25),
-                showlegend=False,
-                xaxis_title="Número de Estudiantes",
-                yaxis_title="",
-                coloraxis_showscale=False
-            )
-            
-            st.plotly_chart(fig_ciudades, use_container_width=True)
+            st.plotly_chart(graficos.grafico_ciudades(otras_ciudades), use_container_width=True)
+            instrumentacion.marca('seccion1.fig_ciudades')
     else:
         st.warning("No hay datos de estudiantes en Atlántico")
 
@@ -525,6 +653,10 @@ if "1. Características Generales" in seccion:
 # SECCIÓN 2: DESERTORES VS NO DESERTORES
 # ============================================================================
 elif "2. Desertores vs No Desertores" in seccion:
+    df = df_filtrado
+    if len(df) == 0:
+        st.info("Ningún estudiante cumple los filtros seleccionados")
+        st.stop()
     st.title("Análisis Comparativo: Desertores vs No Desertores")
     st.markdown("### Comparación detallada entre estudiantes desertores y no desertores")
     st.markdown("---")
@@ -622,132 +754,26 @@ elif "2. Desertores vs No Desertores" in seccion:
 
     with col1:
         st.markdown("##### Tasa de Deserción por Género")
-        df_genero = df_sin_graduados[df_sin_graduados['genero'].notna()].copy()
-        desercion_genero = df_genero.groupby('genero').agg({
-            '_id': 'count',
-            'desertor': 'sum'
-        }).reset_index()
-        desercion_genero.columns = ['genero', 'total', 'desertores']
-        desercion_genero['tasa_desercion'] = (desercion_genero['desertores'] / desercion_genero['total'] * 100).round(2)
-        
-        fig_genero_des = px.bar(
-            desercion_genero,
-            x='genero',
-            y='tasa_desercion',
-            text='tasa_desercion',
-            labels={'genero': 'Género', 'tasa_desercion': 'Tasa de Deserción (%)'},
-            color='genero',
-            color_discrete_map={'Masculino': '#3498db', 'Femenino': '#e74c3c'}
-        )
-        fig_genero_des.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig_genero_des.update_layout(showlegend=False, height=400)
-        st.plotly_chart(fig_genero_des, use_container_width=True)
+        st.plotly_chart(graficos.grafico_genero_desercion(agregado('desercion_genero', df_sin_graduados)), use_container_width=True)
+        instrumentacion.marca('seccion2.fig_genero_des')
 
     with col2:
         st.markdown("##### Tasa de Deserción por Rango de Edad")
-        df_edad_des = df_sin_graduados[df_sin_graduados['edad'].notna()].copy()
-        df_edad_des['rango_edad'] = pd.cut(df_edad_des['edad'], 
-                                           bins=[0, 16, 17, 18, 19, 20, 21, 22, 23, 24, 100], 
-                                           labels=['Menos de 16', '16', '17', '18', '19', '20', '21', '22', '23', '+24'])
-        desercion_edad = df_edad_des.groupby('rango_edad').agg({
-            '_id': 'count',
-            'desertor': 'sum'
-        }).reset_index()
-        desercion_edad.columns = ['rango_edad', 'total', 'desertores']
-        desercion_edad['tasa_desercion'] = (desercion_edad['desertores'] / desercion_edad['total'] * 100).round(2)
-        desercion_edad = desercion_edad.sort_values('rango_edad')
-        
-        fig_edad_des = px.bar(
-            desercion_edad,
-            x='rango_edad',
-            y='tasa_desercion',
-            text='tasa_desercion',
-            labels={'rango_edad': 'Rango de Edad', 'tasa_desercion': 'Tasa de Deserción (%)'},
-            color='tasa_desercion',
-            color_continuous_scale='Reds'
-        )
-        fig_edad_des.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig_edad_des.update_layout(showlegend=False, coloraxis_showscale=False, height=400)
-        st.plotly_chart(fig_edad_des, use_container_width=True)
+        st.plotly_chart(graficos.grafico_edad_desercion(agregado('desercion_edad', df_sin_graduados)), use_container_width=True)
+        instrumentacion.marca('seccion2.fig_edad_des')
 
     # Gráfico combinado
     st.markdown("##### Deserción Combinada: Género por Rango de Edad")
-    df_edad_genero_des = df_sin_graduados[(df_sin_graduados['edad'].notna()) & (df_sin_graduados['genero'].notna())].copy()
-    df_edad_genero_des['rango_edad'] = pd.cut(df_edad_genero_des['edad'], 
-                                              bins=[0, 16, 17, 18, 19, 20, 21, 22, 23, 24, 100], 
-                                              labels=['Menos de 16', '16', '17', '18', '19', '20', '21', '22', '23', '+24'])
-    desercion_edad_genero = df_edad_genero_des.groupby(['rango_edad', 'genero']).agg({
-        '_id': 'count',
-        'desertor': 'sum'
-    }).reset_index()
-    desercion_edad_genero.columns = ['rango_edad', 'genero', 'total', 'desertores']
-    desercion_edad_genero['tasa_desercion'] = (desercion_edad_genero['desertores'] / desercion_edad_genero['total'] * 100).round(2)
-    
-    fig_edad_genero_des = px.bar(
-        desercion_edad_genero,
-        x='rango_edad',
-        y='tasa_desercion',
-        color='genero',
-        barmode='group',
-        text='tasa_desercion',
-        labels={'rango_edad': 'Rango de Edad', 'tasa_desercion': 'Tasa de Deserción (%)', 'genero': 'Género'},
-        color_discrete_map={'Masculino': '#3498db', 'Femenino': '#e74c3c'}
-    )
-    fig_edad_genero_des.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-    fig_edad_genero_des.update_layout(
-        height=450,
-        legend=dict(title='', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    st.plotly_chart(fig_edad_genero_des, use_container_width=True)
+    st.plotly_chart(graficos.grafico_edad_genero_desercion(agregado('desercion_edad_genero', df_sin_graduados)), use_container_width=True)
+    instrumentacion.marca('seccion2.fig_edad_genero_des')
     
     st.markdown("---")
     
     # Deserción por programas
     st.subheader("Deserción por Programa")
 
-    desercion_programa = df_sin_graduados.groupby('programa').agg({
-        '_id': 'count',
-        'desertor': 'sum'
-    }).reset_index()
-    desercion_programa.columns = ['programa', 'total', 'desertores']
-    desercion_programa['tasa_desercion'] = (desercion_programa['desertores'] / desercion_programa['total'] * 100).round(2)
-    desercion_programa = desercion_programa.sort_values('tasa_desercion', ascending=True)
-
-    # Gráfico de barras horizontales
-    fig_programas = go.Figure()
-
-    fig_programas.add_trace(go.Bar(
-        y=desercion_programa['programa'],
-        x=desercion_programa['total'],
-        name='Total',
-        orientation='h',
-        marker_color='lightblue',
-        text=desercion_programa['total'],
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Total: %{x}<extra></extra>'
-    ))
-
-    fig_programas.add_trace(go.Bar(
-        y=desercion_programa['programa'],
-        x=desercion_programa['desertores'],
-        name='Desertores',
-        orientation='h',
-        marker_color='salmon',
-        text=desercion_programa['tasa_desercion'].apply(lambda x: f'{x:.1f}%'),
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Desertores: %{x}<br>Tasa: %{text}<extra></extra>'
-    ))
-
-    fig_programas.update_layout(
-        barmode='overlay',
-        height=max(600, len(desercion_programa) * 20),
-        xaxis_title="Número de Estudiantes",
-        yaxis_title="",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        hovermode='y unified'
-    )
-
-    st.plotly_chart(fig_programas, use_container_width=True)
+    st.plotly_chart(graficos.grafico_programas(agregado('desercion_programa', df_sin_graduados)), use_container_width=True)
+    instrumentacion.marca('seccion2.fig_programas')
 
     st.markdown("---")
 
@@ -757,94 +783,26 @@ elif "2. Desertores vs No Desertores" in seccion:
     df_desertores = df_sin_graduados[df_sin_graduados['desertor'] == 1]
     df_no_desertores = df_sin_graduados[df_sin_graduados['desertor'] == 0]
 
-    estratos_desertores = df_desertores.groupby('estrato').size().reset_index(name='count')
-
-    fig_estratos = px.bar(
-        estratos_desertores,
-        x='estrato',
-        y='count',
-        labels={'estrato': 'Estrato', 'count': 'Número de Desertores'},
-        color='count',
-        color_continuous_scale='Reds'
-    )
-
-    fig_estratos.update_layout(
-        xaxis=dict(tickmode='linear', tick0=1, dtick=1),
-        showlegend=False,
-        coloraxis_showscale=False
-    )
-
-    st.plotly_chart(fig_estratos, use_container_width=True)
+    st.plotly_chart(graficos.grafico_estratos(agregado('desertores_por_estrato', df_desertores)), use_container_width=True)
+    instrumentacion.marca('seccion2.fig_estratos')
 
     st.markdown("---")
     
     # Tasa de deserción por departamento
     st.subheader("Tasa de Deserción por Departamento")
 
-    df_colombia_sin_grad = df_sin_graduados[df_sin_graduados['es_colombia'] == 1].copy()
-
-    # Normalizar nombres primero
-    df_colombia_sin_grad['departamento'] = df_colombia_sin_grad['departamento'].str.upper().str.strip()
-    df_colombia_sin_grad['departamento'] = df_colombia_sin_grad['departamento'].replace(mapeo_departamentos)
-    
-    # Unir Cundinamarca con Bogotá
-    df_colombia_sin_grad['departamento'] = df_colombia_sin_grad['departamento'].replace('CUNDINAMARCA', 'BOGOTÁ D.C.')
-
-    desercion_depto = df_colombia_sin_grad.groupby('departamento').agg({
-        '_id': 'count',
-        'desertor': 'sum'
-    }).reset_index()
-    desercion_depto.columns = ['departamento', 'total', 'desertores']
-    desercion_depto['tasa_desercion'] = (desercion_depto['desertores'] / desercion_depto['total'] * 100).round(2)
-
-    # Filtrar departamentos con al menos 10 estudiantes para tasa representativa
-    desercion_depto_filtrado = desercion_depto[desercion_depto['total'] >= 10].copy()
-    desercion_depto_filtrado = desercion_depto_filtrado.sort_values('tasa_desercion', ascending=True)
-
-    fig_depto_desercion = px.bar(
-        desercion_depto_filtrado,
-        y='departamento',
-        x='tasa_desercion',
-        orientation='h',
-        text='tasa_desercion',
-        labels={'departamento': 'Departamento', 'tasa_desercion': 'Tasa de Deserción (%)'},
-        color='tasa_desercion',
-        color_continuous_scale='RdYlGn_r'
-    )
-
-    fig_depto_desercion.update_traces(
-        texttemplate='%{text:.1f}%',
-        textposition='outside'
-    )
-
-    fig_depto_desercion.update_layout(
-        height=max(500, len(desercion_depto_filtrado) * 20),
-        showlegend=False,
-        coloraxis_showscale=False
-    )
-
-    st.plotly_chart(fig_depto_desercion, use_container_width=True)
+    st.plotly_chart(graficos.grafico_departamentos_desercion(agregado('desercion_departamento', df_sin_graduados)), use_container_width=True)
+    instrumentacion.marca('seccion2.fig_depto_desercion')
 
     st.markdown("---")
 
     # Box plot de promedio
     st.subheader("Distribución de Promedio Académico")
 
-    fig_promedio_box = px.box(
-        df_sin_graduados,
-        x='desertor',
-        y='promedio',
-        color='desertor',
-        labels={'desertor': '', 'promedio': 'Promedio Acumulado'},
-        color_discrete_map={0: '#00cc96', 1: '#ef553b'}
-    )
-
-    fig_promedio_box.update_xaxes(tickvals=[0, 1], ticktext=['No Desertores', 'Desertores'])
-    fig_promedio_box.update_layout(showlegend=False, height=500)
-
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        st.plotly_chart(fig_promedio_box, use_container_width=True)
+        st.plotly_chart(graficos.grafico_promedio_box(df_sin_graduados), use_container_width=True)
+        instrumentacion.marca('seccion2.fig_promedio_box')
 
     col1, col2 = st.columns(2)
     with col1:
@@ -859,55 +817,25 @@ elif "2. Desertores vs No Desertores" in seccion:
     # Promedio ICFES por sección
     st.subheader("Promedio ICFES por Sección")
 
-    # Filtro por programa
-    programas_disponibles = sorted(df_sin_graduados['programa'].dropna().unique())
-    programa_seleccionado = st.selectbox(
-        "Seleccionar Programa:",
-        ['Todos'] + list(programas_disponibles)
-    )
-
-    # Filtrar por programa
-    if programa_seleccionado == 'Todos':
-        df_icfes = df_sin_graduados.copy()
-    else:
-        df_icfes = df_sin_graduados[df_sin_graduados['programa'] == programa_seleccionado].copy()
-
-    # Calcular promedios por sección
-    secciones_icfes = ['icfes_matematicas', 'icfes_lectura', 'icfes_sociales', 'icfes_ciencias', 'icfes_ingles']
-    nombres_secciones = ['Matemáticas', 'Lectura Crítica', 'Sociales', 'Ciencias', 'Inglés']
-
-    promedios_desertores = []
-    promedios_no_desertores = []
-
-    for seccion in secciones_icfes:
-        prom_deser = df_icfes[df_icfes['desertor'] == 1][seccion].mean()
-        prom_no_deser = df_icfes[df_icfes['desertor'] == 0][seccion].mean()
-        promedios_desertores.append(prom_deser)
-        promedios_no_desertores.append(prom_no_deser)
-
-    df_icfes_prom = pd.DataFrame({
-        'Sección': nombres_secciones * 2,
-        'Promedio': promedios_no_desertores + promedios_desertores,
-        'Tipo': ['No Desertores'] * 5 + ['Desertores'] * 5
-    })
+    # Fragmento: cambiar el programa solo re-ejecuta este panel, no todo el script
+    @st.fragment(key="icfes")
+    def panel_icfes(df_sin_graduados):
+        with instrumentacion.fragmento('fragmento.icfes'):
+            # Filtro por programa
+            programas_disponibles = sorted(df_sin_graduados['programa'].dropna().unique())
+            programa_seleccionado = st.selectbox(
+                "Seleccionar Programa:",
+                ['Todos'] + list(programas_disponibles)
+            )
 
-    fig_icfes = px.bar(
-        df_icfes_prom,
-        x='Sección',
-        y='Promedio',
-        color='Tipo',
-        barmode='group',
-        text='Promedio',
-        color_discrete_map={'Desertores': '#ef553b', 'No Desertores': '#00cc96'}
-    )
+            # Filtrar por programa
+            programa = None if programa_seleccionado == 'Todos' else programa_seleccionado
+            df_icfes_prom = agregado('promedios_icfes', df_sin_graduados, programa=programa)
 
-    fig_icfes.update_traces(texttemplate='%{text:.1f}', textposition='outside')
-    fig_icfes.update_layout(
-        height=500,
-        legend=dict(title='', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
+            st.plotly_chart(graficos.grafico_icfes(df_icfes_prom), use_container_width=True)
+            instrumentacion.marca('seccion2.fig_icfes')
 
-    st.plotly_chart(fig_icfes, use_container_width=True)
+    panel_icfes(df_sin_graduados)
 
     st.markdown("---")
 
@@ -945,60 +873,14 @@ elif "2. Desertores vs No Desertores" in seccion:
     with col1:
         st.markdown("##### Por Tipo de Colegio")
         
-        df_colegio = df_sin_graduados[df_sin_graduados['tipo_colegio'].notna()].copy()
-        desercion_colegio = df_colegio.groupby('tipo_colegio').agg({
-            '_id': 'count',
-            'desertor': 'sum'
-        }).reset_index()
-        desercion_colegio.columns = ['tipo_colegio', 'total', 'desertores']
-        desercion_colegio['tasa_desercion'] = (desercion_colegio['desertores'] / desercion_colegio['total'] * 100).round(2)
-        
-        # Asignar colores diferentes a cada tipo de colegio
-        colores_colegio = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c']
-        desercion_colegio['color'] = [colores_colegio[i % len(colores_colegio)] for i in range(len(desercion_colegio))]
-        
-        fig_colegio = px.bar(
-            desercion_colegio,
-            x='tipo_colegio',
-            y='tasa_desercion',
-            text='tasa_desercion',
-            labels={'tipo_colegio': 'Tipo de Colegio', 'tasa_desercion': 'Tasa de Deserción (%)'},
-            color='tipo_colegio',
-            color_discrete_sequence=colores_colegio
-        )
-        
-        fig_colegio.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig_colegio.update_layout(showlegend=False, height=400)
-        
-        st.plotly_chart(fig_colegio, use_container_width=True)
+        st.plotly_chart(graficos.grafico_colegio(agregado('desercion_colegio', df_sin_graduados)), use_container_width=True)
+        instrumentacion.marca('seccion2.fig_colegio')
 
     with col2:
         st.markdown("##### Por Calendario")
         
-        df_calendario = df_sin_graduados[df_sin_graduados['calendario_colegio'].notna()].copy()
-        # Filtrar solo calendarios A y B
-        df_calendario = df_calendario[df_calendario['calendario_colegio'].isin(['A', 'B'])]
-        desercion_calendario = df_calendario.groupby('calendario_colegio').agg({
-            '_id': 'count',
-            'desertor': 'sum'
-        }).reset_index()
-        desercion_calendario.columns = ['calendario', 'total', 'desertores']
-        desercion_calendario['tasa_desercion'] = (desercion_calendario['desertores'] / desercion_calendario['total'] * 100).round(2)
-        
-        fig_calendario = px.bar(
-            desercion_calendario,
-            x='calendario',
-            y='tasa_desercion',
-            text='tasa_desercion',
-            labels={'calendario': 'Calendario', 'tasa_desercion': 'Tasa de Deserción (%)'},
-            color='tasa_desercion',
-            color_continuous_scale='RdYlGn_r'
-        )
-        
-        fig_calendario.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig_calendario.update_layout(showlegend=False, coloraxis_showscale=False, height=400)
-        
-        st.plotly_chart(fig_calendario, use_container_width=True)
+        st.plotly_chart(graficos.grafico_calendario(agregado('desercion_calendario', df_sin_graduados)), use_container_width=True)
+        instrumentacion.marca('seccion2.fig_calendario')
 
     st.markdown("---")
 
@@ -1007,147 +889,42 @@ elif "2. Desertores vs No Desertores" in seccion:
     st.markdown("Exploración de múltiples variables simultáneamente")
 
     # Crear datos para análisis multivariable
-    df_multi = df_sin_graduados[
-        (df_sin_graduados['promedio'].notna()) & 
-        (df_sin_graduados['puntaje_total'].notna()) &
-        (df_sin_graduados['estrato'].notna())
-    ].copy()
-
-    # Selector de tipo de gráfico
-    tipo_grafico = st.selectbox(
-        "Seleccione el tipo de análisis:",
-        [
-            "Promedio vs ICFES (por Estrato y Deserción)",
-            "Promedio vs Materias Perdidas (por Género)",
-            "ICFES vs Materias Cursadas (por Tipo de Colegio)",
-            "Edad vs Promedio (por Programa)",
-            "Matriz de Correlación"
-        ]
-    )
+    df_multi = graficos.datos_multivariable(df_sin_graduados)
+
+    # Fragmento: cambiar el tipo de análisis solo re-ejecuta este panel
+    @st.fragment(key="multivariable")
+    def panel_multivariable(df_multi):
+        with instrumentacion.fragmento('fragmento.multivariable'):
+            # Selector de tipo de gráfico
+            tipo_grafico = st.selectbox(
+                "Seleccione el tipo de análisis:",
+                graficos.TIPOS_MULTIVARIABLE
+            )
 
-    if tipo_grafico == "Promedio vs ICFES (por Estrato y Deserción)":
-        # Gráfico de burbujas: promedio vs ICFES, tamaño por estrato, color por deserción
-        fig_multi = px.scatter(
-            df_multi.sample(min(1500, len(df_multi))),
-            x='puntaje_total',
-            y='promedio',
-            size='estrato',
-            color='desertor',
-            labels={
-                'puntaje_total': 'Puntaje Total ICFES',
-                'promedio': 'Promedio Acumulado',
-                'estrato': 'Estrato',
-                'desertor': 'Estado'
-            },
-            color_discrete_map={0: '#00cc96', 1: '#ef553b'},
-            size_max=20,
-            opacity=0.6,
-            height=600
-        )
-        fig_multi.for_each_trace(lambda t: t.update(name='No Desertor' if t.name == '0' else 'Desertor'))
-        st.plotly_chart(fig_multi, use_container_width=True)
-
-    elif tipo_grafico == "Promedio vs Materias Perdidas (por Género)":
-        df_multi_genero = df_multi[df_multi['genero'].notna()].copy()
-        fig_multi = px.scatter(
-            df_multi_genero,
-            x='materias_perdidas',
-            y='promedio',
-            color='genero',
-            facet_col='desertor',
-            labels={
-                'materias_perdidas': 'Materias Perdidas',
-                'promedio': 'Promedio Acumulado',
-                'genero': 'Género',
-                'desertor': 'Estado'
-            },
-            color_discrete_map={'Masculino': '#3498db', 'Femenino': '#e74c3c'},
-            opacity=0.6,
-            height=500
-        )
-        fig_multi.for_each_annotation(lambda a: a.update(text='No Desertor' if a.text.split('=')[1] == '0' else 'Desertor'))
-        st.plotly_chart(fig_multi, use_container_width=True)
-
-    elif tipo_grafico == "ICFES vs Materias Cursadas (por Tipo de Colegio)":
-        df_multi_colegio = df_multi[df_multi['tipo_colegio'].notna()].copy()
-        df_multi_colegio = df_multi_colegio[df_multi_colegio['materias_cursadas'] > 0]
-        fig_multi = px.scatter(
-            df_multi_colegio.sample(min(1500, len(df_multi_colegio))),
-            x='materias_cursadas',
-            y='puntaje_total',
-            color='tipo_colegio',
-            symbol='desertor',
-            labels={
-                'materias_cursadas': 'Materias Cursadas',
-                'puntaje_total': 'Puntaje ICFES',
-                'tipo_colegio': 'Tipo de Colegio',
-                'desertor': 'Estado'
-            },
-            opacity=0.6,
-            height=600
-        )
-        fig_multi.for_each_trace(lambda t: t.update(name=t.name.replace(', 0', ' - No Desertor').replace(', 1', ' - Desertor')))
-        st.plotly_chart(fig_multi, use_container_width=True)
+            st.plotly_chart(graficos.grafico_multivariable(df_multi, tipo_grafico), use_container_width=True)
+            instrumentacion.marca('seccion2.fig_multi', tipo=tipo_grafico)
 
-    elif tipo_grafico == "Edad vs Promedio (por Programa)":
-        # Seleccionar top 5 programas por cantidad de estudiantes
-        top_programas = df_multi['programa'].value_counts().head(5).index.tolist()
-        df_multi_prog = df_multi[df_multi['programa'].isin(top_programas)].copy()
-        
-        fig_multi = px.box(
-            df_multi_prog,
-            x='programa',
-            y='promedio',
-            color='desertor',
-            labels={
-                'programa': 'Programa',
-                'promedio': 'Promedio Acumulado',
-                'desertor': 'Estado'
-            },
-            color_discrete_map={0: '#00cc96', 1: '#ef553b'},
-            height=600
-        )
-        fig_multi.for_each_trace(lambda t: t.update(name='No Desertor' if t.name == '0' else 'Desertor'))
-        fig_multi.update_xaxes(tickangle=45)
-        st.plotly_chart(fig_multi, use_container_width=True)
-
-    else:  # Matriz de Correlación
-        # Seleccionar variables numéricas relevantes
-        variables_numericas = [
-            'edad', 'estrato', 'promedio', 'puntaje_total',
-            'materias_cursadas', 'materias_perdidas', 'materias_repetidas',
-            'icfes_matematicas', 'icfes_lectura', 'desertor'
-        ]
-        
-        df_corr = df_multi[variables_numericas].dropna()
-        matriz_corr = df_corr.corr()
-        
-        fig_multi = px.imshow(
-            matriz_corr,
-            labels=dict(x="Variable", y="Variable", color="Correlación"),
-            x=matriz_corr.columns,
-            y=matriz_corr.columns,
-            color_continuous_scale='RdBu_r',
-            aspect="auto",
-            text_auto='.2f',
-            height=700
-        )
-        fig_multi.update_layout(
-            title="Matriz de Correlación entre Variables",
-            xaxis_tickangle=45
-        )
-        st.plotly_chart(fig_multi, use_container_width=True)
-        
-        st.info("Valores cercanos a 1 indican correlación positiva fuerte, cercanos a -1 correlación negativa fuerte, y cercanos a 0 poca o ninguna correlación.")
+            if tipo_grafico == "Matriz de Correlación":
+                st.info("Valores cercanos a 1 indican correlación positiva fuerte, cercanos a -1 correlación negativa fuerte, y cercanos a 0 poca o ninguna correlación.")
+
+    panel_multivariable(df_multi)
 
 # ============================================================================
 # SECCIÓN 3: MODELO PREDICTIVO
 # ============================================================================
-else:
+elif "3. Modelo Predictivo" in seccion:
     st.title("Modelo Predictivo de Deserción")
     st.markdown("### Predicción de riesgo de deserción estudiantil")
     st.markdown("---")
     
+    modelo_keras, preprocesador, info_modelo, metricas_modelo = modelo_activo()
+    
+    # Población preprocesada para las explicaciones de los modelos
+    X_poblacion = matriz_poblacion(huella_modelo_activo(preprocesador), version_datos,
+                                   registros_poblacion(), df, preprocesador) if preprocesador is not None else None
+    huella_poblacion = explicaciones.huella_matriz(X_poblacion) if X_poblacion is not None else None
+    modelos_sklearn = load_sklearn_models()
+    
     # Tabs para diferentes modelos
     tab1, tab2, tab3 = st.tabs(["Red Neuronal (Principal)", "Árbol de Decisión", "Regresión Logística"])
     
@@ -1158,12 +935,28 @@ else:
         # Información del modelo
         col1, col2 = st.columns(2)
         
+        # Métricas del modelo activo (manifest del registro o mejor_modelo_info.json)
+        recall_nn = metricas_modelo.get('recall')
+        auc_nn = metricas_modelo.get('auc')
+        precision_nn = metricas_modelo.get('precision')
         with col1:
-            st.metric("Recall", "75.00%", help="Detecta 3 de cada 4 estudiantes en riesgo")
+            st.metric("Recall", f"{recall_nn:.2%}" if recall_nn is not None else "N/D",
+                      help="Proporción de estudiantes en riesgo que el modelo detecta")
         with col2:
-            st.metric("AUC", "0.814")
+            st.metric("AUC", f"{auc_nn:.3f}" if auc_nn is not None else "N/D")
         
-        st.info("**Modelo optimizado con recall ≥ 75%**: Balance entre detectar estudiantes en riesgo (75% recall) y mantener precisión aceptable (16.84%). Configuración modelo_v2_48.")
+        if recall_nn is not None and precision_nn is not None:
+            modelo_id = info_modelo.get('modelo_id', '') if info_modelo else ''
+            st.info(f"**Modelo activo {version_modelo}** ({modelo_id}): detecta {recall_nn:.2%} de los estudiantes en riesgo con precisión de {precision_nn:.2%}.")
+        
+        # Importancia de variables (gradientes integrados sobre una muestra de estudiantes)
+        if modelo_keras is not None and X_poblacion is not None:
+            with st.expander("Importancia de variables en la población"):
+                importancia_red = importancia_poblacion('red', huella_modelo_activo(preprocesador), huella_poblacion,
+                                                        modelo_keras, X_poblacion, preprocesador.columnas)
+                st.plotly_chart(grafico_importancia(importancia_red, "Top 15 variables - Red Neuronal (gradientes integrados)"),
+                                use_container_width=True)
+                instrumentacion.marca('seccion3.importancia_red')
         
         st.markdown("---")
         
@@ -1178,313 +971,326 @@ else:
             horizontal=True
         )
     
-    # Inicializar timestamp para keys únicos
-    import time
-    if 'form_key' not in st.session_state:
-        st.session_state.form_key = 0
+    # Fragmento: búsqueda, formulario, resultado y what-if se re-ejecutan solos;
+    # el resto de la sección (tabs, importancias, comparación) no se vuelve a dibujar
+    def cargar_estudiante(posicion):
+        st.session_state.valores_formulario = entrada_desde_fila(df.iloc[posicion].to_dict())
+        st.session_state.estudiante_cargado = posicion
+        st.session_state.estudiante_what_if = registro_desde_tabla(registros_poblacion(), posicion)
+        st.session_state.form_key += 1
+
+    def limpiar_formulario():
+        st.session_state.form_key += 1
+        st.session_state.pop('estudiante_what_if', None)
+        st.session_state.pop('valores_formulario', None)
+        st.session_state.pop('estudiante_cargado', None)
+
+    @st.fragment(key="prediccion")
+    def panel_prediccion():
+        with instrumentacion.fragmento('fragmento.prediccion'):
+            # Inicializar timestamp para keys únicos
+            if 'form_key' not in st.session_state:
+                st.session_state.form_key = 0
     
-    # Formulario de entrada
-    with st.form(key=f"prediction_form_{st.session_state.form_key}"):
-        st.markdown("#### Datos Personales")
-        col1, col2, col3, col4 = st.columns(4)
+            # Búsqueda de estudiantes existentes: índice en memoria sobre df, sin consultar MongoDB
+            indice_busqueda = indice_estudiantes(version_datos, df)
+            with st.expander("Buscar estudiante existente", expanded='estudiante_cargado' in st.session_state):
+                texto_busqueda = st.text_input("ID, programa o ciudad", key="texto_busqueda")
+                posiciones = indice_busqueda.buscar(texto_busqueda)
+                if texto_busqueda and not posiciones:
+                    st.info("No se encontraron estudiantes")
+                if posiciones:
+                    posicion_elegida = st.selectbox(
+                        "Resultados",
+                        posiciones,
+                        format_func=lambda p: f"{df.iloc[p]['_id']} · {df.iloc[p]['programa']} · {df.iloc[p]['ciudad']}"
+                    )
+                    # El callback corre antes del rerun del fragmento, así no hace falta un st.rerun() extra
+                    st.button("Cargar en el formulario", type="primary", on_click=cargar_estudiante, args=(posicion_elegida,))
         
-        with col1:
-            edad = st.number_input("Edad", min_value=15, max_value=60, value=20, key=f"edad_{st.session_state.form_key}")
-        with col2:
-            genero = st.selectbox("Género", ["Masculino", "Femenino"], key=f"genero_{st.session_state.form_key}")
-        with col3:
-            estrato = st.selectbox("Estrato", [1, 2, 3, 4, 5, 6], key=f"estrato_{st.session_state.form_key}")
-        with col4:
-            discapacidad = st.selectbox("Discapacidad", ["No", "Sí"], key=f"discapacidad_{st.session_state.form_key}")
+                posicion_cargada = st.session_state.get('estudiante_cargado')
+                if posicion_cargada is not None and posicion_cargada < len(df):
+                    fila_cargada = df.iloc[posicion_cargada]
+                    estado_cargado = "Graduado" if fila_cargada['graduado'] == 1 else ("Desertor" if fila_cargada['desertor'] == 1 else "Activo")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Estudiante", str(fila_cargada['_id']))
+                    with col2:
+                        st.metric("Estado", estado_cargado)
+                    with col3:
+                        if modelo_keras is not None and preprocesador is not None:
+                            prob_cargado = riesgo_estudiante(huella_modelo_activo(preprocesador), version_datos, posicion_cargada,
+                                                             modelo_keras, preprocesador, registros_poblacion())
+                            st.metric("Probabilidad de deserción", f"{prob_cargado:.2%}", help="Calculada con el registro completo del estudiante")
+    
+            # Valores iniciales del formulario (estudiante cargado o valores por defecto)
+            valores = st.session_state.get('valores_formulario', {})
+            opciones_programa = sorted(df['programa'].dropna().unique())
+    
+            # Formulario de entrada
+            with st.form(key=f"prediction_form_{st.session_state.form_key}"):
+                st.markdown("#### Datos Personales")
+                col1, col2, col3, col4 = st.columns(4)
         
-        st.markdown("#### Información Académica")
-        col1, col2, col3 = st.columns(3)
+                with col1:
+                    edad = st.number_input("Edad", min_value=15, max_value=60, value=valores.get('edad', 20), key=f"edad_{st.session_state.form_key}")
+                with col2:
+                    genero = st.selectbox("Género", OPCIONES_GENERO, index=OPCIONES_GENERO.index(valores.get('genero', OPCIONES_GENERO[0])), key=f"genero_{st.session_state.form_key}")
+                with col3:
+                    estrato = st.selectbox("Estrato", OPCIONES_ESTRATO, index=OPCIONES_ESTRATO.index(valores.get('estrato', 1)), key=f"estrato_{st.session_state.form_key}")
+                with col4:
+                    discapacidad = st.selectbox("Discapacidad", OPCIONES_DISCAPACIDAD, index=OPCIONES_DISCAPACIDAD.index(valores.get('discapacidad', "No")), key=f"discapacidad_{st.session_state.form_key}")
         
-        with col1:
-            programa = st.selectbox("Programa", sorted(df['programa'].dropna().unique()), key=f"programa_{st.session_state.form_key}")
-        with col2:
-            semestre = st.number_input("Semestre Actual", min_value=1, max_value=15, value=1, key=f"semestre_{st.session_state.form_key}")
-        with col3:
-            promedio = st.number_input("Promedio", min_value=0.0, max_value=5.0, value=3.5, step=0.1, key=f"promedio_{st.session_state.form_key}")
+                st.markdown("#### Información Académica")
+                col1, col2, col3 = st.columns(3)
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            materias_cursadas = st.number_input("Materias Cursadas", min_value=0, max_value=100, value=10, key=f"cursadas_{st.session_state.form_key}")
-        with col2:
-            materias_perdidas = st.number_input("Materias Perdidas", min_value=0, max_value=50, value=0, key=f"perdidas_{st.session_state.form_key}")
-        with col3:
-            materias_repetidas = st.number_input("Materias Repetidas", min_value=0, max_value=20, value=0, key=f"repetidas_{st.session_state.form_key}")
+                with col1:
+                    programa = st.selectbox("Programa", opciones_programa,
+                                            index=opciones_programa.index(valores['programa']) if valores.get('programa') in opciones_programa else 0,
+                                            key=f"programa_{st.session_state.form_key}")
+                with col2:
+                    semestre = st.number_input("Semestre Actual", min_value=1, max_value=15, value=valores.get('semestre', 1), key=f"semestre_{st.session_state.form_key}")
+                with col3:
+                    promedio = st.number_input("Promedio", min_value=0.0, max_value=5.0, value=valores.get('promedio', 3.5), step=0.1, key=f"promedio_{st.session_state.form_key}")
         
-        st.markdown("#### Puntajes ICFES")
-        col1, col2, col3, col4, col5 = st.columns(5)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    materias_cursadas = st.number_input("Materias Cursadas", min_value=0, max_value=100, value=valores.get('materias_cursadas', 10), key=f"cursadas_{st.session_state.form_key}")
+                with col2:
+                    materias_perdidas = st.number_input("Materias Perdidas", min_value=0, max_value=50, value=valores.get('materias_perdidas', 0), key=f"perdidas_{st.session_state.form_key}")
+                with col3:
+                    materias_repetidas = st.number_input("Materias Repetidas", min_value=0, max_value=20, value=valores.get('materias_repetidas', 0), key=f"repetidas_{st.session_state.form_key}")
         
-        with col1:
-            icfes_mat = st.number_input("Matemáticas", min_value=0, max_value=100, value=50, key=f"mat_{st.session_state.form_key}")
-        with col2:
-            icfes_lec = st.number_input("Lectura", min_value=0, max_value=100, value=50, key=f"lec_{st.session_state.form_key}")
-        with col3:
-            icfes_soc = st.number_input("Sociales", min_value=0, max_value=100, value=50, key=f"soc_{st.session_state.form_key}")
-        with col4:
-            icfes_cie = st.number_input("Ciencias", min_value=0, max_value=100, value=50, key=f"cie_{st.session_state.form_key}")
-        with col5:
-            icfes_ing = st.number_input("Inglés", min_value=0, max_value=100, value=50, key=f"ing_{st.session_state.form_key}")
+                st.markdown("#### Puntajes ICFES")
+                col1, col2, col3, col4, col5 = st.columns(5)
         
-        st.markdown("#### Información Adicional")
-        col1, col2, col3 = st.columns(3)
+                with col1:
+                    icfes_mat = st.number_input("Matemáticas", min_value=0, max_value=100, value=valores.get('icfes_mat', 50), key=f"mat_{st.session_state.form_key}")
+                with col2:
+                    icfes_lec = st.number_input("Lectura", min_value=0, max_value=100, value=valores.get('icfes_lec', 50), key=f"lec_{st.session_state.form_key}")
+                with col3:
+                    icfes_soc = st.number_input("Sociales", min_value=0, max_value=100, value=valores.get('icfes_soc', 50), key=f"soc_{st.session_state.form_key}")
+                with col4:
+                    icfes_cie = st.number_input("Ciencias", min_value=0, max_value=100, value=valores.get('icfes_cie', 50), key=f"cie_{st.session_state.form_key}")
+                with col5:
+                    icfes_ing = st.number_input("Inglés", min_value=0, max_value=100, value=valores.get('icfes_ing', 50), key=f"ing_{st.session_state.form_key}")
         
-        with col1:
-            becado = st.selectbox("Tipo de Beca", ["No becado", "Institucional", "oficial"], key=f"beca_{st.session_state.form_key}")
-        with col2:
-            tipo_colegio = st.selectbox("Tipo de Colegio", ["OFICIAL", "PRIVADO", "NO APLICA"], key=f"colegio_{st.session_state.form_key}")
-        with col3:
-            es_barranquilla = st.selectbox("¿Es de Barranquilla?", ["Sí", "No"], key=f"barranquilla_{st.session_state.form_key}")
+                st.markdown("#### Información Adicional")
+                col1, col2, col3 = st.columns(3)
         
-        # Botones de acción
-        col_btn1, col_btn2 = st.columns(2)
-        with col_btn1:
-            submitted = st.form_submit_button("Predecir Riesgo de Deserción", use_container_width=True, type="primary")
-        with col_btn2:
-            limpiar = st.form_submit_button("Limpiar Formulario", use_container_width=True)
-    
-    # Manejar limpiar formulario
-    if limpiar:
-        st.session_state.form_key += 1
-        st.rerun()
+                with col1:
+                    becado = st.selectbox("Tipo de Beca", OPCIONES_BECA, index=OPCIONES_BECA.index(valores.get('becado', "No becado")), key=f"beca_{st.session_state.form_key}")
+                with col2:
+                    tipo_colegio = st.selectbox("Tipo de Colegio", OPCIONES_COLEGIO, index=OPCIONES_COLEGIO.index(valores.get('tipo_colegio', "OFICIAL")), key=f"colegio_{st.session_state.form_key}")
+                with col3:
+                    es_barranquilla = st.selectbox("¿Es de Barranquilla?", OPCIONES_BARRANQUILLA, index=OPCIONES_BARRANQUILLA.index(valores.get('es_barranquilla', "Sí")), key=f"barranquilla_{st.session_state.form_key}")
+        
+                # Botones de acción
+                col_btn1, col_btn2 = st.columns(2)
+                with col_btn1:
+                    submitted = st.form_submit_button("Predecir Riesgo de Deserción", use_container_width=True, type="primary")
+                with col_btn2:
+                    st.form_submit_button("Limpiar Formulario", use_container_width=True, on_click=limpiar_formulario)
     
-    # Manejar predicción
-    if submitted:
-            # Forzar limpieza de cache en cada predicción
-            import hashlib
-            input_hash = hashlib.md5(f"{edad}{genero}{estrato}{programa}{semestre}{promedio}{materias_perdidas}".encode()).hexdigest()
+            # Manejar predicción
+            if submitted:
+                    st.markdown("---")
+                    st.subheader(f"Resultado de la Predicción")
             
-            st.markdown("---")
-            st.subheader(f"Resultado de la Predicción")
+                    # Predicción con modelo real de Keras
+                    if modelo_keras is None or preprocesador is None:
+                        st.error("El modelo no está disponible. Por favor, asegúrese de que el archivo 'mejor_modelo_desercion.keras' existe en el directorio.")
+                        return
             
-            # Predicción con modelo real de Keras
-            if modelo_keras is None:
-                st.error("El modelo no está disponible. Por favor, asegúrese de que el archivo 'mejor_modelo_desercion.keras' existe en el directorio.")
-                st.stop()
-            
-            # Predicción con modelo real
-            try:
-                # PASO 1: Preparar datos de entrenamiento para scaler (usar datos históricos)
-                # Cargar todos los datos de MongoDB para entrenar scaler correctamente
-                datos_training = list(collection.find({}).limit(5000))
-                
-                # Crear DataFrame de entrenamiento
-                training_records = []
-                for doc in datos_training:
-                    record = {
-                        'edad': doc['datos_personales'].get('edad'),
-                        'genero': doc['datos_personales'].get('genero', ''),
-                        'estrato': doc['datos_personales'].get('estrato'),
-                        'discapacidad': doc['datos_personales'].get('discapacidad', ''),
-                        'programa': doc['academico'].get('programa', ''),
-                        'programa_secundario': doc['academico'].get('programa_secundario', 'Ninguno'),
-                        'tiene_programa_secundario': 1 if doc['academico'].get('programa_secundario') not in [None, 'Ninguno', ''] else 0,
-                        'semestre_actual': doc['academico'].get('semestre_actual'),
-                        'tipo_estudiante': doc['academico'].get('tipo_estudiante', ''),
-                        'tipo_admision': doc['academico'].get('tipo_admision', ''),
-                        'estado_academico': doc['academico'].get('estado_academico', ''),
-                        'ciudad_residencia': doc['location'].get('ciudad', ''),
-                        'depto_residencia': doc['location'].get('departamento', ''),
-                        'pais': doc['location'].get('pais', ''),
-                        'es_barranquilla': doc['location'].get('es_barranquilla', 0),
-                        'es_colombia': doc['location'].get('es_colombia', 0),
-                        'tipo_colegio': doc['colegio'].get('tipo_colegio'),
-                        'calendario_colegio': doc['colegio'].get('calendario_colegio'),
-                        'puntaje_total': doc['ICFES'].get('puntaje_total'),
-                        'matematicas': doc['ICFES'].get('matematicas'),
-                        'lectura_critica': doc['ICFES'].get('lectura_critica'),
-                        'sociales': doc['ICFES'].get('sociales'),
-                        'ciencias': doc['ICFES'].get('ciencias'),
-                        'ingles': doc['ICFES'].get('ingles'),
-                        'promedio': doc['metricas_rendimiento'].get('promedio_acumulado'),
-                        'materias_cursadas': doc['metricas_rendimiento'].get('materias_cursadas_total', 0),
-                        'materias_perdidas': doc['metricas_rendimiento'].get('materias_perdidas_total', 0),
-                        'materias_repetidas': doc['metricas_rendimiento'].get('materias_repetidas', 0),
-                        'perdidas_por_depto': doc['metricas_rendimiento'].get('materias_perdidas_por_departamento', {}),
-                        'beca': doc['estado'].get('becado', ''),
-                        'ultimo_periodo': doc.get('ultimo_periodo', 202510)
-                    }
-                    training_records.append(record)
-                
-                df_training = pd.DataFrame(training_records)
-                
-                # PASO 2: Crear datos del estudiante a predecir
-                datos_estudiante = {
-                    'edad': edad,
-                    'genero': genero,
-                    'estrato': estrato,
-                    'discapacidad': discapacidad,
-                    'programa': programa,
-                    'programa_secundario': 'Ninguno',
-                    'tiene_programa_secundario': 0,
-                    'semestre_actual': semestre,
-                    'tipo_estudiante': 'Pregrado',
-                    'tipo_admision': 'Regular',
-                    'estado_academico': 'Activo',
-                    'ciudad_residencia': 'Barranquilla' if es_barranquilla == "Sí" else 'Otra',
-                    'depto_residencia': 'Atlántico' if es_barranquilla == "Sí" else 'Otro',
-                    'pais': 'Colombia',
-                    'es_barranquilla': 1 if es_barranquilla == "Sí" else 0,
-                    'es_colombia': 1,
-                    'tipo_colegio': tipo_colegio,
-                    'calendario_colegio': 'A',
-                    'puntaje_total': icfes_mat + icfes_lec + icfes_soc + icfes_cie + icfes_ing,
-                    'matematicas': icfes_mat,
-                    'lectura_critica': icfes_lec,  # Nombre correcto del notebook
-                    'sociales': icfes_soc,
-                    'ciencias': icfes_cie,
-                    'ingles': icfes_ing,
-                    'promedio': promedio,
-                    'materias_cursadas': materias_cursadas,
-                    'materias_perdidas': materias_perdidas,
-                    'materias_repetidas': materias_repetidas,
-                    'perdidas_por_depto': {},  # Diccionario vacío como en el notebook
-                    'beca': becado,
-                    'ultimo_periodo': '2025-10'
-                }
-                
-                # PASO 3: Preparar datos de training expandiendo perdidas_por_depto
-                perdidas_df_train = pd.json_normalize(df_training['perdidas_por_depto'])
-                perdidas_df_train = perdidas_df_train.add_prefix('perdidas_')
-                df_training = pd.concat([df_training.drop('perdidas_por_depto', axis=1), perdidas_df_train], axis=1)
-                
-                # PASO 4: Preparar datos del estudiante a predecir
-                df_pred = pd.DataFrame([datos_estudiante])
-                perdidas_df_pred = pd.json_normalize(df_pred['perdidas_por_depto'])
-                perdidas_df_pred = perdidas_df_pred.add_prefix('perdidas_')
-                df_pred = pd.concat([df_pred.drop('perdidas_por_depto', axis=1), perdidas_df_pred], axis=1)
-                
-                # PASO 5: Asegurar que ambos DataFrames tengan las mismas columnas
-                # Agregar columnas faltantes en df_pred
-                for col in df_training.columns:
-                    if col not in df_pred.columns:
-                        df_pred[col] = 0
-                
-                # Reordenar columnas de df_pred para que coincidan con df_training
-                df_pred = df_pred[df_training.columns]
-                
-                # PASO 6: Preprocesar categóricas usando TODOS los datos (training + pred)
-                categoricas = ['genero', 'discapacidad', 'programa', 'programa_secundario',
-                             'tipo_estudiante', 'tipo_admision', 'estado_academico',
-                             'ciudad_residencia', 'depto_residencia', 'pais',
-                             'tipo_colegio', 'calendario_colegio', 'beca', 'ultimo_periodo']
+                    # Predicción con modelo real
+                    try:
+                        # Encoders, scaler y orden de columnas vienen con la versión del modelo
+                        datos_estudiante = registro_prediccion({
+                            'edad': edad, 'genero': genero, 'estrato': estrato, 'discapacidad': discapacidad,
+                            'programa': programa, 'semestre': semestre, 'promedio': promedio,
+                            'materias_cursadas': materias_cursadas, 'materias_perdidas': materias_perdidas,
+                            'materias_repetidas': materias_repetidas,
+                            'icfes_mat': icfes_mat, 'icfes_lec': icfes_lec, 'icfes_soc': icfes_soc,
+                            'icfes_cie': icfes_cie, 'icfes_ing': icfes_ing,
+                            'becado': becado, 'tipo_colegio': tipo_colegio, 'es_barranquilla': es_barranquilla
+                        })
+                        # Transformar + predict + atribuciones; la misma entrada con el mismo modelo
+                        # se reutiliza de la caché (de cualquier sesión)
+                        def predecir():
+                            with instrumentacion.tramo('prediccion.transformar'):
+                                X = preprocesador.transformar(pd.DataFrame([datos_estudiante]))
+                            with instrumentacion.tramo('prediccion.predict', version=version_modelo):
+                                prediccion = modelo_keras.predict(X, verbose=0)
+                            # Aporte de cada variable a esta predicción (una pasada de gradientes integrados)
+                            with instrumentacion.tramo('prediccion.atribuciones'):
+                                atribucion = explicaciones.atribuciones_red(modelo_keras, X)[0]
+                            return X, float(prediccion[0][0] * 100), atribucion
                 
-                # Combinar training y predicción temporalmente para fit de LabelEncoders
-                df_combined = pd.concat([df_training, df_pred], ignore_index=True)
-                encoders = {}
+                        X_pred_scaled, probabilidad, atribucion_estudiante = cache_predicciones().obtener(
+                            huella_modelo_activo(preprocesador), datos_estudiante, predecir)
                 
-                for col in categoricas:
-                    if col in df_combined.columns:
-                        le = LabelEncoder()
-                        df_combined[col] = le.fit_transform(df_combined[col].astype(str))
-                        encoders[col] = le
+                        # Verificar dimensiones
+                        n_esperadas = modelo_keras.input_shape[-1]
+                        if X_pred_scaled.shape[1] != n_esperadas:
+                            st.warning(f"Dimensiones: {X_pred_scaled.shape[1]} columnas (esperadas: {n_esperadas})")
+                            st.write("Columnas actuales:", preprocesador.columnas)
                 
-                # Separar de nuevo
-                df_training_encoded = df_combined.iloc[:-1]
-                df_pred_encoded = df_combined.iloc[-1:]
+                        # DEBUG: Mostrar datos de entrada
+                        with st.expander("🔍 Ver datos de entrada (debug)"):
+                            st.write("**Datos del estudiante:**")
+                            st.write(f"- Edad: {edad}, Género: {genero}, Estrato: {estrato}")
+                            st.write(f"- Programa: {programa}, Semestre: {semestre}")
+                            st.write(f"- Promedio: {promedio}, Materias perdidas: {materias_perdidas}")
+                            st.write(f"- ICFES: Mat={icfes_mat}, Lec={icfes_lec}")
+                            st.write(f"**Shape de entrada al modelo:** {X_pred_scaled.shape}")
+                            st.write(f"**Muestra de datos escalados (primeros 10):** {X_pred_scaled[0][:10]}")
                 
-                # PASO 7: Escalar datos usando StandardScaler FIT en training, TRANSFORM en predicción
-                scaler = StandardScaler()
-                scaler.fit(df_training_encoded.values)
-                X_pred_scaled = scaler.transform(df_pred_encoded.values)
+                        # El panel what-if se dibuja fuera del submit para sobrevivir a los reruns
+                        st.session_state.estudiante_what_if = datos_estudiante
                 
-                # Verificar dimensiones
-                if X_pred_scaled.shape[1] != 58:
-                    st.warning(f"Dimensiones: {X_pred_scaled.shape[1]} columnas (esperadas: 58)")
-                    st.write("Columnas actuales:", list(df_pred.columns))
+                        st.success(f"Predicción realizada con modelo de red neuronal")
                 
-                # DEBUG: Mostrar datos de entrada
-                with st.expander("🔍 Ver datos de entrada (debug)"):
-                    st.write("**Datos del estudiante:**")
-                    st.write(f"- Edad: {edad}, Género: {genero}, Estrato: {estrato}")
-                    st.write(f"- Programa: {programa}, Semestre: {semestre}")
-                    st.write(f"- Promedio: {promedio}, Materias perdidas: {materias_perdidas}")
-                    st.write(f"- ICFES: Mat={icfes_mat}, Lec={icfes_lec}")
-                    st.write(f"**Shape de entrada al modelo:** {X_pred_scaled.shape}")
-                    st.write(f"**Muestra de datos escalados (primeros 10):** {X_pred_scaled[0][:10]}")
-                
-                # Predecir con modelo
-                prediccion = modelo_keras.predict(X_pred_scaled, verbose=0)
-                probabilidad = float(prediccion[0][0] * 100)
-                
-                st.success(f"Predicción realizada con modelo de red neuronal")
-                
-            except Exception as e:
-                st.error(f"Error en la predicción: {str(e)}")
-                st.error("Por favor, contacte al administrador del sistema.")
-                st.stop()
+                    except Exception as e:
+                        st.error(f"Error en la predicción: {str(e)}")
+                        st.error("Por favor, contacte al administrador del sistema.")
+                        return
             
-            # Calcular promedio ICFES para análisis de factores
-            puntaje_icfes_promedio = (icfes_mat + icfes_lec + icfes_soc + icfes_cie + icfes_ing) / 5
+                    # Calcular promedio ICFES para análisis de factores
+                    puntaje_icfes_promedio = (icfes_mat + icfes_lec + icfes_soc + icfes_cie + icfes_ing) / 5
             
-            # Mostrar resultado
-            col1, col2, col3 = st.columns([1, 2, 1])
+                    # Mostrar resultado
+                    col1, col2, col3 = st.columns([1, 2, 1])
             
-            with col2:
-                # Mostrar resultado como Desertor/No Desertor según puntaje redondeado
-                # Solo si el puntaje redondeado es exactamente 100 es desertor
-                # Solo si el puntaje es mayor o igual a 99.96 es desertor
-                if probabilidad >= 99.96:
-                    st.error("### DESERTOR")
-                else:
-                    st.success("### NO DESERTOR")
+                    with col2:
+                        # Mostrar resultado como Desertor/No Desertor según puntaje redondeado
+                        # Solo si el puntaje redondeado es exactamente 100 es desertor
+                        # Solo si el puntaje es mayor o igual a 99.96 es desertor
+                        if probabilidad >= 99.96:
+                            st.error("### DESERTOR")
+                        else:
+                            st.success("### NO DESERTOR")
                 
-                # No mostrar gráfico, solo resultado
+                        # No mostrar gráfico, solo resultado
+            
+                    st.markdown("---")
             
-            st.markdown("---")
+                    # Variables que más empujan esta predicción según el modelo
+                    st.subheader("Principales Factores según el Modelo")
+                    df_aportes = explicaciones.principales_factores(atribucion_estudiante, preprocesador.columnas)
+                    fig_aportes = px.bar(
+                        df_aportes.iloc[::-1],
+                        x='Aporte',
+                        y='Variable',
+                        orientation='h',
+                        color='Dirección',
+                        color_discrete_map={'Aumenta riesgo': '#d62728', 'Disminuye riesgo': '#2ca02c'},
+                        title="Aporte a la probabilidad de deserción respecto al estudiante promedio"
+                    )
+                    fig_aportes.update_layout(height=400)
+                    st.plotly_chart(fig_aportes, use_container_width=True)
+                    instrumentacion.marca('seccion3.fig_aportes')
             
-            # Factores de riesgo identificados
-            st.subheader("Factores de Riesgo Identificados")
+                    st.markdown("---")
             
-            factores = []
-            if promedio < 3.0:
-                factores.append(("Promedio muy bajo", "Alto", f"{promedio:.2f}"))
-            elif promedio < 3.5:
-                factores.append(("Promedio bajo", "Medio", f"{promedio:.2f}"))
+                    # Factores de riesgo identificados
+                    st.subheader("Factores de Riesgo Identificados")
+            
+                    factores = []
+                    if promedio < 3.0:
+                        factores.append(("Promedio muy bajo", "Alto", f"{promedio:.2f}"))
+                    elif promedio < 3.5:
+                        factores.append(("Promedio bajo", "Medio", f"{promedio:.2f}"))
                 
-            if materias_perdidas > 5:
-                factores.append(("Muchas materias perdidas", "Alto", f"{materias_perdidas}"))
-            elif materias_perdidas > 2:
-                factores.append(("Materias perdidas", "Medio", f"{materias_perdidas}"))
+                    if materias_perdidas > 5:
+                        factores.append(("Muchas materias perdidas", "Alto", f"{materias_perdidas}"))
+                    elif materias_perdidas > 2:
+                        factores.append(("Materias perdidas", "Medio", f"{materias_perdidas}"))
                 
-            if materias_repetidas > 3:
-                factores.append(("Muchas materias repetidas", "Alto", f"{materias_repetidas}"))
-            elif materias_repetidas > 0:
-                factores.append(("Materias repetidas", "Medio", f"{materias_repetidas}"))
+                    if materias_repetidas > 3:
+                        factores.append(("Muchas materias repetidas", "Alto", f"{materias_repetidas}"))
+                    elif materias_repetidas > 0:
+                        factores.append(("Materias repetidas", "Medio", f"{materias_repetidas}"))
                 
-            if estrato <= 2:
-                factores.append(("Estrato socioeconómico bajo", "Medio", f"Estrato {estrato}"))
+                    if estrato <= 2:
+                        factores.append(("Estrato socioeconómico bajo", "Medio", f"Estrato {estrato}"))
                 
-            if becado == "No becado":
-                factores.append(("Sin apoyo financiero", "Medio", "No becado"))
+                    if becado == "No becado":
+                        factores.append(("Sin apoyo financiero", "Medio", "No becado"))
                 
-            if puntaje_icfes_promedio < 50:
-                factores.append(("Puntajes ICFES bajos", "Alto", f"{puntaje_icfes_promedio:.1f}"))
-            elif puntaje_icfes_promedio < 60:
-                factores.append(("Puntajes ICFES medios", "Bajo", f"{puntaje_icfes_promedio:.1f}"))
+                    if puntaje_icfes_promedio < 50:
+                        factores.append(("Puntajes ICFES bajos", "Alto", f"{puntaje_icfes_promedio:.1f}"))
+                    elif puntaje_icfes_promedio < 60:
+                        factores.append(("Puntajes ICFES medios", "Bajo", f"{puntaje_icfes_promedio:.1f}"))
             
-            if factores:
-                df_factores = pd.DataFrame(factores, columns=["Factor", "Nivel", "Valor"])
+                    if factores:
+                        df_factores = pd.DataFrame(factores, columns=["Factor", "Nivel", "Valor"])
                 
-                # Colorear por nivel de riesgo
-                def color_nivel(val):
-                    if val == "Alto":
-                        return 'background-color: #ffcccc'
-                    elif val == "Medio":
-                        return 'background-color: #fff4cc'
-                    else:
-                        return 'background-color: #ccffcc'
+                        # Colorear por nivel de riesgo
+                        def color_nivel(val):
+                            if val == "Alto":
+                                return 'background-color: #ffcccc'
+                            elif val == "Medio":
+                                return 'background-color: #fff4cc'
+                            else:
+                                return 'background-color: #ccffcc'
                 
-                st.dataframe(
-                    df_factores.style.applymap(color_nivel, subset=['Nivel']),
-                    use_container_width=True,
-                    hide_index=True
+                        st.dataframe(
+                            df_factores.style.applymap(color_nivel, subset=['Nivel']),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                    else:
+                        st.success("No se identificaron factores de riesgo significativos")
+    
+            # Análisis what-if del último estudiante evaluado
+            if 'estudiante_what_if' in st.session_state and modelo_keras is not None and preprocesador is not None:
+                st.markdown("---")
+                st.subheader("Análisis What-If")
+                st.markdown("Probabilidad de deserción del estudiante al variar dos de sus características:")
+        
+                variables = list(VARIABLES_WHAT_IF.keys())
+                col1, col2 = st.columns(2)
+                with col1:
+                    variable_x = st.selectbox("Eje horizontal", variables, index=variables.index('promedio'),
+                                              format_func=lambda v: VARIABLES_WHAT_IF[v][0])
+                with col2:
+                    opciones_y = [v for v in variables if v != variable_x]
+                    variable_y = st.selectbox("Eje vertical", opciones_y,
+                                              index=opciones_y.index('materias_perdidas') if 'materias_perdidas' in opciones_y else 0,
+                                              format_func=lambda v: VARIABLES_WHAT_IF[v][0])
+        
+                estudiante = st.session_state.estudiante_what_if
+                matriz = evaluar_what_if(version_modelo, json.dumps(estudiante, sort_keys=True, default=str),
+                                         variable_x, variable_y, modelo_keras, preprocesador)
+                etiqueta_x, valores_x = VARIABLES_WHAT_IF[variable_x]
+                etiqueta_y, valores_y = VARIABLES_WHAT_IF[variable_y]
+        
+                fig_what_if = px.imshow(
+                    matriz,
+                    x=valores_x,
+                    y=valores_y,
+                    origin='lower',
+                    aspect='auto',
+                    zmin=0,
+                    zmax=1,
+                    color_continuous_scale='RdYlGn_r',
+                    labels={'x': etiqueta_x, 'y': etiqueta_y, 'color': 'Prob. deserción'},
+                    title=f"Probabilidad de deserción: {etiqueta_x} vs {etiqueta_y} ({matriz.size} escenarios)"
                 )
-            else:
-                st.success("No se identificaron factores de riesgo significativos")
+                # Posición actual del estudiante
+                fig_what_if.add_trace(go.Scatter(
+                    x=[estudiante[variable_x]],
+                    y=[estudiante[variable_y]],
+                    mode='markers',
+                    marker=dict(symbol='x', size=14, color='black'),
+                    name='Estudiante',
+                    showlegend=False
+                ))
+                fig_what_if.update_layout(height=500)
+                st.plotly_chart(fig_what_if, use_container_width=True)
+                instrumentacion.marca('seccion3.fig_what_if')
+
+    panel_prediccion()
     
     st.markdown("---")
     
@@ -1494,20 +1300,22 @@ else:
             col1, col2 = st.columns(2)
             with col1:
                 st.write("**Hiperparámetros:**")
-                st.write(f"- ID Modelo: {info_modelo['modelo_id']}")
-                st.write(f"- Arquitectura: {info_modelo['hiperparametros']['arquitectura']}")
-                st.write(f"- Capas: {info_modelo['hiperparametros']['capas']}")
-                st.write(f"- Dropout: {info_modelo['hiperparametros']['dropout']}")
-                st.write(f"- Learning Rate: {info_modelo['hiperparametros']['learning_rate']}")
-                st.write(f"- Batch Size: {info_modelo['hiperparametros']['batch_size']}")
-                st.write(f"- Optimizer: {info_modelo['hiperparametros']['optimizer']}")
+                # info.json del notebook v1 anida los hiperparámetros; el de v2 es plano
+                hiperparametros = info_modelo.get('hiperparametros', info_modelo)
+                st.write(f"- Versión: {version_modelo}")
+                st.write(f"- ID Modelo: {info_modelo.get('modelo_id')}")
+                for clave, nombre in [('arquitectura', 'Arquitectura'), ('capas', 'Capas'), ('dropout', 'Dropout'),
+                                      ('learning_rate', 'Learning Rate'), ('batch_size', 'Batch Size'),
+                                      ('optimizer', 'Optimizer'), ('threshold', 'Threshold')]:
+                    if clave in hiperparametros:
+                        st.write(f"- {nombre}: {hiperparametros[clave]}")
             with col2:
                 st.write("**Métricas de Desempeño:**")
-                st.write(f"- Recall: {info_modelo['metricas']['recall']:.2%}")
-                st.write(f"- Precision: {info_modelo['metricas']['precision']:.2%}")
-                st.write(f"- F1-Score: {info_modelo['metricas']['f1']:.4f}")
-                st.write(f"- AUC: {info_modelo['metricas']['auc']:.4f}")
-                st.write(f"- Score Custom: {info_modelo['metricas']['score_custom']:.4f}")
+                for clave, nombre, formato in [('recall', 'Recall', '.2%'), ('precision', 'Precision', '.2%'),
+                                               ('f1', 'F1-Score', '.4f'), ('auc', 'AUC', '.4f'),
+                                               ('score_custom', 'Score Custom', '.4f')]:
+                    if clave in metricas_modelo:
+                        st.write(f"- {nombre}: {metricas_modelo[clave]:{formato}}")
     else:
         st.info("**Nota:** Este modelo utiliza una red neuronal entrenada con datos históricos de deserción estudiantil.")
     
@@ -1526,6 +1334,14 @@ else:
         
         st.warning("**Nota**: Este modelo ofrece alta interpretabilidad con reglas claras. Precisión similar a Red Neuronal pero menor recall.")
         
+        # Importancia calculada sobre la población con el modelo del notebook
+        if 'arbol' in modelos_sklearn and X_poblacion is not None and X_poblacion.shape[1] == modelos_sklearn['arbol'][0].n_features_in_:
+            modelo_arbol, version_arbol = modelos_sklearn['arbol']
+            importancia_arbol = importancia_poblacion('arbol', version_arbol, huella_poblacion, modelo_arbol,
+                                                    X_poblacion, preprocesador.columnas)
+            st.plotly_chart(grafico_importancia(importancia_arbol, "Top 15 variables - Árbol de Decisión (contribuciones por camino)"), use_container_width=True)
+            instrumentacion.marca('seccion3.importancia_arbol')
+        
         st.markdown("---")
         
         st.subheader("Reglas de Decisión Principales")
@@ -1556,6 +1372,14 @@ else:
         
         st.warning("**Nota**: Mejor F1 Score (29.44%) y AUC (0.828) entre todos los modelos. Excelente balance recall-precisión.")
         
+        # Importancia calculada sobre la población con el modelo del notebook
+        if 'logistica' in modelos_sklearn and X_poblacion is not None and X_poblacion.shape[1] == modelos_sklearn['logistica'][0].n_features_in_:
+            modelo_logistica, version_logistica = modelos_sklearn['logistica']
+            importancia_logistica = importancia_poblacion('logistica', version_logistica, huella_poblacion, modelo_logistica,
+                                                    X_poblacion, preprocesador.columnas)
+            st.plotly_chart(grafico_importancia(importancia_logistica, "Top 15 variables - Regresión Logística (coeficiente x valor)"), use_container_width=True)
+            instrumentacion.marca('seccion3.importancia_logistica')
+        
         st.markdown("---")
         
         st.subheader("Coeficientes e Interpretación")
@@ -1587,8 +1411,8 @@ else:
     # Tabla comparativa
     comparacion_modelos = pd.DataFrame({
         'Modelo': ['Red Neuronal', 'Árbol de Decisión', 'Regresión Logística'],
-        'Recall': ['76.14%', '60.23%', '71.59%'],
-        'AUC': ['0.809', '0.673', '0.828'],
+        'Recall': [f"{recall_nn:.2%}" if recall_nn is not None else "N/D", '60.23%', '71.59%'],
+        'AUC': [f"{auc_nn:.3f}" if auc_nn is not None else "N/D", '0.673', '0.828'],
         'Interpretabilidad': ['Baja', 'Alta', 'Media'],
         'Uso Recomendado': [
             'Recall ≥75% con mejor precisión',
@@ -1601,3 +1425,202 @@ else:
     
     st.success("**Conclusión**: La Regresión Logística ofrece el mejor balance (F1: 29.44%, AUC: 0.828). La Red Neuronal cumple requisito recall ≥75% con mejor precisión. Árbol de Decisión aporta interpretabilidad.")
 
+# ============================================================================
+# SECCIÓN 4: ESTUDIANTES EN RIESGO
+# ============================================================================
+elif "4. Estudiantes en Riesgo" in seccion:
+    st.title("Estudiantes en Riesgo de Deserción")
+    st.markdown("### Estudiantes activos con mayor probabilidad de deserción según el modelo")
+    st.markdown("---")
+    
+    modelo_keras, preprocesador, info_modelo, metricas_modelo = modelo_activo()
+    
+    if modelo_keras is None or preprocesador is None:
+        st.error("El modelo no está disponible. Por favor, publique una versión en el registro o agregue 'mejor_modelo_desercion.keras'.")
+        st.stop()
+    
+    indice = indice_riesgo(huella_modelo_activo(preprocesador), version_datos, registros_poblacion(), df,
+                           modelo_keras, preprocesador)
+    df['riesgo'] = indice.puntajes
+    
+    # Fragmento: filtros, top-k y paginación re-ejecutan solo la tabla
+    @st.fragment(key="riesgo")
+    def panel_riesgo(indice):
+        with instrumentacion.fragmento('fragmento.riesgo'):
+            # Filtros
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                programa_riesgo = st.selectbox("Programa", indice.opciones('programa'))
+            with col2:
+                depto_riesgo = st.selectbox("Departamento", indice.opciones('departamento'))
+            with col3:
+                k_riesgo = st.number_input("Cantidad de estudiantes (top-k)", min_value=10, max_value=5000, value=200, step=10)
+            with col4:
+                tamano_pagina = st.selectbox("Filas por página", [25, 50, 100], index=1)
+    
+            # Selección top-k (argpartition sobre el puntaje precalculado)
+            inicio_seleccion = time.perf_counter()
+            seleccion = indice.seleccionar(int(k_riesgo), programa=programa_riesgo, departamento=depto_riesgo,
+                                           periodo=periodo_seleccionado)
+            ms_seleccion = (time.perf_counter() - inicio_seleccion) * 1000
+    
+            if len(seleccion) == 0:
+                st.info("No hay estudiantes activos con los filtros seleccionados")
+                return
+    
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Estudiantes seleccionados", f"{len(seleccion):,}")
+            with col2:
+                st.metric("Riesgo promedio", f"{indice.puntajes[seleccion].mean():.2%}")
+            with col3:
+                st.metric("Riesgo mínimo en la lista", f"{indice.puntajes[seleccion[-1]]:.2%}")
+    
+            # Paginación en el servidor: solo se arma la tabla de la página visible
+            n_paginas = total_paginas(len(seleccion), tamano_pagina)
+            numero_pagina = st.number_input(
+                f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1,
+                key=f"pagina_riesgo_{programa_riesgo}_{depto_riesgo}_{periodo_etiqueta}_{k_riesgo}_{tamano_pagina}"
+            )
+            filas = pagina(seleccion, numero_pagina, tamano_pagina)
+    
+            columnas_tabla = ['_id', 'programa', 'departamento', 'semestre_actual', 'promedio',
+                              'materias_perdidas', 'becado', 'riesgo']
+            tabla_riesgo = df.iloc[filas][columnas_tabla].copy()
+            tabla_riesgo.insert(0, 'Posición', np.arange(len(filas)) + (numero_pagina - 1) * tamano_pagina + 1)
+            tabla_riesgo['riesgo'] = (tabla_riesgo['riesgo'].astype(float) * 100).round(2)
+            tabla_riesgo['promedio'] = tabla_riesgo['promedio'].astype(float).round(2)
+            tabla_riesgo.columns = ['Posición', 'ID', 'Programa', 'Departamento', 'Semestre', 'Promedio',
+                                    'Materias Perdidas', 'Beca', 'Riesgo (%)']
+    
+            st.dataframe(tabla_riesgo, use_container_width=True, hide_index=True)
+            instrumentacion.marca('seccion4.tabla_riesgo', filas=len(seleccion))
+    
+            inicio_pagina = (numero_pagina - 1) * tamano_pagina + 1
+            st.caption(f"Mostrando {inicio_pagina}–{inicio_pagina + len(filas) - 1} de {len(seleccion)} · "
+                       f"selección en {ms_seleccion:.1f} ms · modelo {version_modelo}")
+
+    panel_riesgo(indice)
+
+# ============================================================================
+# SECCIÓN 5: ANÁLISIS POR MATERIAS
+# ============================================================================
+elif "5. Análisis por Materias" in seccion:
+    st.title("Análisis por Materias")
+    st.markdown("### Pérdida de materias por curso, categoría y periodo")
+    st.markdown("---")
+    
+    if filas_periodo is not None:
+        almacen = almacen.filtrar(filas_periodo)
+    if len(almacen) == 0:
+        st.info("Los documentos no tienen materias cursadas")
+        st.stop()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Materias cursadas (registros)", f"{len(almacen):,}")
+    with col2:
+        st.metric("Materias distintas", f"{len(almacen.codigos):,}")
+    with col3:
+        st.metric("Tasa global de pérdida", f"{almacen.tasa_global():.2%}")
+    with col4:
+        min_inscritos = st.number_input("Mínimo de inscritos por materia", min_value=1, max_value=1000, value=30, step=10)
+    
+    st.markdown("---")
+    
+    # Tasa de pérdida por materia
+    st.subheader("Materias con Mayor Tasa de Pérdida")
+    
+    if motor is not None:
+        por_curso = motor.tasa_por_curso(filtro_periodo, min_inscritos=int(min_inscritos))
+        por_categoria = motor.tasa_por_categoria(filtro_periodo)
+        por_periodo = motor.tasa_por_periodo(filtro_periodo)
+    else:
+        por_curso = almacen.tasa_por_curso(min_inscritos=int(min_inscritos))
+        por_categoria = almacen.tasa_por_categoria()
+        por_periodo = almacen.tasa_por_periodo()
+    st.plotly_chart(graficos.grafico_cursos(por_curso), use_container_width=True)
+    instrumentacion.marca('seccion5.fig_cursos')
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("##### Tasa de Pérdida por Categoría")
+        st.plotly_chart(graficos.grafico_categorias(por_categoria), use_container_width=True)
+        instrumentacion.marca('seccion5.fig_categorias')
+    
+    with col2:
+        st.markdown("##### Tasa de Pérdida por Periodo")
+        st.plotly_chart(graficos.grafico_perdida_periodos(por_periodo), use_container_width=True)
+        instrumentacion.marca('seccion5.fig_periodos')
+    
+    st.markdown("---")
+    
+    # Materias "puerta": las que más separan la deserción entre quienes las pierden y quienes las aprueban
+    st.subheader("Materias Asociadas a la Deserción")
+    st.caption("Tasa de deserción de los estudiantes que perdieron la materia (en cualquier intento) frente a los que la aprobaron. "
+               "Es una asociación, no una relación causal.")
+    
+    puerta = almacen.cursos_puerta(df['desertor'].fillna(0).to_numpy(), min_estudiantes=int(min_inscritos)).head(15)
+    if len(puerta) == 0:
+        st.info("No hay materias con suficientes estudiantes")
+    else:
+        tabla_puerta = puerta[['codigo', 'materia', 'estudiantes', 'perdieron', 'desercion_perdieron',
+                               'desercion_aprobaron', 'riesgo_relativo']].copy()
+        tabla_puerta['desercion_perdieron'] = (tabla_puerta['desercion_perdieron'] * 100).round(2)
+        tabla_puerta['desercion_aprobaron'] = (tabla_puerta['desercion_aprobaron'] * 100).round(2)
+        tabla_puerta['riesgo_relativo'] = tabla_puerta['riesgo_relativo'].round(2)
+        tabla_puerta.columns = ['Código', 'Materia', 'Estudiantes', 'La Perdieron', 'Deserción si la Perdió (%)',
+                                'Deserción si la Aprobó (%)', 'Riesgo Relativo']
+        st.dataframe(tabla_puerta, use_container_width=True, hide_index=True)
+
+# ============================================================================
+# SECCIÓN 6: EVOLUCIÓN POR PERIODO
+# ============================================================================
+else:
+    st.title("Evolución por Periodo")
+    st.markdown("### Matrícula y deserción por periodo académico y por cohorte")
+    st.markdown("---")
+    
+    serie = particiones.tabla()
+    if serie.empty:
+        st.info("Los documentos no tienen información de periodos")
+        st.stop()
+    
+    ultimo = serie.iloc[-1]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Periodos", len(serie))
+    with col2:
+        st.metric(f"Matriculados {ultimo['etiqueta']}", f"{int(ultimo['matriculados']):,}")
+    with col3:
+        st.metric("Desertores (todos los periodos)", f"{int(serie['desertores'].sum()):,}")
+    with col4:
+        st.metric("Periodos recalculados", len(particiones.recalculados))
+    
+    st.markdown("---")
+    
+    # Matrícula y desertores por periodo
+    st.subheader("Matrícula y Deserción por Periodo")
+    
+    st.plotly_chart(graficos.grafico_matricula_periodos(serie, periodo_seleccionado), use_container_width=True)
+    instrumentacion.marca('seccion6.fig_periodos')
+    st.caption("Tasa de deserción por periodo: desertores entre los estudiantes cuyo último periodo registrado es ese periodo.")
+    
+    # Deserción por cohorte
+    st.subheader("Deserción por Cohorte")
+    
+    st.plotly_chart(graficos.grafico_cohortes(serie), use_container_width=True)
+    instrumentacion.marca('seccion6.fig_cohortes')
+    
+    tabla_periodos = serie[['etiqueta', 'matriculados', 'estudiantes', 'desertores', 'graduados',
+                            'cohorte_estudiantes', 'cohorte_desertores']].copy()
+    tabla_periodos.columns = ['Periodo', 'Matriculados', 'Último Periodo', 'Desertores', 'Graduados',
+                              'Cohorte', 'Desertores de la Cohorte']
+    st.dataframe(tabla_periodos, use_container_width=True, hide_index=True)
+
+instrumentacion.cerrar_rerun()
+
+# Con la página ya enviada, TensorFlow se importa en segundo plano para las secciones 3 y 4
+if PRECALENTAR:
+    precalentar_tensorflow()
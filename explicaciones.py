@@ -0,0 +1,136 @@
+"""
+Atribuciones por variable para los tres modelos del dashboard.
+
+- Regresión logística: coeficiente x valor escalado (aporte al log-odds
+  respecto al estudiante promedio, que en el espacio escalado es el origen).
+- Árbol de decisión: contribuciones por camino (cada división aporta a su
+  variable el cambio de probabilidad entre el nodo padre y el hijo).
+- Red neuronal: gradientes integrados desde el estudiante promedio, con los
+  pasos de la integral evaluados en lote.
+
+Las atribuciones de toda la población se calculan una vez por versión de
+modelo y matriz de datos, y se guardan en disco; las de un estudiante
+individual salen de una sola pasada de gradientes.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+DIRECTORIO_CACHE = "cache_explicaciones"
+
+# Gradientes integrados: pasos de la integral y filas por llamada al modelo
+PASOS_IG = 32
+FILAS_POR_LOTE_IG = 8192
+# Para la importancia global de la red basta una muestra de estudiantes
+MUESTRA_POBLACION_RED = 2000
+
+
+def atribuciones_logistica(modelo, X):
+    """Aporte de cada variable al log-odds: coef * x"""
+    return np.asarray(X, dtype=np.float64) * modelo.coef_[0]
+
+
+def atribuciones_arbol(modelo, X):
+    """Contribuciones por camino del árbol: suman predict_proba - probabilidad de la raíz"""
+    from scipy import sparse
+
+    arbol = modelo.tree_
+    valor = arbol.value[:, 0, :]
+    probabilidad = valor[:, 1] / valor.sum(axis=1)
+
+    internos = np.where(arbol.children_left >= 0)[0]
+    padre = np.full(arbol.node_count, -1)
+    padre[arbol.children_left[internos]] = internos
+    padre[arbol.children_right[internos]] = internos
+    hijos = np.where(padre >= 0)[0]
+
+    # Matriz nodo -> variable con el cambio de probabilidad que aporta llegar a ese nodo
+    aporte = sparse.csr_matrix(
+        (probabilidad[hijos] - probabilidad[padre[hijos]], (hijos, arbol.feature[padre[hijos]])),
+        shape=(arbol.node_count, modelo.n_features_in_)
+    )
+    caminos = modelo.decision_path(np.asarray(X, dtype=np.float32))
+    return np.asarray((caminos @ aporte).todense())
+
+
+def atribuciones_red(modelo, X, pasos=PASOS_IG, filas_por_lote=FILAS_POR_LOTE_IG):
+    """Gradientes integrados (regla del punto medio) desde el origen del espacio escalado"""
+    import tensorflow as tf
+
+    X = np.asarray(X, dtype=np.float32)
+    alphas = ((np.arange(pasos) + 0.5) / pasos).astype(np.float32)
+    estudiantes_por_lote = max(1, filas_por_lote // pasos)
+    resultado = np.empty_like(X)
+
+    for inicio in range(0, len(X), estudiantes_por_lote):
+        x = X[inicio:inicio + estudiantes_por_lote]
+        interpolados = tf.constant((alphas[None, :, None] * x[:, None, :]).reshape(-1, X.shape[1]))
+        with tf.GradientTape() as cinta:
+            cinta.watch(interpolados)
+            salida = modelo(interpolados, training=False)
+        gradientes = cinta.gradient(salida, interpolados).numpy().reshape(len(x), pasos, -1)
+        resultado[inicio:inicio + len(x)] = x * gradientes.mean(axis=1)
+    return resultado
+
+
+ATRIBUIDORES = {
+    'red': atribuciones_red,
+    'arbol': atribuciones_arbol,
+    'logistica': atribuciones_logistica,
+}
+
+
+def huella_matriz(X):
+    """Hash de la matriz de entrada, parte de la clave de la caché"""
+    X = np.ascontiguousarray(X)
+    h = hashlib.sha256(str(X.shape).encode())
+    h.update(X.tobytes())
+    return h.hexdigest()[:16]
+
+
+def explicar_poblacion(tipo, modelo, X, version, directorio=DIRECTORIO_CACHE):
+    """
+    Atribuciones de la población con caché en disco por (modelo, versión, datos).
+
+    `version` debe cambiar con el contenido del modelo (hash del archivo, no
+    solo su nombre); en el nombre del archivo va su hash, sin espacios ni '/'.
+    Para la red se usa una muestra fija de MUESTRA_POBLACION_RED estudiantes.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    if tipo == 'red' and len(X) > MUESTRA_POBLACION_RED:
+        indices = np.random.default_rng(42).choice(len(X), MUESTRA_POBLACION_RED, replace=False)
+        X = X[np.sort(indices)]
+
+    clave_version = hashlib.sha256(str(version).encode('utf-8')).hexdigest()[:16]
+    ruta = os.path.join(directorio, f"{tipo}_{clave_version}_{huella_matriz(X)}.npy")
+    if os.path.exists(ruta):
+        return np.load(ruta)
+
+    atribuciones = ATRIBUIDORES[tipo](modelo, X)
+    os.makedirs(directorio, exist_ok=True)
+    ruta_tmp = ruta + ".tmp.npy"
+    np.save(ruta_tmp, atribuciones)
+    os.replace(ruta_tmp, ruta)
+    return atribuciones
+
+
+def importancia_global(atribuciones, columnas):
+    """Importancia media |atribución| y efecto medio con signo, de mayor a menor"""
+    return pd.DataFrame({
+        'Variable': columnas,
+        'Importancia': np.abs(atribuciones).mean(axis=0),
+        'Efecto medio': atribuciones.mean(axis=0)
+    }).sort_values('Importancia', ascending=False).reset_index(drop=True)
+
+
+def principales_factores(atribucion, columnas, k=10):
+    """Las k variables con mayor aporte (en valor absoluto) para un estudiante"""
+    atribucion = np.asarray(atribucion).reshape(-1)
+    orden = np.argsort(-np.abs(atribucion))[:k]
+    return pd.DataFrame({
+        'Variable': [columnas[i] for i in orden],
+        'Aporte': atribucion[orden],
+        'Dirección': np.where(atribucion[orden] > 0, 'Aumenta riesgo', 'Disminuye riesgo')
+    })
@@ -0,0 +1,745 @@
+"""
+Agregaciones y figuras de las secciones descriptivas del dashboard.
+
+Las agregaciones reciben la tabla de estudiantes y devuelven la tabla que
+dibuja cada gráfico; las funciones `grafico_*` reciben esa tabla (o, las que
+necesitan puntos individuales, la tabla de estudiantes) y devuelven la figura
+de Plotly. Nada depende de Streamlit, así que sirven para el benchmark sin
+interfaz, y `motor_duckdb.py` produce las mismas tablas con SQL.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+BINS_EDAD = [0, 16, 17, 18, 19, 20, 21, 22, 23, 24, 100]
+ETIQUETAS_EDAD = ['Menos de 16', '16', '17', '18', '19', '20', '21', '22', '23', '+24']
+COLORES_GENERO = {'Masculino': '#3498db', 'Femenino': '#e74c3c'}
+COLORES_DESERCION = {0: '#00cc96', 1: '#ef553b'}
+URL_GEOJSON_COLOMBIA = "https://gist.githubusercontent.com/john-guerra/43c7656821069d00dcbc/raw/3aadedf47badbdac823b00dbe259f6bc6d9e1899/colombia.geo.json"
+
+# Mapeo de nombres de departamentos (usado en múltiples secciones)
+MAPEO_DEPARTAMENTOS = {
+    'ATLANTICO': 'ATLÁNTICO',
+    'BOLIVAR': 'BOLÍVAR',
+    'BOGOTA': 'BOGOTÁ D.C.',
+    'BOGOTA D.C.': 'BOGOTÁ D.C.',
+    'BOGOTÁ': 'BOGOTÁ D.C.',
+    'CORDOBA': 'CÓRDOBA',
+    'NARINO': 'NARIÑO',
+    'QUINDIO': 'QUINDÍO',
+    'VALLE': 'VALLE DEL CAUCA',
+    'NORTE SANTANDER': 'NORTE DE SANTANDER',
+    'ARCHIPIELAGO DE SAN ANDRES': 'ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA',
+    'SAN ANDRES': 'ARCHIPIÉLAGO DE SAN ANDRÉS, PROVIDENCIA Y SANTA CATALINA'
+}
+
+SECCIONES_ICFES = ['icfes_matematicas', 'icfes_lectura', 'icfes_sociales', 'icfes_ciencias', 'icfes_ingles']
+NOMBRES_SECCIONES_ICFES = ['Matemáticas', 'Lectura Crítica', 'Sociales', 'Ciencias', 'Inglés']
+
+TIPOS_MULTIVARIABLE = [
+    "Promedio vs ICFES (por Estrato y Deserción)",
+    "Promedio vs Materias Perdidas (por Género)",
+    "ICFES vs Materias Cursadas (por Tipo de Colegio)",
+    "Edad vs Promedio (por Programa)",
+    "Matriz de Correlación"
+]
+
+
+def rango_edad(edad):
+    return pd.cut(edad, bins=BINS_EDAD, labels=ETIQUETAS_EDAD)
+
+
+def agregar_porcentaje(tabla, columna, decimales):
+    """Columna `porcentaje`: participación de cada fila en la suma de `columna`"""
+    tabla['porcentaje'] = (tabla[columna] / tabla[columna].sum() * 100).round(decimales)
+    return tabla
+
+
+def agregar_tasa(tabla):
+    """Columna `tasa_desercion` (%) a partir de `total` y `desertores`"""
+    tabla['tasa_desercion'] = (tabla['desertores'] / tabla['total'] * 100).round(2)
+    return tabla
+
+
+def tasa_por_grupo(df, columnas, nombres=None):
+    """Total, desertores y tasa de deserción (%) por grupo"""
+    tabla = df.groupby(columnas, observed=True).agg({
+        '_id': 'count',
+        'desertor': 'sum'
+    }).reset_index()
+    tabla.columns = (nombres or list(np.atleast_1d(columnas))) + ['total', 'desertores']
+    return agregar_tasa(tabla)
+
+
+def normalizar_departamentos(departamentos):
+    """Mayúsculas, sin espacios y con los nombres del GeoJSON (MAPEO_DEPARTAMENTOS)"""
+    return departamentos.str.upper().str.strip().replace(MAPEO_DEPARTAMENTOS)
+
+
+# ============================================================================
+# SECCIÓN 1: CARACTERÍSTICAS GENERALES
+# ============================================================================
+
+def conteo_genero(df):
+    conteo = df['genero'].value_counts()
+    genero_count = conteo[conteo > 0].reset_index()
+    genero_count.columns = ['genero', 'count']
+    return agregar_porcentaje(genero_count, 'count', 1)
+
+
+def grafico_genero(genero_count):
+    fig = px.pie(
+        genero_count,
+        values='count',
+        names='genero',
+        title='Distribución por Género',
+        color_discrete_sequence=['#3498db', '#e74c3c'],
+        hole=0.4
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(height=400)
+    return fig
+
+
+def conteo_edad(df):
+    """Estudiantes por rango de edad (todos los rangos, en orden)"""
+    df_edad = df[df['edad'].notna()].copy()
+    df_edad['rango_edad'] = rango_edad(df_edad['edad'])
+    edad_count = df_edad['rango_edad'].value_counts().reset_index()
+    edad_count.columns = ['rango_edad', 'count']
+    return edad_count.sort_values('rango_edad').reset_index(drop=True)
+
+
+def grafico_edad(edad_count):
+    fig = px.bar(
+        edad_count,
+        x='rango_edad',
+        y='count',
+        title='Distribución por Rango de Edad',
+        labels={'rango_edad': 'Rango de Edad', 'count': 'Número de Estudiantes'},
+        color='count',
+        color_continuous_scale='Blues'
+    )
+    fig.update_layout(showlegend=False, coloraxis_showscale=False, height=400)
+    return fig
+
+
+def conteo_edad_genero(df):
+    df_edad_genero = df[(df['edad'].notna()) & (df['genero'].notna())].copy()
+    df_edad_genero['rango_edad'] = rango_edad(df_edad_genero['edad'])
+    return df_edad_genero.groupby(['rango_edad', 'genero']).size().reset_index(name='count')
+
+
+def grafico_edad_genero(edad_genero_count):
+    fig = px.bar(
+        edad_genero_count,
+        x='rango_edad',
+        y='count',
+        color='genero',
+        barmode='group',
+        labels={'rango_edad': 'Rango de Edad', 'count': 'Número de Estudiantes', 'genero': 'Género'},
+        color_discrete_map=COLORES_GENERO
+    )
+    fig.update_layout(
+        height=450,
+        legend=dict(title='', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+def estudiantes_por_departamento(df):
+    """Estudiantes de Colombia por departamento (nombres normalizados), sin Atlántico para el mapa"""
+    df_colombia = df[df['es_colombia'] == 1]
+
+    estudiantes_depto = df_colombia.groupby('departamento', observed=True).agg({
+        '_id': 'count'
+    }).reset_index()
+    estudiantes_depto.columns = ['departamento', 'total_estudiantes']
+    return departamentos_mapa(estudiantes_depto)
+
+
+def departamentos_mapa(estudiantes_depto):
+    """Porcentaje y nombres normalizados de los conteos por departamento; quita Atlántico"""
+    estudiantes_depto = agregar_porcentaje(estudiantes_depto, 'total_estudiantes', 2)
+    estudiantes_depto['departamento'] = normalizar_departamentos(estudiantes_depto['departamento'])
+    return estudiantes_depto[estudiantes_depto['departamento'] != 'ATLÁNTICO'].copy()
+
+
+def grafico_mapa(estudiantes_mapa, geojson):
+    """Mapa de Colombia con degradado de color y porcentaje"""
+    fig = px.choropleth_mapbox(
+        estudiantes_mapa,
+        geojson=geojson,
+        locations='departamento',
+        featureidkey="properties.NOMBRE_DPT",
+        color='total_estudiantes',
+        color_continuous_scale="Viridis",
+        hover_name='departamento',
+        hover_data={
+            'departamento': False,
+            'total_estudiantes': ':,',
+            'porcentaje': ':.2f'
+        },
+        mapbox_style="carto-positron",
+        zoom=4.5,
+        center={"lat": 4.5, "lon": -74},
+        opacity=0.8,
+        labels={
+            'total_estudiantes': 'Estudiantes',
+            'porcentaje': '% del Total'
+        }
+    )
+
+    fig.update_layout(
+        height=600,
+        margin={"r": 0, "t": 0, "l": 0, "b": 0}
+    )
+    return fig
+
+
+def estudiantes_atlantico_por_ciudad(df):
+    """Estudiantes del Atlántico por ciudad con porcentaje (None si no hay)"""
+    df_atlantico = df[df['departamento'].str.upper().str.strip().str.contains('ATLANTICO|ATLÁNTICO', na=False)]
+    if len(df_atlantico) == 0:
+        return None
+
+    estudiantes_ciudad = df_atlantico.groupby('ciudad', observed=True).agg({
+        '_id': 'count'
+    }).reset_index()
+    estudiantes_ciudad.columns = ['ciudad', 'total_estudiantes']
+    return ciudades_atlantico(estudiantes_ciudad)
+
+
+def ciudades_atlantico(estudiantes_ciudad):
+    """Porcentaje y nombres normalizados de los conteos por ciudad"""
+    estudiantes_ciudad = agregar_porcentaje(estudiantes_ciudad, 'total_estudiantes', 2)
+    estudiantes_ciudad['ciudad'] = estudiantes_ciudad['ciudad'].str.title().str.strip()
+    return estudiantes_ciudad
+
+
+def grafico_ciudades(otras_ciudades):
+    """Barras horizontales de las ciudades del Atlántico distintas de Barranquilla"""
+    otras_ciudades = otras_ciudades.sort_values('total_estudiantes', ascending=True)
+
+    fig = px.bar(
+        otras_ciudades,
+        y='ciudad',
+        x='total_estudiantes',
+        text='porcentaje',
+        orientation='h',
+        labels={'ciudad': 'Ciudad', 'total_estudiantes': 'Frecuencia'},
+        color='total_estudiantes',
+        color_continuous_scale='Blues'
+    )
+
+    fig.update_traces(
+        texttemplate='%{text:.1f}%',
+        textposition='outside'
+    )
+
+    fig.update_layout(
+        height=max(400, len(otras_ciudades) * 25),
+        showlegend=False,
+        xaxis_title="Número de Estudiantes",
+        yaxis_title="",
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+# ============================================================================
+# SECCIÓN 2: DESERTORES VS NO DESERTORES
+# ============================================================================
+
+def desercion_genero(df_sin_graduados):
+    return tasa_por_grupo(df_sin_graduados[df_sin_graduados['genero'].notna()], 'genero')
+
+
+def grafico_genero_desercion(desercion_genero):
+    fig = px.bar(
+        desercion_genero,
+        x='genero',
+        y='tasa_desercion',
+        text='tasa_desercion',
+        labels={'genero': 'Género', 'tasa_desercion': 'Tasa de Deserción (%)'},
+        color='genero',
+        color_discrete_map=COLORES_GENERO
+    )
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(showlegend=False, height=400)
+    return fig
+
+
+def desercion_edad(df_sin_graduados):
+    df_edad_des = df_sin_graduados[df_sin_graduados['edad'].notna()].copy()
+    df_edad_des['rango_edad'] = rango_edad(df_edad_des['edad'])
+    return tasa_por_grupo(df_edad_des, 'rango_edad')
+
+
+def grafico_edad_desercion(desercion_edad):
+    fig = px.bar(
+        desercion_edad,
+        x='rango_edad',
+        y='tasa_desercion',
+        text='tasa_desercion',
+        labels={'rango_edad': 'Rango de Edad', 'tasa_desercion': 'Tasa de Deserción (%)'},
+        color='tasa_desercion',
+        color_continuous_scale='Reds'
+    )
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(showlegend=False, coloraxis_showscale=False, height=400)
+    return fig
+
+
+def desercion_edad_genero(df_sin_graduados):
+    df_edad_genero_des = df_sin_graduados[(df_sin_graduados['edad'].notna()) & (df_sin_graduados['genero'].notna())].copy()
+    df_edad_genero_des['rango_edad'] = rango_edad(df_edad_genero_des['edad'])
+    return tasa_por_grupo(df_edad_genero_des, ['rango_edad', 'genero'])
+
+
+def grafico_edad_genero_desercion(desercion_edad_genero):
+    fig = px.bar(
+        desercion_edad_genero,
+        x='rango_edad',
+        y='tasa_desercion',
+        color='genero',
+        barmode='group',
+        text='tasa_desercion',
+        labels={'rango_edad': 'Rango de Edad', 'tasa_desercion': 'Tasa de Deserción (%)', 'genero': 'Género'},
+        color_discrete_map=COLORES_GENERO
+    )
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(
+        height=450,
+        legend=dict(title='', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+def desercion_programa(df_sin_graduados):
+    return tasa_por_grupo(df_sin_graduados, 'programa')
+
+
+def grafico_programas(desercion_programa):
+    """Total y desertores por programa (barras horizontales superpuestas)"""
+    desercion_programa = desercion_programa.sort_values('tasa_desercion', ascending=True)
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        y=desercion_programa['programa'],
+        x=desercion_programa['total'],
+        name='Total',
+        orientation='h',
+        marker_color='lightblue',
+        text=desercion_programa['total'],
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Total: %{x}<extra></extra>'
+    ))
+
+    fig.add_trace(go.Bar(
+        y=desercion_programa['programa'],
+        x=desercion_programa['desertores'],
+        name='Desertores',
+        orientation='h',
+        marker_color='salmon',
+        text=desercion_programa['tasa_desercion'].apply(lambda x: f'{x:.1f}%'),
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Desertores: %{x}<br>Tasa: %{text}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        barmode='overlay',
+        height=max(600, len(desercion_programa) * 20),
+        xaxis_title="Número de Estudiantes",
+        yaxis_title="",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode='y unified'
+    )
+    return fig
+
+
+def desertores_por_estrato(df_desertores):
+    return df_desertores.groupby('estrato').size().reset_index(name='count')
+
+
+def grafico_estratos(estratos_desertores):
+    fig = px.bar(
+        estratos_desertores,
+        x='estrato',
+        y='count',
+        labels={'estrato': 'Estrato', 'count': 'Número de Desertores'},
+        color='count',
+        color_continuous_scale='Reds'
+    )
+
+    fig.update_layout(
+        xaxis=dict(tickmode='linear', tick0=1, dtick=1),
+        showlegend=False,
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+def desercion_departamento(df_sin_graduados):
+    """Tasa de deserción por departamento (al menos 10 estudiantes)"""
+    df_colombia_sin_grad = df_sin_graduados[df_sin_graduados['es_colombia'] == 1]
+    return tasa_departamentos(tasa_por_grupo(df_colombia_sin_grad, 'departamento'))
+
+
+def tasa_departamentos(desercion_depto):
+    """Une los conteos por nombre normalizado (Cundinamarca con Bogotá) y deja los de al menos 10 estudiantes"""
+    departamento = normalizar_departamentos(desercion_depto['departamento']).replace('CUNDINAMARCA', 'BOGOTÁ D.C.')
+    desercion_depto = desercion_depto.groupby(departamento)[['total', 'desertores']].sum().reset_index()
+    desercion_depto = agregar_tasa(desercion_depto)
+
+    # Filtrar departamentos con al menos 10 estudiantes para tasa representativa
+    return desercion_depto[desercion_depto['total'] >= 10].copy()
+
+
+def grafico_departamentos_desercion(desercion_depto_filtrado):
+    desercion_depto_filtrado = desercion_depto_filtrado.sort_values('tasa_desercion', ascending=True)
+
+    fig = px.bar(
+        desercion_depto_filtrado,
+        y='departamento',
+        x='tasa_desercion',
+        orientation='h',
+        text='tasa_desercion',
+        labels={'departamento': 'Departamento', 'tasa_desercion': 'Tasa de Deserción (%)'},
+        color='tasa_desercion',
+        color_continuous_scale='RdYlGn_r'
+    )
+
+    fig.update_traces(
+        texttemplate='%{text:.1f}%',
+        textposition='outside'
+    )
+
+    fig.update_layout(
+        height=max(500, len(desercion_depto_filtrado) * 20),
+        showlegend=False,
+        coloraxis_showscale=False
+    )
+    return fig
+
+
+def grafico_promedio_box(df_sin_graduados):
+    fig = px.box(
+        df_sin_graduados,
+        x='desertor',
+        y='promedio',
+        color='desertor',
+        labels={'desertor': '', 'promedio': 'Promedio Acumulado'},
+        color_discrete_map=COLORES_DESERCION
+    )
+
+    fig.update_xaxes(tickvals=[0, 1], ticktext=['No Desertores', 'Desertores'])
+    fig.update_layout(showlegend=False, height=500)
+    return fig
+
+
+def promedios_icfes(df_sin_graduados, programa=None):
+    """Promedio por sección del ICFES de desertores y no desertores (de un programa o de todos)"""
+    df_icfes = df_sin_graduados if programa is None else df_sin_graduados[df_sin_graduados['programa'] == programa]
+    promedios = {
+        desertor: [df_icfes[df_icfes['desertor'] == desertor][seccion].mean() for seccion in SECCIONES_ICFES]
+        for desertor in (0, 1)
+    }
+    return tabla_icfes(promedios)
+
+
+def tabla_icfes(promedios):
+    """Tabla larga Sección/Promedio/Tipo desde {desertor: [promedio de cada sección]}"""
+    return pd.DataFrame({
+        'Sección': NOMBRES_SECCIONES_ICFES * 2,
+        'Promedio': list(promedios[0]) + list(promedios[1]),
+        'Tipo': ['No Desertores'] * 5 + ['Desertores'] * 5
+    })
+
+
+def grafico_icfes(df_icfes_prom):
+    fig = px.bar(
+        df_icfes_prom,
+        x='Sección',
+        y='Promedio',
+        color='Tipo',
+        barmode='group',
+        text='Promedio',
+        color_discrete_map={'Desertores': '#ef553b', 'No Desertores': '#00cc96'}
+    )
+
+    fig.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+    fig.update_layout(
+        height=500,
+        legend=dict(title='', orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+def desercion_colegio(df_sin_graduados):
+    return tasa_por_grupo(df_sin_graduados[df_sin_graduados['tipo_colegio'].notna()], 'tipo_colegio')
+
+
+def grafico_colegio(desercion_colegio):
+    # Asignar colores diferentes a cada tipo de colegio
+    colores_colegio = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c']
+
+    fig = px.bar(
+        desercion_colegio,
+        x='tipo_colegio',
+        y='tasa_desercion',
+        text='tasa_desercion',
+        labels={'tipo_colegio': 'Tipo de Colegio', 'tasa_desercion': 'Tasa de Deserción (%)'},
+        color='tipo_colegio',
+        color_discrete_sequence=colores_colegio
+    )
+
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(showlegend=False, height=400)
+    return fig
+
+
+def desercion_calendario(df_sin_graduados):
+    df_calendario = df_sin_graduados[df_sin_graduados['calendario_colegio'].notna()]
+    # Filtrar solo calendarios A y B
+    df_calendario = df_calendario[df_calendario['calendario_colegio'].isin(['A', 'B'])]
+    return tasa_por_grupo(df_calendario, 'calendario_colegio', ['calendario'])
+
+
+def grafico_calendario(desercion_calendario):
+    fig = px.bar(
+        desercion_calendario,
+        x='calendario',
+        y='tasa_desercion',
+        text='tasa_desercion',
+        labels={'calendario': 'Calendario', 'tasa_desercion': 'Tasa de Deserción (%)'},
+        color='tasa_desercion',
+        color_continuous_scale='RdYlGn_r'
+    )
+
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(showlegend=False, coloraxis_showscale=False, height=400)
+    return fig
+
+
+def datos_multivariable(df_sin_graduados):
+    """Estudiantes con promedio, puntaje ICFES y estrato"""
+    return df_sin_graduados[
+        (df_sin_graduados['promedio'].notna()) &
+        (df_sin_graduados['puntaje_total'].notna()) &
+        (df_sin_graduados['estrato'].notna())
+    ].copy()
+
+
+def grafico_multivariable(df_multi, tipo_grafico):
+    """Figura del análisis multivariable elegido (uno de TIPOS_MULTIVARIABLE)"""
+    if tipo_grafico == "Promedio vs ICFES (por Estrato y Deserción)":
+        # Gráfico de burbujas: promedio vs ICFES, tamaño por estrato, color por deserción
+        fig = px.scatter(
+            df_multi.sample(min(1500, len(df_multi))),
+            x='puntaje_total',
+            y='promedio',
+            size='estrato',
+            color='desertor',
+            labels={
+                'puntaje_total': 'Puntaje Total ICFES',
+                'promedio': 'Promedio Acumulado',
+                'estrato': 'Estrato',
+                'desertor': 'Estado'
+            },
+            color_discrete_map=COLORES_DESERCION,
+            size_max=20,
+            opacity=0.6,
+            height=600
+        )
+        fig.for_each_trace(lambda t: t.update(name='No Desertor' if t.name == '0' else 'Desertor'))
+
+    elif tipo_grafico == "Promedio vs Materias Perdidas (por Género)":
+        df_multi_genero = df_multi[df_multi['genero'].notna()].copy()
+        fig = px.scatter(
+            df_multi_genero,
+            x='materias_perdidas',
+            y='promedio',
+            color='genero',
+            facet_col='desertor',
+            labels={
+                'materias_perdidas': 'Materias Perdidas',
+                'promedio': 'Promedio Acumulado',
+                'genero': 'Género',
+                'desertor': 'Estado'
+            },
+            color_discrete_map=COLORES_GENERO,
+            opacity=0.6,
+            height=500
+        )
+        fig.for_each_annotation(lambda a: a.update(text='No Desertor' if a.text.split('=')[1] == '0' else 'Desertor'))
+
+    elif tipo_grafico == "ICFES vs Materias Cursadas (por Tipo de Colegio)":
+        df_multi_colegio = df_multi[df_multi['tipo_colegio'].notna()].copy()
+        df_multi_colegio = df_multi_colegio[df_multi_colegio['materias_cursadas'] > 0]
+        fig = px.scatter(
+            df_multi_colegio.sample(min(1500, len(df_multi_colegio))),
+            x='materias_cursadas',
+            y='puntaje_total',
+            color='tipo_colegio',
+            symbol='desertor',
+            labels={
+                'materias_cursadas': 'Materias Cursadas',
+                'puntaje_total': 'Puntaje ICFES',
+                'tipo_colegio': 'Tipo de Colegio',
+                'desertor': 'Estado'
+            },
+            opacity=0.6,
+            height=600
+        )
+        fig.for_each_trace(lambda t: t.update(name=t.name.replace(', 0', ' - No Desertor').replace(', 1', ' - Desertor')))
+
+    elif tipo_grafico == "Edad vs Promedio (por Programa)":
+        # Seleccionar top 5 programas por cantidad de estudiantes
+        top_programas = df_multi['programa'].value_counts().head(5).index.tolist()
+        df_multi_prog = df_multi[df_multi['programa'].isin(top_programas)].copy()
+
+        fig = px.box(
+            df_multi_prog,
+            x='programa',
+            y='promedio',
+            color='desertor',
+            labels={
+                'programa': 'Programa',
+                'promedio': 'Promedio Acumulado',
+                'desertor': 'Estado'
+            },
+            color_discrete_map=COLORES_DESERCION,
+            height=600
+        )
+        fig.for_each_trace(lambda t: t.update(name='No Desertor' if t.name == '0' else 'Desertor'))
+        fig.update_xaxes(tickangle=45)
+
+    else:  # Matriz de Correlación
+        # Seleccionar variables numéricas relevantes
+        variables_numericas = [
+            'edad', 'estrato', 'promedio', 'puntaje_total',
+            'materias_cursadas', 'materias_perdidas', 'materias_repetidas',
+            'icfes_matematicas', 'icfes_lectura', 'desertor'
+        ]
+
+        df_corr = df_multi[variables_numericas].dropna()
+        matriz_corr = df_corr.corr()
+
+        fig = px.imshow(
+            matriz_corr,
+            labels=dict(x="Variable", y="Variable", color="Correlación"),
+            x=matriz_corr.columns,
+            y=matriz_corr.columns,
+            color_continuous_scale='RdBu_r',
+            aspect="auto",
+            text_auto='.2f',
+            height=700
+        )
+        fig.update_layout(
+            title="Matriz de Correlación entre Variables",
+            xaxis_tickangle=45
+        )
+    return fig
+
+
+# ============================================================================
+# SECCIÓN 5: ANÁLISIS POR MATERIAS
+# ============================================================================
+
+def grafico_cursos(por_curso, top=20):
+    """Materias con mayor tasa de pérdida"""
+    top_cursos = por_curso.head(top).sort_values('tasa_perdida', ascending=True)
+    fig = px.bar(
+        top_cursos,
+        x=top_cursos['tasa_perdida'] * 100,
+        y='materia',
+        orientation='h',
+        color=top_cursos['tasa_perdida'] * 100,
+        color_continuous_scale='Reds',
+        hover_data={'codigo': True, 'categoria': True, 'inscritos': True, 'perdidas': True},
+        labels={'x': 'Tasa de Pérdida (%)', 'materia': '', 'color': 'Tasa (%)'}
+    )
+    fig.update_layout(coloraxis_showscale=False, height=max(400, len(top_cursos) * 25))
+    return fig
+
+
+def grafico_categorias(por_categoria):
+    por_categoria = por_categoria.sort_values('tasa_perdida', ascending=True)
+    fig = px.bar(
+        por_categoria,
+        x=por_categoria['tasa_perdida'] * 100,
+        y='categoria',
+        orientation='h',
+        hover_data={'inscritos': True, 'perdidas': True},
+        labels={'x': 'Tasa de Pérdida (%)', 'categoria': ''},
+        color_discrete_sequence=['salmon']
+    )
+    fig.update_layout(height=max(400, len(por_categoria) * 22))
+    return fig
+
+
+def grafico_perdida_periodos(por_periodo):
+    fig = px.line(
+        por_periodo,
+        x='periodo',
+        y=por_periodo['tasa_perdida'] * 100,
+        markers=True,
+        hover_data={'inscritos': True, 'perdidas': True},
+        labels={'y': 'Tasa de Pérdida (%)', 'periodo': 'Periodo'}
+    )
+    fig.update_xaxes(type='category')
+    fig.update_layout(height=400)
+    return fig
+
+
+# ============================================================================
+# SECCIÓN 6: EVOLUCIÓN POR PERIODO
+# ============================================================================
+
+def grafico_matricula_periodos(serie, periodo_resaltado=None):
+    """Matriculados por periodo (barras) y tasa de deserción (línea, eje derecho)"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=serie['etiqueta'],
+        y=serie['matriculados'],
+        name='Matriculados',
+        marker_color=['#ff9800' if p == periodo_resaltado else 'lightblue' for p in serie['periodo']],
+        hovertemplate='<b>%{x}</b><br>Matriculados: %{y}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=serie['etiqueta'],
+        y=serie['tasa_desercion'] * 100,
+        name='Tasa de deserción (%)',
+        mode='lines+markers',
+        yaxis='y2',
+        line=dict(color='salmon', width=3),
+        hovertemplate='<b>%{x}</b><br>Tasa: %{y:.2f}%<extra></extra>'
+    ))
+    fig.update_layout(
+        height=450,
+        xaxis=dict(title="Periodo", type='category'),
+        yaxis=dict(title="Estudiantes matriculados"),
+        yaxis2=dict(title="Tasa de deserción (%)", overlaying='y', side='right'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode='x unified'
+    )
+    return fig
+
+
+def grafico_cohortes(serie):
+    cohortes = serie[serie['cohorte_estudiantes'] > 0]
+    fig = px.bar(
+        cohortes,
+        x='etiqueta',
+        y=cohortes['tasa_desercion_cohorte'] * 100,
+        color=cohortes['tasa_desercion_cohorte'] * 100,
+        color_continuous_scale='Reds',
+        hover_data={'cohorte_estudiantes': True, 'cohorte_desertores': True, 'cohorte_graduados': True},
+        labels={'etiqueta': 'Cohorte (primer periodo)', 'y': 'Tasa de Deserción (%)', 'color': 'Tasa (%)'}
+    )
+    fig.update_xaxes(type='category')
+    fig.update_layout(coloraxis_showscale=False, height=400)
+    return fig
@@ -0,0 +1,106 @@
+"""
+Índice en memoria para buscar estudiantes existentes.
+
+- Hash por `_id`: búsqueda exacta en O(1).
+- Prefijos sobre los campos buscables (`_id`, programa, ciudad): cada campo
+  se guarda ordenado en minúsculas y sin tildes, y un prefijo se resuelve con
+  dos búsquedas binarias.
+
+Se construye una vez por versión de los datos; devuelve posiciones de fila
+de `df`, así que el registro sale directo del DataFrame sin volver a MongoDB.
+Los documentos no tienen nombre del estudiante, por eso no hay búsqueda por
+nombre.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+CAMPOS_BUSQUEDA = ['_id', 'programa', 'ciudad']
+
+# Opciones de los selectbox del formulario de predicción
+OPCIONES_GENERO = ["Masculino", "Femenino"]
+OPCIONES_ESTRATO = [1, 2, 3, 4, 5, 6]
+OPCIONES_DISCAPACIDAD = ["No", "Sí"]
+OPCIONES_BECA = ["No becado", "Institucional", "oficial"]
+OPCIONES_COLEGIO = ["OFICIAL", "PRIVADO", "NO APLICA"]
+OPCIONES_BARRANQUILLA = ["Sí", "No"]
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes, para que 'psicologia' encuentre 'PSICOLOGÍA'"""
+    texto = unicodedata.normalize('NFKD', str(texto).strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+class IndiceEstudiantes:
+    """Hash por _id + índices de prefijo ordenados por campo"""
+
+    def __init__(self, df, campos=CAMPOS_BUSQUEDA):
+        ids = df['_id'].astype(str).to_numpy()
+        self.por_id = {id_: posicion for posicion, id_ in enumerate(ids)}
+        self.prefijos = {}
+        for campo in campos:
+            claves = np.array([normalizar(v) if pd.notna(v) else '' for v in df[campo].to_numpy()], dtype=str)
+            orden = np.argsort(claves, kind='stable')
+            self.prefijos[campo] = (claves[orden], orden)
+
+    def buscar_id(self, id_estudiante):
+        """Posición de fila del estudiante con ese _id, o None"""
+        return self.por_id.get(str(id_estudiante).strip())
+
+    def buscar(self, texto, limite=20):
+        """Posiciones de fila cuyo _id, programa o ciudad empiezan por `texto` (primero coincidencia exacta de _id)"""
+        texto = str(texto).strip()
+        if not texto:
+            return []
+        exacto = self.buscar_id(texto)
+        resultados = [exacto] if exacto is not None else []
+        prefijo = normalizar(texto)
+        for claves, orden in self.prefijos.values():
+            inicio = np.searchsorted(claves, prefijo, side='left')
+            fin = np.searchsorted(claves, prefijo + '\uffff', side='right')
+            resultados.extend(orden[inicio:min(fin, inicio + limite)].tolist())
+            if len(resultados) >= limite:
+                break
+        return list(dict.fromkeys(resultados))[:limite]
+
+
+def _valor(fila, columna, defecto, minimo=None, maximo=None, tipo=int):
+    valor = fila.get(columna)
+    if valor is None or pd.isna(valor):
+        return defecto
+    valor = tipo(valor)
+    if minimo is not None:
+        valor = max(minimo, valor)
+    if maximo is not None:
+        valor = min(maximo, valor)
+    return valor
+
+
+def _opcion(valor, opciones, defecto):
+    return valor if valor in opciones else defecto
+
+
+def entrada_desde_fila(fila):
+    """Campos del formulario de predicción (mismas claves que registro_prediccion) a partir de una fila de df"""
+    return {
+        'edad': _valor(fila, 'edad', 20, 15, 60),
+        'genero': _opcion(fila.get('genero'), OPCIONES_GENERO, OPCIONES_GENERO[0]),
+        'estrato': _opcion(_valor(fila, 'estrato', 1), OPCIONES_ESTRATO, OPCIONES_ESTRATO[0]),
+        'discapacidad': _opcion(fila.get('discapacidad'), OPCIONES_DISCAPACIDAD, OPCIONES_DISCAPACIDAD[0]),
+        'programa': fila.get('programa'),
+        'semestre': _valor(fila, 'semestre_actual', 1, 1, 15),
+        'promedio': round(_valor(fila, 'promedio', 3.5, 0.0, 5.0, float), 2),
+        'materias_cursadas': _valor(fila, 'materias_cursadas', 10, 0, 100),
+        'materias_perdidas': _valor(fila, 'materias_perdidas', 0, 0, 50),
+        'materias_repetidas': _valor(fila, 'materias_repetidas', 0, 0, 20),
+        'icfes_mat': _valor(fila, 'icfes_matematicas', 50, 0, 100),
+        'icfes_lec': _valor(fila, 'icfes_lectura', 50, 0, 100),
+        'icfes_soc': _valor(fila, 'icfes_sociales', 50, 0, 100),
+        'icfes_cie': _valor(fila, 'icfes_ciencias', 50, 0, 100),
+        'icfes_ing': _valor(fila, 'icfes_ingles', 50, 0, 100),
+        'becado': _opcion(fila.get('becado'), OPCIONES_BECA, OPCIONES_BECA[0]),
+        'tipo_colegio': _opcion(fila.get('tipo_colegio'), OPCIONES_COLEGIO, OPCIONES_COLEGIO[0]),
+        'es_barranquilla': "Sí" if fila.get('es_barranquilla') == 1 else "No",
+    }
@@ -0,0 +1,92 @@
+"""
+Índice de mapas de bits para los filtros globales de las secciones 1 y 2.
+
+Por cada columna filtrable (DIMENSIONES) y cada valor presente se guarda un
+mapa de bits con un bit por fila de `df`, empaquetado en palabras uint64.
+Una selección {columna: [valores]} se resuelve con OR entre los valores de
+una columna y AND entre columnas: son operaciones sobre n/64 palabras, así
+que cambiar un filtro no recorre la tabla. Los mapas son arreglos NumPy, de
+modo que `&`, `|` y `~` combinan cualquier otra expresión.
+
+Las filas con el valor faltante no están en ningún mapa (igual que
+`isin`). Se construye una vez por versión de los datos y, como los demás
+índices, devuelve posiciones de fila de `df`.
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONES = ['programa', 'estrato', 'becado', 'tipo_colegio', 'departamento', 'genero', 'periodo']
+
+
+def _popcount(mapa):
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(mapa).sum())
+    return int(np.unpackbits(mapa.view(np.uint8)).sum())
+
+
+class IndiceFiltros:
+    """Un mapa de bits por (columna, valor) sobre las filas de df"""
+
+    def __init__(self, df, columnas=DIMENSIONES):
+        self.n = len(df)
+        self.palabras = (self.n + 63) // 64
+        self.valores = {}
+        self.mapas = {}
+        for columna in columnas:
+            codigos, valores = pd.factorize(df[columna], sort=True)
+            valores = pd.array(valores).tolist()
+            self.valores[columna] = valores
+            self.mapas[columna] = {valor: self._empaquetar(codigos == codigo) for codigo, valor in enumerate(valores)}
+
+    def _empaquetar(self, mascara):
+        """Máscara booleana de n filas -> mapa de bits en palabras uint64 (bits de relleno en 0)"""
+        empaquetado = np.zeros(self.palabras * 8, dtype=np.uint8)
+        bytes_mascara = np.packbits(mascara, bitorder='little')
+        empaquetado[:len(bytes_mascara)] = bytes_mascara
+        return empaquetado.view(np.uint64)
+
+    def opciones(self, columna):
+        """Valores presentes de la columna, ordenados"""
+        return self.valores[columna]
+
+    def vacio(self):
+        return np.zeros(self.palabras, dtype=np.uint64)
+
+    def todos(self):
+        return self._empaquetar(np.ones(self.n, dtype=bool))
+
+    def mapa(self, columna, valores):
+        """OR de los mapas de los valores de una columna (los valores desconocidos no suman filas)"""
+        resultado = self.vacio()
+        mapas = self.mapas[columna]
+        for valor in valores:
+            if valor in mapas:
+                np.bitwise_or(resultado, mapas[valor], out=resultado)
+        return resultado
+
+    def seleccion(self, filtros):
+        """AND entre columnas de `filtros` ({columna: [valores]}); las listas vacías no filtran. None = sin filtros"""
+        resultado = None
+        for columna, valores in filtros.items():
+            if not valores:
+                continue
+            mapa = self.mapa(columna, valores)
+            resultado = mapa if resultado is None else np.bitwise_and(resultado, mapa, out=resultado)
+        return resultado
+
+    def posiciones(self, mapa):
+        """Posiciones de fila (ordenadas) de los bits encendidos"""
+        return np.flatnonzero(np.unpackbits(mapa.view(np.uint8), count=self.n, bitorder='little'))
+
+    def contar(self, mapa):
+        return _popcount(mapa)
+
+    def filtrar(self, filtros):
+        """Posiciones de fila que cumplen los filtros, o None si no hay ninguno activo o seleccionan todo"""
+        mapa = self.seleccion(filtros)
+        if mapa is None or self.contar(mapa) == self.n:
+            return None
+        return self.posiciones(mapa)
+
+    def memoria_bytes(self):
+        return sum(m.nbytes for mapas in self.mapas.values() for m in mapas.values())
@@ -0,0 +1,151 @@
+"""
+Lectura de los Excel fuente (ESTUDIANTES.xlsx, MATERIAS.xlsx) con caché Parquet.
+
+DB MONGO.ipynb empieza con pd.read_excel (openpyxl) de los dos libros y
+MATERIAS es el paso más lento de cada reconstrucción. `leer_excels` convierte
+cada hoja a Parquet una sola vez y las corridas siguientes leen el Parquet.
+El nombre del archivo en caché lleva el hash del libro, la hoja y el motor,
+así que un Excel modificado se vuelve a convertir solo.
+
+- Motor: calamine (paquete python-calamine, pandas >= 2.2) si está
+  instalado; si no, el de pandas por defecto (openpyxl).
+- Las hojas que faltan en caché se convierten en paralelo, un proceso por
+  hoja.
+- Una hoja que Parquet no admite (columnas con tipos mezclados, encabezados
+  numéricos) se guarda con pickle, para que leer de caché devuelva siempre
+  el mismo DataFrame que la conversión.
+
+Uso:
+    python ingesta_excel.py ESTUDIANTES.xlsx MATERIAS.xlsx
+"""
+import argparse
+import glob
+import hashlib
+import multiprocessing as mp
+import os
+import time
+
+import pandas as pd
+
+DIRECTORIO_CACHE = "cache_excel"
+TAMANO_BLOQUE_HASH = 1 << 20
+
+
+def huella_archivo(ruta):
+    """Hash del contenido del libro: la caché se invalida cuando cambia el archivo"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+            h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def motor_excel():
+    """'calamine' si python-calamine está instalado; None deja el motor por defecto de pandas"""
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return None
+
+
+def _nombre_cache(ruta, huella, hoja, motor):
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    return f"{nombre}-{huella}-{hoja}-{motor or 'openpyxl'}"
+
+
+def ruta_cache(ruta, hoja, motor, directorio=DIRECTORIO_CACHE):
+    """Ruta en caché sin extensión: <libro>-<hash>-<hoja>-<motor>"""
+    return os.path.join(directorio, _nombre_cache(ruta, huella_archivo(ruta), hoja, motor))
+
+
+def _guardar(df, base):
+    """Escribe base.parquet (o base.pkl si Parquet no admite la hoja) de forma atómica"""
+    ruta_tmp = f"{base}.tmp"
+    try:
+        df.to_parquet(ruta_tmp)
+        ruta = f"{base}.parquet"
+    except (ValueError, TypeError):
+        df.to_pickle(ruta_tmp)
+        ruta = f"{base}.pkl"
+    os.replace(ruta_tmp, ruta)
+    return ruta
+
+
+def _limpiar_anteriores(ruta, hoja, motor, base):
+    """Borra las conversiones de versiones anteriores del mismo libro, hoja y motor"""
+    patron = glob.escape(_nombre_cache(ruta, "#", hoja, motor)).replace("#", "?" * 16)
+    for anterior in glob.glob(os.path.join(glob.escape(os.path.dirname(base)), f"{patron}.*")):
+        if not anterior.startswith(f"{base}."):
+            os.remove(anterior)
+
+
+def _leer_cache(base):
+    if os.path.exists(f"{base}.parquet"):
+        return pd.read_parquet(f"{base}.parquet")
+    if os.path.exists(f"{base}.pkl"):
+        return pd.read_pickle(f"{base}.pkl")
+    return None
+
+
+def _en_cache(base):
+    return os.path.exists(f"{base}.parquet") or os.path.exists(f"{base}.pkl")
+
+
+def _convertir(ruta, hoja, motor, base):
+    """Lee la hoja del Excel y la deja en caché; devuelve los segundos que tomó"""
+    inicio = time.perf_counter()
+    df = pd.read_excel(ruta, sheet_name=hoja, engine=motor)
+    _guardar(df, base)
+    _limpiar_anteriores(ruta, hoja, motor, base)
+    return time.perf_counter() - inicio
+
+
+def leer_excels(rutas, hoja=0, directorio=DIRECTORIO_CACHE, workers=None, informe=print):
+    """Un DataFrame por libro, en el orden de `rutas`, igual a pd.read_excel(ruta, sheet_name=hoja).
+    Las hojas sin caché se convierten en paralelo; `informe` recibe una línea por libro con el tiempo"""
+    os.makedirs(directorio, exist_ok=True)
+    motor = motor_excel()
+    bases = [ruta_cache(ruta, hoja, motor, directorio) for ruta in rutas]
+    pendientes = [i for i, base in enumerate(bases) if not _en_cache(base)]
+
+    n_workers = min(workers or os.cpu_count() or 1, len(pendientes))
+    if n_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('spawn')) as pool:
+            futuros = {i: pool.submit(_convertir, rutas[i], hoja, motor, bases[i]) for i in pendientes}
+            conversiones = {i: futuro.result() for i, futuro in futuros.items()}
+    else:
+        conversiones = {i: _convertir(rutas[i], hoja, motor, bases[i]) for i in pendientes}
+
+    dfs = []
+    for i, ruta in enumerate(rutas):
+        inicio = time.perf_counter()
+        df = _leer_cache(bases[i])
+        segundos = time.perf_counter() - inicio
+        if i in conversiones:
+            informe(f"{os.path.basename(ruta)}: {len(df)} filas, convertido con {motor or 'openpyxl'} "
+                    f"en {conversiones[i] + segundos:.2f} s (en frío)")
+        else:
+            informe(f"{os.path.basename(ruta)}: {len(df)} filas, leído de caché en {segundos:.2f} s")
+        dfs.append(df)
+    return dfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte los Excel fuente a Parquet (caché por hash)")
+    parser.add_argument('rutas', nargs='+', help="Libros .xlsx")
+    parser.add_argument('--hoja', default='0', help="Nombre o posición de la hoja (por defecto la primera)")
+    parser.add_argument('--directorio', default=DIRECTORIO_CACHE)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    hoja = int(args.hoja) if args.hoja.isdigit() else args.hoja
+    inicio = time.perf_counter()
+    leer_excels(args.rutas, hoja, args.directorio, args.workers)
+    print(f"Total: {time.perf_counter() - inicio:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
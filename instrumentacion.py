@@ -0,0 +1,225 @@
+"""
+Tramos de tiempo (spans) del dashboard: dónde se va el tiempo de un rerun.
+
+Se activa con la variable de entorno DASHBOARD_INSTRUMENTACION=1. Apagada,
+`tramo()` devuelve un contexto nulo compartido y `marca()` retorna de
+inmediato, así que el costo es una comparación por llamada.
+
+- `iniciar_rerun()` abre el tramo raíz de cada ejecución del script.
+- `tramo(nombre)` mide un bloque (`with tramo('mongo.load_data'): ...`).
+- `marca(nombre)` cierra un tramo desde la marca anterior del mismo rerun;
+  sirve para las secciones del dashboard, que son bloques largos del script.
+- `fragmento(nombre)` envuelve el cuerpo de un `@st.fragment`; cuando el
+  fragmento se re-ejecuta solo, su tramo es la raíz de ese rerun parcial.
+- `registrar_contadores(nombre, fuente)` agrega contadores (p. ej. aciertos
+  de una caché) que el panel muestra junto a los tramos.
+
+Los tramos quedan en memoria (los últimos MAX_TRAMOS de todas las sesiones)
+y se exportan como JSON lines o en el formato JSON de OTLP
+(OpenTelemetry), que aceptan los colectores en /v1/traces.
+"""
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+
+ACTIVO = os.environ.get("DASHBOARD_INSTRUMENTACION", "") not in ("", "0")
+MAX_TRAMOS = 20000
+NOMBRE_SERVICIO = "dashboard-desercion"
+
+_tramos = deque(maxlen=MAX_TRAMOS)
+_local = threading.local()
+_NULO = nullcontext()
+_fuentes_contadores = {}
+
+
+def _registrar(nombre, inicio_ns, fin_ns, rerun, atributos):
+    _tramos.append({
+        'nombre': nombre,
+        'traza': rerun['traza'] if rerun else secrets.token_hex(16),
+        'id': secrets.token_hex(8),
+        'padre': rerun['id'] if rerun else None,
+        'inicio_ns': inicio_ns,
+        'fin_ns': fin_ns,
+        'atributos': atributos,
+    })
+
+
+def _rerun_actual():
+    return getattr(_local, 'rerun', None)
+
+
+def iniciar_rerun(nombre='rerun', **atributos):
+    """Abre el tramo raíz del rerun (cierra el anterior si quedó abierto por un st.stop)"""
+    if not ACTIVO:
+        return
+    anterior = _rerun_actual()
+    if anterior is not None:
+        _cerrar(anterior, anterior['ultima_marca_ns'])
+    ahora = time.time_ns()
+    _local.rerun = {'nombre': nombre, 'traza': secrets.token_hex(16), 'id': secrets.token_hex(8),
+                    'inicio_ns': ahora, 'ultima_marca_ns': ahora, 'atributos': atributos}
+
+
+def _cerrar(rerun, fin_ns):
+    _local.rerun = None
+    _tramos.append({'nombre': rerun['nombre'], 'traza': rerun['traza'], 'id': rerun['id'], 'padre': None,
+                    'inicio_ns': rerun['inicio_ns'], 'fin_ns': fin_ns, 'atributos': rerun['atributos']})
+
+
+def cerrar_rerun():
+    """Cierra el tramo raíz al final del script"""
+    if not ACTIVO:
+        return
+    rerun = _rerun_actual()
+    if rerun is not None:
+        _cerrar(rerun, time.time_ns())
+
+
+def marca(nombre, **atributos):
+    """Registra el tramo `nombre` desde la marca (o tramo) anterior de este rerun hasta ahora"""
+    if not ACTIVO:
+        return
+    rerun = _rerun_actual()
+    if rerun is None:
+        return
+    ahora = time.time_ns()
+    _registrar(nombre, rerun['ultima_marca_ns'], ahora, rerun, atributos)
+    rerun['ultima_marca_ns'] = ahora
+
+
+@contextmanager
+def _tramo(nombre, atributos):
+    rerun = _rerun_actual()
+    inicio = time.time_ns()
+    try:
+        yield
+    finally:
+        fin = time.time_ns()
+        _registrar(nombre, inicio, fin, rerun, atributos)
+        if rerun is not None:
+            rerun['ultima_marca_ns'] = fin
+
+
+def tramo(nombre, **atributos):
+    """Contexto que mide un bloque; nulo si la instrumentación está apagada"""
+    if not ACTIVO:
+        return _NULO
+    return _tramo(nombre, atributos)
+
+
+@contextmanager
+def _fragmento(nombre, atributos):
+    if _rerun_actual() is not None:
+        with _tramo(nombre, atributos):
+            yield
+        return
+    iniciar_rerun(nombre, **atributos)
+    try:
+        yield
+    finally:
+        cerrar_rerun()
+
+
+def fragmento(nombre, **atributos):
+    """Cuerpo de un @st.fragment: tramo dentro del rerun completo, o raíz propia cuando el fragmento corre solo"""
+    if not ACTIVO:
+        return _NULO
+    return _fragmento(nombre, atributos)
+
+
+def tramos():
+    return list(_tramos)
+
+
+def registrar_contadores(nombre, fuente):
+    """`fuente()` devuelve un dict de contadores; se lee cada vez que se consultan"""
+    _fuentes_contadores[nombre] = fuente
+
+
+def contadores():
+    """Una fila por contador registrado: fuente, contador, valor"""
+    filas = [{'fuente': nombre, 'contador': clave, 'valor': valor}
+             for nombre, fuente in list(_fuentes_contadores.items())
+             for clave, valor in fuente().items()]
+    return pd.DataFrame(filas, columns=['fuente', 'contador', 'valor'])
+
+
+def limpiar():
+    _tramos.clear()
+
+
+def resumen():
+    """Por tramo: llamadas, p50/p95/máximo y total en ms, de mayor a menor total"""
+    registros = tramos()
+    if not registros:
+        return pd.DataFrame(columns=['tramo', 'llamadas', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms'])
+    df = pd.DataFrame({'tramo': [t['nombre'] for t in registros],
+                       'ms': [(t['fin_ns'] - t['inicio_ns']) / 1e6 for t in registros]})
+    tabla = df.groupby('tramo')['ms'].agg(
+        llamadas='count',
+        p50_ms=lambda x: np.percentile(x, 50),
+        p95_ms=lambda x: np.percentile(x, 95),
+        max_ms='max',
+        total_ms='sum'
+    ).round(2)
+    return tabla.sort_values('total_ms', ascending=False).reset_index()
+
+
+def exportar_jsonl():
+    """Un tramo por línea, con duración en ms"""
+    return "\n".join(
+        json.dumps({**t, 'duracion_ms': round((t['fin_ns'] - t['inicio_ns']) / 1e6, 3)}, ensure_ascii=False, default=str)
+        for t in tramos()
+    ) + "\n"
+
+
+def _atributo_otlp(clave, valor):
+    if isinstance(valor, bool):
+        return {'key': clave, 'value': {'boolValue': valor}}
+    if isinstance(valor, (int, np.integer)):
+        return {'key': clave, 'value': {'intValue': str(int(valor))}}
+    if isinstance(valor, (float, np.floating)):
+        return {'key': clave, 'value': {'doubleValue': float(valor)}}
+    return {'key': clave, 'value': {'stringValue': str(valor)}}
+
+
+def exportar_otlp():
+    """Tramos en el formato JSON de OTLP (ExportTraceServiceRequest)"""
+    spans = []
+    for t in tramos():
+        span = {
+            'traceId': t['traza'],
+            'spanId': t['id'],
+            'name': t['nombre'],
+            'kind': 1,
+            'startTimeUnixNano': str(t['inicio_ns']),
+            'endTimeUnixNano': str(t['fin_ns']),
+            'attributes': [_atributo_otlp(k, v) for k, v in t['atributos'].items()],
+        }
+        if t['padre']:
+            span['parentSpanId'] = t['padre']
+        spans.append(span)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [_atributo_otlp('service.name', NOMBRE_SERVICIO)]},
+        'scopeSpans': [{'scope': {'name': 'instrumentacion'}, 'spans': spans}],
+    }]}
+
+
+def enviar_otlp(endpoint, timeout=10):
+    """POST de los tramos a un colector OTLP/HTTP (p. ej. http://localhost:4318); devuelve el código HTTP"""
+    solicitud = urllib.request.Request(
+        endpoint.rstrip('/') + '/v1/traces',
+        data=json.dumps(exportar_otlp()).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(solicitud, timeout=timeout) as respuesta:
+        return respuesta.status
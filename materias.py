@@ -0,0 +1,199 @@
+"""
+Almacén columnar de materias cursadas.
+
+Los documentos traen el arreglo `materias_cursadas` (materia, código,
+categoría, periodo, nota, retirada) por estudiante. Se aplana una sola vez
+por versión de los datos en arreglos NumPy con el código de materia y la
+categoría como enteros; las tasas por materia, categoría y periodo salen de
+np.bincount sin recorrer los documentos otra vez.
+
+Una materia cuenta como perdida con la misma regla que DB MONGO.ipynb:
+retirada, o nota entre 0 y 3 (exclusivo).
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+NOTA_APROBATORIA = 3.0
+
+
+def formato_periodo(periodo):
+    """202510 -> '2025-10'"""
+    periodo = int(periodo)
+    return f"{periodo // 100}-{periodo % 100:02d}"
+
+
+class AlmacenMaterias:
+    """Una fila por materia cursada: estudiante, curso, categoría, periodo, nota, retirada"""
+
+    def __init__(self, estudiante, curso, categoria, periodo, nota, retirada, codigos, nombres, categorias,
+                 categoria_curso, n_estudiantes, perdida=None):
+        self.estudiante = estudiante
+        self.curso = curso
+        self.categoria = categoria
+        self.periodo = periodo
+        self.nota = nota
+        self.retirada = retirada
+        self.codigos = codigos
+        self.nombres = nombres
+        self.categorias = categorias
+        self.categoria_curso = categoria_curso
+        self.n_estudiantes = n_estudiantes
+        # Se recibe ya calculada cuando los arreglos vienen del plano compartido
+        self.perdida = (retirada == 1) | ((nota > 0) & (nota < NOTA_APROBATORIA)) if perdida is None else perdida
+
+    @classmethod
+    def desde_documentos(cls, documentos):
+        """Aplana los arreglos de materias de todos los documentos (posición del documento = estudiante)"""
+        indice_curso, indice_categoria = {}, {}
+        nombres, categoria_curso = [], []
+        estudiante, curso, categoria, periodo, nota, retirada = [], [], [], [], [], []
+
+        for posicion, doc in enumerate(documentos):
+            for materia in doc.get('materias_cursadas') or []:
+                cat = indice_categoria.setdefault(materia.get('categoria') or 'SIN CATEGORIA', len(indice_categoria))
+                codigo = materia.get('codigo_materia')
+                if codigo not in indice_curso:
+                    indice_curso[codigo] = len(indice_curso)
+                    nombres.append(materia.get('materia') or str(codigo))
+                    categoria_curso.append(cat)
+                estudiante.append(posicion)
+                curso.append(indice_curso[codigo])
+                categoria.append(cat)
+                periodo.append(materia.get('periodo') or 0)
+                valor_nota = materia.get('nota')
+                nota.append(np.nan if valor_nota is None else valor_nota)
+                retirada.append(materia.get('retirada') or 0)
+
+        return cls(
+            estudiante=np.array(estudiante, dtype=np.int32),
+            curso=np.array(curso, dtype=np.int32),
+            categoria=np.array(categoria, dtype=np.int16),
+            periodo=np.array(periodo, dtype=np.int32),
+            nota=np.array(nota, dtype=np.float32),
+            retirada=np.array(retirada, dtype=np.int8),
+            codigos=list(indice_curso.keys()),
+            nombres=nombres,
+            categorias=list(indice_categoria.keys()),
+            categoria_curso=np.array(categoria_curso, dtype=np.int16),
+            n_estudiantes=len(documentos),
+        )
+
+    def __len__(self):
+        return len(self.curso)
+
+    def memoria_bytes(self):
+        return sum(a.nbytes for a in (self.estudiante, self.curso, self.categoria, self.periodo,
+                                      self.nota, self.retirada, self.perdida))
+
+    def huella(self):
+        """Hash del contenido: cambia si cambia cualquier nota, periodo, retiro o materia"""
+        h = hashlib.sha256()
+        for arreglo in (self.estudiante, self.curso, self.categoria, self.periodo, self.nota, self.retirada):
+            arreglo = np.ascontiguousarray(arreglo)
+            h.update(arreglo.dtype.str.encode())
+            h.update(arreglo.tobytes())
+        dimensiones = [list(self.codigos), list(self.nombres), list(self.categorias),
+                       np.asarray(self.categoria_curso).tolist(), int(self.n_estudiantes)]
+        h.update(json.dumps(dimensiones, ensure_ascii=False, default=str).encode('utf-8'))
+        return h.hexdigest()[:16]
+
+    def filtrar(self, estudiantes):
+        """Almacén con solo las materias de los estudiantes dados (posiciones de fila)"""
+        incluido = np.zeros(self.n_estudiantes, dtype=bool)
+        incluido[estudiantes] = True
+        filas = incluido[self.estudiante]
+        return AlmacenMaterias(self.estudiante[filas], self.curso[filas], self.categoria[filas], self.periodo[filas],
+                               self.nota[filas], self.retirada[filas], self.codigos, self.nombres, self.categorias,
+                               self.categoria_curso, self.n_estudiantes)
+
+    def primer_periodo(self):
+        """Cohorte de cada estudiante: primer periodo con materias cursadas (0 si no tiene)"""
+        sin_periodo = np.iinfo(np.int32).max
+        resultado = np.full(self.n_estudiantes, sin_periodo, dtype=np.int32)
+        validos = self.periodo > 0
+        np.minimum.at(resultado, self.estudiante[validos], self.periodo[validos])
+        resultado[resultado == sin_periodo] = 0
+        return resultado
+
+    def matriculas(self):
+        """Pares (estudiante, periodo) distintos: quién cursó materias en cada periodo"""
+        validos = self.periodo > 0
+        base = np.int64(self.periodo.max()) + 1 if len(self) else 1
+        pares = np.unique(self.estudiante[validos].astype(np.int64) * base + self.periodo[validos])
+        return pares // base, pares % base
+
+    def tasa_global(self):
+        return float(self.perdida.mean()) if len(self) else 0.0
+
+    def _tasas(self, codigos, n_grupos):
+        inscritos = np.bincount(codigos, minlength=n_grupos)
+        perdidas = np.bincount(codigos, weights=self.perdida, minlength=n_grupos)
+        tasa = np.divide(perdidas, inscritos, out=np.zeros(n_grupos), where=inscritos > 0)
+        return inscritos, perdidas.astype(np.int64), tasa
+
+    def tasa_por_curso(self, min_inscritos=30):
+        """Tasa de pérdida por materia (solo materias con al menos min_inscritos registros)"""
+        inscritos, perdidas, tasa = self._tasas(self.curso, len(self.codigos))
+        resultado = pd.DataFrame({
+            'codigo': self.codigos,
+            'materia': self.nombres,
+            'categoria': np.array(self.categorias, dtype=object)[self.categoria_curso],
+            'inscritos': inscritos,
+            'perdidas': perdidas,
+            'tasa_perdida': tasa,
+        })
+        resultado = resultado[resultado['inscritos'] >= min_inscritos]
+        return resultado.sort_values('tasa_perdida', ascending=False).reset_index(drop=True)
+
+    def tasa_por_categoria(self):
+        inscritos, perdidas, tasa = self._tasas(self.categoria, len(self.categorias))
+        resultado = pd.DataFrame({'categoria': self.categorias, 'inscritos': inscritos,
+                                  'perdidas': perdidas, 'tasa_perdida': tasa})
+        return resultado.sort_values('tasa_perdida', ascending=False).reset_index(drop=True)
+
+    def tasa_por_periodo(self):
+        periodos, codigos = np.unique(self.periodo, return_inverse=True)
+        inscritos, perdidas, tasa = self._tasas(codigos, len(periodos))
+        return pd.DataFrame({'periodo': [formato_periodo(p) for p in periodos], 'inscritos': inscritos,
+                             'perdidas': perdidas, 'tasa_perdida': tasa})
+
+    def cursos_puerta(self, desertor, min_estudiantes=30):
+        """
+        Materias "puerta": deserción de quienes la perdieron frente a quienes la aprobaron.
+
+        Cada par (estudiante, materia) cuenta una vez; perderla en cualquier intento cuenta como
+        perdida. riesgo_relativo = tasa de deserción de los que la perdieron / de los que la aprobaron.
+        """
+        desertor = np.asarray(desertor, dtype=np.float64)
+        n_cursos = len(self.codigos)
+        clave = self.estudiante.astype(np.int64) * n_cursos + self.curso
+        pares = np.unique(clave)
+        pares_perdidos = np.unique(clave[self.perdida])
+        perdio = np.isin(pares, pares_perdidos, assume_unique=True)
+
+        curso_par = pares % n_cursos
+        desertor_par = desertor[pares // n_cursos]
+        n_perdieron = np.bincount(curso_par[perdio], minlength=n_cursos)
+        n_aprobaron = np.bincount(curso_par[~perdio], minlength=n_cursos)
+        des_perdieron = np.bincount(curso_par[perdio], weights=desertor_par[perdio], minlength=n_cursos)
+        des_aprobaron = np.bincount(curso_par[~perdio], weights=desertor_par[~perdio], minlength=n_cursos)
+
+        tasa_perdieron = np.divide(des_perdieron, n_perdieron, out=np.zeros(n_cursos), where=n_perdieron > 0)
+        tasa_aprobaron = np.divide(des_aprobaron, n_aprobaron, out=np.zeros(n_cursos), where=n_aprobaron > 0)
+        riesgo_relativo = np.divide(tasa_perdieron, tasa_aprobaron, out=np.full(n_cursos, np.nan),
+                                    where=tasa_aprobaron > 0)
+
+        resultado = pd.DataFrame({
+            'codigo': self.codigos,
+            'materia': self.nombres,
+            'estudiantes': n_perdieron + n_aprobaron,
+            'perdieron': n_perdieron,
+            'desercion_perdieron': tasa_perdieron,
+            'desercion_aprobaron': tasa_aprobaron,
+            'riesgo_relativo': riesgo_relativo,
+        })
+        resultado = resultado[(resultado['estudiantes'] >= min_estudiantes) & (resultado['perdieron'] > 0)]
+        return resultado.sort_values('riesgo_relativo', ascending=False).reset_index(drop=True)
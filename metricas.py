@@ -0,0 +1,112 @@
+"""
+Métricas vectorizadas para el barrido de umbrales.
+
+En lugar de re-binarizar las predicciones y llamar a confusion_matrix,
+recall_score, precision_score y f1_score una vez por umbral, las
+probabilidades se ordenan una sola vez y la matriz de confusión de todos los
+umbrales sale de una suma acumulada. Lo usan `busqueda.py` y el notebook de
+entrenamiento (modelocode.ipynb).
+"""
+import numpy as np
+
+UMBRALES_NOTEBOOK = [0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6]
+
+
+def calcular_score_custom(recall, precision, auc, objetivo='v2'):
+    """Función objetivo del notebook: v1 (60/30/10) o v2 (recall >= 75% y precisión); acepta arreglos"""
+    recall = np.asarray(recall, dtype=float)
+    precision = np.asarray(precision, dtype=float)
+    auc = np.asarray(auc, dtype=float)
+    if objetivo == 'v1':
+        score = 0.6 * recall + 0.3 * auc + 0.1 * precision
+    else:
+        score = np.where(recall < 0.75, recall * 0.5, 0.4 * precision + 0.35 * recall + 0.25 * auc)
+    return score if score.ndim else float(score)
+
+
+def _dividir(numerador, denominador):
+    """División con resultado 0 cuando el denominador es 0 (zero_division=0 de sklearn)"""
+    numerador = np.asarray(numerador, dtype=float)
+    denominador = np.asarray(denominador, dtype=float)
+    resultado = np.zeros(np.broadcast(numerador, denominador).shape)
+    np.divide(numerador, denominador, out=resultado, where=denominador > 0)
+    return resultado
+
+
+def _auc_ordenado(p_ord, y_ord):
+    """AUC ROC por fila a partir de probabilidades ordenadas de mayor a menor (empates incluidos)"""
+    n_filas, n = p_ord.shape
+    tps = np.cumsum(y_ord, axis=1)
+    fps = np.arange(1, n + 1) - tps
+
+    # En un grupo de probabilidades empatadas todos los puntos toman el valor del final del grupo,
+    # así el tramo del grupo en la curva ROC es la diagonal, igual que roc_auc_score
+    fin_grupo = np.ones_like(p_ord, dtype=bool)
+    fin_grupo[:, :-1] = p_ord[:, 1:] != p_ord[:, :-1]
+    indice_fin = np.where(fin_grupo, np.arange(n), n - 1)
+    indice_fin = np.minimum.accumulate(indice_fin[:, ::-1], axis=1)[:, ::-1]
+    tps = np.take_along_axis(tps, indice_fin, axis=1)
+    fps = np.take_along_axis(fps, indice_fin, axis=1)
+
+    positivos = tps[:, -1:]
+    negativos = fps[:, -1:]
+    tpr = np.concatenate([np.zeros((n_filas, 1)), _dividir(tps, positivos)], axis=1)
+    fpr = np.concatenate([np.zeros((n_filas, 1)), _dividir(fps, negativos)], axis=1)
+    auc = np.sum(np.diff(fpr, axis=1) * (tpr[:, 1:] + tpr[:, :-1]) / 2, axis=1)
+    # AUC indefinida con una sola clase
+    return np.where((positivos[:, 0] > 0) & (negativos[:, 0] > 0), auc, np.nan)
+
+
+def barrido_umbrales_lote(y_true, probabilidades, umbrales=UMBRALES_NOTEBOOK):
+    """
+    Métricas de todos los umbrales para varios modelos a la vez.
+
+    probabilidades tiene forma (n_modelos, n_muestras); cada métrica del
+    resultado tiene forma (n_modelos, n_umbrales), salvo 'auc' (n_modelos,).
+    """
+    y_true = np.asarray(y_true).astype(bool).ravel()
+    probabilidades = np.atleast_2d(np.asarray(probabilidades, dtype=float))
+    umbrales = np.asarray(umbrales, dtype=float)
+    n_modelos, n = probabilidades.shape
+
+    # Un solo ordenamiento por modelo (de mayor a menor probabilidad)
+    orden = np.argsort(-probabilidades, axis=1, kind='stable')
+    p_ord = np.take_along_axis(probabilidades, orden, axis=1)
+    y_ord = y_true[orden]
+    tp_acum = np.concatenate([np.zeros((n_modelos, 1), dtype=np.int64), np.cumsum(y_ord, axis=1)], axis=1)
+
+    # Cantidad de predicciones >= umbral: búsqueda binaria sobre todas las filas a la vez
+    # (cada fila se desplaza 2 unidades para que el arreglo aplanado siga ordenado)
+    desplazamiento = 2.0 * np.arange(n_modelos)[:, None]
+    claves = (-p_ord + desplazamiento).ravel()
+    consultas = -np.clip(umbrales, -0.5, 1.5)[None, :] + desplazamiento
+    predichos = np.searchsorted(claves, consultas.ravel(), side='right').reshape(n_modelos, -1)
+    predichos -= (np.arange(n_modelos) * n)[:, None]
+
+    positivos = int(y_true.sum())
+    negativos = n - positivos
+    tp = np.take_along_axis(tp_acum, predichos, axis=1)
+    fp = predichos - tp
+    fn = positivos - tp
+    tn = negativos - fp
+
+    recall = _dividir(tp, positivos)
+    precision = _dividir(tp, tp + fp)
+    f1 = _dividir(2 * tp, 2 * tp + fp + fn)
+    auc = _auc_ordenado(p_ord, y_ord)
+
+    return {
+        'threshold': np.broadcast_to(umbrales, tp.shape),
+        'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn,
+        'recall': recall, 'precision': precision, 'f1': f1, 'auc': auc,
+        'score_custom': calcular_score_custom(recall, precision, auc[:, None], 'v2'),
+        'score_custom_v1': calcular_score_custom(recall, precision, auc[:, None], 'v1'),
+    }
+
+
+def barrido_umbrales(y_true, y_proba, umbrales=UMBRALES_NOTEBOOK):
+    """Métricas de un modelo para cada umbral: dict de arreglos de largo n_umbrales"""
+    resultado = barrido_umbrales_lote(y_true, np.asarray(y_proba, dtype=float).ravel()[None, :], umbrales)
+    barrido = {clave: valor[0] for clave, valor in resultado.items() if clave != 'auc'}
+    barrido['auc'] = np.full(len(barrido['threshold']), resultado['auc'][0])
+    return barrido
@@ -0,0 +1,313 @@
+"""
+Motor de consultas DuckDB sobre una copia Parquet de los datos.
+
+Alternativa opcional (DASHBOARD_MOTOR=duckdb) a las agregaciones de pandas
+de las secciones 1, 2 y 5. Por cada versión de los datos se escribe una
+copia Parquet en `DIRECTORIO_SNAPSHOT/<version>/`:
+- estudiantes/: la tabla plana de estudiantes más `fila` (posición en df);
+- materias/: una fila por materia cursada (AlmacenMaterias), con `estudiante`
+  = fila del estudiante;
+- cursos/ y categorias/: nombres de los códigos enteros de materias.
+
+DuckDB las registra como vistas sobre read_parquet, así que las consultas
+leen solo las columnas que usan, corren en todos los hilos y pueden
+derramar a disco (temp_directory) en lugar de cargar la tabla en memoria.
+Cada directorio puede tener varios archivos (parte-*.parquet), como los que
+escribe el benchmark para 10 millones de estudiantes.
+
+Cada método recibe los filtros globales ({columna: [valores]}, p. ej.
+{'periodo': [202510], 'estrato': [1, 2]}) y devuelve la misma tabla que la
+función homónima de graficos.py sobre las filas filtradas (o el método de
+AlmacenMaterias): el SQL hace los conteos y sumas sobre todas
+las filas y los pasos sobre la tabla ya agregada (porcentajes, tasas,
+nombres de departamento) reutilizan las funciones de graficos.py, así que
+los resultados coinciden con pandas.
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import graficos
+from materias import formato_periodo
+
+DIRECTORIO_SNAPSHOT = os.environ.get("DASHBOARD_DUCKDB_DIR", "snapshot_duckdb")
+VERSIONES_CONSERVADAS = 2
+TABLAS = ('estudiantes', 'materias', 'cursos', 'categorias')
+
+# Rango de edad con los mismos intervalos (abiertos a la izquierda) que pd.cut en graficos.rango_edad
+RANGO_EDAD = "CASE " + " ".join(
+    f"WHEN edad > {bajo} AND edad <= {alto} THEN '{etiqueta}'"
+    for bajo, alto, etiqueta in zip(graficos.BINS_EDAD, graficos.BINS_EDAD[1:], graficos.ETIQUETAS_EDAD)
+) + " END"
+
+
+def escribir_parte(directorio, tabla, datos, parte=0):
+    """Escribe un DataFrame como directorio/tabla/parte-NNNN.parquet"""
+    destino = os.path.join(directorio, tabla)
+    os.makedirs(destino, exist_ok=True)
+    datos.to_parquet(os.path.join(destino, f"parte-{parte:04d}.parquet"), index=False)
+
+
+def tabla_estudiantes(df, desplazamiento=0):
+    """Tabla de estudiantes para Parquet: `_id` como texto y la posición de fila en `fila`"""
+    datos = df.assign(_id=df['_id'].astype(str))
+    datos.insert(0, 'fila', np.arange(desplazamiento, desplazamiento + len(df), dtype=np.int64))
+    return datos
+
+
+def tabla_materias(almacen, desplazamiento=0):
+    return pd.DataFrame({
+        'estudiante': almacen.estudiante.astype(np.int64) + desplazamiento,
+        'curso': almacen.curso,
+        'categoria': almacen.categoria,
+        'periodo': almacen.periodo,
+        'nota': almacen.nota,
+        'retirada': almacen.retirada,
+        'perdida': almacen.perdida,
+    })
+
+
+def escribir_dimensiones(directorio, almacen):
+    """Nombres de cursos y categorías (comunes a todas las partes de materias)"""
+    escribir_parte(directorio, 'cursos', pd.DataFrame({
+        'curso': np.arange(len(almacen.codigos), dtype=np.int32),
+        'codigo': [str(c) for c in almacen.codigos],
+        'materia': almacen.nombres,
+        'categoria': np.array(almacen.categorias, dtype=object)[almacen.categoria_curso],
+    }))
+    escribir_parte(directorio, 'categorias', pd.DataFrame({
+        'categoria': np.arange(len(almacen.categorias), dtype=np.int16),
+        'nombre': almacen.categorias,
+    }))
+
+
+def escribir_snapshot(directorio, df, almacen):
+    """Copia Parquet de df y del almacén de materias; se escribe aparte y se renombra al terminar"""
+    temporal = directorio + ".tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    escribir_parte(temporal, 'estudiantes', tabla_estudiantes(df))
+    escribir_parte(temporal, 'materias', tabla_materias(almacen))
+    escribir_dimensiones(temporal, almacen)
+    os.replace(temporal, directorio)
+
+
+def _limpiar_versiones(raiz, conservar):
+    """Borra las copias más antiguas y deja las `conservar` más recientes"""
+    versiones = [os.path.join(raiz, v) for v in os.listdir(raiz) if not v.endswith(".tmp")]
+    versiones.sort(key=os.path.getmtime, reverse=True)
+    for directorio in versiones[conservar:]:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def _como_rangos(tabla, completar=False, por=()):
+    """rango_edad como categoría ordenada (igual que pd.cut); `completar` agrega los rangos vacíos con 0"""
+    if completar:
+        tabla = tabla.set_index('rango_edad').reindex(graficos.ETIQUETAS_EDAD, fill_value=0).reset_index()
+    tabla['rango_edad'] = pd.Categorical(tabla['rango_edad'], categories=graficos.ETIQUETAS_EDAD, ordered=True)
+    return tabla.sort_values(['rango_edad', *por]).reset_index(drop=True)
+
+
+class MotorDuckDB:
+    """Conexión DuckDB con las tablas de una copia Parquet registradas como vistas"""
+
+    def __init__(self, directorio, hilos=None, limite_memoria=None):
+        import duckdb
+
+        self.directorio = directorio
+        self.conexion = duckdb.connect()
+        self.conexion.execute(f"SET temp_directory = '{os.path.join(directorio, '.temporal')}'")
+        if hilos:
+            self.conexion.execute(f"SET threads = {int(hilos)}")
+        if limite_memoria:
+            self.conexion.execute(f"SET memory_limit = '{limite_memoria}'")
+        for tabla in TABLAS:
+            archivos = os.path.join(directorio, tabla, "*.parquet")
+            self.conexion.execute(f"CREATE VIEW {tabla} AS SELECT * FROM read_parquet('{archivos}')")
+
+    @classmethod
+    def desde_tablas(cls, version, df, almacen, raiz=DIRECTORIO_SNAPSHOT, **opciones):
+        """Motor sobre la copia de `version`; la escribe si todavía no existe"""
+        directorio = os.path.join(raiz, version)
+        if not os.path.isdir(directorio):
+            os.makedirs(raiz, exist_ok=True)
+            escribir_snapshot(directorio, df, almacen)
+            _limpiar_versiones(raiz, VERSIONES_CONSERVADAS)
+        return cls(directorio, **opciones)
+
+    def sql(self, consulta, parametros=()):
+        """Resultado como DataFrame; un cursor por llamada para poder compartir el motor entre sesiones"""
+        return self.conexion.cursor().execute(consulta, list(parametros)).df()
+
+    def consultar(self, nombre, filtros=None, **parametros):
+        """Tabla del gráfico `nombre` (mismo nombre que la agregación de graficos.py) sobre las filas de `filtros`"""
+        return getattr(self, nombre)(filtros, **parametros)
+
+    @staticmethod
+    def _condiciones_filtros(filtros, prefijo=""):
+        """`columna IN (...)` por cada columna de {columna: [valores]} (las listas vacías no filtran)"""
+        condiciones, parametros = [], []
+        for columna, valores in (filtros or {}).items():
+            if valores:
+                condiciones.append(f"{prefijo}{columna} IN ({', '.join('?' * len(valores))})")
+                parametros.extend(valores)
+        return condiciones, parametros
+
+    @classmethod
+    def _filtro(cls, filtros, *condiciones):
+        condiciones_filtros, parametros = cls._condiciones_filtros(filtros)
+        condiciones = list(condiciones) + condiciones_filtros
+        return ("WHERE " + " AND ".join(condiciones)) if condiciones else "", parametros
+
+    def _tasa(self, columna, nombre, filtros, *condiciones):
+        """
+        Total, desertores y tasa por grupo de estudiantes no graduados (graficos.tasa_por_grupo).
+
+        `_id` nunca es nulo: count(*) da lo mismo que count(_id) sin leer esa columna.
+        """
+        donde, parametros = self._filtro(filtros, "graduado = 0", f"{columna} IS NOT NULL", *condiciones)
+        tabla = self.sql(f"""
+            SELECT {columna} AS {nombre}, count(*) AS total, sum(desertor)::BIGINT AS desertores
+            FROM estudiantes {donde} GROUP BY 1 ORDER BY 1
+        """, parametros)
+        return graficos.agregar_tasa(tabla)
+
+    def _por_edad(self, filtros, columnas, con_desertores, *condiciones):
+        """Cuenta por edad (y `columnas`) y luego suma por rango: el CASE corre sobre los grupos, no las filas"""
+        donde, parametros = self._filtro(filtros, "edad IS NOT NULL", *condiciones)
+        grupos = "".join(f", {c}" for c in columnas)
+        internos = ", sum(desertor) AS desertores" if con_desertores else ""
+        externos = ", sum(desertores)::BIGINT AS desertores" if con_desertores else ""
+        tabla = self.sql(f"""
+            SELECT {RANGO_EDAD} AS rango_edad{grupos}, sum(n)::BIGINT AS total{externos}
+            FROM (SELECT edad{grupos}, count(*) AS n{internos} FROM estudiantes {donde} GROUP BY ALL)
+            WHERE ({RANGO_EDAD}) IS NOT NULL GROUP BY ALL
+        """, parametros)
+        return _como_rangos(tabla, completar=not columnas and not con_desertores, por=columnas)
+
+    # ------------------------------------------------------------------
+    # Sección 1
+    # ------------------------------------------------------------------
+    def conteo_genero(self, filtros=None):
+        donde, parametros = self._filtro(filtros, "genero IS NOT NULL")
+        tabla = self.sql(f"""
+            SELECT genero, count(*) AS count FROM estudiantes {donde} GROUP BY 1 ORDER BY 2 DESC, 1
+        """, parametros)
+        return graficos.agregar_porcentaje(tabla, 'count', 1)
+
+    def conteo_edad(self, filtros=None):
+        return self._por_edad(filtros, [], False).rename(columns={'total': 'count'})
+
+    def conteo_edad_genero(self, filtros=None):
+        return self._por_edad(filtros, ['genero'], False, "genero IS NOT NULL").rename(columns={'total': 'count'})
+
+    def estudiantes_por_departamento(self, filtros=None):
+        donde, parametros = self._filtro(filtros, "es_colombia = 1", "departamento IS NOT NULL")
+        tabla = self.sql(f"""
+            SELECT departamento, count(*) AS total_estudiantes FROM estudiantes {donde} GROUP BY 1 ORDER BY 1
+        """, parametros)
+        return graficos.departamentos_mapa(tabla)
+
+    def estudiantes_atlantico_por_ciudad(self, filtros=None):
+        # Se cuenta por (departamento, ciudad) y el filtro de texto se aplica a esos pocos grupos
+        donde, parametros = self._filtro(filtros)
+        tabla = self.sql(f"""
+            SELECT ciudad, sum(n)::BIGINT AS total_estudiantes
+            FROM (SELECT departamento, ciudad, count(*) AS n FROM estudiantes {donde} GROUP BY ALL)
+            WHERE regexp_matches(upper(trim(departamento)), 'ATLANTICO|ATLÁNTICO')
+            GROUP BY 1 ORDER BY 1
+        """, parametros)
+        if len(tabla) == 0:
+            return None
+        return graficos.ciudades_atlantico(tabla[tabla['ciudad'].notna()].reset_index(drop=True))
+
+    # ------------------------------------------------------------------
+    # Sección 2 (estudiantes no graduados)
+    # ------------------------------------------------------------------
+    def desercion_genero(self, filtros=None):
+        return self._tasa("genero", "genero", filtros)
+
+    def desercion_edad(self, filtros=None):
+        return graficos.agregar_tasa(self._por_edad(filtros, [], True, "graduado = 0"))
+
+    def desercion_edad_genero(self, filtros=None):
+        return graficos.agregar_tasa(self._por_edad(filtros, ['genero'], True, "graduado = 0", "genero IS NOT NULL"))
+
+    def desercion_programa(self, filtros=None):
+        return self._tasa("programa", "programa", filtros)
+
+    def desertores_por_estrato(self, filtros=None):
+        donde, parametros = self._filtro(filtros, "graduado = 0", "desertor = 1", "estrato IS NOT NULL")
+        return self.sql(f"SELECT estrato, count(*) AS count FROM estudiantes {donde} GROUP BY 1 ORDER BY 1", parametros)
+
+    def desercion_departamento(self, filtros=None):
+        return graficos.tasa_departamentos(self._tasa("departamento", "departamento", filtros, "es_colombia = 1"))
+
+    def promedios_icfes(self, filtros=None, programa=None):
+        condiciones, parametros = ["graduado = 0"], []
+        if programa is not None:
+            condiciones.append("programa = ?")
+            parametros.append(programa)
+        donde, parametros_filtros = self._filtro(filtros, *condiciones)
+        columnas = ", ".join(f"avg({s}) AS {s}" for s in graficos.SECCIONES_ICFES)
+        tabla = self.sql(f"SELECT desertor, {columnas} FROM estudiantes {donde} GROUP BY 1",
+                         parametros + parametros_filtros).set_index('desertor')
+        return graficos.tabla_icfes({
+            desertor: [tabla.at[desertor, s] if desertor in tabla.index else np.nan for s in graficos.SECCIONES_ICFES]
+            for desertor in (0, 1)
+        })
+
+    def desercion_colegio(self, filtros=None):
+        return self._tasa("tipo_colegio", "tipo_colegio", filtros)
+
+    def desercion_calendario(self, filtros=None):
+        return self._tasa("calendario_colegio", "calendario", filtros, "calendario_colegio IN ('A', 'B')")
+
+    # ------------------------------------------------------------------
+    # Sección 5 (materias cursadas)
+    # ------------------------------------------------------------------
+    def _materias(self, filtros):
+        """FROM de las materias, solo de los estudiantes que cumplen los filtros si hay alguno"""
+        condiciones, parametros = self._condiciones_filtros(filtros, prefijo="e.")
+        if not condiciones:
+            return "materias m", []
+        return "materias m JOIN estudiantes e ON m.estudiante = e.fila AND " + " AND ".join(condiciones), parametros
+
+    def tasa_por_curso(self, filtros=None, min_inscritos=30):
+        origen, parametros = self._materias(filtros)
+        tabla = self.sql(f"""
+            SELECT c.codigo, c.materia, c.categoria, p.inscritos, p.perdidas
+            FROM cursos c JOIN (
+                SELECT m.curso, count(*) AS inscritos, sum(m.perdida::INTEGER)::BIGINT AS perdidas
+                FROM {origen} GROUP BY 1
+            ) p USING (curso)
+            WHERE p.inscritos >= ? ORDER BY c.curso
+        """, parametros + [int(min_inscritos)])
+        tabla['tasa_perdida'] = tabla['perdidas'] / tabla['inscritos']
+        return tabla.sort_values('tasa_perdida', ascending=False).reset_index(drop=True)
+
+    def tasa_por_categoria(self, filtros=None):
+        origen, parametros = self._materias(filtros)
+        tabla = self.sql(f"""
+            SELECT c.nombre AS categoria, coalesce(p.inscritos, 0)::BIGINT AS inscritos,
+                   coalesce(p.perdidas, 0)::BIGINT AS perdidas
+            FROM categorias c LEFT JOIN (
+                SELECT m.categoria, count(*) AS inscritos, sum(m.perdida::INTEGER) AS perdidas
+                FROM {origen} GROUP BY 1
+            ) p USING (categoria)
+            ORDER BY c.categoria
+        """, parametros)
+        tabla['tasa_perdida'] = np.divide(tabla['perdidas'], tabla['inscritos'], out=np.zeros(len(tabla)),
+                                          where=tabla['inscritos'] > 0)
+        return tabla.sort_values('tasa_perdida', ascending=False).reset_index(drop=True)
+
+    def tasa_por_periodo(self, filtros=None):
+        origen, parametros = self._materias(filtros)
+        tabla = self.sql(f"""
+            SELECT m.periodo, count(*) AS inscritos, sum(m.perdida::INTEGER)::BIGINT AS perdidas
+            FROM {origen} GROUP BY 1 ORDER BY 1
+        """, parametros)
+        tabla['tasa_perdida'] = tabla['perdidas'] / tabla['inscritos']
+        tabla['periodo'] = [formato_periodo(p) for p in tabla['periodo']]
+        return tabla
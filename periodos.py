@@ -0,0 +1,170 @@
+"""
+Agregados por periodo académico (series de tiempo y filtro de periodo).
+
+Los estudiantes se particionan por su último periodo
+(`periodo_info.ultimo_periodo`). Cada partición guarda sus agregados
+parciales:
+- estudiantes, desertores y graduados de la partición;
+- los mismos conteos repartidos por cohorte (primer periodo con materias);
+- matriculados por periodo (estudiantes de la partición con materias en él).
+
+Los totales por periodo y por cohorte son la suma de las particiones. Un
+estudiante que sigue activo está en la partición del periodo más reciente, así
+que cuando cambian los datos solo se recalcula esa partición y las que
+cambiaron de contenido (la firma es un hash de sus cohortes,
+desertores, graduados y matrículas: marcar como desertor a un estudiante de
+un periodo cerrado la recalcula); las demás se reutilizan. Las posiciones de
+fila de cada partición sirven para filtrar `df` por periodo.
+
+El objeto se comparte entre sesiones: cada actualización arma el estado
+nuevo aparte y lo publica con una sola asignación, así que un lector ve el
+estado anterior completo o el nuevo completo.
+"""
+import hashlib
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from materias import formato_periodo
+
+SIN_PERIODO = 0
+
+
+def _por_periodo(periodos, *pesos):
+    """{periodo: (conteo, suma de cada peso)} de un grupo de estudiantes"""
+    unicos, codigos = np.unique(periodos, return_inverse=True)
+    columnas = [np.bincount(codigos, minlength=len(unicos))]
+    columnas += [np.bincount(codigos, weights=p, minlength=len(unicos)).astype(np.int64) for p in pesos]
+    return {int(u): tuple(int(c[i]) for c in columnas) for i, u in enumerate(unicos) if u != SIN_PERIODO}
+
+
+def _firma(*arreglos):
+    h = hashlib.sha256()
+    for arreglo in arreglos:
+        h.update(np.ascontiguousarray(arreglo, dtype=np.int64).tobytes())
+        h.update(b'|')
+    return h.hexdigest()[:16]
+
+
+class _Estado:
+    def __init__(self, version, posiciones, particiones, recalculados):
+        self.version = version
+        self.posiciones = posiciones
+        self.particiones = particiones
+        self.recalculados = recalculados
+
+
+class ParticionesPeriodo:
+    """Agregados parciales por último periodo que se actualizan de forma incremental"""
+
+    def __init__(self):
+        self._estado = _Estado(None, {}, {}, [])
+        self._bloqueo = threading.Lock()
+
+    @property
+    def version(self):
+        return self._estado.version
+
+    @property
+    def posiciones(self):
+        return self._estado.posiciones
+
+    @property
+    def particiones(self):
+        return self._estado.particiones
+
+    @property
+    def recalculados(self):
+        return self._estado.recalculados
+
+    def actualizar(self, version, ultimo_periodo, cohorte, desertor, graduado, matricula_estudiante, matricula_periodo):
+        """
+        Actualiza las particiones para una versión de los datos.
+
+        ultimo_periodo, cohorte, desertor y graduado van por estudiante (posición de fila);
+        matricula_estudiante/matricula_periodo son los pares (estudiante, periodo) distintos.
+        Devuelve los periodos (particiones) recalculados.
+        """
+        with self._bloqueo:
+            anterior_estado = self._estado
+            if version == anterior_estado.version:
+                return anterior_estado.recalculados
+
+            ultimo_periodo = np.asarray(ultimo_periodo, dtype=np.int64)
+            cohorte = np.asarray(cohorte, dtype=np.int64)
+            desertor = np.asarray(desertor, dtype=np.int64)
+            graduado = np.asarray(graduado, dtype=np.int64)
+            matricula_estudiante = np.asarray(matricula_estudiante, dtype=np.int64)
+            matricula_periodo = np.asarray(matricula_periodo, dtype=np.int64)
+            particion_matricula = ultimo_periodo[matricula_estudiante]
+
+            # Posiciones de fila por último periodo: un solo ordenamiento estable
+            orden = np.argsort(ultimo_periodo, kind='stable')
+            periodos, inicios = np.unique(ultimo_periodo[orden], return_index=True)
+            posiciones_periodo = dict(zip(periodos.tolist(), np.split(orden, inicios[1:])))
+
+            # Matrículas agrupadas por partición, también con un ordenamiento estable
+            orden_matricula = np.argsort(particion_matricula, kind='stable')
+            periodos_matricula, inicios_matricula = np.unique(particion_matricula[orden_matricula], return_index=True)
+            matriculas_particion = dict(zip(periodos_matricula.tolist(), np.split(orden_matricula, inicios_matricula[1:])))
+            sin_matriculas = np.empty(0, dtype=np.int64)
+            mas_reciente = max(posiciones_periodo) if posiciones_periodo else None
+
+            recalculados = []
+            particiones = {}
+            for periodo, posiciones in posiciones_periodo.items():
+                en_particion = matriculas_particion.get(periodo, sin_matriculas)
+                firma = _firma(cohorte[posiciones], desertor[posiciones], graduado[posiciones],
+                               matricula_estudiante[en_particion], matricula_periodo[en_particion])
+                anterior = anterior_estado.particiones.get(periodo)
+                if anterior is not None and anterior['firma'] == firma and periodo != mas_reciente:
+                    particiones[periodo] = anterior
+                    continue
+                particiones[periodo] = {
+                    'firma': firma,
+                    'estudiantes': len(posiciones),
+                    'desertores': int(desertor[posiciones].sum()),
+                    'graduados': int(graduado[posiciones].sum()),
+                    'cohortes': _por_periodo(cohorte[posiciones], desertor[posiciones], graduado[posiciones]),
+                    'matriculas': _por_periodo(matricula_periodo[en_particion]),
+                }
+                recalculados.append(periodo)
+
+            # Una sola asignación: las sesiones que leen en paralelo no ven un estado a medias
+            self._estado = _Estado(version, posiciones_periodo, particiones, recalculados)
+            return recalculados
+
+    def periodos(self):
+        """Periodos con estudiantes cuyo último periodo es ese, del más antiguo al más reciente"""
+        return sorted(p for p in self.posiciones if p != SIN_PERIODO)
+
+    def filas(self, periodo):
+        """Posiciones de fila de los estudiantes cuyo último periodo es `periodo`"""
+        return self.posiciones.get(periodo, np.empty(0, dtype=np.int64))
+
+    def tabla(self):
+        """Serie por periodo: matrícula, deserción por último periodo y por cohorte"""
+        filas = {}
+
+        def fila(periodo):
+            return filas.setdefault(periodo, Counter())
+
+        for periodo, particion in self.particiones.items():
+            if periodo != SIN_PERIODO:
+                fila(periodo).update(estudiantes=particion['estudiantes'], desertores=particion['desertores'],
+                                     graduados=particion['graduados'])
+            for cohorte, (n, desertores, graduados) in particion['cohortes'].items():
+                fila(cohorte).update(cohorte_estudiantes=n, cohorte_desertores=desertores, cohorte_graduados=graduados)
+            for matricula, (n,) in particion['matriculas'].items():
+                fila(matricula).update(matriculados=n)
+
+        columnas = ['matriculados', 'estudiantes', 'desertores', 'graduados',
+                    'cohorte_estudiantes', 'cohorte_desertores', 'cohorte_graduados']
+        tabla = pd.DataFrame([[filas[p][c] for c in columnas] for p in sorted(filas)], columns=columnas)
+        tabla.insert(0, 'periodo', sorted(filas))
+        tabla.insert(1, 'etiqueta', tabla['periodo'].map(formato_periodo))
+        tabla['tasa_desercion'] = tabla['desertores'] / tabla['estudiantes'].where(tabla['estudiantes'] > 0)
+        tabla['tasa_desercion_cohorte'] = tabla['cohorte_desertores'] / tabla['cohorte_estudiantes'].where(tabla['cohorte_estudiantes'] > 0)
+        return tabla
@@ -0,0 +1,243 @@
+"""
+Plano de datos compartido entre procesos del servidor.
+
+Con varios procesos de Streamlit detrás de un balanceador, cada uno leía la
+colección completa (`load_data`) y guardaba su propia copia de los
+documentos y de las tablas derivadas. Con DASHBOARD_DATOS=plano un solo
+proceso cargador (`python plano_compartido.py`) lee MongoDB y publica las
+tablas como archivos Arrow IPC sin comprimir en memoria compartida
+(DIRECTORIO_PLANO, por defecto /dev/shm/dashboard-desercion); cada proceso
+del dashboard los abre con `pa.memory_map`, así que todos leen las mismas
+páginas físicas:
+
+- estudiantes.arrow: la tabla plana de estudiantes (`df`);
+- registros.arrow: los registros del modelo (preprocesamiento.tabla_registros),
+  lo que las secciones 3 y 4 sacaban de los documentos;
+- materias.arrow: los arreglos de AlmacenMaterias, con los nombres de
+  cursos y categorías en los metadatos.
+
+Los textos y los flotantes (los faltantes se guardan como NaN, no como
+nulos) se leen sin copia; las categorías y los enteros anulables copian sus
+códigos (1-4 bytes por fila y columna).
+
+Publicación: cada versión se escribe en `v<contador>.tmp/`, se renombra y al
+final se reemplaza VERSION (JSON con el contador, la versión de los datos y
+el número de filas) con os.replace. La versión de los datos es un hash de
+las tres tablas (`version_conjunta`), así que un cambio solo en las pérdidas
+por departamento o en las materias también publica una versión nueva. Los lectores leen VERSION en cada rerun
+y abren la versión nueva cuando cambia el contador. Se conservan las últimas
+VERSIONES_CONSERVADAS; un proceso que todavía tiene mapeada una versión
+borrada la sigue leyendo (el sistema libera las páginas con el último mapa).
+Un candado (flock) en el directorio asegura un solo cargador.
+Con --snapshot el cargador también regenera la copia estática de las
+secciones 1 y 2 (snapshot_estatico.py) cuando cambian los datos.
+
+Uso:
+    python plano_compartido.py --intervalo 60
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+
+from materias import AlmacenMaterias
+from preprocesamiento import registro_modelo, tabla_registros
+from tabla_estudiantes import construir_df, version_conjunta
+
+DIRECTORIO_PLANO = os.environ.get(
+    "DASHBOARD_PLANO_DIR",
+    "/dev/shm/dashboard-desercion" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "dashboard-desercion")
+)
+ARCHIVO_VERSION = "VERSION"
+ARCHIVO_CANDADO = ".cargador.lock"
+VERSIONES_CONSERVADAS = 2
+COLUMNAS_MATERIAS = ('estudiante', 'curso', 'categoria', 'periodo', 'nota', 'retirada', 'perdida')
+
+# Mismos nombres que el dashboard
+DATABASE_NAME = "Estudiantes"
+COLLECTION_NAME = "Estudiantes_Materias"
+
+
+def tablas_desde_documentos(documentos):
+    """Tabla de estudiantes, registros del modelo y almacén de materias (fila i = documento i)"""
+    return (construir_df(documentos), tabla_registros([registro_modelo(doc) for doc in documentos]),
+            AlmacenMaterias.desde_documentos(documentos))
+
+
+def _tabla_arrow(df):
+    """DataFrame -> Table con los metadatos de pandas; los flotantes conservan NaN para leerse sin copia"""
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    for i, columna in enumerate(df.columns):
+        if df[columna].dtype.kind == 'f':
+            tabla = tabla.set_column(i, columna, pa.array(df[columna].to_numpy()))
+    return tabla
+
+
+def _tabla_materias(almacen):
+    dimensiones = {
+        'codigos': list(almacen.codigos),
+        'nombres': list(almacen.nombres),
+        'categorias': list(almacen.categorias),
+        'categoria_curso': almacen.categoria_curso.tolist(),
+        'n_estudiantes': int(almacen.n_estudiantes),
+    }
+    # Arrow guarda los booleanos como bits: `perdida` va como bytes para leerse sin copia
+    arreglos = {c: getattr(almacen, c) for c in COLUMNAS_MATERIAS}
+    arreglos['perdida'] = arreglos['perdida'].view(np.uint8)
+    return pa.table({c: pa.array(a) for c, a in arreglos.items()},
+                    metadata={'dimensiones': json.dumps(dimensiones, ensure_ascii=False, default=str)})
+
+
+def _escribir(ruta, tabla):
+    # Un solo lote por archivo: cada columna se lee como un arreglo contiguo
+    with pa.OSFile(ruta, 'wb') as archivo, pa.ipc.new_file(archivo, tabla.schema) as escritor:
+        escritor.write_table(tabla.combine_chunks())
+
+
+def _leer(ruta):
+    with pa.memory_map(ruta, 'r') as mapa:
+        return pa.ipc.open_file(mapa).read_all()
+
+
+def _escribir_json_atomico(ruta, contenido):
+    ruta_tmp = f"{ruta}.tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, indent=4, ensure_ascii=False)
+    os.replace(ruta_tmp, ruta)
+
+
+def _limpiar_versiones(directorio, conservar):
+    """Borra las versiones más antiguas y deja las `conservar` más recientes"""
+    versiones = sorted(v for v in os.listdir(directorio) if v.startswith('v') and not v.endswith('.tmp'))
+    for version in versiones[:-conservar]:
+        shutil.rmtree(os.path.join(directorio, version), ignore_errors=True)
+
+
+def version_publicada(directorio=DIRECTORIO_PLANO):
+    """Contenido de VERSION, o None si todavía no se ha publicado nada"""
+    try:
+        with open(os.path.join(directorio, ARCHIVO_VERSION), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def publicar(df, registros, almacen, directorio=DIRECTORIO_PLANO, version_datos=None):
+    """Escribe las tablas como una versión nueva y la anuncia en VERSION; devuelve la publicación"""
+    os.makedirs(directorio, exist_ok=True)
+    anterior = version_publicada(directorio)
+    contador = anterior['contador'] + 1 if anterior else 1
+    nombre = f"v{contador:06d}"
+    temporal = os.path.join(directorio, f"{nombre}.tmp")
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    _escribir(os.path.join(temporal, 'estudiantes.arrow'), _tabla_arrow(df))
+    _escribir(os.path.join(temporal, 'registros.arrow'), _tabla_arrow(registros))
+    _escribir(os.path.join(temporal, 'materias.arrow'), _tabla_materias(almacen))
+    os.replace(temporal, os.path.join(directorio, nombre))
+
+    publicacion = {
+        'contador': contador,
+        'directorio': nombre,
+        'version_datos': version_datos or version_conjunta(df, registros, almacen),
+        'filas': len(df),
+        'publicado': datetime.now().isoformat(timespec='seconds'),
+    }
+    _escribir_json_atomico(os.path.join(directorio, ARCHIVO_VERSION), publicacion)
+    _limpiar_versiones(directorio, VERSIONES_CONSERVADAS)
+    return publicacion
+
+
+def abrir(publicacion, directorio=DIRECTORIO_PLANO):
+    """(df, registros, almacen) de una versión publicada; sus columnas apuntan a la memoria compartida"""
+    ruta = os.path.join(directorio, publicacion['directorio'])
+    df = _leer(os.path.join(ruta, 'estudiantes.arrow')).to_pandas(split_blocks=True)
+    registros = _leer(os.path.join(ruta, 'registros.arrow')).to_pandas(split_blocks=True)
+
+    materias = _leer(os.path.join(ruta, 'materias.arrow'))
+    dimensiones = json.loads(materias.schema.metadata[b'dimensiones'])
+    arreglos = {c: materias.column(c).to_numpy() for c in COLUMNAS_MATERIAS}
+    almacen = AlmacenMaterias(
+        arreglos['estudiante'], arreglos['curso'], arreglos['categoria'], arreglos['periodo'], arreglos['nota'],
+        arreglos['retirada'], dimensiones['codigos'], dimensiones['nombres'], dimensiones['categorias'],
+        np.array(dimensiones['categoria_curso'], dtype=np.int16), dimensiones['n_estudiantes'],
+        perdida=arreglos['perdida'].view(bool)
+    )
+    return df, registros, almacen
+
+
+def _connection_string():
+    """El mismo secreto que usa el dashboard: variable de entorno o .streamlit/secrets.toml"""
+    if os.environ.get("CONNECTION_STRING"):
+        return os.environ["CONNECTION_STRING"]
+    import tomllib
+    with open(os.path.join(".streamlit", "secrets.toml"), 'rb') as f:
+        return tomllib.load(f)["CONNECTION_STRING"]
+
+
+def cargar_documentos(connection_string):
+    from pymongo import MongoClient
+    cliente = MongoClient(connection_string)
+    try:
+        return list(cliente[DATABASE_NAME][COLLECTION_NAME].find({}))
+    finally:
+        cliente.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cargador del plano de datos compartido")
+    parser.add_argument('--directorio', default=DIRECTORIO_PLANO)
+    parser.add_argument('--intervalo', type=float, default=60, help="Segundos entre lecturas de MongoDB (ttl de load_data)")
+    parser.add_argument('--una-vez', action='store_true', help="Publica una vez y termina")
+    parser.add_argument('--snapshot', default=None,
+                        help="Directorio de la copia estática de las secciones 1 y 2 (snapshot_estatico), regenerada con cada versión")
+    parser.add_argument('--geojson', default=None, help="GeoJSON de departamentos para el mapa de la copia estática")
+    args = parser.parse_args()
+
+    import fcntl
+    os.makedirs(args.directorio, exist_ok=True)
+    with open(os.path.join(args.directorio, ARCHIVO_CANDADO), 'w') as candado:
+        try:
+            fcntl.flock(candado, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"Ya hay un cargador publicando en {args.directorio}")
+            sys.exit(1)
+
+        connection_string = _connection_string()
+        geojson = version_snapshot = None
+        if args.snapshot:
+            import snapshot_estatico
+            geojson = snapshot_estatico.cargar_geojson(args.geojson)
+        while True:
+            inicio = time.perf_counter()
+            documentos = cargar_documentos(connection_string)
+            df, registros, almacen = tablas_desde_documentos(documentos)
+            del documentos
+            # Cubre las tres tablas: un cambio solo en pérdidas o en materias también se publica
+            version_datos = version_conjunta(df, registros, almacen)
+            publicada = version_publicada(args.directorio)
+            if publicada is not None and publicada['version_datos'] == version_datos:
+                print(f"Sin cambios (versión {publicada['contador']}, datos {version_datos})")
+            else:
+                publicacion = publicar(df, registros, almacen, args.directorio, version_datos)
+                print(f"Versión {publicacion['contador']} publicada: {publicacion['filas']} estudiantes, "
+                      f"datos {version_datos}, {time.perf_counter() - inicio:.1f} s")
+            # La copia estática se regenera al arrancar y con cada versión nueva de los datos
+            if args.snapshot and version_snapshot != version_datos:
+                for error in snapshot_estatico.construir_snapshot(df, geojson, args.snapshot, version_datos):
+                    print(f"Copia estática: gráfico omitido ({error})")
+                version_snapshot = version_datos
+            if args.una_vez:
+                break
+            time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Preprocesamiento del modelo de deserción, serializable junto al modelo.
+
+Reúne en un solo lugar lo que el notebook hace con LabelEncoder +
+StandardScaler y lo que el dashboard repetía en cada predicción (leer 5000
+documentos de MongoDB y volver a ajustar encoders y scaler). Un
+`Preprocesador` guarda el orden de columnas, el vocabulario de cada variable
+categórica y la media/escala de cada columna, y se persiste como JSON en el
+registro de modelos.
+
+Las pérdidas por departamento (`perdidas_por_depto`) son decenas de columnas
+casi todas en cero. Cuando los registros traen el diccionario sin expandir,
+`transformar` las codifica como un bloque CSR con el orden de columnas del
+preprocesador y solo las vuelve densas al armar cada lote de la matriz del
+modelo (`lotes`), sin pasar por json_normalize.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# Mismas variables categóricas que el notebook (beca se codifica allí como columna object)
+COLUMNAS_CATEGORICAS = ['genero', 'discapacidad', 'programa', 'programa_secundario',
+                        'tipo_estudiante', 'tipo_admision', 'estado_academico',
+                        'ciudad_residencia', 'depto_residencia', 'pais',
+                        'tipo_colegio', 'calendario_colegio', 'beca', 'ultimo_periodo']
+
+PREFIJO_PERDIDAS = 'perdidas_'
+
+PERIODO_ACTUAL = 202510
+
+# Filas por lote al volver densa la matriz del modelo
+TAMANO_LOTE_DENSO = 16384
+
+
+def registro_modelo(doc):
+    """Aplana un documento de Estudiantes_Materias con las variables que usa el modelo"""
+    prog_sec = doc['academico'].get('programa_secundario')
+    return {
+        'edad': doc['datos_personales'].get('edad'),
+        'genero': doc['datos_personales'].get('genero', ''),
+        'estrato': doc['datos_personales'].get('estrato'),
+        'discapacidad': doc['datos_personales'].get('discapacidad', ''),
+        'programa': doc['academico'].get('programa', ''),
+        'programa_secundario': prog_sec if prog_sec not in [None, ''] else 'Ninguno',
+        'tiene_programa_secundario': 1 if prog_sec not in [None, 'Ninguno', ''] else 0,
+        'semestre_actual': doc['academico'].get('semestre_actual'),
+        'tipo_estudiante': doc['academico'].get('tipo_estudiante', ''),
+        'tipo_admision': doc['academico'].get('tipo_admision', ''),
+        'estado_academico': doc['academico'].get('estado_academico', ''),
+        'ciudad_residencia': doc['location'].get('ciudad', ''),
+        'depto_residencia': doc['location'].get('departamento', ''),
+        'pais': doc['location'].get('pais', ''),
+        'es_barranquilla': doc['location'].get('es_barranquilla', 0),
+        'es_colombia': doc['location'].get('es_colombia', 0),
+        'tipo_colegio': doc['colegio'].get('tipo_colegio'),
+        'calendario_colegio': doc['colegio'].get('calendario_colegio'),
+        'puntaje_total': doc['ICFES'].get('puntaje_total'),
+        'matematicas': doc['ICFES'].get('matematicas'),
+        'lectura_critica': doc['ICFES'].get('lectura_critica'),
+        'sociales': doc['ICFES'].get('sociales'),
+        'ciencias': doc['ICFES'].get('ciencias'),
+        'ingles': doc['ICFES'].get('ingles'),
+        'promedio': doc['metricas_rendimiento'].get('promedio_acumulado'),
+        'materias_cursadas': doc['metricas_rendimiento'].get('materias_cursadas_total', 0),
+        'materias_perdidas': doc['metricas_rendimiento'].get('materias_perdidas_total', 0),
+        'materias_repetidas': doc['metricas_rendimiento'].get('materias_repetidas', 0),
+        'perdidas_por_depto': doc['metricas_rendimiento'].get('materias_perdidas_por_departamento', {}),
+        'beca': doc['estado'].get('becado', ''),
+        'ultimo_periodo': doc.get('periodo_info', {}).get('ultimo_periodo', PERIODO_ACTUAL)
+    }
+
+
+def registro_prediccion(entrada):
+    """Registro del modelo a partir de los campos del formulario de predicción"""
+    es_barranquilla = entrada.get('es_barranquilla') in ("Sí", 1, True)
+    icfes = [entrada['icfes_mat'], entrada['icfes_lec'], entrada['icfes_soc'],
+             entrada['icfes_cie'], entrada['icfes_ing']]
+    return {
+        'edad': entrada['edad'],
+        'genero': entrada['genero'],
+        'estrato': entrada['estrato'],
+        'discapacidad': entrada['discapacidad'],
+        'programa': entrada['programa'],
+        'programa_secundario': 'Ninguno',
+        'tiene_programa_secundario': 0,
+        'semestre_actual': entrada['semestre'],
+        'tipo_estudiante': 'Pregrado',
+        'tipo_admision': 'Regular',
+        'estado_academico': 'Activo',
+        'ciudad_residencia': 'Barranquilla' if es_barranquilla else 'Otra',
+        'depto_residencia': 'Atlántico' if es_barranquilla else 'Otro',
+        'pais': 'Colombia',
+        'es_barranquilla': 1 if es_barranquilla else 0,
+        'es_colombia': 1,
+        'tipo_colegio': entrada['tipo_colegio'],
+        'calendario_colegio': 'A',
+        'puntaje_total': sum(icfes),
+        'matematicas': entrada['icfes_mat'],
+        'lectura_critica': entrada['icfes_lec'],
+        'sociales': entrada['icfes_soc'],
+        'ciencias': entrada['icfes_cie'],
+        'ingles': entrada['icfes_ing'],
+        'promedio': entrada['promedio'],
+        'materias_cursadas': entrada['materias_cursadas'],
+        'materias_perdidas': entrada['materias_perdidas'],
+        'materias_repetidas': entrada['materias_repetidas'],
+        'perdidas_por_depto': entrada.get('perdidas_por_depto', {}),
+        'beca': entrada['becado'],
+        'ultimo_periodo': entrada.get('ultimo_periodo', PERIODO_ACTUAL)
+    }
+
+
+def expandir_perdidas(df_registros):
+    """Expande perdidas_por_depto en columnas perdidas_<categoría> como json_normalize del notebook"""
+    if 'perdidas_por_depto' not in df_registros.columns:
+        return df_registros
+    perdidas = pd.json_normalize(df_registros['perdidas_por_depto'].tolist()).add_prefix(PREFIJO_PERDIDAS)
+    perdidas.index = df_registros.index
+    return pd.concat([df_registros.drop('perdidas_por_depto', axis=1), perdidas], axis=1)
+
+
+def perdidas_dispersas(perdidas, columnas):
+    """CSR (n x len(columnas)) con las pérdidas de cada registro en el orden de `columnas` (perdidas_<categoría>).
+    Categorías fuera de `columnas` se ignoran y los valores no numéricos cuentan como 0, igual que al expandir"""
+    from scipy import sparse
+
+    posiciones = {col[len(PREFIJO_PERDIDAS):]: j for j, col in enumerate(columnas)}
+    por_depto = [d if isinstance(d, dict) else {} for d in perdidas]
+    longitudes = np.fromiter(map(len, por_depto), dtype=np.int64, count=len(por_depto))
+    indices = np.fromiter((posiciones.get(c, -1) for d in por_depto for c in d), dtype=np.int32,
+                          count=int(longitudes.sum()))
+    try:
+        datos = np.fromiter((v for d in por_depto for v in d.values()), dtype=np.float64, count=len(indices))
+    except (TypeError, ValueError):
+        valores = pd.Series([v for d in por_depto for v in d.values()], dtype=object)
+        datos = pd.to_numeric(valores, errors='coerce').to_numpy(dtype=np.float64)
+    indptr = np.concatenate([[0], np.cumsum(longitudes)])
+    conocidas = indices >= 0
+    if not conocidas.all():
+        # Los pares vienen ordenados por fila: indptr cuenta solo las categorías conocidas
+        indptr = np.concatenate([[0], np.cumsum(conocidas)])[indptr]
+        indices, datos = indices[conocidas], datos[conocidas]
+    matriz = sparse.csr_matrix((np.nan_to_num(datos, copy=False), indices, indptr),
+                               shape=(len(por_depto), len(columnas)))
+    matriz.eliminate_zeros()
+    return matriz
+
+
+def tabla_registros(registros):
+    """Registros con las pérdidas expandidas y cada columna como la lee `_codificar`: categóricas como texto
+    (category) y el resto float64. Transformar la tabla o sus filas da la misma matriz que los registros"""
+    df = expandir_perdidas(pd.DataFrame(registros))
+    for col in df.columns:
+        if col in COLUMNAS_CATEGORICAS:
+            df[col] = df[col].astype(str).astype('category')
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    return df
+
+
+def primeros_registros(tabla, n):
+    """Primeras n filas de la tabla, sin las columnas de pérdidas que no aparecen en ellas (como expandir solo esos registros)"""
+    muestra = tabla.iloc[:n]
+    vacias = [col for col in muestra.columns if col.startswith(PREFIJO_PERDIDAS) and muestra[col].isna().all()]
+    return muestra.drop(columns=vacias)
+
+
+def registro_desde_tabla(tabla, posicion):
+    """Registro (dict) de la fila `posicion`, con las pérdidas otra vez en perdidas_por_depto"""
+    fila = tabla.iloc[posicion]
+    registro = {col: valor for col, valor in fila.items() if not col.startswith(PREFIJO_PERDIDAS)}
+    registro['perdidas_por_depto'] = {col[len(PREFIJO_PERDIDAS):]: valor for col, valor in fila.items()
+                                      if col.startswith(PREFIJO_PERDIDAS) and pd.notna(valor)}
+    return registro
+
+
+class Preprocesador:
+    """Codificación categórica + estandarización con columnas y vocabularios fijos"""
+
+    def __init__(self, columnas, vocabularios, media, escala):
+        self.columnas = list(columnas)
+        self.vocabularios = {col: np.asarray(vocab, dtype=object) for col, vocab in vocabularios.items()}
+        self.media = np.asarray(media, dtype=np.float64)
+        self.escala = np.asarray(escala, dtype=np.float64)
+        # Vocabulario del bloque de pérdidas: las columnas perdidas_ guardadas, en su orden
+        self.posiciones_perdidas = np.array([j for j, col in enumerate(self.columnas) if col.startswith(PREFIJO_PERDIDAS)],
+                                            dtype=np.intp)
+
+    @classmethod
+    def ajustar(cls, df_registros):
+        """Ajusta vocabularios y media/escala sobre registros de entrenamiento (como LabelEncoder + StandardScaler)"""
+        df = expandir_perdidas(df_registros)
+        columnas = list(df.columns)
+        vocabularios = {col: np.unique(df[col].astype(str).values)
+                        for col in COLUMNAS_CATEGORICAS if col in df.columns}
+        preprocesador = cls(columnas, vocabularios, np.zeros(len(columnas)), np.ones(len(columnas)))
+
+        matriz = preprocesador._codificar(df)
+        media = np.nanmean(matriz, axis=0)
+        escala = np.nanstd(matriz, axis=0)
+        # Igual que StandardScaler: columnas constantes no se escalan
+        escala[~(escala > 0)] = 1.0
+        preprocesador.media = np.nan_to_num(media)
+        preprocesador.escala = escala
+        return preprocesador
+
+    @classmethod
+    def desde_sklearn(cls, columnas, encoders, scaler):
+        """Construye el preprocesador con los LabelEncoder y el StandardScaler ya ajustados en el notebook"""
+        vocabularios = {col: [str(v) for v in le.classes_] for col, le in encoders.items() if col in columnas}
+        return cls(columnas, vocabularios, scaler.mean_, scaler.scale_)
+
+    def _codificar(self, df):
+        matriz = np.empty((len(df), len(self.columnas)), dtype=np.float64)
+        for j, col in enumerate(self.columnas):
+            if col not in df.columns:
+                # Categoría de pérdidas que el estudiante no tiene
+                matriz[:, j] = 0.0
+            elif col in self.vocabularios:
+                # Valores no vistos toman la posición donde LabelEncoder los habría insertado
+                matriz[:, j] = np.searchsorted(self.vocabularios[col], df[col].astype(str).values)
+            else:
+                valores = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                if col.startswith(PREFIJO_PERDIDAS):
+                    valores = np.nan_to_num(valores)
+                matriz[:, j] = valores
+        return matriz
+
+    def codificar_perdidas(self, df_registros):
+        """Bloque CSR de pérdidas de los registros sin expandir (columna perdidas_por_depto)"""
+        columnas = [self.columnas[j] for j in self.posiciones_perdidas]
+        return perdidas_dispersas(df_registros['perdidas_por_depto'], columnas)
+
+    def lotes(self, df_registros, tamano_lote=TAMANO_LOTE_DENSO):
+        """(inicio, matriz escalada float32) de cada lote de filas; las pérdidas sin expandir se leen del bloque CSR"""
+        perdidas = None
+        if 'perdidas_por_depto' in df_registros.columns:
+            perdidas = self.codificar_perdidas(df_registros)
+            df_registros = df_registros.drop(columns='perdidas_por_depto')
+        for inicio in range(0, len(df_registros), tamano_lote):
+            fin = min(inicio + tamano_lote, len(df_registros))
+            matriz = self._codificar(df_registros.iloc[inicio:fin])
+            if perdidas is not None:
+                matriz[:, self.posiciones_perdidas] = perdidas[inicio:fin].toarray()
+            matriz -= self.media
+            matriz /= self.escala
+            yield inicio, np.nan_to_num(matriz, nan=0.0, copy=False).astype(np.float32)
+
+    def transformar(self, df_registros, tamano_lote=TAMANO_LOTE_DENSO):
+        """Matriz escalada (float32) lista para el modelo; faltantes quedan en la media de la columna"""
+        X = np.empty((len(df_registros), len(self.columnas)), dtype=np.float32)
+        for inicio, lote in self.lotes(df_registros, tamano_lote):
+            X[inicio:inicio + len(lote)] = lote
+        return X
+
+    def a_dict(self):
+        return {
+            'columnas': self.columnas,
+            'vocabularios': {col: [str(v) for v in vocab] for col, vocab in self.vocabularios.items()},
+            'media': self.media.tolist(),
+            'escala': self.escala.tolist()
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(datos['columnas'], datos['vocabularios'], datos['media'], datos['escala'])
+
+    def guardar(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return cls.desde_dict(json.load(f))
+
+    def huella(self):
+        """Hash del contenido, para invalidar cachés cuando cambia el preprocesamiento"""
+        contenido = json.dumps(self.a_dict(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,208 @@
+"""
+Puntuación por lotes de toda la población en varios procesos.
+
+`riesgo.puntuar_poblacion` corre el modelo en un solo proceso. Aquí la
+matriz ya codificada (`Preprocesador.transformar`) se publica una vez en
+memoria compartida, se parte en tramos contiguos de `tamano_tramo` filas y
+cada tramo lo puntúa un worker de un pool de procesos que cargó el modelo una
+sola vez (initializer). Cada resultado se escribe en la posición de su
+tramo, así que los puntajes salen en el orden de las filas. Como en
+`busqueda.py`, cada worker fija sus hilos de CPU para no competir con los
+demás.
+
+El modelo se indica con una especificación que cada worker sabe cargar:
+- ('keras', ruta): archivo .keras, `predict`;
+- ('sklearn', ruta): pickle del notebook, `predict_proba[:, 1]`;
+- ('registro', versión): modelo de una versión de `registro_modelos`.
+
+Uso:
+    python puntuacion_lotes.py --documentos estudiantes_documentos.json --modelo registro:v0001 --workers 8
+"""
+import argparse
+import json
+import multiprocessing as mp
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+import cache_muestreo
+from busqueda import fijar_hilos, repartir_cpus
+
+TAMANO_TRAMO = 50_000
+TAMANO_LOTE = 4096
+
+# Estado por proceso: el modelo se carga una sola vez por worker
+_ESTADO = {}
+
+
+def cargar_modelo(especificacion):
+    tipo, valor = especificacion
+    if tipo == 'keras':
+        from tensorflow import keras
+        return keras.models.load_model(valor)
+    if tipo == 'sklearn':
+        with open(valor, 'rb') as f:
+            return pickle.load(f)
+    if tipo == 'registro':
+        import registro_modelos
+        return registro_modelos.cargar_version(valor)[0]
+    raise ValueError(f"Tipo de modelo desconocido: {tipo}")
+
+
+def predecir(modelo, X, tamano_lote=TAMANO_LOTE):
+    """Probabilidad de deserción (float32) de cada fila de X"""
+    if hasattr(modelo, 'predict_proba'):
+        return modelo.predict_proba(X)[:, 1].astype(np.float32)
+    return np.asarray(modelo.predict(X, batch_size=tamano_lote, verbose=0), dtype=np.float32).reshape(-1)
+
+
+def _inicializar_worker(especificacion, cola_ranuras, hilos_por_worker, tamano_lote, barrera):
+    fijar_hilos(cola_ranuras.get(), hilos_por_worker)
+    if especificacion[0] != 'sklearn':
+        # TensorFlow se importa después de fijar las variables de entorno
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(hilos_por_worker)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    _ESTADO['modelo'] = cargar_modelo(especificacion)
+    _ESTADO['tamano_lote'] = tamano_lote
+    _ESTADO['barrera'] = barrera
+
+
+def _esperar_workers():
+    # Cada worker queda bloqueado hasta que todos tomaron una tarea: ninguno toma dos
+    _ESTADO['barrera'].wait()
+
+
+def _matriz(descriptor):
+    """Vista sobre la matriz publicada; la de una llamada anterior se suelta al llegar una nueva"""
+    actual = _ESTADO.get('matriz')
+    if actual is not None and actual[0] == descriptor['nombre']:
+        return actual[2]
+    if actual is not None:
+        # La vista anterior se suelta antes de cerrar su bloque (close falla con vistas vivas)
+        del _ESTADO['matriz']
+        bloque_anterior = actual[1]
+        del actual
+        bloque_anterior.close()
+    bloque = cache_muestreo.adjuntar_bloque(descriptor['nombre'])
+    X = np.ndarray(tuple(descriptor['shape']), dtype=np.dtype(descriptor['dtype']), buffer=bloque.buf)
+    _ESTADO['matriz'] = (descriptor['nombre'], bloque, X)
+    return X
+
+
+def _puntuar_tramo(descriptor, inicio, fin):
+    X = _matriz(descriptor)
+    return predecir(_ESTADO['modelo'], X[inicio:fin], _ESTADO['tamano_lote'])
+
+
+def tramos(n, tamano_tramo):
+    """Pares (inicio, fin) contiguos que cubren n filas"""
+    return [(inicio, min(inicio + tamano_tramo, n)) for inicio in range(0, n, tamano_tramo)]
+
+
+class PuntuadorLotes:
+    """Pool de workers con el modelo cargado; `puntuar` se puede llamar varias veces"""
+
+    def __init__(self, especificacion, n_workers=None, hilos_por_worker=None, tamano_lote=TAMANO_LOTE):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.n_workers, self.hilos_por_worker = repartir_cpus(n_workers)
+        self.hilos_por_worker = hilos_por_worker or self.hilos_por_worker
+        contexto = mp.get_context('spawn')
+        cola_ranuras = contexto.Queue()
+        for ranura in range(self.n_workers):
+            cola_ranuras.put(ranura)
+        barrera = contexto.Barrier(self.n_workers)
+        self.pool = ProcessPoolExecutor(max_workers=self.n_workers, mp_context=contexto,
+                                        initializer=_inicializar_worker,
+                                        initargs=(especificacion, cola_ranuras, self.hilos_por_worker, tamano_lote,
+                                                  barrera))
+
+    def calentar(self):
+        """Arranca todos los workers y carga el modelo en cada uno antes de la primera matriz"""
+        futuros = [self.pool.submit(_esperar_workers) for _ in range(self.n_workers)]
+        for futuro in futuros:
+            futuro.result()
+
+    def puntuar(self, X, tamano_tramo=TAMANO_TRAMO):
+        """Probabilidad de deserción de cada fila de X, en el orden de las filas"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        bloques = []
+        descriptor = cache_muestreo.publicar_arreglo(X, bloques)
+        try:
+            puntajes = np.empty(len(X), dtype=np.float32)
+            partes = tramos(len(X), tamano_tramo)
+            futuros = [self.pool.submit(_puntuar_tramo, descriptor, inicio, fin) for inicio, fin in partes]
+            for (inicio, fin), futuro in zip(partes, futuros):
+                puntajes[inicio:fin] = futuro.result()
+            return puntajes
+        finally:
+            cache_muestreo.liberar(bloques)
+
+    def cerrar(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def puntuar_registros(especificacion, preprocesador, registros, n_workers=None, tamano_tramo=TAMANO_TRAMO):
+    """Como riesgo.puntuar_poblacion, con la matriz codificada repartida entre procesos"""
+    X = preprocesador.transformar(pd.DataFrame(registros))
+    with PuntuadorLotes(especificacion, n_workers) as puntuador:
+        return puntuador.puntuar(X, tamano_tramo)
+
+
+def _especificacion(texto):
+    """'registro:v0001', 'keras:ruta.keras' o 'sklearn:ruta.pkl'"""
+    tipo, _, valor = texto.partition(':')
+    return tipo, valor
+
+
+def main():
+    from preprocesamiento import Preprocesador, registro_modelo
+    import registro_modelos
+
+    parser = argparse.ArgumentParser(description="Puntuación de la población en varios procesos")
+    parser.add_argument('--documentos', required=True, help="JSON de documentos de estudiantes")
+    parser.add_argument('--modelo', default=None, help="registro:<versión>, keras:<ruta> o sklearn:<ruta> (por defecto la versión activa)")
+    parser.add_argument('--preprocesamiento', default=None, help="JSON de Preprocesador (por defecto el de la versión del registro)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--tamano-tramo', type=int, default=TAMANO_TRAMO)
+    parser.add_argument('--salida', default="puntajes.csv")
+    args = parser.parse_args()
+
+    if args.modelo is None:
+        entrada = registro_modelos.entrada_activa()
+        if entrada is None:
+            parser.error("El registro no tiene versión activa: indique --modelo")
+        args.modelo = f"registro:{entrada['version']}"
+    especificacion = _especificacion(args.modelo)
+    if args.preprocesamiento:
+        preprocesador = Preprocesador.cargar(args.preprocesamiento)
+    elif especificacion[0] == 'registro':
+        preprocesador = registro_modelos.cargar_version(especificacion[1])[1]
+    else:
+        parser.error("Indique --preprocesamiento para un modelo fuera del registro")
+
+    with open(args.documentos, 'r', encoding='utf-8') as f:
+        documentos = json.load(f)
+    X = preprocesador.transformar(pd.DataFrame([registro_modelo(doc) for doc in documentos]))
+
+    with PuntuadorLotes(especificacion, args.workers) as puntuador:
+        puntuador.calentar()
+        inicio = time.perf_counter()
+        puntajes = puntuador.puntuar(X, args.tamano_tramo)
+        segundos = time.perf_counter() - inicio
+    pd.DataFrame({'_id': [str(doc['_id']) for doc in documentos], 'riesgo': puntajes}).to_csv(args.salida, index=False)
+    print(f"{len(puntajes)} estudiantes puntuados en {segundos:.1f} s con {puntuador.n_workers} workers "
+          f"({puntuador.hilos_por_worker} hilos c/u) -> {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
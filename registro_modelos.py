@@ -0,0 +1,215 @@
+"""
+Registro local de modelos versionados.
+
+Cada versión es un directorio inmutable con el modelo, su preprocesamiento y
+sus metadatos:
+
+    modelos/
+        manifest.json
+        v0001/modelo.keras
+        v0001/preprocesamiento.json
+        v0001/info.json
+
+`manifest.json` indica la versión activa y guarda las métricas de cada
+versión. Las versiones se escriben en un directorio temporal y se renombran
+al terminar, y el manifest se reemplaza con os.replace, así que un lector
+(el dashboard) nunca ve una versión a medias: cambiar el modelo en producción
+es publicar o activar una versión, sin reiniciar el servidor. Publicar y
+activar toman un candado exclusivo (flock) durante todo el
+leer-modificar-escribir del manifest, así que dos publicaciones simultáneas
+no se pisan la versión ni la entrada.
+
+Uso:
+    python registro_modelos.py publicar --modelo mejor_modelo_desercion.keras \\
+        --info mejor_modelo_info.json --preprocesamiento preprocesamiento.json
+    python registro_modelos.py activar v0001
+    python registro_modelos.py listar --directorio modelos
+"""
+import argparse
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime
+
+from preprocesamiento import Preprocesador
+
+DIRECTORIO_REGISTRO = "modelos"
+ARCHIVO_MANIFEST = "manifest.json"
+ARCHIVO_MODELO = "modelo.keras"
+ARCHIVO_PREPROCESAMIENTO = "preprocesamiento.json"
+ARCHIVO_INFO = "info.json"
+# El manifest se reemplaza con os.replace (cambia de inodo): el candado va en un archivo aparte
+ARCHIVO_CANDADO = ".manifest.lock"
+
+
+def _ruta_manifest(directorio):
+    return os.path.join(directorio, ARCHIVO_MANIFEST)
+
+
+def _escribir_json_atomico(ruta, contenido):
+    ruta_tmp = f"{ruta}.tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_tmp, ruta)
+
+
+@contextmanager
+def _bloqueo_manifest(directorio):
+    """Candado exclusivo del manifest; espera si otro proceso lo tiene"""
+    import fcntl
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, ARCHIVO_CANDADO), 'w') as candado:
+        fcntl.flock(candado, fcntl.LOCK_EX)
+        yield
+
+
+def leer_manifest(directorio=DIRECTORIO_REGISTRO):
+    """Manifest del registro; vacío si todavía no se ha publicado ninguna versión"""
+    ruta = _ruta_manifest(directorio)
+    if not os.path.exists(ruta):
+        return {'activa': None, 'versiones': []}
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def metricas_info(info):
+    """Métricas de un info.json en cualquiera de los dos formatos que escribe el notebook"""
+    if info is None:
+        return {}
+    fuente = info.get('metricas', info)
+    return {clave: fuente[clave] for clave in ('recall', 'precision', 'f1', 'auc', 'score_custom')
+            if fuente.get(clave) is not None}
+
+
+def umbral_info(info):
+    """Umbral de decisión con el que se seleccionó el modelo"""
+    if info is None:
+        return None
+    return info.get('hiperparametros', info).get('threshold')
+
+
+def _siguiente_version(manifest):
+    numeros = [int(v['version'][1:]) for v in manifest['versiones']]
+    return f"v{max(numeros, default=0) + 1:04d}"
+
+
+def publicar(ruta_modelo, info, preprocesador, directorio=DIRECTORIO_REGISTRO, activar=True):
+    """Copia modelo + preprocesamiento + info a una nueva versión y la registra en el manifest"""
+    with _bloqueo_manifest(directorio):
+        manifest = leer_manifest(directorio)
+        version = _siguiente_version(manifest)
+
+        # Se arma en un directorio temporal y se renombra completo
+        destino = os.path.join(directorio, version)
+        temporal = os.path.join(directorio, f".{version}.tmp")
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+        shutil.copy2(ruta_modelo, os.path.join(temporal, ARCHIVO_MODELO))
+        preprocesador.guardar(os.path.join(temporal, ARCHIVO_PREPROCESAMIENTO))
+        with open(os.path.join(temporal, ARCHIVO_INFO), 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=4, ensure_ascii=False)
+        os.rename(temporal, destino)
+
+        manifest['versiones'].append({
+            'version': version,
+            'modelo_id': info.get('modelo_id') if info else None,
+            'creado': datetime.now().isoformat(timespec='seconds'),
+            'metricas': metricas_info(info),
+            'threshold': umbral_info(info),
+            'n_features': len(preprocesador.columnas),
+            'preprocesamiento': preprocesador.huella()
+        })
+        if activar or manifest['activa'] is None:
+            manifest['activa'] = version
+        _escribir_json_atomico(_ruta_manifest(directorio), manifest)
+    return version
+
+
+def activar(version, directorio=DIRECTORIO_REGISTRO):
+    """Cambia la versión activa (también sirve para volver a una versión anterior)"""
+    with _bloqueo_manifest(directorio):
+        manifest = leer_manifest(directorio)
+        if version not in [v['version'] for v in manifest['versiones']]:
+            raise ValueError(f"La versión {version} no existe en el registro")
+        manifest['activa'] = version
+        _escribir_json_atomico(_ruta_manifest(directorio), manifest)
+
+
+def entrada_activa(directorio=DIRECTORIO_REGISTRO):
+    """Entrada del manifest de la versión activa, o None si el registro está vacío"""
+    manifest = leer_manifest(directorio)
+    for entrada in manifest['versiones']:
+        if entrada['version'] == manifest['activa']:
+            return entrada
+    return None
+
+
+def cargar_version(version, directorio=DIRECTORIO_REGISTRO):
+    """Devuelve (modelo, preprocesador, info) de una versión"""
+    from tensorflow import keras
+
+    ruta = os.path.join(directorio, version)
+    modelo = keras.models.load_model(os.path.join(ruta, ARCHIVO_MODELO))
+    preprocesador = Preprocesador.cargar(os.path.join(ruta, ARCHIVO_PREPROCESAMIENTO))
+    with open(os.path.join(ruta, ARCHIVO_INFO), 'r', encoding='utf-8') as f:
+        info = json.load(f)
+    return modelo, preprocesador, info
+
+
+def _preprocesador_desde_documentos(ruta_documentos):
+    """Ajusta el preprocesamiento con los documentos exportados por DB MONGO.ipynb"""
+    import pandas as pd
+    from preprocesamiento import registro_modelo
+
+    with open(ruta_documentos, 'r', encoding='utf-8') as f:
+        documentos = json.load(f)
+    documentos = [d for d in documentos if not d['estado'].get('graduado')]
+    return Preprocesador.ajustar(pd.DataFrame([registro_modelo(d) for d in documentos]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de modelos de deserción")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_publicar = sub.add_parser('publicar', help="Publica una nueva versión")
+    p_publicar.add_argument('--modelo', default="mejor_modelo_desercion.keras")
+    p_publicar.add_argument('--info', default="mejor_modelo_info.json")
+    origen = p_publicar.add_mutually_exclusive_group(required=True)
+    origen.add_argument('--preprocesamiento', help="JSON guardado con Preprocesador.guardar()")
+    origen.add_argument('--documentos', help="JSON de documentos de estudiantes para ajustar el preprocesamiento")
+    p_publicar.add_argument('--no-activar', action='store_true')
+
+    p_activar = sub.add_parser('activar', help="Cambia la versión activa")
+    p_activar.add_argument('version')
+
+    p_listar = sub.add_parser('listar', help="Muestra las versiones registradas")
+
+    for p in (p_publicar, p_activar, p_listar):
+        p.add_argument('--directorio', default=DIRECTORIO_REGISTRO)
+    args = parser.parse_args()
+
+    if args.comando == 'publicar':
+        with open(args.info, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if args.preprocesamiento:
+            preprocesador = Preprocesador.cargar(args.preprocesamiento)
+        else:
+            preprocesador = _preprocesador_desde_documentos(args.documentos)
+        version = publicar(args.modelo, info, preprocesador, args.directorio, activar=not args.no_activar)
+        print(f"Versión publicada: {version}")
+    elif args.comando == 'activar':
+        activar(args.version, args.directorio)
+        print(f"Versión activa: {args.version}")
+    else:
+        manifest = leer_manifest(args.directorio)
+        for entrada in manifest['versiones']:
+            marca = '*' if entrada['version'] == manifest['activa'] else ' '
+            metricas = ", ".join(f"{k}={v:.3f}" for k, v in entrada['metricas'].items())
+            print(f"{marca} {entrada['version']}  {entrada['modelo_id']}  {entrada['creado']}  {metricas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Ranking de estudiantes en riesgo de deserción.
+
+El puntaje de riesgo de toda la población se calcula una vez por versión del
+modelo y queda como columna de `df`. Cada cambio de filtro (programa,
+departamento) solo hace una comparación sobre códigos enteros y una
+selección parcial con argpartition para los k primeros; la tabla se pagina en
+el servidor, así que al navegador solo llegan las filas de la página.
+"""
+import numpy as np
+import pandas as pd
+
+TODOS = "Todos"
+
+
+def puntuar_poblacion(modelo, preprocesador, registros_modelo, tamano_lote=4096):
+    """Probabilidad de deserción de cada registro, en lotes; la matriz densa solo existe lote a lote"""
+    puntajes = np.empty(len(registros_modelo), dtype=np.float32)
+    for inicio, X in preprocesador.lotes(pd.DataFrame(registros_modelo)):
+        puntajes[inicio:inicio + len(X)] = np.asarray(modelo.predict(X, batch_size=tamano_lote, verbose=0)).reshape(-1)
+    return puntajes
+
+
+def top_k(puntajes, candidatos, k):
+    """Índices de los k candidatos con mayor puntaje, de mayor a menor"""
+    if k < len(candidatos):
+        parte = np.argpartition(-puntajes[candidatos], k - 1)[:k]
+        candidatos = candidatos[parte]
+    orden = np.argsort(-puntajes[candidatos], kind='stable')
+    return candidatos[orden]
+
+
+class IndiceRiesgo:
+    """Puntajes + códigos enteros de las columnas filtrables, listos para top-k"""
+
+    def __init__(self, puntajes, filtros, elegibles=None):
+        self.puntajes = np.asarray(puntajes, dtype=np.float32)
+        self.codigos = {}
+        self.categorias = {}
+        self.posiciones = {}
+        for nombre, valores in filtros.items():
+            codigos, categorias = pd.factorize(pd.Series(valores).astype(object).fillna(''), sort=True)
+            self.codigos[nombre] = codigos.astype(np.int32)
+            self.categorias[nombre] = list(categorias)
+            self.posiciones[nombre] = {c: i for i, c in enumerate(categorias)}
+        self.elegibles = np.ones(len(self.puntajes), dtype=bool) if elegibles is None else np.asarray(elegibles, dtype=bool)
+
+    def opciones(self, nombre):
+        return [TODOS] + [c for c in self.categorias[nombre] if c != '']
+
+    def seleccionar(self, k, **filtros):
+        """Top-k (de mayor a menor riesgo) entre los elegibles que cumplen los filtros"""
+        mascara = self.elegibles.copy()
+        for nombre, valor in filtros.items():
+            if valor is None or valor == TODOS:
+                continue
+            posicion = self.posiciones[nombre].get(valor)
+            if posicion is None:
+                return np.empty(0, dtype=np.int64)
+            mascara &= self.codigos[nombre] == posicion
+        return top_k(self.puntajes, np.flatnonzero(mascara), k)
+
+
+def pagina(indices, numero, tamano):
+    """Rebanada de índices de la página `numero` (desde 1)"""
+    inicio = (numero - 1) * tamano
+    return indices[inicio:inicio + tamano]
+
+
+def total_paginas(n, tamano):
+    return max(1, -(-n // tamano))
@@ -0,0 +1,43 @@
+"""
+Análisis what-if para un estudiante.
+
+Arma una grilla de copias del estudiante variando dos variables (por ejemplo
+promedio contra materias perdidas) y la evalúa con una sola llamada al modelo,
+en lugar de un rerun del formulario por cada combinación.
+"""
+import numpy as np
+import pandas as pd
+
+# Variables que se pueden perturbar: etiqueta y valores de la grilla
+VARIABLES_WHAT_IF = {
+    'promedio': ("Promedio", np.round(np.arange(2.0, 5.01, 0.1), 1)),
+    'materias_perdidas': ("Materias Perdidas", np.arange(0, 11)),
+    'materias_repetidas': ("Materias Repetidas", np.arange(0, 11)),
+    'semestre_actual': ("Semestre Actual", np.arange(1, 11)),
+    'estrato': ("Estrato", np.arange(1, 7)),
+    'matematicas': ("ICFES Matemáticas", np.arange(0, 101, 5)),
+}
+
+
+def construir_grilla(registro, variable_x, variable_y):
+    """DataFrame con una fila por combinación (y, x), en orden de filas de la matriz resultante"""
+    valores_x = VARIABLES_WHAT_IF[variable_x][1]
+    valores_y = VARIABLES_WHAT_IF[variable_y][1]
+    n = len(valores_x) * len(valores_y)
+
+    grilla = pd.DataFrame([registro]).loc[np.zeros(n, dtype=int)].reset_index(drop=True)
+    grilla[variable_x] = np.tile(valores_x, len(valores_y))
+    grilla[variable_y] = np.repeat(valores_y, len(valores_x))
+    if 'matematicas' in (variable_x, variable_y):
+        # El puntaje total se recalcula para que siga siendo la suma de las pruebas
+        grilla['puntaje_total'] = grilla[['matematicas', 'lectura_critica', 'sociales', 'ciencias', 'ingles']].sum(axis=1)
+    return grilla
+
+
+def evaluar_grilla(modelo, preprocesador, registro, variable_x, variable_y):
+    """Matriz (len(valores_y), len(valores_x)) de probabilidades de deserción, en un solo predict"""
+    grilla = construir_grilla(registro, variable_x, variable_y)
+    X = preprocesador.transformar(grilla)
+    probabilidades = np.asarray(modelo.predict(X, batch_size=len(X), verbose=0)).reshape(-1)
+    n_x = len(VARIABLES_WHAT_IF[variable_x][1])
+    return probabilidades.reshape(-1, n_x)
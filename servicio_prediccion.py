@@ -0,0 +1,382 @@
+"""
+Servicio HTTP de predicción de deserción.
+
+Expone el modelo activo del registro (`registro_modelos.py`) con el mismo
+preprocesamiento que usa el dashboard, para que otros sistemas (consejería)
+lo consulten sin pasar por Streamlit. Con el registro vacío usa, como el
+dashboard, los archivos sueltos del notebook (mejor_modelo_desercion.keras +
+mejor_modelo_info.json) con el preprocesamiento legacy, que se ajusta con los
+primeros 5000 documentos de --documentos (o se lee de --preprocesamiento). Las solicitudes concurrentes se agrupan
+en micro-lotes: el primer estudiante que llega abre un lote, se esperan más
+solicitudes hasta completar `max_lote` filas o agotar el presupuesto de
+latencia, y se hace una sola llamada a `predict` para todo el lote.
+
+Cada solicitud se valida y normaliza antes de entrar a un lote: un
+estudiante mal formado recibe 400 y no afecta a los demás del lote; solo
+los errores del modelo se comparten.
+
+Uso:
+    python servicio_prediccion.py --puerto 8502 --espera-ms 5 --max-lote 256
+    python servicio_prediccion.py --documentos estudiantes_documentos.json   # registro vacío
+
+Endpoints:
+    GET  /salud       versión activa del modelo y estadísticas de lotes
+    POST /predecir    un estudiante (campos del formulario del dashboard)
+                      o {"estudiantes": [...]} para varios
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import registro_modelos
+from preprocesamiento import Preprocesador, primeros_registros, registro_modelo, registro_prediccion, tabla_registros
+
+CAMPOS_NUMERICOS = ['edad', 'estrato', 'semestre', 'promedio',
+                    'materias_cursadas', 'materias_perdidas', 'materias_repetidas',
+                    'icfes_mat', 'icfes_lec', 'icfes_soc', 'icfes_cie', 'icfes_ing']
+CAMPOS_TEXTO = ['genero', 'discapacidad', 'programa', 'becado', 'tipo_colegio']
+CAMPOS_OBLIGATORIOS = CAMPOS_NUMERICOS + CAMPOS_TEXTO + ['es_barranquilla']
+
+# Archivos sueltos del notebook, para cuando el registro está vacío
+MODELO_LOCAL = "mejor_modelo_desercion.keras"
+INFO_LOCAL = "mejor_modelo_info.json"
+
+ESPERA_MS = 5
+MAX_LOTE = 256
+# Cada cuánto se revisa el manifest para cambiar de versión sin reiniciar
+INTERVALO_MANIFEST = 2.0
+
+
+class SolicitudInvalida(ValueError):
+    """Error de los datos de una solicitud (400), no del modelo"""
+
+
+def preprocesador_legacy(ruta_documentos):
+    """Preprocesamiento de los archivos sueltos, ajustado como en el dashboard (primeros 5000 documentos)"""
+    with open(ruta_documentos, 'r', encoding='utf-8') as f:
+        documentos = json.load(f)
+    return Preprocesador.ajustar(primeros_registros(tabla_registros([registro_modelo(d) for d in documentos]), 5000))
+
+
+class ModeloActivo:
+    """Versión activa del registro; se recarga cuando cambia el manifest.
+    Con el registro vacío usa los archivos sueltos y se recarga cuando cambia el .keras"""
+
+    def __init__(self, directorio=registro_modelos.DIRECTORIO_REGISTRO, documentos=None, preprocesamiento=None,
+                 ruta_modelo=MODELO_LOCAL, ruta_info=INFO_LOCAL):
+        self.directorio = directorio
+        self.documentos = documentos
+        self.preprocesamiento = preprocesamiento
+        self.ruta_modelo = ruta_modelo
+        self.ruta_info = ruta_info
+        self._cargado = None
+        self._clave = None
+        self._preprocesador_local = None
+        self._revisado = 0.0
+        self._lock = threading.Lock()
+
+    def _cargar_local(self):
+        if not os.path.exists(self.ruta_modelo):
+            raise RuntimeError(f"No hay versiones publicadas en {self.directorio}/ ni {self.ruta_modelo}")
+        if self._preprocesador_local is None:
+            if self.preprocesamiento:
+                self._preprocesador_local = Preprocesador.cargar(self.preprocesamiento)
+            elif self.documentos:
+                self._preprocesador_local = preprocesador_legacy(self.documentos)
+            else:
+                raise RuntimeError(f"El registro {self.directorio}/ está vacío: indique --documentos o "
+                                   f"--preprocesamiento para usar {self.ruta_modelo}")
+        from tensorflow import keras
+
+        info = None
+        if os.path.exists(self.ruta_info):
+            with open(self.ruta_info, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        entrada = {'version': "archivos locales", 'modelo_id': info.get('modelo_id') if info else None,
+                   'threshold': registro_modelos.umbral_info(info), 'metricas': registro_modelos.metricas_info(info)}
+        return entrada, keras.models.load_model(self.ruta_modelo), self._preprocesador_local
+
+    def obtener(self):
+        """Devuelve (entrada_manifest, modelo, preprocesador) como una sola tupla"""
+        ahora = time.monotonic()
+        if self._cargado is not None and ahora - self._revisado < INTERVALO_MANIFEST:
+            return self._cargado
+        with self._lock:
+            self._revisado = ahora
+            entrada = registro_modelos.entrada_activa(self.directorio)
+            if entrada is None:
+                clave = ('local', os.path.getmtime(self.ruta_modelo) if os.path.exists(self.ruta_modelo) else None)
+                if self._cargado is None or self._clave != clave:
+                    self._cargado = self._cargar_local()
+                    self._clave = clave
+            elif self._cargado is None or self._clave != entrada['version']:
+                modelo, preprocesador, _ = registro_modelos.cargar_version(entrada['version'], self.directorio)
+                self._cargado = (entrada, modelo, preprocesador)
+                self._clave = entrada['version']
+        return self._cargado
+
+
+class AgrupadorLotes:
+    """Agrupa solicitudes concurrentes en lotes dentro de un presupuesto de latencia"""
+
+    def __init__(self, modelo_activo, espera_ms=ESPERA_MS, max_lote=MAX_LOTE):
+        self.modelo_activo = modelo_activo
+        self.espera = espera_ms / 1000.0
+        self.max_lote = max_lote
+        self._cola = queue.Queue()
+        self.lotes = 0
+        self.filas = 0
+        self._hilo = threading.Thread(target=self._ciclo, name="agrupador-lotes", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, registros):
+        """Encola registros del modelo; el Future se resuelve con (probabilidades, entrada_manifest)"""
+        futuro = Future()
+        self._cola.put((registros, futuro))
+        return futuro
+
+    def _recolectar(self):
+        pendientes = [self._cola.get()]
+        filas = len(pendientes[0][0])
+        limite = time.monotonic() + self.espera
+        while filas < self.max_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self._cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            pendientes.append(item)
+            filas += len(item[0])
+        return pendientes
+
+    @staticmethod
+    def _codificar(preprocesador, pendientes):
+        """Matriz del lote; si falla, cada solicitud se codifica aparte y solo fallan las que no se pueden codificar"""
+        try:
+            return pendientes, preprocesador.transformar(pd.DataFrame([r for regs, _ in pendientes for r in regs]))
+        except Exception:
+            validos, matrices = [], []
+            for regs, futuro in pendientes:
+                try:
+                    matrices.append(preprocesador.transformar(pd.DataFrame(regs)))
+                    validos.append((regs, futuro))
+                except Exception as e:
+                    futuro.set_exception(SolicitudInvalida(f"No se pudo codificar el estudiante: {e}"))
+            return validos, (np.concatenate(matrices) if matrices else None)
+
+    def _ciclo(self):
+        while True:
+            pendientes = self._recolectar()
+            try:
+                entrada, modelo, preprocesador = self.modelo_activo.obtener()
+            except Exception as e:
+                for _, futuro in pendientes:
+                    futuro.set_exception(e)
+                continue
+            pendientes, X = self._codificar(preprocesador, pendientes)
+            if not pendientes:
+                continue
+            try:
+                probabilidades = np.asarray(modelo.predict_on_batch(X)).reshape(-1)
+            except Exception as e:
+                # Error del modelo: lo comparten todas las solicitudes del lote
+                for _, futuro in pendientes:
+                    futuro.set_exception(e)
+                continue
+
+            self.lotes += 1
+            self.filas += len(probabilidades)
+            inicio = 0
+            for regs, futuro in pendientes:
+                futuro.set_result((probabilidades[inicio:inicio + len(regs)], entrada))
+                inicio += len(regs)
+
+
+def _numero(valor, campo):
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise SolicitudInvalida(f"'{campo}' debe ser numérico")
+    try:
+        numero = float(valor)
+    except ValueError:
+        raise SolicitudInvalida(f"'{campo}' debe ser numérico") from None
+    if not np.isfinite(numero):
+        raise SolicitudInvalida(f"'{campo}' debe ser un número finito")
+    return numero
+
+
+def _validar(estudiante):
+    """Valida y normaliza un estudiante antes de encolarlo: tipos que el preprocesamiento acepta sin fallar"""
+    if not isinstance(estudiante, dict):
+        raise SolicitudInvalida("Cada estudiante debe ser un objeto JSON")
+    faltantes = [c for c in CAMPOS_OBLIGATORIOS if c not in estudiante]
+    if faltantes:
+        raise SolicitudInvalida(f"Campos faltantes: {', '.join(faltantes)}")
+
+    estudiante = dict(estudiante)
+    for campo in CAMPOS_NUMERICOS:
+        estudiante[campo] = _numero(estudiante[campo], campo)
+    for campo in CAMPOS_TEXTO:
+        if not isinstance(estudiante[campo], str):
+            raise SolicitudInvalida(f"'{campo}' debe ser texto")
+    perdidas = estudiante.get('perdidas_por_depto', {})
+    if not isinstance(perdidas, dict):
+        raise SolicitudInvalida("'perdidas_por_depto' debe ser un objeto {departamento: materias}")
+    estudiante['perdidas_por_depto'] = {str(depto): _numero(n, f"perdidas_por_depto.{depto}")
+                                        for depto, n in perdidas.items()}
+    if 'ultimo_periodo' in estudiante:
+        periodo = _numero(estudiante['ultimo_periodo'], 'ultimo_periodo')
+        if not periodo.is_integer():
+            raise SolicitudInvalida("'ultimo_periodo' debe ser un periodo como 202510")
+        estudiante['ultimo_periodo'] = int(periodo)
+    return registro_prediccion(estudiante)
+
+
+def _resultado(probabilidad, entrada):
+    umbral = entrada.get('threshold')
+    resultado = {'probabilidad': round(float(probabilidad), 6)}
+    if umbral is not None:
+        resultado['riesgo'] = bool(probabilidad >= umbral)
+    return resultado
+
+
+def crear_manejador(agrupador):
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Encabezados y cuerpo van en escrituras separadas: sin esto Nagle + ACK retardado suman ~40 ms
+        disable_nagle_algorithm = True
+
+        def _responder(self, codigo, contenido):
+            cuerpo = json.dumps(contenido, ensure_ascii=False).encode('utf-8')
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def do_GET(self):
+            if self.path != "/salud":
+                self._responder(404, {'error': "Ruta no encontrada"})
+                return
+            try:
+                entrada, _, _ = agrupador.modelo_activo.obtener()
+            except Exception as e:
+                self._responder(503, {'error': str(e)})
+                return
+            self._responder(200, {
+                'version': entrada['version'],
+                'modelo_id': entrada['modelo_id'],
+                'threshold': entrada.get('threshold'),
+                'lotes': agrupador.lotes,
+                'filas': agrupador.filas
+            })
+
+        def do_POST(self):
+            if self.path != "/predecir":
+                self._responder(404, {'error': "Ruta no encontrada"})
+                return
+            try:
+                longitud = int(self.headers.get('Content-Length', 0))
+                cuerpo = json.loads(self.rfile.read(longitud) or b'{}')
+                masivo = isinstance(cuerpo, dict) and 'estudiantes' in cuerpo
+                estudiantes = cuerpo['estudiantes'] if masivo else [cuerpo]
+                if not isinstance(estudiantes, list) or not estudiantes:
+                    raise ValueError("'estudiantes' debe ser una lista no vacía")
+                registros = [_validar(e) for e in estudiantes]
+            except (ValueError, KeyError, TypeError) as e:
+                self._responder(400, {'error': str(e)})
+                return
+
+            try:
+                probabilidades, entrada = agrupador.enviar(registros).result()
+            except SolicitudInvalida as e:
+                self._responder(400, {'error': str(e)})
+                return
+            except Exception as e:
+                self._responder(503, {'error': f"Error en la predicción: {e}"})
+                return
+
+            resultados = [_resultado(p, entrada) for p in probabilidades]
+            respuesta = {'version': entrada['version'], 'threshold': entrada.get('threshold')}
+            if masivo:
+                respuesta['resultados'] = resultados
+            else:
+                respuesta.update(resultados[0])
+            self._responder(200, respuesta)
+
+        def log_message(self, formato, *args):
+            # Sin un log por solicitud: en carga alta domina el tiempo de respuesta
+            pass
+
+    return Manejador
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    # Cola de conexiones pendientes más larga que la de socketserver (5) para ráfagas de clientes
+    request_queue_size = 128
+
+
+def crear_servidor(host="127.0.0.1", puerto=8502, espera_ms=ESPERA_MS, max_lote=MAX_LOTE,
+                   directorio=registro_modelos.DIRECTORIO_REGISTRO, carga_en_fondo=False,
+                   documentos=None, preprocesamiento=None):
+    """Servidor listo para serve_forever(); carga el modelo antes de aceptar solicitudes,
+    o en un hilo de fondo con `carga_en_fondo` (las primeras solicitudes esperan la carga).
+    `documentos` o `preprocesamiento` solo se usan si el registro está vacío"""
+    modelo_activo = ModeloActivo(directorio, documentos, preprocesamiento)
+    if carga_en_fondo:
+        def cargar():
+            try:
+                modelo_activo.obtener()
+            except Exception as e:
+                # Las solicitudes reintentan la carga y devuelven el error con 503
+                print(f"No se pudo cargar el modelo: {e}")
+        threading.Thread(target=cargar, name="carga-modelo", daemon=True).start()
+    else:
+        modelo_activo.obtener()
+    agrupador = AgrupadorLotes(modelo_activo, espera_ms, max_lote)
+    servidor = _Servidor((host, puerto), crear_manejador(agrupador))
+    servidor.agrupador = agrupador
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de predicción de deserción")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--puerto', type=int, default=8502)
+    parser.add_argument('--espera-ms', type=float, default=ESPERA_MS,
+                        help="Tiempo máximo que una solicitud espera a que se complete su lote")
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE)
+    parser.add_argument('--directorio', default=registro_modelos.DIRECTORIO_REGISTRO)
+    parser.add_argument('--carga-en-fondo', action='store_true',
+                        help="Acepta conexiones de inmediato y carga TensorFlow y el modelo en segundo plano")
+    legacy = parser.add_mutually_exclusive_group()
+    legacy.add_argument('--documentos', help=f"JSON de documentos para ajustar el preprocesamiento de {MODELO_LOCAL} "
+                                             "si el registro está vacío")
+    legacy.add_argument('--preprocesamiento', help=f"JSON de Preprocesador para {MODELO_LOCAL} si el registro está vacío")
+    args = parser.parse_args()
+
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    servidor = crear_servidor(args.host, args.puerto, args.espera_ms, args.max_lote, args.directorio,
+                              args.carga_en_fondo, args.documentos, args.preprocesamiento)
+    print(f"Servicio de predicción en http://{args.host}:{args.puerto} "
+          f"(espera {args.espera_ms} ms, lote máximo {args.max_lote})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
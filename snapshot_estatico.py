@@ -0,0 +1,341 @@
+"""
+Copia estática de las secciones 1 y 2 del dashboard para lectores de solo consulta.
+
+Las secciones 1 (Características Generales) y 2 (Desertores vs No
+Desertores) muestran lo mismo a todos los usuarios entre dos actualizaciones
+de datos, pero cada visitante abría una sesión de Streamlit que volvía a
+ejecutar dashboard.py. `construir_snapshot` arma una página HTML con las
+mismas tarjetas de indicadores y los mismos gráficos (las agregaciones y
+funciones `grafico_*` de graficos.py, incluido el mapa por departamento), con
+la figura de Plotly embebida como JSON. El directorio de salida se puede
+servir con cualquier servidor de archivos estáticos: ver la página no
+ejecuta Python ni consulta MongoDB.
+
+- index.html: las dos secciones; se reemplaza con os.replace, así que un
+  lector nunca ve una página a medias;
+- plotly-<versión>.min.js: la librería de Plotly, sin depender de un CDN.
+
+Los paneles con selector del dashboard quedan fijos: ICFES con todos los
+programas y los cinco análisis multivariables uno tras otro. Sin filtros
+globales: la copia muestra toda la población.
+
+Uso (después de cada actualización de datos):
+    python snapshot_estatico.py --documentos estudiantes_documentos.json --salida snapshot_html
+    python plano_compartido.py --snapshot snapshot_html   # el cargador la regenera con cada versión
+"""
+import argparse
+import html
+import json
+import os
+from datetime import datetime
+
+import graficos
+from tabla_estudiantes import construir_df, version_tabla
+
+DIRECTORIO_SALIDA = "snapshot_html"
+
+ESTILO = """
+body { font-family: "Source Sans Pro", sans-serif; margin: 0 auto; max-width: 1200px; padding: 0 24px 48px; color: #262730; }
+nav { position: sticky; top: 0; background: white; padding: 12px 0; border-bottom: 1px solid #e6e6e6; z-index: 1; }
+nav a { margin-right: 24px; color: #262730; }
+.fila { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 16px; margin: 16px 0; }
+.tarjeta { background-color: #f0f2f6; padding: 20px; border-radius: 10px; text-align: center; }
+.tarjeta h3 { margin: 0; }
+.tarjeta h2 { color: #4a4a4a; margin: 10px 0 0 0; }
+.tarjeta p { color: #666; margin: 5px 0 0 0; }
+.destacada { padding: 30px; border-radius: 15px; }
+.destacada h2 { font-size: 3em; }
+.graficos { display: grid; grid-template-columns: repeat(auto-fit, minmax(480px, 1fr)); gap: 16px; }
+.nota { background: #e8f0fe; padding: 12px 16px; border-radius: 8px; }
+footer { color: #666; margin-top: 32px; font-size: 0.9em; }
+"""
+
+# Dibuja cada figura a partir de su JSON embebido
+SCRIPT_FIGURAS = """
+document.querySelectorAll('script[type="application/json"][data-figura]').forEach(function (datos) {
+    var figura = JSON.parse(datos.textContent);
+    Plotly.newPlot(datos.dataset.figura, figura.data, figura.layout, {responsive: true, displaylogo: false});
+});
+"""
+
+
+# ============================================================================
+# CONTENIDO
+# ============================================================================
+def _tarjeta(titulo, valor, detalle=None, color=None):
+    return (titulo, valor, detalle, color)
+
+
+def indicadores_poblacion(df):
+    """Tarjetas de la sección 1: totales, becados y ubicación, con el formato del dashboard"""
+    total = len(df)
+    institucional = int((df['becado'] == 'Institucional').sum())
+    oficial = int((df['becado'] == 'oficial').sum())
+
+    def porcentaje(cantidad):
+        return f"{cantidad / total * 100:.1f}%"
+
+    ubicacion = {
+        'Barranquilla': int((df['es_barranquilla'] == 1).sum()),
+        'Otras Ciudades': int((df['es_barranquilla'] == 0).sum()),
+        'Colombia': int((df['es_colombia'] == 1).sum()),
+        'Extranjero': int((df['es_colombia'] == 0).sum()),
+    }
+    return [
+        [_tarjeta("Total Estudiantes", f"{total:,}"),
+         _tarjeta("Graduados", f"{int(df['graduado'].sum()):,}"),
+         _tarjeta("Estrato Promedio", f"{df['estrato'].mean():.2f}"),
+         _tarjeta("Edad Promedio", f"{df['edad'].mean():.1f} años")],
+        [_tarjeta("Total Becados", f"{institucional + oficial:,}", porcentaje(institucional + oficial)),
+         _tarjeta("Becados Institucional", f"{institucional:,}", porcentaje(institucional)),
+         _tarjeta("Becados Oficial", f"{oficial:,}", porcentaje(oficial))],
+        [_tarjeta(nombre, f"{cantidad:,}", porcentaje(cantidad)) for nombre, cantidad in ubicacion.items()],
+    ]
+
+
+def indicadores_desercion(df_sin_graduados):
+    """Tarjetas de la sección 2: tasa general y tasa por tipo de beca"""
+    desertores = int(df_sin_graduados['desertor'].sum())
+    general = _tarjeta("Tasa de Deserción", f"{desertores / len(df_sin_graduados) * 100:.2f}%",
+                       f"{desertores:,} de {len(df_sin_graduados):,} estudiantes", color="#d32f2f")
+    becas = []
+    for titulo, valor in [("No Becados", 'No becado'), ("Becados Institucional", 'Institucional'), ("Becados Oficial", 'oficial')]:
+        grupo = df_sin_graduados[df_sin_graduados['becado'] == valor]
+        if len(grupo) > 0:
+            becas.append(_tarjeta(titulo, f"{grupo['desertor'].sum() / len(grupo) * 100:.2f}%", f"{len(grupo):,} estudiantes",
+                                  color="#ff9800"))
+        else:
+            becas.append(_tarjeta(titulo, "N/A", color="#ff9800"))
+    return general, becas
+
+
+def indicadores_segundo_programa(df_sin_graduados):
+    con_segundo = df_sin_graduados[df_sin_graduados['programa_secundario'].notna()]
+    desertores = int(con_segundo['desertor'].sum())
+    tasa = desertores / len(con_segundo) * 100 if len(con_segundo) > 0 else 0
+    return [_tarjeta("Estudiantes con 2° Programa", f"{len(con_segundo):,}",
+                     f"{len(con_segundo) / len(df_sin_graduados) * 100:.2f}%"),
+            _tarjeta("Desertores con 2° Programa", f"{desertores:,}"),
+            _tarjeta("Tasa de Deserción", f"{tasa:.2f}%")]
+
+
+def bloques_seccion1(df, geojson):
+    """Bloques (tipo, contenido) de la sección 1, en el orden del dashboard"""
+    totales, becados, ubicacion = indicadores_poblacion(df)
+    bloques = [
+        ('titulo', "Características Generales de la Población"),
+        ('tarjetas', totales),
+        ('subtitulo', "Becados"),
+        ('tarjetas', becados),
+        ('tarjetas', ubicacion),
+        ('subtitulo', "Distribución por Género y Edad"),
+        ('graficos', [lambda: graficos.grafico_genero(graficos.conteo_genero(df)),
+                      lambda: graficos.grafico_edad(graficos.conteo_edad(df))]),
+        ('graficos', [lambda: graficos.grafico_edad_genero(graficos.conteo_edad_genero(df))]),
+        ('titulo', "Distribución Geográfica"),
+        ('subtitulo', "Estudiantes por Departamento"),
+    ]
+    if geojson is not None:
+        bloques.append(('graficos', [lambda: graficos.grafico_mapa(graficos.estudiantes_por_departamento(df), geojson)]))
+        bloques.append(('nota', "Nota: Atlántico fue excluido del mapa para mejor visualización de otros departamentos."))
+    else:
+        bloques.append(('nota', "Mapa no disponible: no se pudo cargar el GeoJSON de Colombia."))
+
+    bloques.append(('subtitulo', "Estudiantes del Atlántico por Ciudad"))
+    estudiantes_ciudad = graficos.estudiantes_atlantico_por_ciudad(df)
+    if estudiantes_ciudad is None:
+        bloques.append(('nota', "No hay datos de estudiantes en Atlántico"))
+        return bloques
+    barranquilla = estudiantes_ciudad[estudiantes_ciudad['ciudad'] == 'Barranquilla']
+    otras_ciudades = estudiantes_ciudad[estudiantes_ciudad['ciudad'] != 'Barranquilla'].copy()
+    if len(barranquilla) > 0:
+        bloques.append(('destacada', _tarjeta("Barranquilla", f"{int(barranquilla['total_estudiantes'].iloc[0]):,}",
+                                              f"{barranquilla['porcentaje'].iloc[0]:.1f}% del Atlántico", color="#2e7d32")))
+    if len(otras_ciudades) > 0:
+        bloques.append(('subtitulo', "Otras Ciudades del Atlántico"))
+        bloques.append(('graficos', [lambda: graficos.grafico_ciudades(otras_ciudades)]))
+    return bloques
+
+
+def bloques_seccion2(df):
+    """Bloques (tipo, contenido) de la sección 2, en el orden del dashboard"""
+    df_sin_graduados = df[df['graduado'] == 0].copy()
+    df_desertores = df_sin_graduados[df_sin_graduados['desertor'] == 1]
+    df_no_desertores = df_sin_graduados[df_sin_graduados['desertor'] == 0]
+    general, becas = indicadores_desercion(df_sin_graduados)
+    df_multi = graficos.datos_multivariable(df_sin_graduados)
+    return [
+        ('titulo', "Análisis Comparativo: Desertores vs No Desertores"),
+        ('destacada', general),
+        ('subtitulo', "Deserción por Tipo de Beca"),
+        ('tarjetas', becas),
+        ('subtitulo', "Deserción por Género y Edad"),
+        ('graficos', [lambda: graficos.grafico_genero_desercion(graficos.desercion_genero(df_sin_graduados)),
+                      lambda: graficos.grafico_edad_desercion(graficos.desercion_edad(df_sin_graduados))]),
+        ('graficos', [lambda: graficos.grafico_edad_genero_desercion(graficos.desercion_edad_genero(df_sin_graduados))]),
+        ('subtitulo', "Deserción por Programa"),
+        ('graficos', [lambda: graficos.grafico_programas(graficos.desercion_programa(df_sin_graduados))]),
+        ('subtitulo', "Distribución de Desertores por Estrato"),
+        ('graficos', [lambda: graficos.grafico_estratos(graficos.desertores_por_estrato(df_desertores))]),
+        ('subtitulo', "Tasa de Deserción por Departamento"),
+        ('graficos', [lambda: graficos.grafico_departamentos_desercion(graficos.desercion_departamento(df_sin_graduados))]),
+        ('subtitulo', "Distribución de Promedio Académico"),
+        ('graficos', [lambda: graficos.grafico_promedio_box(df_sin_graduados)]),
+        ('tarjetas', [_tarjeta("Promedio No Desertores", f"{df_no_desertores['promedio'].mean():.2f}"),
+                      _tarjeta("Promedio Desertores", f"{df_desertores['promedio'].mean():.2f}")]),
+        ('subtitulo', "Promedio ICFES por Sección (todos los programas)"),
+        ('graficos', [lambda: graficos.grafico_icfes(graficos.promedios_icfes(df_sin_graduados))]),
+        ('subtitulo', "Estudiantes con Segundo Programa"),
+        ('tarjetas', indicadores_segundo_programa(df_sin_graduados)),
+        ('subtitulo', "Deserción por Tipo de Colegio y Calendario"),
+        ('graficos', [lambda: graficos.grafico_colegio(graficos.desercion_colegio(df_sin_graduados)),
+                      lambda: graficos.grafico_calendario(graficos.desercion_calendario(df_sin_graduados))]),
+        ('subtitulo', "Análisis Multivariable"),
+    ] + [bloque for tipo in graficos.TIPOS_MULTIVARIABLE
+         for bloque in [('encabezado', tipo),
+                        ('graficos', [lambda tipo=tipo: graficos.grafico_multivariable(df_multi, tipo)])]]
+
+
+# ============================================================================
+# HTML
+# ============================================================================
+def _html_tarjeta(tarjeta, clase="tarjeta"):
+    titulo, valor, detalle, color = tarjeta
+    parrafo = f"<p>{html.escape(detalle)}</p>" if detalle else ""
+    estilo = f' style="color: {color};"' if color else ""
+    return f'<div class="{clase}"><h3>{html.escape(titulo)}</h3><h2{estilo}>{html.escape(valor)}</h2>{parrafo}</div>'
+
+
+def _html_bloques(bloques, figuras, errores):
+    """HTML de los bloques; agrega el JSON de cada figura a `figuras` y los gráficos que fallan a `errores`"""
+    partes = []
+    for tipo, contenido in bloques:
+        if tipo == 'titulo':
+            partes.append(f"<h1>{html.escape(contenido)}</h1>")
+        elif tipo == 'subtitulo':
+            partes.append(f"<h2>{html.escape(contenido)}</h2>")
+        elif tipo == 'encabezado':
+            partes.append(f"<h3>{html.escape(contenido)}</h3>")
+        elif tipo == 'nota':
+            partes.append(f'<p class="nota">{html.escape(contenido)}</p>')
+        elif tipo == 'tarjetas':
+            partes.append('<div class="fila">' + "".join(_html_tarjeta(t) for t in contenido) + "</div>")
+        elif tipo == 'destacada':
+            partes.append('<div class="fila">' + _html_tarjeta(contenido, "tarjeta destacada") + "</div>")
+        elif tipo == 'graficos':
+            divs = []
+            for construir in contenido:
+                try:
+                    figura = construir()
+                except Exception as e:
+                    # Un gráfico que no se puede construir no impide publicar el resto
+                    errores.append(str(e))
+                    divs.append('<p class="nota">Gráfico no disponible.</p>')
+                    continue
+                identificador = f"figura-{len(figuras)}"
+                # "</" escapado para que el JSON no cierre la etiqueta <script>
+                figuras.append((identificador, figura.to_json().replace("</", "<\\/")))
+                divs.append(f'<div id="{identificador}"></div>')
+            partes.append('<div class="graficos">' + "".join(divs) + "</div>")
+    return "\n".join(partes)
+
+
+def pagina(df, geojson, archivo_plotly, version_datos=None):
+    """(html, errores) de la copia estática de las secciones 1 y 2"""
+    figuras = []
+    errores = []
+    seccion1 = _html_bloques(bloques_seccion1(df, geojson), figuras, errores)
+    seccion2 = _html_bloques(bloques_seccion2(df), figuras, errores)
+    datos = "\n".join(f'<script type="application/json" data-figura="{identificador}">{json_figura}</script>'
+                      for identificador, json_figura in figuras)
+    generado = datetime.now().isoformat(timespec='seconds')
+    contenido = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Dashboard de Deserción Estudiantil</title>
+<style>{ESTILO}</style>
+<script src="{archivo_plotly}"></script>
+</head>
+<body>
+<nav><a href="#seccion-1">1. Características Generales</a><a href="#seccion-2">2. Desertores vs No Desertores</a></nav>
+<section id="seccion-1">
+{seccion1}
+</section>
+<section id="seccion-2">
+{seccion2}
+</section>
+<footer>Datos {html.escape(version_datos or version_tabla(df))} · {len(df):,} estudiantes · generado {generado}</footer>
+{datos}
+<script>{SCRIPT_FIGURAS}</script>
+</body>
+</html>
+"""
+    return contenido, errores
+
+
+def cargar_geojson(ruta=None):
+    """GeoJSON de departamentos desde un archivo o desde URL_GEOJSON_COLOMBIA; None si no se puede leer"""
+    try:
+        if ruta:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        import requests
+        respuesta = requests.get(graficos.URL_GEOJSON_COLOMBIA, timeout=30)
+        respuesta.raise_for_status()
+        return respuesta.json()
+    except Exception as e:
+        print(f"No se pudo cargar el GeoJSON: {e}")
+        return None
+
+
+def _escribir_plotly(directorio):
+    """Copia plotly.js al directorio (una vez por versión de Plotly); devuelve el nombre del archivo"""
+    import plotly
+    from plotly.offline import get_plotlyjs
+
+    nombre = f"plotly-{plotly.__version__}.min.js"
+    ruta = os.path.join(directorio, nombre)
+    if not os.path.exists(ruta):
+        with open(f"{ruta}.tmp", 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+        os.replace(f"{ruta}.tmp", ruta)
+    return nombre
+
+
+def construir_snapshot(df, geojson, directorio=DIRECTORIO_SALIDA, version_datos=None):
+    """Escribe index.html (y plotly.js) en `directorio`; devuelve la lista de gráficos que fallaron"""
+    os.makedirs(directorio, exist_ok=True)
+    contenido, errores = pagina(df, geojson, _escribir_plotly(directorio), version_datos)
+    ruta = os.path.join(directorio, "index.html")
+    with open(f"{ruta}.tmp", 'w', encoding='utf-8') as f:
+        f.write(contenido)
+    os.replace(f"{ruta}.tmp", ruta)
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copia estática (HTML) de las secciones 1 y 2 del dashboard")
+    parser.add_argument('--documentos', default=None, help="JSON de documentos (por defecto se leen de MongoDB)")
+    parser.add_argument('--salida', default=DIRECTORIO_SALIDA)
+    parser.add_argument('--geojson', default=None, help="Archivo GeoJSON de departamentos (por defecto se descarga)")
+    args = parser.parse_args()
+
+    if args.documentos:
+        with open(args.documentos, 'r', encoding='utf-8') as f:
+            documentos = json.load(f)
+    else:
+        from plano_compartido import _connection_string, cargar_documentos
+        documentos = cargar_documentos(_connection_string())
+    df = construir_df(documentos)
+    del documentos
+
+    errores = construir_snapshot(df, cargar_geojson(args.geojson), args.salida)
+    for error in errores:
+        print(f"Gráfico omitido: {error}")
+    print(f"Copia estática de {len(df)} estudiantes en {os.path.join(args.salida, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Tabla plana de estudiantes (`df` del dashboard) con tipos compactos.
+
+Cada sesión de Streamlit guarda `df` en memoria junto a la lista de
+documentos, así que los tipos importan:
+- textos repetidos (programa, ciudad, beca...) como `category`;
+- enteros con faltantes como enteros anulables pequeños (Int8/Int16/Int32)
+  en lugar de float64;
+- puntajes ICFES y promedio como float32 (sobra precisión para 0-500).
+
+La fila i de la tabla corresponde al documento i.
+"""
+import hashlib
+
+import pandas as pd
+
+COLUMNAS_CATEGORICAS = [
+    'genero', 'discapacidad', 'programa', 'programa_secundario', 'tipo_estudiante', 'tipo_admision',
+    'estado_academico', 'ciudad', 'departamento', 'pais', 'tipo_colegio', 'calendario_colegio',
+    'descripcion_bachillerato', 'becado'
+]
+
+TIPOS_ENTEROS = {
+    'edad': 'Int8',
+    'estrato': 'Int8',
+    'semestre_actual': 'Int8',
+    'es_barranquilla': 'Int8',
+    'es_colombia': 'Int8',
+    'materias_cursadas': 'Int16',
+    'materias_perdidas': 'Int16',
+    'materias_repetidas': 'Int16',
+    'graduado': 'Int8',
+    'desertor': 'Int8',
+    'periodo': 'Int32',
+}
+
+COLUMNAS_FLOAT32 = [
+    'puntaje_total', 'icfes_matematicas', 'icfes_lectura', 'icfes_sociales', 'icfes_ciencias', 'icfes_ingles',
+    'promedio'
+]
+
+
+def aplanar(doc):
+    """Registro plano de un documento de Estudiantes_Materias"""
+    return {
+        '_id': doc['_id'],
+        # Datos personales
+        'edad': doc['datos_personales'].get('edad'),
+        'genero': doc['datos_personales'].get('genero', ''),
+        'estrato': doc['datos_personales'].get('estrato'),
+        'discapacidad': doc['datos_personales'].get('discapacidad', ''),
+        # Académico
+        'programa': doc['academico'].get('programa', ''),
+        'programa_secundario': doc['academico'].get('programa_secundario'),
+        'semestre_actual': doc['academico'].get('semestre_actual'),
+        'tipo_estudiante': doc['academico'].get('tipo_estudiante', ''),
+        'tipo_admision': doc['academico'].get('tipo_admision', ''),
+        'estado_academico': doc['academico'].get('estado_academico', ''),
+        # Ubicación
+        'ciudad': doc['location'].get('ciudad', ''),
+        'departamento': doc['location'].get('departamento', ''),
+        'pais': doc['location'].get('pais', ''),
+        'es_barranquilla': doc['location'].get('es_barranquilla', 0),
+        'es_colombia': doc['location'].get('es_colombia', 0),
+        # Colegio
+        'tipo_colegio': doc['colegio'].get('tipo_colegio'),
+        'calendario_colegio': doc['colegio'].get('calendario_colegio'),
+        'descripcion_bachillerato': doc['colegio'].get('descripcion_bachillerato'),
+        # ICFES
+        'puntaje_total': doc['ICFES'].get('puntaje_total'),
+        'icfes_matematicas': doc['ICFES'].get('matematicas'),
+        'icfes_lectura': doc['ICFES'].get('lectura_critica'),
+        'icfes_sociales': doc['ICFES'].get('sociales'),
+        'icfes_ciencias': doc['ICFES'].get('ciencias'),
+        'icfes_ingles': doc['ICFES'].get('ingles'),
+        # Métricas rendimiento
+        'promedio': doc['metricas_rendimiento'].get('promedio_acumulado'),
+        'materias_cursadas': doc['metricas_rendimiento'].get('materias_cursadas_total', 0),
+        'materias_perdidas': doc['metricas_rendimiento'].get('materias_perdidas_total', 0),
+        'materias_repetidas': doc['metricas_rendimiento'].get('materias_repetidas', 0),
+        # Estado
+        'becado': doc['estado'].get('becado', ''),
+        'graduado': doc['estado'].get('graduado', 0),
+        'desertor': doc['estado'].get('desertor', 0),
+        # Periodo
+        'periodo': doc['periodo_info'].get('ultimo_periodo'),
+    }
+
+
+def compactar(df):
+    """Convierte las columnas conocidas a category / enteros anulables pequeños / float32"""
+    tipos = {c: 'category' for c in COLUMNAS_CATEGORICAS if c in df.columns}
+    tipos.update({c: t for c, t in TIPOS_ENTEROS.items() if c in df.columns})
+    tipos.update({c: 'float32' for c in COLUMNAS_FLOAT32 if c in df.columns})
+    # Los enteros llegan como float64 cuando hay None: pd.to_numeric antes del cast anulable
+    for columna, tipo in tipos.items():
+        if tipo.startswith('Int'):
+            df[columna] = pd.to_numeric(df[columna], errors='coerce')
+    return df.astype(tipos)
+
+
+def construir_df(documentos, compacto=True):
+    """DataFrame plano de los documentos (fila i = documento i)"""
+    df = pd.DataFrame([aplanar(doc) for doc in documentos])
+    return compactar(df) if compacto else df
+
+
+def version_tabla(df):
+    """Huella del contenido de df: cambia cuando cambia cualquier valor"""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()[:16]
+
+
+def version_conjunta(df, registros, almacen):
+    """Versión de los datos: cubre df, los registros del modelo (pérdidas por departamento) y las materias"""
+    partes = (version_tabla(df), version_tabla(registros), almacen.huella())
+    return hashlib.sha256("/".join(partes).encode()).hexdigest()[:16]
+
+
+def reporte_memoria(df):
+    """Bytes por columna (incluye el contenido de los textos), de mayor a menor"""
+    bytes_columna = df.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({
+        'columna': bytes_columna.index,
+        'tipo': [str(df[c].dtype) for c in bytes_columna.index],
+        'bytes': bytes_columna.values,
+    })
+    reporte['bytes_por_fila'] = (reporte['bytes'] / max(len(df), 1)).round(2)
+    return reporte.sort_values('bytes', ascending=False).reset_index(drop=True)